@@ -111,22 +111,25 @@ def init_services(app):
 
     # 8. TaskQueue + CronScheduler (Optional)
     try:
-        import asyncio
         from services.scheduling import TaskQueueManager
         from services.scheduling.cron_scheduler import CronScheduler
         from api.routes.queue_routes import init_queue_routes
         from api.routes.scheduler_routes import init_scheduler_routes
+        from services.blog_generator.queue_bridge import set_queue_manager
+        from utils.background_loop import run_async
 
         backend_dir = os.path.dirname(os.path.dirname(__file__))
         db_path = os.path.join(backend_dir, 'data', 'task_queue.db')
         queue_manager = TaskQueueManager(db_path=db_path, max_concurrent=2)
-        asyncio.run(queue_manager.init())
+        # 在进程级后台事件循环中初始化，CronTimer 等循环内对象随循环常驻
+        run_async(queue_manager.init())
 
         init_queue_routes(queue_manager)
         app.queue_manager = queue_manager
+        set_queue_manager(queue_manager)
 
         cron_scheduler = CronScheduler(queue_manager, db_path=db_path)
-        asyncio.run(cron_scheduler.start())
+        run_async(cron_scheduler.start())
         init_scheduler_routes(cron_scheduler)
 
         logger.info("任务排队系统已初始化 (TaskQueueManager + CronScheduler)")
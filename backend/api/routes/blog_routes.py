@@ -5,7 +5,6 @@
 import os
 import uuid
 import logging
-import threading
 from pathlib import Path
 
 from flask import Blueprint, jsonify, request, current_app
@@ -17,6 +16,7 @@ from services import (
 )
 from services.database_service import get_db_service
 from services.documents import get_file_parser, get_knowledge_service
+from services.documents.ingestion import reuse_parsed_document, save_upload, submit_ingestion
 from utils.atomic_write import atomic_write
 
 logger = logging.getLogger(__name__)
@@ -32,10 +32,10 @@ def _record_task_to_queue(task_id: str, topic: str, article_type: str,
         queue_manager = getattr(app, 'queue_manager', None)
         if not queue_manager:
             return
-        import asyncio
         from models.scheduling import (
             BlogTask, BlogGenerationConfig, QueueStatus,
         )
+        from utils.background_loop import run_async
         task = BlogTask(
             id=task_id,
             name=f"博客: {topic[:30]}",
@@ -48,7 +48,7 @@ def _record_task_to_queue(task_id: str, topic: str, article_type: str,
             status=QueueStatus.RUNNING,
         )
         task.started_at = task.created_at
-        asyncio.run(queue_manager.db.save_task(task))
+        run_async(queue_manager.save_task(task))
     except Exception as e:
         logger.debug(f"记录任务到排队系统失败 (非关键): {e}")
 
@@ -111,7 +111,7 @@ def upload_document():
         upload_folder = current_app.config['UPLOAD_FOLDER']
         os.makedirs(upload_folder, exist_ok=True)
         file_path = os.path.join(upload_folder, f"{doc_id}_{filename}")
-        file.save(file_path)
+        content_hash = save_upload(file.stream, file_path)
 
         file_size = os.path.getsize(file_path)
         file_type = ext if ext != 'markdown' else 'md'
@@ -136,55 +136,28 @@ def upload_document():
             file_type=file_type
         )
 
-        app = current_app._get_current_object()
-
-        def parse_async():
-            with app.app_context():
-                try:
-                    db_service.update_document_status(doc_id, 'parsing')
-
-                    file_parser = get_file_parser()
-                    if not file_parser:
-                        db_service.update_document_status(doc_id, 'error', '文件解析服务不可用')
-                        return
-
-                    result = file_parser.parse_file(file_path, filename)
-
-                    if not result.get('success'):
-                        db_service.update_document_status(doc_id, 'error', result.get('error', '解析失败'))
-                        return
-
-                    markdown = result.get('markdown', '')
-                    images = result.get('images', [])
-                    mineru_folder = result.get('mineru_folder')
-
-                    db_service.save_parse_result(doc_id, markdown, mineru_folder)
-
-                    chunk_size = app.config.get('KNOWLEDGE_CHUNK_SIZE', 2000)
-                    chunk_overlap = app.config.get('KNOWLEDGE_CHUNK_OVERLAP', 200)
-                    chunks = file_parser.chunk_markdown(markdown, chunk_size, chunk_overlap)
-                    db_service.save_chunks(doc_id, chunks)
-
-                    llm_service = get_llm_service()
-                    if llm_service:
-                        summary = file_parser.generate_document_summary(markdown, llm_service)
-                        if summary:
-                            db_service.update_document_summary(doc_id, summary)
-
-                    if images and llm_service:
-                        images_with_caption = file_parser.generate_image_captions(images, llm_service)
-                        db_service.save_images(doc_id, images_with_caption)
-                    elif images:
-                        db_service.save_images(doc_id, images)
-
-                    logger.info(f"文档解析完成: {doc_id}, chunks={len(chunks)}, images={len(images)}")
-
-                except Exception as e:
-                    logger.error(f"文档解析异常: {doc_id}, {e}", exc_info=True)
-                    db_service.update_document_status(doc_id, 'error', str(e))
-
-        thread = threading.Thread(target=parse_async, daemon=True)
-        thread.start()
+        # 相同内容的文件已入库过：直接复用解析结果、分块、图片描述和摘要
+        source_id = reuse_parsed_document(db_service, doc_id, content_hash, file_type)
+        if source_id:
+            return jsonify({
+                'success': True,
+                'document_id': doc_id,
+                'filename': filename,
+                'status': 'ready',
+                'reused_from': source_id
+            })
+
+        # 解析、分块、摘要在后台事件循环中以协程执行，不再为每个文档占用一个线程
+        submit_ingestion(
+            doc_id, file_path, filename,
+            db_service=db_service,
+            file_parser=get_file_parser(),
+            llm_service=get_llm_service(),
+            chunk_size=current_app.config.get('KNOWLEDGE_CHUNK_SIZE', 2000),
+            chunk_overlap=current_app.config.get('KNOWLEDGE_CHUNK_OVERLAP', 200),
+            chunk_max_tokens=current_app.config.get('KNOWLEDGE_CHUNK_MAX_TOKENS', 0) or None,
+            content_hash=content_hash,
+        )
 
         return jsonify({
             'success': True,
@@ -140,18 +140,8 @@ def write_section(session_id):
     result = _dispatcher.write_section(session, section_id)
     if "error" in result:
         return jsonify(result), 400
-    # 更新 sections 列表
-    section_data = result.get("section", {})
-    sections = list(session.sections or [])
-    updated = False
-    for i, s in enumerate(sections):
-        if s.get("id") == section_id:
-            sections[i] = section_data
-            updated = True
-            break
-    if not updated:
-        sections.append(section_data)
-    _session_mgr.update(session_id, sections=sections, status="writing")
+    # 只写入这一章节
+    _session_mgr.update_section(session_id, result.get("section", {}), section_id=section_id, status="writing")
     return jsonify(result)
 
 
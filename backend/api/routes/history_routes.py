@@ -9,12 +9,13 @@ import logging
 import zipfile
 
 import requests as http_requests
-from flask import Blueprint, Response, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request, send_file
 from urllib.parse import urlparse
 
 from services.database_service import get_db_service
 from services.media import get_video_service
-from services.publishing import get_oss_service
+from services.publishing import get_docx_exporter, get_oss_service
+from services.publishing.docx_exporter import DOCX_MIMETYPE
 
 logger = logging.getLogger(__name__)
 
@@ -23,15 +24,42 @@ history_bp = Blueprint('history', __name__)
 
 @history_bp.route('/api/history', methods=['GET'])
 def list_history():
-    """获取历史记录列表（支持分页和类型筛选）"""
+    """
+    获取历史记录列表（支持分页和类型筛选）
+
+    传入 cursor（首页传空串）或 book_id 时使用游标分页：响应带 next_cursor，
+    翻页深度不影响查询耗时；否则保持 page/offset 分页。
+    """
     try:
         page = request.args.get('page', 1, type=int)
         page_size = request.args.get('page_size', 12, type=int)
         content_type = request.args.get('type', 'all')
+        cursor = request.args.get('cursor')
+        book_id = request.args.get('book_id')
         offset = (page - 1) * page_size
 
         db_service = get_db_service()
 
+        if cursor is not None or book_id:
+            try:
+                result = db_service.list_history_page(
+                    content_type=content_type if content_type != 'all' else None,
+                    book_id=book_id,
+                    limit=page_size,
+                    cursor=cursor or None,
+                )
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+            return jsonify({
+                'success': True,
+                'records': result['records'],
+                'total': result['total'],
+                'page_size': page_size,
+                'next_cursor': result['next_cursor'],
+                'has_more': result['has_more'],
+                'content_type': content_type
+            })
+
         total = db_service.count_history_by_type(content_type if content_type != 'all' else None)
         records = db_service.list_history_by_type(
             content_type=content_type if content_type != 'all' else None,
@@ -54,6 +82,27 @@ def list_history():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@history_bp.route('/api/history/search', methods=['GET'])
+def search_history():
+    """全文搜索历史记录（标题 / 主题 / 正文），返回按相关度排序的高亮片段"""
+    try:
+        query = request.args.get('q', '').strip()
+        content_type = request.args.get('type', 'all')
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        if not query:
+            return jsonify({'success': False, 'error': '请提供搜索关键词 q'}), 400
+
+        results = get_db_service().search_history(
+            query,
+            content_type=content_type if content_type != 'all' else None,
+            limit=limit
+        )
+        return jsonify({'success': True, 'query': query, 'results': results, 'count': len(results)})
+    except Exception as e:
+        logger.error(f"搜索历史记录失败: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @history_bp.route('/api/history/<history_id>', methods=['GET'])
 def get_history(history_id):
     """获取单条历史记录详情"""
@@ -272,74 +321,25 @@ def export_word():
         title = data.get('title', 'blog')
         safe_title = re.sub(r'[^\w\u4e00-\u9fa5_-]', '_', title)[:50]
 
+        output_folders = [
+            current_app.config.get('OUTPUT_FOLDER'),
+            current_app.config.get('LEGACY_OUTPUT_FOLDER'),
+        ]
         try:
-            from docx import Document
-            from docx.shared import Pt, Inches
-            from docx.enum.text import WD_ALIGN_PARAGRAPH
+            docx_file = get_docx_exporter().export(
+                markdown_content,
+                output_folders=output_folders,
+                upload_folders=[current_app.config.get('UPLOAD_FOLDER')],
+            )
         except ImportError:
             return jsonify({'success': False, 'error': '服务端未安装 python-docx，请运行 pip install python-docx'}), 500
 
-        doc = Document()
-
-        # 设置默认字体
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Microsoft YaHei'
-        font.size = Pt(11)
-
-        lines = markdown_content.split('\n')
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                continue
-
-            # 标题
-            if stripped.startswith('# '):
-                doc.add_heading(stripped[2:], level=1)
-            elif stripped.startswith('## '):
-                doc.add_heading(stripped[3:], level=2)
-            elif stripped.startswith('### '):
-                doc.add_heading(stripped[4:], level=3)
-            elif stripped.startswith('#### '):
-                doc.add_heading(stripped[5:], level=4)
-            elif stripped.startswith('- ') or stripped.startswith('* '):
-                doc.add_paragraph(stripped[2:], style='List Bullet')
-            elif re.match(r'^\d+\.\s', stripped):
-                text = re.sub(r'^\d+\.\s', '', stripped)
-                doc.add_paragraph(text, style='List Number')
-            elif stripped.startswith('> '):
-                p = doc.add_paragraph()
-                p.style = doc.styles['Normal']
-                p.paragraph_format.left_indent = Inches(0.5)
-                # 去除 markdown 加粗/斜体标记
-                clean = re.sub(r'\*\*(.*?)\*\*', r'\1', stripped[2:])
-                clean = re.sub(r'\*(.*?)\*', r'\1', clean)
-                p.add_run(clean)
-            elif stripped.startswith('```'):
-                # 跳过代码块标记行
-                continue
-            elif stripped.startswith('!['):
-                # 跳过图片标记
-                continue
-            else:
-                # 普通段落：去除 markdown 内联标记
-                clean = re.sub(r'\*\*(.*?)\*\*', r'\1', stripped)
-                clean = re.sub(r'\*(.*?)\*', r'\1', clean)
-                clean = re.sub(r'`([^`]+)`', r'\1', clean)
-                clean = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', clean)
-                doc.add_paragraph(clean)
-
-        # 保存到内存
-        buffer = io.BytesIO()
-        doc.save(buffer)
-        buffer.seek(0)
-
-        return Response(
-            buffer.getvalue(),
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            headers={
-                'Content-Disposition': f'attachment; filename="{safe_title}.docx"'
-            }
+        # 以流的形式发送（临时文件/缓存文件发送完毕后自动关闭）
+        return send_file(
+            docx_file,
+            mimetype=DOCX_MIMETYPE,
+            as_attachment=True,
+            download_name=f'{safe_title}.docx',
         )
 
     except Exception as e:
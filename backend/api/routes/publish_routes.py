@@ -2,7 +2,6 @@
 多平台发布路由
 /api/publish/..., /api/history/<id>/to-xhs, /api/publish/sync
 """
-import asyncio
 import json
 import uuid
 import logging
@@ -13,6 +12,7 @@ from services import get_llm_service, get_image_service
 from services.database_service import get_db_service
 from services.media import get_video_service
 from services.publishing import Publisher
+from utils.background_loop import run_async
 
 logger = logging.getLogger(__name__)
 
@@ -59,24 +59,19 @@ def publish_article_stream():
 
             publisher = Publisher()
 
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                yield f"data: {json.dumps({'type': 'progress', 'step': '导航', 'message': '正在打开编辑器页面...'})}\n\n"
+            yield f"data: {json.dumps({'type': 'progress', 'step': '导航', 'message': '正在打开编辑器页面...'})}\n\n"
 
-                result = loop.run_until_complete(publisher.publish(
-                    platform_id=platform,
-                    cookies=cookies,
-                    title=title,
-                    content=content,
-                    tags=data.get('tags'),
-                    category=data.get('category'),
-                    article_type=data.get('article_type', 'original'),
-                    pub_type=data.get('pub_type', 'public'),
-                    headless=data.get('headless', True)
-                ))
-            finally:
-                loop.close()
+            result = run_async(publisher.publish(
+                platform_id=platform,
+                cookies=cookies,
+                title=title,
+                content=content,
+                tags=data.get('tags'),
+                category=data.get('category'),
+                article_type=data.get('article_type', 'original'),
+                pub_type=data.get('pub_type', 'public'),
+                headless=data.get('headless', True)
+            ))
 
             yield f"data: {json.dumps({'type': 'result', **result})}\n\n"
 
@@ -109,22 +104,17 @@ def publish_article():
 
         publisher = Publisher()
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            result = loop.run_until_complete(publisher.publish(
-                platform_id=platform,
-                cookies=cookies,
-                title=title,
-                content=content,
-                tags=data.get('tags'),
-                category=data.get('category'),
-                article_type=data.get('article_type', 'original'),
-                pub_type=data.get('pub_type', 'public'),
-                headless=data.get('headless', False)
-            ))
-        finally:
-            loop.close()
+        result = run_async(publisher.publish(
+            platform_id=platform,
+            cookies=cookies,
+            title=title,
+            content=content,
+            tags=data.get('tags'),
+            category=data.get('category'),
+            article_type=data.get('article_type', 'original'),
+            pub_type=data.get('pub_type', 'public'),
+            headless=data.get('headless', False)
+        ))
 
         if result.get('success'):
             return jsonify(result)
@@ -166,22 +156,17 @@ def publish_blog_to_platform(blog_id: str):
 
         publisher = Publisher()
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            result = loop.run_until_complete(publisher.publish(
-                platform_id=platform,
-                cookies=cookies,
-                title=title,
-                content=content,
-                tags=data.get('tags'),
-                category=data.get('category'),
-                article_type=data.get('article_type', 'original'),
-                pub_type=data.get('pub_type', 'public'),
-                headless=True
-            ))
-        finally:
-            loop.close()
+        result = run_async(publisher.publish(
+            platform_id=platform,
+            cookies=cookies,
+            title=title,
+            content=content,
+            tags=data.get('tags'),
+            category=data.get('category'),
+            article_type=data.get('article_type', 'original'),
+            pub_type=data.get('pub_type', 'public'),
+            headless=True
+        ))
 
         if result.get('success'):
             return jsonify(result)
@@ -225,18 +210,13 @@ def convert_blog_to_xhs(history_id):
 
         logger.info(f"开始将博客转换为小红书: {history_id} -> {topic}")
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            result = loop.run_until_complete(xhs_service.generate_series(
-                topic=topic,
-                count=count,
-                style=style,
-                content=reference_content,
-                generate_video=generate_video
-            ))
-        finally:
-            loop.close()
+        result = run_async(xhs_service.generate_series(
+            topic=topic,
+            count=count,
+            style=style,
+            content=reference_content,
+            generate_video=generate_video
+        ))
 
         xhs_id = f"xhs_{uuid.uuid4().hex[:12]}"
 
@@ -308,27 +288,22 @@ def sync_publish():
                 continue
 
             try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(publisher.publish(
-                        platform_id=platform,
-                        cookies=platform_cookies,
-                        title=record.get('topic', ''),
-                        content=record.get('markdown_content', ''),
-                        headless=True
-                    ))
-                    results['blog'][platform] = result
-
-                    if result.get('success'):
-                        from datetime import datetime
-                        db_service.update_publish_platforms(record_id, platform, {
-                            'status': 'published',
-                            'url': result.get('url', ''),
-                            'published_at': datetime.now().isoformat()
-                        })
-                finally:
-                    loop.close()
+                result = run_async(publisher.publish(
+                    platform_id=platform,
+                    cookies=platform_cookies,
+                    title=record.get('topic', ''),
+                    content=record.get('markdown_content', ''),
+                    headless=True
+                ))
+                results['blog'][platform] = result
+
+                if result.get('success'):
+                    from datetime import datetime
+                    db_service.update_publish_platforms(record_id, platform, {
+                        'status': 'published',
+                        'url': result.get('url', ''),
+                        'published_at': datetime.now().isoformat()
+                    })
             except Exception as e:
                 results['blog'][platform] = {'success': False, 'error': str(e)}
 
@@ -344,18 +319,13 @@ def sync_publish():
                     count = xhs_options.get('count', 4)
                     generate_video = xhs_options.get('generate_video', True)
 
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        xhs_result = loop.run_until_complete(xhs_service.generate_series(
-                            topic=record.get('topic', ''),
-                            count=count,
-                            style=style,
-                            content=record.get('outline', '') or record.get('markdown_content', '')[:2000],
-                            generate_video=generate_video
-                        ))
-                    finally:
-                        loop.close()
+                    xhs_result = run_async(xhs_service.generate_series(
+                        topic=record.get('topic', ''),
+                        count=count,
+                        style=style,
+                        content=record.get('outline', '') or record.get('markdown_content', '')[:2000],
+                        generate_video=generate_video
+                    ))
 
                     xhs_id = f"xhs_{uuid.uuid4().hex[:12]}"
                     db_service.save_xhs_record(
@@ -382,24 +352,19 @@ def sync_publish():
 
                     if xhs_cookies and xhs_result.image_urls:
                         try:
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            try:
-                                publish_result = loop.run_until_complete(publisher.publish(
-                                    platform_id='xiaohongshu',
-                                    cookies=xhs_cookies,
-                                    title=xhs_result.titles[0] if xhs_result.titles else record.get('topic', ''),
-                                    content=xhs_result.copywriting,
-                                    tags=xhs_result.tags,
-                                    images=xhs_result.image_urls,
-                                    headless=True
-                                ))
-
-                                if publish_result.get('success'):
-                                    results['xhs']['publish_url'] = publish_result.get('url', '')
-                                    db_service.update_xhs_publish_url(xhs_id, publish_result.get('url', ''))
-                            finally:
-                                loop.close()
+                            publish_result = run_async(publisher.publish(
+                                platform_id='xiaohongshu',
+                                cookies=xhs_cookies,
+                                title=xhs_result.titles[0] if xhs_result.titles else record.get('topic', ''),
+                                content=xhs_result.copywriting,
+                                tags=xhs_result.tags,
+                                images=xhs_result.image_urls,
+                                headless=True
+                            ))
+
+                            if publish_result.get('success'):
+                                results['xhs']['publish_url'] = publish_result.get('url', '')
+                                db_service.update_xhs_publish_url(xhs_id, publish_result.get('url', ''))
                         except Exception as e:
                             results['xhs']['publish_error'] = str(e)
 
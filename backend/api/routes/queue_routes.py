@@ -3,16 +3,17 @@
 
 接口：
 - POST /api/queue/tasks   提交任务入队
-- GET  /api/queue/tasks   获取队列快照
+- GET  /api/queue/tasks   获取队列快照（支持 ETag / If-None-Match → 304）
 - GET  /api/queue/tasks/<id>  获取单个任务
 - DELETE /api/queue/tasks/<id>  取消任务
 - GET  /api/queue/history  获取执行历史
 """
-import asyncio
 import logging
 
 from flask import Blueprint, jsonify, request
 
+from utils.background_loop import run_async
+
 logger = logging.getLogger(__name__)
 
 queue_bp = Blueprint('queue', __name__, url_prefix='/api/queue')
@@ -27,8 +28,8 @@ def init_queue_routes(queue_manager):
 
 
 def _run_async(coro):
-    """在同步 Flask 上下文中运行异步协程"""
-    return asyncio.run(coro)
+    """在同步 Flask 上下文中运行异步协程（提交到进程级后台事件循环）"""
+    return run_async(coro)
 
 
 @queue_bp.route('/tasks', methods=['POST'])
@@ -80,7 +81,10 @@ def get_queue_snapshot():
     if not _queue_manager:
         return jsonify({'error': '队列服务未初始化'}), 503
     snapshot = _run_async(_queue_manager.get_queue_snapshot())
-    return jsonify(snapshot)
+    response = jsonify(snapshot)
+    response.set_etag(snapshot['version'])
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 
 @queue_bp.route('/tasks/<task_id>', methods=['GET'])
@@ -17,6 +17,7 @@ import logging
 from flask import Blueprint, jsonify, request
 
 from services.scheduling.cron_parser import parse_schedule
+from utils.background_loop import run_async
 
 logger = logging.getLogger(__name__)
 
@@ -33,8 +34,7 @@ def init_scheduler_routes(scheduler):
 
 
 def _run_async(coro):
-    import asyncio
-    return asyncio.run(coro)
+    return run_async(coro)
 
 
 @scheduler_bp.route('/tasks', methods=['POST'])
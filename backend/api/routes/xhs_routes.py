@@ -6,7 +6,6 @@ import os
 import json
 import time
 import uuid
-import asyncio
 import logging
 from queue import Empty
 
@@ -19,6 +18,7 @@ from services import (
 from services.database_service import get_db_service
 from services.publishing import get_oss_service
 from services.media import get_video_service
+from utils.background_loop import run_async
 
 logger = logging.getLogger(__name__)
 
@@ -182,19 +182,14 @@ def xhs_explanation_video():
             oss_service=get_oss_service()
         )
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            video_url = loop.run_until_complete(xhs_service.generate_explanation_video(
-                images=images,
-                scripts=scripts,
-                style=style,
-                target_duration=target_duration,
-                bgm_url=bgm_url,
-                video_model=video_model
-            ))
-        finally:
-            loop.close()
+        video_url = run_async(xhs_service.generate_explanation_video(
+            images=images,
+            scripts=scripts,
+            style=style,
+            target_duration=target_duration,
+            bgm_url=bgm_url,
+            video_model=video_model
+        ))
 
         if video_url:
             return jsonify({
@@ -236,16 +231,11 @@ def xhs_outline():
             oss_service=None
         )
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            outline, pages, article = loop.run_until_complete(xhs_service._generate_outline(
-                topic=topic,
-                count=count,
-                content=content
-            ))
-        finally:
-            loop.close()
+        outline, pages, article = run_async(xhs_service._generate_outline(
+            topic=topic,
+            count=count,
+            content=content
+        ))
 
         return jsonify({
             'success': True,
@@ -313,10 +303,8 @@ def xhs_publish():
 
         publisher = Publisher()
 
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
         try:
-            result = loop.run_until_complete(publisher.publish(
+            result = run_async(publisher.publish(
                 platform_id='xiaohongshu',
                 cookies=cookies,
                 title=title,
@@ -326,7 +314,6 @@ def xhs_publish():
                 headless=False
             ))
         finally:
-            loop.close()
             import shutil
             try:
                 shutil.rmtree(temp_dir)
@@ -67,6 +67,8 @@ class Config:
     KNOWLEDGE_MAX_DOC_ITEMS = int(os.getenv('KNOWLEDGE_MAX_DOC_ITEMS', '10'))  # 文档知识最大条目数
     KNOWLEDGE_CHUNK_SIZE = int(os.getenv('KNOWLEDGE_CHUNK_SIZE', '2000'))  # 知识分块大小（字符）
     KNOWLEDGE_CHUNK_OVERLAP = int(os.getenv('KNOWLEDGE_CHUNK_OVERLAP', '200'))  # 分块重叠大小
+    KNOWLEDGE_CHUNK_MAX_TOKENS = int(os.getenv('KNOWLEDGE_CHUNK_MAX_TOKENS', '0'))  # 每块 token 预算（0 不限制）
+    KNOWLEDGE_PROMPT_MAX_TOKENS = int(os.getenv('KNOWLEDGE_PROMPT_MAX_TOKENS', '20000'))  # 融合知识写入 Prompt 的 token 预算
     
     # 多模态模型配置（用于图片摘要）
     IMAGE_CAPTION_MODEL = os.getenv('IMAGE_CAPTION_MODEL', 'qwen3-vl-plus-2025-12-19')
@@ -3,6 +3,7 @@
 import logging
 from typing import Any, Dict, List, Optional
 
+from .content_store import hydrate_records
 from .runtime import SQLiteRuntime
 
 logger = logging.getLogger("services.database_service")
@@ -251,14 +252,16 @@ class BookRepository:
         """获取章节及其关联的博客内容"""
         with self.get_connection() as conn:
             cursor = conn.execute('''
-                SELECT bc.*, hr.markdown_content, hr.topic as blog_topic
+                SELECT bc.*, hr.markdown_hash, hr.topic as blog_topic
                 FROM book_chapters bc
                 LEFT JOIN history_records hr ON bc.blog_id = hr.id
                 WHERE bc.book_id = ? AND bc.id = ?
             ''', (book_id, chapter_id))
             row = cursor.fetchone()
             if row:
-                return dict(row)
+                chapter = dict(row)
+                chapter.setdefault('markdown_content', None)
+                return hydrate_records(conn, [chapter])[0]
         return None
 
     def get_blogs_by_book(self, book_id: str) -> List[Dict[str, Any]]:
@@ -270,7 +273,7 @@ class BookRepository:
                 WHERE bc.book_id = ?
                 ORDER BY bc.chapter_index, bc.section_index
             ''', (book_id,))
-            return [dict(row) for row in cursor.fetchall()]
+            return hydrate_records(conn, [dict(row) for row in cursor.fetchall()])
 
     def get_unassigned_blogs(self) -> List[Dict[str, Any]]:
         """获取未分配到任何书籍的博客"""
@@ -280,7 +283,7 @@ class BookRepository:
                 WHERE hr.book_id IS NULL
                 ORDER BY hr.created_at DESC
             ''')
-            return [dict(row) for row in cursor.fetchall()]
+            return hydrate_records(conn, [dict(row) for row in cursor.fetchall()])
 
     def get_all_blogs_with_book_info(self, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
         """获取所有博客及其所属书籍信息"""
@@ -299,7 +302,7 @@ class BookRepository:
                 ORDER BY hr.created_at DESC
                 LIMIT ? OFFSET ?
             ''', (limit, offset))
-            return [dict(row) for row in cursor.fetchall()]
+            return hydrate_records(conn, [dict(row) for row in cursor.fetchall()])
 
 
     def clear_all_books(self):
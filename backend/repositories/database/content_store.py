@@ -0,0 +1,117 @@
+"""Content-addressed, compressed storage for large history payloads.
+
+正文、大纲、引用以及小红书文案、图片列表、话题标签等大字段不再内联在
+history_records 中，而是按 sha256 去重、zlib 压缩后存入 history_contents；
+history_records 只保存哈希引用。
+列表查询不再读到正文所在的页，详情/导出/书籍扫描按需 hydrate。
+"""
+
+import hashlib
+import logging
+import sqlite3
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("services.database_service")
+
+CODEC_ZLIB = "zlib"
+
+# 大字段 → history_records 上的哈希引用列
+LARGE_FIELDS = {
+    "markdown_content": "markdown_hash",
+    "outline": "outline_hash",
+    "citations": "citations_hash",
+    "xhs_copy_text": "xhs_copy_text_hash",
+    "xhs_image_urls": "xhs_image_urls_hash",
+    "xhs_hashtags": "xhs_hashtags_hash",
+}
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS history_contents (
+        content_hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        raw_size INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def put_content(conn: sqlite3.Connection, text: Optional[str]) -> Optional[str]:
+    """写入一段内容，返回内容哈希；相同内容只存一份"""
+    if text is None:
+        return None
+    raw = text.encode("utf-8")
+    content_hash = hashlib.sha256(raw).hexdigest()
+    conn.execute(
+        "INSERT OR IGNORE INTO history_contents (content_hash, codec, raw_size, data) VALUES (?, ?, ?, ?)",
+        (content_hash, CODEC_ZLIB, len(raw), zlib.compress(raw, 6)),
+    )
+    return content_hash
+
+
+def load_contents(conn: sqlite3.Connection, hashes: Iterable[Optional[str]]) -> Dict[str, str]:
+    """批量读取并解压内容"""
+    unique = [h for h in dict.fromkeys(hashes) if h]
+    contents: Dict[str, str] = {}
+    for start in range(0, len(unique), 500):
+        batch = unique[start:start + 500]
+        rows = conn.execute(
+            f"SELECT content_hash, codec, data FROM history_contents "
+            f"WHERE content_hash IN ({','.join('?' * len(batch))})",
+            batch,
+        ).fetchall()
+        for content_hash, codec, data in rows:
+            if codec != CODEC_ZLIB:
+                logger.warning(f"未知的内容编码 {codec}，跳过: {content_hash}")
+                continue
+            contents[content_hash] = zlib.decompress(data).decode("utf-8")
+    return contents
+
+
+def hydrate_records(conn: sqlite3.Connection, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """把哈希引用替换回大字段内容（原地修改并返回）"""
+    contents = load_contents(
+        conn, (record.get(column) for record in records for column in LARGE_FIELDS.values())
+    )
+    for record in records:
+        for field, column in LARGE_FIELDS.items():
+            if column not in record:
+                continue
+            content_hash = record.pop(column)
+            record[field] = contents.get(content_hash) if content_hash else record.get(field)
+    return records
+
+
+def release_contents(conn: sqlite3.Connection, hashes: Iterable[Optional[str]]) -> None:
+    """删除不再被任何记录引用的内容"""
+    references = " OR ".join(f"{column} = :h" for column in LARGE_FIELDS.values())
+    for content_hash in {h for h in hashes if h}:
+        conn.execute(
+            f"DELETE FROM history_contents WHERE content_hash = :h "
+            f"AND NOT EXISTS (SELECT 1 FROM history_records WHERE {references})",
+            {"h": content_hash},
+        )
+
+
+def migrate_inline_contents(conn: sqlite3.Connection, batch_size: int = 200) -> int:
+    """把仍内联在 history_records 中的大字段搬到 history_contents，返回迁移行数"""
+    fields = list(LARGE_FIELDS)
+    pending = " OR ".join(f"{field} IS NOT NULL" for field in fields)
+    moved = 0
+    while True:
+        rows = conn.execute(
+            f"SELECT id, {', '.join(fields)} FROM history_records WHERE {pending} LIMIT ?",
+            (batch_size,),
+        ).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            updates = {LARGE_FIELDS[field]: put_content(conn, row[i + 1]) for i, field in enumerate(fields)
+                       if row[i + 1] is not None}
+            assignments = ", ".join(
+                [f"{column} = :{column}" for column in updates] + [f"{field} = NULL" for field in fields]
+            )
+            conn.execute(f"UPDATE history_records SET {assignments} WHERE id = :id", {**updates, "id": row[0]})
+        moved += len(rows)
+    return moved
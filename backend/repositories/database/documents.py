@@ -1,5 +1,6 @@
 """Document, chunk, and image persistence."""
 
+import json
 import logging
 from typing import Any, Dict, List, Optional
 
@@ -203,6 +204,95 @@ class DocumentRepository:
             ''', (summary, doc_id))
         logger.info(f"更新文档摘要: {doc_id}")
 
+    # ========== 内容指纹去重 ==========
+
+    def set_document_hash(self, doc_id: str, content_hash: str):
+        """
+        记录文档内容指纹（入库全部完成后调用，有指纹即表示解析结果可复用）
+
+        Args:
+            doc_id: 文档 ID
+            content_hash: 文件内容 SHA-256
+        """
+        with self.get_connection() as conn:
+            conn.execute('''
+                UPDATE documents
+                SET content_hash = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (content_hash, doc_id))
+
+    def find_document_by_hash(self, content_hash: str, file_type: str) -> Optional[Dict[str, Any]]:
+        """
+        查找内容相同且已完成入库的文档
+
+        Args:
+            content_hash: 文件内容 SHA-256
+            file_type: 文件类型（同样的字节按不同类型解析结果不同）
+
+        Returns:
+            最近解析的文档记录，不存在返回 None
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                SELECT * FROM documents
+                WHERE content_hash = ? AND file_type = ? AND status = 'ready'
+                ORDER BY parsed_at DESC
+                LIMIT 1
+            ''', (content_hash, file_type))
+            row = cursor.fetchone()
+            if row:
+                return dict(row)
+        return None
+
+    def reuse_parsed_document(self, doc_id: str, source_id: str) -> bool:
+        """
+        把来源文档的解析结果、摘要、分块和图片复制给新文档（单个事务，数据不经过 Python）
+
+        Args:
+            doc_id: 新文档 ID
+            source_id: 来源文档 ID
+
+        Returns:
+            来源文档不存在或未就绪时返回 False
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                UPDATE documents
+                SET (status, markdown_content, markdown_length, summary, mineru_folder, content_hash) = (
+                        SELECT 'ready', markdown_content, markdown_length, summary, mineru_folder, content_hash
+                        FROM documents WHERE id = :source
+                    ),
+                    source_document_id = :source,
+                    error_message = NULL,
+                    parsed_at = CURRENT_TIMESTAMP,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = :doc
+                  AND EXISTS (SELECT 1 FROM documents WHERE id = :source AND status = 'ready')
+            ''', {'doc': doc_id, 'source': source_id})
+            if cursor.rowcount == 0:
+                return False
+
+            conn.execute('DELETE FROM knowledge_chunks WHERE document_id = ?', (doc_id,))
+            conn.execute('''
+                INSERT INTO knowledge_chunks
+                (id, document_id, chunk_index, chunk_type, title, content, start_pos, end_pos, breadcrumbs)
+                SELECT 'chunk_' || :doc || '_' || chunk_index, :doc, chunk_index,
+                       chunk_type, title, content, start_pos, end_pos, breadcrumbs
+                FROM knowledge_chunks WHERE document_id = :source
+            ''', {'doc': doc_id, 'source': source_id})
+
+            conn.execute('DELETE FROM document_images WHERE document_id = ?', (doc_id,))
+            conn.execute('''
+                INSERT INTO document_images
+                (id, document_id, image_index, image_path, caption, page_num)
+                SELECT 'img_' || :doc || '_' || image_index, :doc, image_index,
+                       image_path, caption, page_num
+                FROM document_images WHERE document_id = :source
+            ''', {'doc': doc_id, 'source': source_id})
+
+        logger.info(f"复用文档解析结果: {doc_id} <- {source_id}")
+        return True
+
     # ========== 知识分块操作（二期新增） ==========
 
     def save_chunks(self, doc_id: str, chunks: List[Dict[str, Any]]):
@@ -211,7 +301,7 @@ class DocumentRepository:
 
         Args:
             doc_id: 文档 ID
-            chunks: 分块列表，每个分块包含 {chunk_type, title, content, start_pos, end_pos}
+            chunks: 分块列表，每个分块包含 {chunk_type, title, content, start_pos, end_pos, breadcrumbs}
         """
         with self.get_connection() as conn:
             # 先删除旧分块
@@ -222,8 +312,8 @@ class DocumentRepository:
                 chunk_id = f"chunk_{doc_id}_{idx}"
                 conn.execute('''
                     INSERT INTO knowledge_chunks
-                    (id, document_id, chunk_index, chunk_type, title, content, start_pos, end_pos)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    (id, document_id, chunk_index, chunk_type, title, content, start_pos, end_pos, breadcrumbs)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
                     chunk_id,
                     doc_id,
@@ -232,7 +322,8 @@ class DocumentRepository:
                     chunk.get('title', ''),
                     chunk.get('content', ''),
                     chunk.get('start_pos', 0),
-                    chunk.get('end_pos', 0)
+                    chunk.get('end_pos', 0),
+                    json.dumps(chunk.get('breadcrumbs') or [], ensure_ascii=False)
                 ))
 
         logger.info(f"保存知识分块: {doc_id}, 共 {len(chunks)} 块")
@@ -252,7 +343,7 @@ class DocumentRepository:
                 'SELECT * FROM knowledge_chunks WHERE document_id = ? ORDER BY chunk_index',
                 (doc_id,)
             )
-            return [dict(row) for row in cursor.fetchall()]
+            return [self._chunk_from_row(row) for row in cursor.fetchall()]
 
     def get_chunks_by_documents(self, doc_ids: List[str]) -> List[Dict[str, Any]]:
         """
@@ -273,7 +364,17 @@ class DocumentRepository:
                 f'SELECT * FROM knowledge_chunks WHERE document_id IN ({placeholders}) ORDER BY document_id, chunk_index',
                 doc_ids
             )
-            return [dict(row) for row in cursor.fetchall()]
+            return [self._chunk_from_row(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _chunk_from_row(row) -> Dict[str, Any]:
+        """分块行 → 字典，breadcrumbs 解码为列表（迁移前写入的分块为空列表）"""
+        chunk = dict(row)
+        try:
+            chunk['breadcrumbs'] = json.loads(chunk.get('breadcrumbs') or '[]')
+        except ValueError:
+            chunk['breadcrumbs'] = []
+        return chunk
 
     # ========== 文档图片操作（二期新增） ==========
 
@@ -1,21 +1,118 @@
 """Generated-content history and publishing persistence."""
 
+import base64
+import json
 import logging
-from typing import Any, Dict, List, Optional
-
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import history_search
+from .content_store import LARGE_FIELDS, hydrate_records, load_contents, put_content, release_contents
 from .runtime import SQLiteRuntime
 
 logger = logging.getLogger("services.database_service")
 
+# 列表页只取元数据列，不读 markdown_content / outline 等大字段；
+# 小红书卡片需要的文案、图片、标签按哈希引用取出，只为本页解压
+_LIST_COLUMNS = (
+    "id", "topic", "article_type", "target_length", "sections_count",
+    "code_blocks_count", "images_count", "review_score", "cover_image", "cover_video",
+    "target_sections_count", "target_images_count", "target_code_blocks_count", "target_word_count",
+    "created_at", "content_type", "source_id", "derived_ids",
+    "xhs_style", "xhs_image_urls_hash", "xhs_copy_text_hash", "xhs_hashtags_hash", "xhs_publish_url",
+    "publish_platforms",
+)
+
+
+def encode_history_cursor(created_at: str, history_id: str) -> str:
+    """(created_at, id) → 不透明的分页游标"""
+    raw = json.dumps([created_at, history_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[str, str]:
+    """解析分页游标，格式非法时抛出 ValueError"""
+    try:
+        created_at, history_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor!r}") from e
+    return str(created_at), str(history_id)
+
 
 class HistoryRepository:
     def __init__(self, runtime: SQLiteRuntime, connection_provider=None):
         self.runtime = runtime
         self._connection_provider = connection_provider or runtime
+        # 按筛选条件缓存总数，本进程写入时失效，其他进程的写入靠 TTL 兜底
+        self._count_cache_ttl = float(os.environ.get("HISTORY_COUNT_CACHE_TTL", "30"))
+        self._count_cache: Dict[Tuple[Optional[str], Optional[str]], Tuple[int, float]] = {}
+        self._count_lock = threading.Lock()
 
     def get_connection(self):
         return self._connection_provider.get_connection()
 
+    def _invalidate_counts(self):
+        with self._count_lock:
+            self._count_cache.clear()
+
+    @staticmethod
+    def _filter_clause(content_type: str = None, book_id: str = None) -> Tuple[List[str], List[Any]]:
+        # 迁移时已把 content_type 为 NULL 的旧记录回填为 'blog'，可直接走等值索引
+        conditions, params = [], []
+        if content_type and content_type != 'all':
+            conditions.append("content_type = ?")
+            params.append(content_type)
+        if book_id:
+            conditions.append("book_id = ?")
+            params.append(book_id)
+        return conditions, params
+
+    def _select_page(
+        self,
+        conditions: List[str],
+        params: List[Any],
+        limit: int,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """先在 history_records 上按 (created_at, id) 索引取一页，再关联书籍信息"""
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        inner_columns = ", ".join(_LIST_COLUMNS)
+        outer_columns = ", ".join(f"hr.{c}" for c in _LIST_COLUMNS)
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f'''SELECT {outer_columns},
+                   b.id as book_id,
+                   b.title as book_title
+                   FROM (
+                       SELECT {inner_columns} FROM history_records
+                       {where}
+                       ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?
+                   ) hr
+                   LEFT JOIN book_chapters bc ON hr.id = bc.blog_id
+                   LEFT JOIN books b ON bc.book_id = b.id
+                   ORDER BY hr.created_at DESC, hr.id DESC''',
+                (*params, limit, offset)
+            )
+            return hydrate_records(conn, [dict(row) for row in cursor.fetchall()])
+
+    def _count(self, content_type: str = None, book_id: str = None) -> int:
+        key = (content_type if content_type != 'all' else None, book_id or None)
+        now = time.monotonic()
+        with self._count_lock:
+            cached = self._count_cache.get(key)
+            if cached and now - cached[1] < self._count_cache_ttl:
+                return cached[0]
+        conditions, params = self._filter_clause(*key)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.get_connection() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM history_records {where}", params).fetchone()[0]
+        with self._count_lock:
+            self._count_cache[key] = (total, now)
+        return total
+
     def save_history(
         self,
         history_id: str,
@@ -36,20 +133,25 @@ class HistoryRepository:
         target_word_count: int = None,
         citations: str = None
     ) -> Dict[str, Any]:
-        """保存历史记录"""
+        """保存历史记录（正文、大纲、引用存入压缩内容表）"""
         with self.get_connection() as conn:
+            markdown_hash = put_content(conn, markdown_content)
+            outline_hash = put_content(conn, outline)
+            citations_hash = put_content(conn, citations)
             conn.execute('''
                 INSERT INTO history_records
-                (id, topic, article_type, target_length, markdown_content, outline,
+                (id, topic, article_type, target_length, markdown_hash, outline_hash,
                  sections_count, code_blocks_count, images_count, review_score, cover_image, cover_video,
-                 target_sections_count, target_images_count, target_code_blocks_count, target_word_count, citations)
+                 target_sections_count, target_images_count, target_code_blocks_count, target_word_count, citations_hash)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
-                history_id, topic, article_type, target_length, markdown_content, outline,
+                history_id, topic, article_type, target_length, markdown_hash, outline_hash,
                 sections_count, code_blocks_count, images_count, review_score, cover_image, cover_video,
-                target_sections_count, target_images_count, target_code_blocks_count, target_word_count, citations
+                target_sections_count, target_images_count, target_code_blocks_count, target_word_count, citations_hash
             ))
+            history_search.sync_record(conn, history_id)
 
+        self._invalidate_counts()
         logger.info(f"保存历史记录: {history_id}, 主题: {topic}")
         return self.get_history(history_id)
 
@@ -62,32 +164,16 @@ class HistoryRepository:
             )
             row = cursor.fetchone()
             if row:
-                return dict(row)
+                return hydrate_records(conn, [dict(row)])[0]
         return None
 
     def list_history(self, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
         """列出历史记录（按时间倒序，支持分页，包含归属书籍信息）"""
-        with self.get_connection() as conn:
-            cursor = conn.execute(
-                '''SELECT hr.id, hr.topic, hr.article_type, hr.target_length, hr.sections_count,
-                   hr.code_blocks_count, hr.images_count, hr.review_score, hr.cover_image, hr.cover_video,
-                   hr.target_sections_count, hr.target_images_count, hr.target_code_blocks_count, hr.target_word_count,
-                   hr.created_at,
-                   b.id as book_id,
-                   b.title as book_title
-                   FROM history_records hr
-                   LEFT JOIN book_chapters bc ON hr.id = bc.blog_id
-                   LEFT JOIN books b ON bc.book_id = b.id
-                   ORDER BY hr.created_at DESC LIMIT ? OFFSET ?''',
-                (limit, offset)
-            )
-            return [dict(row) for row in cursor.fetchall()]
+        return self._select_page([], [], limit, offset)
 
     def count_history(self) -> int:
-        """获取历史记录总数"""
-        with self.get_connection() as conn:
-            cursor = conn.execute('SELECT COUNT(*) FROM history_records')
-            return cursor.fetchone()[0]
+        """获取历史记录总数（短时缓存）"""
+        return self._count()
 
     def update_history_video(self, history_id: str, cover_video: str) -> bool:
         """更新历史记录的封面动画"""
@@ -104,15 +190,23 @@ class HistoryRepository:
         return updated
 
     def delete_history(self, history_id: str) -> bool:
-        """删除历史记录"""
+        """删除历史记录（同时回收不再被引用的正文内容）"""
         with self.get_connection() as conn:
+            refs = conn.execute(
+                f"SELECT {', '.join(LARGE_FIELDS.values())} FROM history_records WHERE id = ?",
+                (history_id,)
+            ).fetchone()
             cursor = conn.execute(
                 'DELETE FROM history_records WHERE id = ?',
                 (history_id,)
             )
             deleted = cursor.rowcount > 0
+            history_search.sync_record(conn, history_id)
+            if refs:
+                release_contents(conn, tuple(refs))
 
         if deleted:
+            self._invalidate_counts()
             logger.info(f"删除历史记录: {history_id}")
         return deleted
 
@@ -135,41 +229,8 @@ class HistoryRepository:
         Returns:
             历史记录列表
         """
-        with self.get_connection() as conn:
-            if content_type and content_type != 'all':
-                cursor = conn.execute(
-                    '''SELECT hr.id, hr.topic, hr.article_type, hr.target_length, hr.sections_count,
-                       hr.code_blocks_count, hr.images_count, hr.review_score, hr.cover_image, hr.cover_video,
-                       hr.target_sections_count, hr.target_images_count, hr.target_code_blocks_count, hr.target_word_count,
-                       hr.created_at, hr.content_type, hr.source_id, hr.derived_ids,
-                       hr.xhs_style, hr.xhs_image_urls, hr.xhs_copy_text, hr.xhs_hashtags, hr.xhs_publish_url,
-                       hr.publish_platforms,
-                       b.id as book_id,
-                       b.title as book_title
-                       FROM history_records hr
-                       LEFT JOIN book_chapters bc ON hr.id = bc.blog_id
-                       LEFT JOIN books b ON bc.book_id = b.id
-                       WHERE hr.content_type = ? OR (hr.content_type IS NULL AND ? = 'blog')
-                       ORDER BY hr.created_at DESC LIMIT ? OFFSET ?''',
-                    (content_type, content_type, limit, offset)
-                )
-            else:
-                cursor = conn.execute(
-                    '''SELECT hr.id, hr.topic, hr.article_type, hr.target_length, hr.sections_count,
-                       hr.code_blocks_count, hr.images_count, hr.review_score, hr.cover_image, hr.cover_video,
-                       hr.target_sections_count, hr.target_images_count, hr.target_code_blocks_count, hr.target_word_count,
-                       hr.created_at, hr.content_type, hr.source_id, hr.derived_ids,
-                       hr.xhs_style, hr.xhs_image_urls, hr.xhs_copy_text, hr.xhs_hashtags, hr.xhs_publish_url,
-                       hr.publish_platforms,
-                       b.id as book_id,
-                       b.title as book_title
-                       FROM history_records hr
-                       LEFT JOIN book_chapters bc ON hr.id = bc.blog_id
-                       LEFT JOIN books b ON bc.book_id = b.id
-                       ORDER BY hr.created_at DESC LIMIT ? OFFSET ?''',
-                    (limit, offset)
-                )
-            return [dict(row) for row in cursor.fetchall()]
+        conditions, params = self._filter_clause(content_type)
+        return self._select_page(conditions, params, limit, offset)
 
     def count_history_by_type(self, content_type: str = None) -> int:
         """
@@ -181,16 +242,107 @@ class HistoryRepository:
         Returns:
             记录数量
         """
+        return self._count(content_type)
+
+    def list_history_page(
+        self,
+        content_type: str = None,
+        book_id: str = None,
+        limit: int = 20,
+        cursor: str = None,
+        include_total: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        游标（keyset）分页列出历史记录
+
+        按 (created_at, id) 倒序，从上一页最后一条之后继续取，
+        翻到多深都只扫描一页的数据。
+
+        Args:
+            content_type: 内容类型 ('blog' | 'xhs' | None表示全部)
+            book_id: 所属书籍
+            limit: 每页数量
+            cursor: 上一页返回的 next_cursor，None 表示第一页
+            include_total: 是否附带总数（短时缓存）
+
+        Returns:
+            {records, next_cursor, has_more, total}
+        """
+        conditions, params = self._filter_clause(content_type, book_id)
+        if cursor:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(decode_history_cursor(cursor))
+
+        rows = self._select_page(conditions, params, limit + 1)
+        # 一篇博客可能挂在多个章节下，按记录 ID 判断是否还有下一页
+        ids = list(dict.fromkeys(row['id'] for row in rows))
+        has_more = len(ids) > limit
+        if has_more:
+            rows = [row for row in rows if row['id'] != ids[limit]]
+        next_cursor = encode_history_cursor(rows[-1]['created_at'], rows[-1]['id']) if has_more else None
+
+        return {
+            'records': rows,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'total': self._count(content_type, book_id) if include_total else None,
+        }
+
+    def search_history(
+        self,
+        query: str,
+        content_type: str = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        全文搜索历史记录（标题 / 主题 / 正文，按 bm25 相关度排序）
+
+        Args:
+            query: 搜索词，多个词之间为 AND
+            content_type: 内容类型 ('blog' | 'xhs' | None表示全部)
+            limit: 返回数量
+
+        Returns:
+            命中记录列表，每条带 title 与高亮片段 snippet
+        """
+        match = history_search.build_match_query(query)
+        if not match:
+            return []
+        conditions, params = self._filter_clause(content_type)
+        where = ''.join(f" AND hr.{c}" for c in conditions)
         with self.get_connection() as conn:
-            if content_type and content_type != 'all':
-                cursor = conn.execute(
-                    '''SELECT COUNT(*) FROM history_records
-                       WHERE content_type = ? OR (content_type IS NULL AND ? = 'blog')''',
-                    (content_type, content_type)
-                )
-            else:
-                cursor = conn.execute('SELECT COUNT(*) FROM history_records')
-            return cursor.fetchone()[0]
+            try:
+                rows = conn.execute(
+                    f'''SELECT hr.id, hr.topic, hr.article_type, hr.content_type, hr.cover_image,
+                       hr.created_at, hr.markdown_hash, hr.xhs_copy_text_hash,
+                       {history_search.bm25_expression()} AS score
+                       FROM history_fts
+                       JOIN history_fts_keys k ON k.fts_rowid = history_fts.rowid
+                       JOIN history_records hr ON hr.id = k.history_id
+                       WHERE history_fts MATCH ?{where}
+                       ORDER BY score LIMIT ?''',
+                    (match, *params, limit)
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"历史记录全文搜索失败: {e}")
+                return []
+            # 只为本页命中结果解压正文生成片段
+            bodies = load_contents(
+                conn, (row[column] for row in rows for column in ('markdown_hash', 'xhs_copy_text_hash'))
+            )
+
+        terms = history_search.query_terms(query)
+        results = []
+        for row in rows:
+            record = dict(row)
+            body = bodies.get(record.pop('markdown_hash')) or bodies.get(record.pop('xhs_copy_text_hash')) or ''
+            record.pop('xhs_copy_text_hash', None)
+            heading = history_search.TITLE_RE.search(body)
+            record['title'] = heading.group(1).strip() if heading else record['topic']
+            record['snippet'] = history_search.make_snippet(body, terms)
+            record['score'] = round(-record['score'], 4)
+            results.append(record)
+        return results
 
     def save_xhs_record(
         self,
@@ -228,22 +380,24 @@ class HistoryRepository:
             conn.execute('''
                 INSERT INTO history_records
                 (id, topic, content_type, xhs_style, xhs_layout_type,
-                 xhs_image_urls, xhs_copy_text, xhs_hashtags,
+                 xhs_image_urls_hash, xhs_copy_text_hash, xhs_hashtags_hash,
                  cover_image, cover_video, source_id, images_count)
                 VALUES (?, ?, 'xhs', ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 history_id, topic, style, layout_type,
-                json.dumps(image_urls or [], ensure_ascii=False),
-                copy_text,
-                json.dumps(hashtags or [], ensure_ascii=False),
+                put_content(conn, json.dumps(image_urls or [], ensure_ascii=False)),
+                put_content(conn, copy_text),
+                put_content(conn, json.dumps(hashtags or [], ensure_ascii=False)),
                 cover_image, cover_video, source_id,
                 len(image_urls or [])
             ))
+            history_search.sync_record(conn, history_id)
 
         # 如果有来源记录，更新其 derived_ids
         if source_id:
             self._add_derived_id(source_id, history_id)
 
+        self._invalidate_counts()
         logger.info(f"保存小红书记录: {history_id}, 主题: {topic}")
         return self.get_history(history_id)
 
@@ -327,12 +481,19 @@ class HistoryRepository:
             markdown_content: 最新 Markdown 内容
         """
         with self.get_connection() as conn:
+            old = conn.execute(
+                'SELECT markdown_hash FROM history_records WHERE id = ?', (history_id,)
+            ).fetchone()
+            if old is None:
+                return False
             cursor = conn.execute('''
                 UPDATE history_records
-                SET markdown_content = ?
+                SET markdown_hash = ?
                 WHERE id = ?
-            ''', (markdown_content, history_id))
+            ''', (put_content(conn, markdown_content), history_id))
             updated = cursor.rowcount > 0
+            history_search.sync_record(conn, history_id)
+            release_contents(conn, [old[0]])
 
         if updated:
             logger.info(f"更新博客正文: {history_id}, 长度={len(markdown_content)}")
@@ -352,4 +513,8 @@ class HistoryRepository:
                 SET book_id = ?
                 WHERE id = ?
             ''', (book_id, history_id))
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+
+        if updated:
+            self._invalidate_counts()
+        return updated
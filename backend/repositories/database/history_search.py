@@ -0,0 +1,250 @@
+"""Full-text search over generated history (SQLite FTS5).
+
+history_fts 是无内容（contentless）FTS5 索引，只存倒排表，不再复制一份正文：
+- 索引列：title（正文首个 # 标题）、topic、body（博客正文或小红书文案）
+- 正文与文案在 history_contents 中压缩存放，写入记录后由仓库层调用 sync_record
+  在 Python 中解压、切分并写入索引；不依赖触发器或自定义 SQL 函数，
+  其他 sqlite3 连接写 history_records 不会失败，只是索引滞后，下次启动时补齐
+- history_fts_keys 把记录 ID 映射到 FTS rowid（INTEGER PRIMARY KEY，VACUUM 不会重排），
+  并记下建索引时的 topic 与内容哈希，删除旧索引项时据此重算当时写入的文本
+- CJK 文本按单字切分后交给 unicode61 分词，查询时中文片段转为短语匹配，
+  因此「检索增强」能命中正文中连续出现的这四个字
+- 片段（snippet）在命中的少量结果上由 Python 从正文生成
+"""
+
+import html
+import logging
+import re
+import sqlite3
+from typing import Iterable, List, Optional, Tuple
+
+from .content_store import load_contents
+
+logger = logging.getLogger("services.database_service")
+
+_CJK = r'㐀-䶿一-鿿豈-﫿぀-ヿ가-힯'
+_CJK_CHAR_RE = re.compile(f'([{_CJK}])')
+_QUERY_TERM_RE = re.compile(f'[{_CJK}]+|[^\\s{_CJK}"]+')
+TITLE_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+
+# 列权重：标题 > 主题 > 正文
+_BM25_WEIGHTS = (10.0, 5.0, 1.0)
+
+SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+        title, topic, body,
+        content='',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+
+    CREATE TABLE IF NOT EXISTS history_fts_keys (
+        fts_rowid INTEGER PRIMARY KEY,
+        history_id TEXT NOT NULL UNIQUE,
+        topic TEXT,
+        markdown_hash TEXT,
+        xhs_copy_text_hash TEXT
+    );
+"""
+
+# 旧版本依赖自定义 SQL 函数的同步触发器，迁移时删除
+_LEGACY_TRIGGERS = ("history_fts_ai", "history_fts_ad", "history_fts_au")
+
+# (topic, markdown_hash, xhs_copy_text_hash)
+_Source = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def segment(text: Optional[str]) -> str:
+    """CJK 字符两侧补空格，使 unicode61 按单字切分"""
+    if not text:
+        return ''
+    return _CJK_CHAR_RE.sub(r' \1 ', text)
+
+
+def _indexed_values(sources: List[_Source], contents: dict) -> List[Tuple[str, str, str]]:
+    values = []
+    for topic, markdown_hash, copy_hash in sources:
+        body = contents.get(markdown_hash) or contents.get(copy_hash)
+        heading = TITLE_RE.search(contents.get(markdown_hash) or '')
+        values.append((
+            segment(heading.group(1).strip() if heading else None),
+            segment(topic),
+            segment(body),
+        ))
+    return values
+
+
+def _missing_contents(sources: Iterable[_Source], contents: dict) -> bool:
+    return any(h and h not in contents for source in sources for h in source[1:])
+
+
+def _index_all(conn: sqlite3.Connection, batch_size: int = 200) -> int:
+    """清空并按现有记录重建索引"""
+    conn.execute("INSERT INTO history_fts (history_fts) VALUES ('delete-all')")
+    conn.execute("DELETE FROM history_fts_keys")
+    cursor = conn.execute("SELECT id, topic, markdown_hash, xhs_copy_text_hash FROM history_records")
+    indexed = 0
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        sources = [tuple(row[1:]) for row in rows]
+        contents = load_contents(conn, (h for source in sources for h in source[1:]))
+        for row, source, values in zip(rows, sources, _indexed_values(sources, contents)):
+            fts_rowid = conn.execute(
+                "INSERT INTO history_fts_keys (history_id, topic, markdown_hash, xhs_copy_text_hash) "
+                "VALUES (?, ?, ?, ?)",
+                (row[0], *source),
+            ).lastrowid
+            conn.execute(
+                "INSERT INTO history_fts (rowid, title, topic, body) VALUES (?, ?, ?, ?)",
+                (fts_rowid, *values),
+            )
+        indexed += len(rows)
+    return indexed
+
+
+def sync_record(conn: sqlite3.Connection, history_id: str) -> bool:
+    """
+    让一条记录的索引与 history_records 当前内容一致（新增、修改、删除后调用）
+
+    须在 release_contents 之前调用：删除旧索引项时要用旧内容重算当时写入的文本。
+    旧内容已不存在时无法精确删除，退化为全量重建。返回 False 表示当前库没有全文索引。
+    """
+    try:
+        key = conn.execute(
+            "SELECT fts_rowid, topic, markdown_hash, xhs_copy_text_hash FROM history_fts_keys WHERE history_id = ?",
+            (history_id,),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return False
+    row = conn.execute(
+        "SELECT topic, markdown_hash, xhs_copy_text_hash FROM history_records WHERE id = ?",
+        (history_id,),
+    ).fetchone()
+    old: Optional[_Source] = tuple(key[1:]) if key else None
+    new: Optional[_Source] = tuple(row) if row else None
+    if old == new:
+        return True
+
+    sources = [source for source in (old, new) if source]
+    contents = load_contents(conn, (h for source in sources for h in source[1:]))
+    if old and _missing_contents([old], contents):
+        logger.warning(f"记录 {history_id} 的旧索引内容已被回收，重建历史记录全文索引")
+        _index_all(conn)
+        return True
+
+    if old:
+        conn.execute(
+            "INSERT INTO history_fts (history_fts, rowid, title, topic, body) VALUES ('delete', ?, ?, ?, ?)",
+            (key[0], *_indexed_values([old], contents)[0]),
+        )
+    if new is None:
+        conn.execute("DELETE FROM history_fts_keys WHERE history_id = ?", (history_id,))
+        return True
+    if key:
+        fts_rowid = key[0]
+        conn.execute(
+            "UPDATE history_fts_keys SET topic = ?, markdown_hash = ?, xhs_copy_text_hash = ? WHERE fts_rowid = ?",
+            (*new, fts_rowid),
+        )
+    else:
+        fts_rowid = conn.execute(
+            "INSERT INTO history_fts_keys (history_id, topic, markdown_hash, xhs_copy_text_hash) VALUES (?, ?, ?, ?)",
+            (history_id, *new),
+        ).lastrowid
+    conn.execute(
+        "INSERT INTO history_fts (rowid, title, topic, body) VALUES (?, ?, ?, ?)",
+        (fts_rowid, *_indexed_values([new], contents)[0]),
+    )
+    return True
+
+
+def create_index(conn: sqlite3.Connection, rebuild: bool = False) -> bool:
+    """
+    创建 FTS 表；新建、旧版（触发器同步）索引或 rebuild=True 时全量重建，
+    否则补齐其他连接绕过仓库层写入造成的差异
+    """
+    legacy = conn.execute(
+        f"SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name IN ({','.join('?' * len(_LEGACY_TRIGGERS))})",
+        _LEGACY_TRIGGERS,
+    ).fetchone()
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_fts_keys'"
+    ).fetchone()
+    if legacy or not exists:
+        for trigger in _LEGACY_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        # 旧索引以 history_records 的隐式 rowid 为键，VACUUM 后可能错位，直接丢弃
+        conn.execute("DROP TABLE IF EXISTS history_fts")
+        rebuild = True
+    try:
+        conn.executescript(SCHEMA)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"SQLite 不支持 FTS5，历史记录全文搜索不可用: {e}")
+        return False
+    if rebuild:
+        indexed = _index_all(conn)
+        logger.info(f"历史记录全文索引已重建: {indexed} 条")
+        return True
+
+    stale = [row[0] for row in conn.execute(
+        """SELECT hr.id FROM history_records hr
+           LEFT JOIN history_fts_keys k ON k.history_id = hr.id
+           WHERE k.history_id IS NULL OR k.topic IS NOT hr.topic
+              OR k.markdown_hash IS NOT hr.markdown_hash OR k.xhs_copy_text_hash IS NOT hr.xhs_copy_text_hash
+           UNION ALL
+           SELECT k.history_id FROM history_fts_keys k
+           LEFT JOIN history_records hr ON hr.id = k.history_id
+           WHERE hr.id IS NULL"""
+    ).fetchall()]
+    for history_id in stale:
+        sync_record(conn, history_id)
+    if stale:
+        logger.info(f"历史记录全文索引已补齐: {len(stale)} 条")
+    return True
+
+
+def build_match_query(query: str) -> str:
+    """用户输入 → FTS5 MATCH 表达式（各词 AND；中文为短语，拉丁词为前缀匹配）"""
+    clauses = []
+    for term in _QUERY_TERM_RE.findall(query or ''):
+        tokens = segment(term).split()
+        if not tokens:
+            continue
+        phrase = '"' + ' '.join(t.replace('"', '""') for t in tokens) + '"'
+        # 单个拉丁词允许前缀匹配：「lang」命中 LangGraph
+        if len(tokens) == 1 and not _CJK_CHAR_RE.match(tokens[0]):
+            phrase += '*'
+        clauses.append(phrase)
+    return ' '.join(clauses)
+
+
+def query_terms(query: str) -> List[str]:
+    return [t for t in _QUERY_TERM_RE.findall(query or '') if t.strip()]
+
+
+def make_snippet(text: Optional[str], terms: List[str], width: int = 120) -> str:
+    """以第一个命中词为中心截取片段，命中词用 <mark> 标出（其余内容做 HTML 转义）"""
+    if not text:
+        return ''
+    lowered = text.lower()
+    positions = [p for p in (lowered.find(t.lower()) for t in terms) if p >= 0]
+    start = max(0, min(positions) - width // 3) if positions else 0
+    end = min(len(text), start + width)
+    window = ' '.join(text[start:end].split())
+    if terms:
+        pattern = re.compile('|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True)), re.IGNORECASE)
+        parts, last = [], 0
+        for match in pattern.finditer(window):
+            parts.append(html.escape(window[last:match.start()]))
+            parts.append(f'<mark>{html.escape(match.group(0))}</mark>')
+            last = match.end()
+        parts.append(html.escape(window[last:]))
+        window = ''.join(parts)
+    else:
+        window = html.escape(window)
+    return ('…' if start > 0 else '') + window + ('…' if end < len(text) else '')
+
+
+def bm25_expression() -> str:
+    return f"bm25(history_fts, {', '.join(str(w) for w in _BM25_WEIGHTS)})"
@@ -5,6 +5,8 @@ import sqlite3
 from contextlib import contextmanager
 from pathlib import Path
 
+from . import content_store, history_search
+
 logger = logging.getLogger("services.database_service")
 
 
@@ -62,6 +64,7 @@ class SQLiteRuntime:
                     content TEXT NOT NULL,
                     start_pos INTEGER,
                     end_pos INTEGER,
+                    breadcrumbs TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
                 );
@@ -195,6 +198,29 @@ class SQLiteRuntime:
             # 迁移后创建依赖新字段的索引
             conn.execute('CREATE INDEX IF NOT EXISTS idx_history_book_id ON history_records(book_id)')
 
+            # ========== 文档内容指纹去重 ==========
+            cursor = conn.execute("PRAGMA table_info(documents)")
+            document_columns = [row[1] for row in cursor.fetchall()]
+
+            document_new_columns = {
+                'content_hash': 'TEXT',         # 文件内容 SHA-256（入库完成后写入）
+                'source_document_id': 'TEXT',   # 复用解析结果的来源文档
+            }
+
+            for col_name, col_type in document_new_columns.items():
+                if col_name not in document_columns:
+                    logger.info(f"迁移数据库：添加 documents.{col_name} 列")
+                    conn.execute(f"ALTER TABLE documents ADD COLUMN {col_name} {col_type}")
+
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents(content_hash, file_type)')
+
+            # ========== 分块标题路径 ==========
+            cursor = conn.execute("PRAGMA table_info(knowledge_chunks)")
+            if 'breadcrumbs' not in [row[1] for row in cursor.fetchall()]:
+                logger.info("迁移数据库：添加 knowledge_chunks.breadcrumbs 列")
+                # JSON 数组，分块所在章节的标题路径
+                conn.execute("ALTER TABLE knowledge_chunks ADD COLUMN breadcrumbs TEXT")
+
             # ========== 小红书支持迁移 ==========
             xhs_columns = {
                 # 内容类型区分
@@ -224,3 +250,31 @@ class SQLiteRuntime:
             # 创建小红书相关索引
             conn.execute('CREATE INDEX IF NOT EXISTS idx_history_content_type ON history_records(content_type)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_history_source_id ON history_records(source_id)')
+
+            # ========== 历史列表游标分页 ==========
+            # 旧记录 content_type 可能为 NULL，回填后按类型筛选可直接走等值索引
+            conn.execute("UPDATE history_records SET content_type = 'blog' WHERE content_type IS NULL")
+            # (筛选列, created_at, id) 复合索引：筛选 + 排序 + 游标定位都在索引内完成
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_history_created_id ON history_records(created_at, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_history_type_created ON history_records(content_type, created_at, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_history_book_created ON history_records(book_id, created_at, id)')
+
+            # ========== 大字段外置到压缩内容表 ==========
+            conn.execute(content_store.SCHEMA)
+            for col_name in content_store.LARGE_FIELDS.values():
+                if col_name not in columns:
+                    logger.info(f"迁移数据库：添加 history_records.{col_name} 列")
+                    conn.execute(f"ALTER TABLE history_records ADD COLUMN {col_name} TEXT")
+                # 回收内容时按引用列判断是否仍被使用
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_history_{col_name} ON history_records({col_name})')
+            moved = content_store.migrate_inline_contents(conn)
+
+        if moved:
+            logger.info(f"迁移数据库：{moved} 条历史记录的正文已移入 history_contents，压缩数据库文件")
+            with connections.get_connection() as conn:
+                conn.commit()
+                conn.execute("VACUUM")
+
+        # 全文索引在内容迁移之后建立/重建，并补齐其他连接写入造成的差异
+        with connections.get_connection() as conn:
+            history_search.create_index(conn, rebuild=bool(moved))
@@ -23,6 +23,14 @@ from models.scheduling import (
 
 logger = logging.getLogger(__name__)
 
+# _row_to_task 需要的列
+_TASK_COLUMNS = (
+    "id, name, description, trigger_config, generation_config, publish_config, "
+    "status, priority, queue_position, progress, current_stage, stage_detail, "
+    "output_url, output_word_count, output_image_count, "
+    "created_at, updated_at, started_at, completed_at, tags, user_id"
+)
+
 
 class TaskDB:
     def __init__(self, db_path: str = "data/task_queue.db"):
@@ -65,6 +73,22 @@ class TaskDB:
             ))
             await db.commit()
 
+    async def update_progress_many(self, updates: list[tuple]):
+        """批量写入进度列（仅 RUNNING 任务）
+
+        updates: [(progress, current_stage, stage_detail, updated_at, task_id), ...]
+        """
+        if not updates:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                "UPDATE task_queue SET progress = ?, current_stage = ?, "
+                "stage_detail = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                updates,
+            )
+            await db.commit()
+
     async def get_task(self, task_id: str) -> Optional[BlogTask]:
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
@@ -107,6 +131,43 @@ class TaskDB:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
 
+    async def get_queue_overview(
+        self, limits: dict[QueueStatus, int]
+    ) -> tuple[dict[QueueStatus, list[BlogTask]], dict[QueueStatus, int], int]:
+        """一个连接内取回 Dashboard 快照所需的全部数据
+
+        各状态按 (status, priority, created_at) 索引只读前 N 行，
+        计数走 status 索引，不再对整张表的全部列做窗口计算。
+
+        Returns:
+            (各状态的任务列表, 各状态的任务数, 今日完成数)
+        """
+        buckets = [(status, int(limit)) for status, limit in limits.items() if limit > 0]
+        bucket_sql = " UNION ALL ".join(
+            f"SELECT * FROM (SELECT {_TASK_COLUMNS} FROM task_queue WHERE status = ? "
+            f"ORDER BY priority DESC, created_at ASC LIMIT ?)"
+            for _ in buckets
+        ) + " ORDER BY status, priority DESC, created_at ASC"
+        tasks: dict[QueueStatus, list[BlogTask]] = {s: [] for s in limits}
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            if buckets:
+                params = [v for status, limit in buckets for v in (status.value, limit)]
+                async with db.execute(bucket_sql, params) as cursor:
+                    for row in await cursor.fetchall():
+                        task = self._row_to_task(dict(row))
+                        tasks[task.status].append(task)
+            async with db.execute(
+                "SELECT status, COUNT(*) FROM task_queue GROUP BY status"
+            ) as cursor:
+                counts = {QueueStatus(status): n for status, n in await cursor.fetchall()}
+            async with db.execute(
+                "SELECT COUNT(*) FROM task_queue "
+                "WHERE status = 'completed' AND date(completed_at) = date('now')",
+            ) as cursor:
+                completed_today = (await cursor.fetchone())[0]
+        return tasks, counts, completed_today
+
     # ── 执行历史 ──
 
     async def save_execution_record(self, record: ExecutionRecord):
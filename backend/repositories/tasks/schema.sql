@@ -106,6 +106,8 @@ CREATE TABLE IF NOT EXISTS cron_jobs (
 -- 索引
 CREATE INDEX IF NOT EXISTS idx_tq_status ON task_queue(status);
 CREATE INDEX IF NOT EXISTS idx_tq_priority ON task_queue(priority DESC, created_at ASC);
+-- Dashboard 按状态取前 N 条：过滤与排序都在索引内完成
+CREATE INDEX IF NOT EXISTS idx_tq_status_priority ON task_queue(status, priority DESC, created_at ASC);
 CREATE INDEX IF NOT EXISTS idx_eh_task ON execution_history(task_id);
 CREATE INDEX IF NOT EXISTS idx_eh_time ON execution_history(started_at DESC);
 CREATE INDEX IF NOT EXISTS idx_st_enabled ON scheduled_tasks(enabled);
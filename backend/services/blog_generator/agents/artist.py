@@ -17,6 +17,7 @@ from ..schemas.outputs import (
 from ..structured_output import parse_structured_output, repair_legacy_json
 from ...image_service import get_image_service, AspectRatio, ImageSize
 from ..image_enhancement import ImageEnhancementPipeline
+from ..utils.mermaid_linter import autofix_mermaid, lint_mermaid
 
 # 从环境变量读取并行配置，默认为 3
 MAX_WORKERS = int(os.environ.get('BLOG_GENERATOR_MAX_WORKERS', '3'))
@@ -250,21 +251,21 @@ class ArtistAgent:
         return code.strip()
 
     def _validate_mermaid(self, code: str) -> tuple:
-        """基础语法校验，返回 (is_valid, error_msg)"""
-        errors = []
-        first_line = code.strip().split('\n')[0].strip() if code.strip() else ''
-        if not re.match(r'^(flowchart|graph|sequenceDiagram|classDiagram|stateDiagram|gantt|pie|erDiagram|mindmap|timeline)', first_line):
-            errors.append("缺少图表类型声明")
-        subgraph_count = len(re.findall(r'\bsubgraph\b', code))
-        end_count = len(re.findall(r'^\s*end\s*$', code, re.MULTILINE))
-        if subgraph_count != end_count:
-            errors.append(f"subgraph({subgraph_count}) 与 end({end_count}) 不匹配")
+        """本地语法校验，返回 (is_valid, error_msg)"""
+        errors = lint_mermaid(code)
         if errors:
             return False, "; ".join(errors)
         return True, "OK"
 
     def _repair_mermaid(self, mermaid_code: str, error_msg: str) -> str:
-        """用 LLM 修复 Mermaid 语法错误（最多 2 次重试）"""
+        """修复 Mermaid 语法错误：先本地确定性修复，仍失败再用 LLM 修复（最多 2 次重试）"""
+        local = autofix_mermaid(mermaid_code)
+        if local.is_valid:
+            logger.info(f"[Mermaid] 本地修复成功: {'; '.join(local.fixes)}")
+            return local.code
+        mermaid_code = local.code
+        error_msg = "; ".join(local.errors)
+
         max_retries = int(os.getenv('MERMAID_REPAIR_MAX_RETRIES', '2'))
         for attempt in range(max_retries):
             logger.info(f"[Mermaid] 语法修复 (尝试 {attempt + 1}/{max_retries}): {error_msg}")
@@ -278,13 +279,12 @@ class ArtistAgent:
 修复要求：只修复语法错误，不改变图表内容和结构。节点文本不要用 \\n。含特殊字符的文本用双引号包裹。节点 ID 只用英文字母和数字。确保 subgraph 都有对应的 end。"""
             try:
                 response = self.llm.chat(messages=[{"role": "user", "content": prompt}])
-                repaired = self._sanitize_mermaid(response.strip())
-                is_valid, new_error = self._validate_mermaid(repaired)
-                if is_valid:
+                repaired = autofix_mermaid(self._sanitize_mermaid(response.strip()))
+                if repaired.is_valid:
                     logger.info("[Mermaid] 语法修复成功")
-                    return repaired
-                error_msg = new_error
-                mermaid_code = repaired
+                    return repaired.code
+                error_msg = "; ".join(repaired.errors)
+                mermaid_code = repaired.code
             except Exception as e:
                 logger.error(f"[Mermaid] 修复调用失败: {e}")
                 break
@@ -698,7 +698,7 @@ class ArtistAgent:
         image_mode = "mini_section" if target_length in ('mini', 'short') else "full"
         if image_mode == "mini_section":
             logger.info(f"[{target_length}] 模式：使用章节配图生成")
-            return self._generate_mini_section_images(state, sections)
+            return self._generate_mini_section_images(state, sections, max_workers)
         
         # ========== 新增：ASCII 流程图预处理 ==========
         # 检测并将 ASCII 流程图转换为占位符，复用现有配图生成流程
@@ -956,7 +956,7 @@ class ArtistAgent:
         
         if use_parallel:
             # 并行执行
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total_image_count))) as executor:
                 futures = {executor.submit(generate_single_task, task): task for task in tasks}
                 
                 for future in as_completed(futures):
@@ -1079,7 +1079,8 @@ class ArtistAgent:
     def _generate_mini_section_images(
         self,
         state: Dict[str, Any],
-        sections: List[Dict[str, Any]]
+        sections: List[Dict[str, Any]],
+        max_workers: int = None,
     ) -> Dict[str, Any]:
         """
         Mini 模式：为每个章节生成统一风格的配图
@@ -1091,6 +1092,7 @@ class ArtistAgent:
         Args:
             state: 共享状态
             sections: 章节列表
+            max_workers: 最大并行数，默认 BLOG_GENERATOR_MAX_WORKERS
             
         Returns:
             更新后的状态
@@ -1121,7 +1123,9 @@ class ArtistAgent:
         images = []
         section_images = []  # 用于视频生成的图片 URL 列表
         
-        max_workers = MAX_WORKERS
+        if max_workers is None:
+            max_workers = MAX_WORKERS
+        max_workers = max(1, min(max_workers, len(sections)))
         
         def generate_section_image(idx: int, section: Dict[str, Any]):
             """生成单个章节的配图"""
@@ -76,6 +76,7 @@ class ResearcherAgent:
         if self.deep_scrape_enabled:
             try:
                 from ..services.deep_scraper import DeepScraper
+                from ..services.page_cache import get_page_cache
                 self._deep_scraper = DeepScraper(
                     jina_api_key=os.environ.get('JINA_API_KEY'),
                     llm_service=llm_client,
@@ -87,6 +88,9 @@ class ResearcherAgent:
                     mini_timeout=float(os.environ.get('DEEP_SCRAPE_MINI_TIMEOUT', '8')),
                     mini_total_timeout=float(os.environ.get('DEEP_SCRAPE_MINI_TOTAL_TIMEOUT', '20')),
                     mini_top_n=int(os.environ.get('DEEP_SCRAPE_MINI_TOP_N', '1')),
+                    page_cache=get_page_cache(),
+                    max_concurrency=int(os.environ.get('DEEP_SCRAPE_CONCURRENCY', '4')),
+                    per_host_limit=int(os.environ.get('DEEP_SCRAPE_PER_HOST', '2')),
                 )
                 logger.info("🔗 深度抓取已启用 (Jina + httpx)")
             except Exception as e:
@@ -241,7 +245,9 @@ class ResearcherAgent:
                         'type': 'search_started',
                         'data': {'query': query, 'engine': 'zhipu'}
                     })
-                result = self.search_service.search(query, max_results=max_results // len(queries))
+                result = self.search_service.search(
+                    query, max_results=max_results // len(queries), task_id=self.task_id,
+                )
                 if result.get('success') and result.get('results'):
                     all_results.extend(result['results'])
                     # 推送 search_results 事件
@@ -333,7 +339,8 @@ class ResearcherAgent:
             result = smart_service.search(
                 topic=topic,
                 article_type=target_audience,
-                max_results_per_source=5
+                max_results_per_source=5,
+                task_id=self.task_id,
             )
 
             if result.get('success'):
@@ -669,6 +676,7 @@ class ResearcherAgent:
             logger.info(f"🔬 启动子查询并行研究...")
             sq_result = self._sub_query_engine.run(
                 topic=topic, target_audience=target_audience, max_results=15,
+                task_id=self.task_id,
             )
             search_results = sq_result['results']
             state['sub_queries'] = sq_result['sub_queries']
@@ -694,23 +702,25 @@ class ResearcherAgent:
             # ✅ 有文档 → 走知识融合逻辑
             logger.info("使用知识融合模式")
             
-            # 将文档知识转换为 KnowledgeItem
-            doc_items = self.knowledge_service.prepare_document_knowledge(
-                [{'filename': d.get('file_name', ''), 'markdown_content': d.get('content', '')} 
-                 for d in document_knowledge]
-            )
+            # 上传的文档整篇作为一个分块，与搜索结果一起按主题相关性排序、去重
+            documents = [{'id': i, 'filename': d.get('file_name', '')} for i, d in enumerate(document_knowledge)]
+            chunks = [{'document_id': i, 'content': d.get('content', '')} for i, d in enumerate(document_knowledge)]
             
             # 将搜索结果转换为 KnowledgeItem
             web_items = self.knowledge_service.convert_search_results(search_results)
             
             # 融合知识
-            merged_knowledge = self.knowledge_service.get_merged_knowledge(
-                document_knowledge=doc_items,
-                web_knowledge=web_items
+            merged_knowledge = self.knowledge_service.get_merged_knowledge_v2(
+                documents=documents,
+                chunks=chunks,
+                images=[],
+                web_knowledge=web_items,
+                max_items=20,
+                query=topic
             )
             
-            # 整理为 Prompt 可用格式
-            summary = self.knowledge_service.summarize_for_prompt(merged_knowledge)
+            # 整理为 Prompt 可用格式（按相关性装箱到 token 预算）
+            summary = self.knowledge_service.summarize_for_prompt_v2(merged_knowledge)
             
             # 记录知识来源统计
             state['knowledge_source_stats'] = {
@@ -732,6 +742,7 @@ class ResearcherAgent:
                     topic=topic,
                     target_audience=target_audience,
                     initial_results=search_results,
+                    task_id=self.task_id,
                 )
                 search_results = dr_result['results']
                 state['deep_research_stats'] = {
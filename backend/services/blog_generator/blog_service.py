@@ -1020,18 +1020,17 @@ class BlogService:
                     # 如果没找到，就在开头插入
                     final_markdown = cover_section + markdown
             
-            # 写入文件（102.07 原子写入，防止崩溃时产生半写文件）
-            from utils.atomic_write import atomic_write
-            atomic_write(filepath, final_markdown)
-            
-            # 后处理：修复分割线前后的换行符
+            # 后处理：修复分割线前后的换行符（在内存中完成，只写一次文件）
             try:
-                formatter = MarkdownFormatter()
-                formatter.process_file(filepath)
+                final_markdown = MarkdownFormatter().format_content(final_markdown)
                 logger.info(f"Markdown 格式化完成: {filepath}")
             except Exception as format_error:
                 logger.warning(f"Markdown 格式化失败（非致命错误）: {format_error}")
             
+            # 写入文件（102.07 原子写入，防止崩溃时产生半写文件）
+            from utils.atomic_write import atomic_write
+            atomic_write(filepath, final_markdown)
+            
             logger.info(f"Markdown 已保存: {filepath}")
             return filepath
             
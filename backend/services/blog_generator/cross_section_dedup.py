@@ -72,7 +72,9 @@ class CrossSectionDeduplicator:
             重复对列表: [{'section_a': idx, 'para_a': str, 'section_b': idx,
                           'para_b': str, 'similarity': float}]
         """
-        from .services.semantic_compressor import _cosine_similarity, EmbeddingProvider
+        import numpy as np
+
+        from .services.semantic_compressor import EmbeddingProvider
 
         # 收集所有段落
         all_paragraphs: List[Tuple[int, str]] = []  # (section_idx, paragraph_text)
@@ -86,31 +88,27 @@ class CrossSectionDeduplicator:
 
         # 生成 embedding
         try:
-            provider = EmbeddingProvider()
+            provider = EmbeddingProvider(shared_cache=True)
             texts = [p[1] for p in all_paragraphs]
-            embeddings = provider.embed(texts)
+            sims = provider.pairwise_similarity(texts)
         except Exception as e:
             logger.warning(f"[Dedup] Embedding 生成失败: {e}")
             return []
 
-        # 两两比较（只比较不同章节的段落）
+        # 相似度矩阵取上三角，只比较不同章节的段落
+        section_ids = np.array([p[0] for p in all_paragraphs])
+        candidates = np.triu(sims >= self.threshold, k=1)
+        candidates &= section_ids[:, None] != section_ids[None, :]
+
         duplicates = []
-        for i in range(len(all_paragraphs)):
-            for j in range(i + 1, len(all_paragraphs)):
-                sec_i, _ = all_paragraphs[i]
-                sec_j, _ = all_paragraphs[j]
-                if sec_i == sec_j:
-                    continue  # 同章节内不去重
-
-                sim = _cosine_similarity(embeddings[i], embeddings[j])
-                if sim >= self.threshold:
-                    duplicates.append({
-                        'section_a': sec_i,
-                        'para_a': all_paragraphs[i][1],
-                        'section_b': sec_j,
-                        'para_b': all_paragraphs[j][1],
-                        'similarity': round(sim, 4),
-                    })
+        for i, j in np.argwhere(candidates):
+            duplicates.append({
+                'section_a': all_paragraphs[i][0],
+                'para_a': all_paragraphs[i][1],
+                'section_b': all_paragraphs[j][0],
+                'para_b': all_paragraphs[j][1],
+                'similarity': round(float(sims[i, j]), 4),
+            })
 
         logger.info(f"[Dedup] 检测到 {len(duplicates)} 对跨章节重复段落")
         return duplicates
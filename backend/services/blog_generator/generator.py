@@ -158,6 +158,9 @@ class BlogGenerator:
         self._env_factcheck = os.getenv('FACTCHECK_ENABLED', 'true').lower() == 'true'
         self._env_text_cleanup = os.getenv('TEXT_CLEANUP_ENABLED', 'true').lower() == 'true'
         self._env_summary = os.getenv('SUMMARY_GENERATOR_ENABLED', 'true').lower() == 'true'
+        # 配图并行数：未配置时沿用 BLOG_GENERATOR_MAX_WORKERS
+        artist_workers = os.getenv('ARTIST_MAX_WORKERS', '')
+        self._artist_max_workers = int(artist_workers) if artist_workers else None
 
         # 初始化增强 Agent（只要环境变量没禁用就创建实例）
         self.humanizer = HumanizerAgent(_proxy('humanizer')) if self._env_humanizer else None
@@ -220,10 +223,10 @@ class BlogGenerator:
         self._memory_storage = None
         if os.getenv('MEMORY_ENABLED', 'false').lower() == 'true':
             try:
-                from .memory import MemoryStorage, BlogMemoryConfig
+                from .memory import BlogMemoryConfig, create_memory_storage
                 mem_config = BlogMemoryConfig.from_env()
-                self._memory_storage = MemoryStorage(storage_path=mem_config.storage_path)
-                logger.info("102.03 MemoryStorage 已启用")
+                self._memory_storage = create_memory_storage(mem_config)
+                logger.info(f"102.03 MemoryStorage 已启用 ({mem_config.storage_backend})")
             except Exception as e:
                 logger.warning(f"MemoryStorage 初始化失败: {e}")
 
@@ -316,6 +319,7 @@ class BlogGenerator:
                 image_task_registry=self._image_task_registry,
                 executor_factory=ThreadPoolExecutor,
                 uuid_factory=lambda: str(uuid.uuid4()),
+                artist_max_workers=self._artist_max_workers,
             ),
             "cross_section_dedup": partial(
                 cross_section_dedup_node,
@@ -134,7 +134,6 @@ class TaskEventBridge:
             researcher.task_id = self.task_id
             if researcher.search_service:
                 researcher.search_service.task_manager = self.task_manager
-                researcher.search_service.task_id = self.task_id
         except Exception:
             pass
         try:
@@ -145,6 +144,9 @@ class TaskEventBridge:
             pass
 
     def close(self):
+        from utils.query_deduplicator import release_task_deduplicator
+
+        release_task_deduplicator(self.task_id)
         if self.handler is None:
             return
         for logger_name in self.logger_names:
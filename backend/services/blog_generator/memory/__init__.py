@@ -1,4 +1,5 @@
-from .storage import MemoryStorage, create_empty_memory
+from .storage import MemoryStorage, create_empty_memory, create_memory_storage
+from .sqlite_storage import SQLiteMemoryStorage
 from .config import BlogMemoryConfig
 
-__all__ = ["MemoryStorage", "BlogMemoryConfig", "create_empty_memory"]
+__all__ = ["MemoryStorage", "SQLiteMemoryStorage", "BlogMemoryConfig", "create_empty_memory", "create_memory_storage"]
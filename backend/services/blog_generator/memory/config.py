@@ -1,5 +1,8 @@
 """
 BlogMemoryConfig — 博客记忆系统配置（102.03）
+
+环境变量：
+- MEMORY_STORAGE_BACKEND: json | sqlite（默认 sqlite；sqlite 首次启动时自动导入旧 JSON 文件）
 """
 
 import os
@@ -10,7 +13,7 @@ from dataclasses import dataclass, field
 class BlogMemoryConfig:
     """博客记忆系统配置"""
     enabled: bool = True
-    storage_backend: str = "json"       # json | sqlite（预留）
+    storage_backend: str = "sqlite"     # json | sqlite
     storage_path: str = "data/memory/"
     debounce_seconds: int = 10
     max_facts: int = 200
@@ -23,6 +26,7 @@ class BlogMemoryConfig:
         """从环境变量加载配置"""
         return cls(
             enabled=os.getenv("MEMORY_ENABLED", "true").lower() == "true",
+            storage_backend=os.getenv("MEMORY_STORAGE_BACKEND", "sqlite").lower(),
             storage_path=os.getenv("MEMORY_STORAGE_PATH", "data/memory/"),
             debounce_seconds=int(os.getenv("MEMORY_DEBOUNCE_SECONDS", "10")),
             max_facts=int(os.getenv("MEMORY_MAX_FACTS", "200")),
@@ -0,0 +1,431 @@
+"""
+SQLiteMemoryStorage — SQLite 事务型用户记忆存储（与 MemoryStorage 接口一致）
+
+JSON 文件存储每次读写都要解析/序列化整个用户文件，同一用户的并发任务会互相覆盖。
+本模块按条目存储：
+- memory_users: 用户元信息（version、lastUpdated）
+- memory_profile: 每个 profile 字段一行（section, field）
+- memory_facts: 每条事实一行，按 (user_id, category, seq) / (user_id, confidence) 建索引
+- memory_facts_fts: 事实内容的 FTS5 索引（CJK 按单字切分），按查询取 top-k 相关事实注入 Prompt
+
+每次写操作是一个 BEGIN IMMEDIATE 事务，只触及相关行；多线程、多进程写同一用户不会丢失更新。
+首次打开时把存储目录下旧的 {user_id}.json 导入数据库，并重命名为 .json.migrated。
+"""
+
+import json
+import logging
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from repositories.database.history_search import query_terms, segment
+
+from .storage import create_empty_memory
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "memory.db"
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS memory_users (
+        user_id TEXT PRIMARY KEY,
+        version TEXT NOT NULL DEFAULT '1.0',
+        created_at TEXT NOT NULL,
+        last_updated TEXT NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS memory_profile (
+        user_id TEXT NOT NULL,
+        section TEXT NOT NULL,
+        field TEXT NOT NULL,
+        summary TEXT NOT NULL DEFAULT '',
+        updated_at TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (user_id, section, field)
+    );
+
+    CREATE TABLE IF NOT EXISTS memory_facts (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        id TEXT NOT NULL UNIQUE,
+        user_id TEXT NOT NULL,
+        content TEXT NOT NULL,
+        category TEXT NOT NULL DEFAULT 'preference',
+        confidence REAL NOT NULL DEFAULT 0.9,
+        source TEXT NOT NULL DEFAULT '',
+        created_at TEXT NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_memory_facts_user_category ON memory_facts(user_id, category, seq);
+    CREATE INDEX IF NOT EXISTS idx_memory_facts_user_confidence ON memory_facts(user_id, confidence, seq);
+"""
+
+_FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS memory_facts_fts USING fts5(
+        content,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def build_relevance_query(query: str) -> str:
+    """查询 → FTS5 MATCH 表达式（任一词命中即可；中文按相邻二字短语，拉丁词前缀匹配）"""
+    clauses = []
+    for term in query_terms(query):
+        tokens = segment(term).split()
+        if len(tokens) == 1:
+            clauses.append('"' + tokens[0].replace('"', '""') + '"*')
+        else:
+            clauses.extend(f'"{a} {b}"' for a, b in zip(tokens, tokens[1:]))
+    return ' OR '.join(dict.fromkeys(clauses))
+
+
+def _fact_to_dict(row: sqlite3.Row) -> dict:
+    return {
+        "id": row["id"],
+        "content": row["content"],
+        "category": row["category"],
+        "confidence": row["confidence"],
+        "createdAt": row["created_at"],
+        "source": row["source"],
+    }
+
+
+class SQLiteMemoryStorage:
+    """
+    记忆存储层 — SQLite 按条目存储
+
+    接口与 MemoryStorage 一致，另提供：
+    - get_recent_facts: 按类别 + 时间倒序查询
+    - search_facts: 按查询取 top-k 相关事实
+    - format_for_injection(query=...): 注入与当前主题最相关的事实
+    """
+
+    def __init__(self, storage_path: str = "data/memory/", db_path: str = None):
+        self._base_path = Path(storage_path)
+        self._base_path.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path or str(self._base_path / DB_FILENAME)
+        self._fts = True
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            try:
+                conn.execute(_FTS_SCHEMA)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite 不支持 FTS5，记忆相关性检索降级为按置信度排序: {e}")
+                self._fts = False
+        self._migrate_json_files()
+
+    @contextmanager
+    def _connect(self, write: bool = False):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            if write:
+                # 写事务一开始就持有写锁，读改写之间不会插入其他写者
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            if write:
+                conn.execute("COMMIT")
+        except Exception:
+            if write and conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    # ========== 迁移 ==========
+
+    def _migrate_json_files(self):
+        for file_path in sorted(self._base_path.glob("*.json")):
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    memory = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.error(f"记忆文件迁移失败，保留原文件 [{file_path.name}]: {e}")
+                continue
+            user_id = memory.get("userId") or file_path.stem
+            with self._connect(write=True) as conn:
+                known = conn.execute("SELECT 1 FROM memory_users WHERE user_id = ?", (user_id,)).fetchone()
+                if not known:
+                    self._replace_all(conn, user_id, memory)
+            file_path.rename(file_path.with_name(file_path.name + ".migrated"))
+            logger.info(f"记忆文件已迁移到 SQLite [{user_id}]: {len(memory.get('facts', []))} 条事实")
+
+    # ========== 行级读写（调用方提供连接） ==========
+
+    def _touch_user(self, conn: sqlite3.Connection, user_id: str, version: str = "1.0") -> str:
+        now = _now()
+        conn.execute(
+            "INSERT INTO memory_users (user_id, version, created_at, last_updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET last_updated = excluded.last_updated",
+            (user_id, version, now, now),
+        )
+        return now
+
+    def _insert_fact(self, conn: sqlite3.Connection, user_id: str, fact: dict):
+        cursor = conn.execute(
+            "INSERT INTO memory_facts (id, user_id, content, category, confidence, source, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                fact.get("id") or f"fact_{uuid.uuid4().hex[:8]}",
+                user_id,
+                fact.get("content", ""),
+                fact.get("category", "preference"),
+                fact.get("confidence", 0.9),
+                fact.get("source", ""),
+                fact.get("createdAt") or _now(),
+            ),
+        )
+        if self._fts:
+            conn.execute(
+                "INSERT INTO memory_facts_fts (rowid, content) VALUES (?, ?)",
+                (cursor.lastrowid, segment(fact.get("content", ""))),
+            )
+
+    def _delete_facts(self, conn: sqlite3.Connection, where: str, params: tuple) -> int:
+        if self._fts:
+            conn.execute(
+                f"DELETE FROM memory_facts_fts WHERE rowid IN (SELECT seq FROM memory_facts WHERE {where})",
+                params,
+            )
+        return conn.execute(f"DELETE FROM memory_facts WHERE {where}", params).rowcount
+
+    def _replace_all(self, conn: sqlite3.Connection, user_id: str, memory: dict):
+        now = self._touch_user(conn, user_id, memory.get("version", "1.0"))
+        conn.execute(
+            "UPDATE memory_users SET version = ?, last_updated = ? WHERE user_id = ?",
+            (memory.get("version", "1.0"), memory.get("lastUpdated") or now, user_id),
+        )
+        conn.execute("DELETE FROM memory_profile WHERE user_id = ?", (user_id,))
+        for section, fields in memory.items():
+            if not isinstance(fields, dict):
+                continue
+            for field, value in fields.items():
+                if isinstance(value, dict) and "summary" in value:
+                    conn.execute(
+                        "INSERT INTO memory_profile (user_id, section, field, summary, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (user_id, section, field, value.get("summary", ""), value.get("updatedAt", "")),
+                    )
+        self._delete_facts(conn, "user_id = ?", (user_id,))
+        for fact in memory.get("facts", []):
+            self._insert_fact(conn, user_id, fact)
+
+    # ========== 公共接口（与 MemoryStorage 一致） ==========
+
+    def load(self, user_id: str) -> dict:
+        """组装用户记忆（结构同 create_empty_memory）"""
+        memory = create_empty_memory(user_id)
+        with self._connect() as conn:
+            user = conn.execute(
+                "SELECT version, last_updated FROM memory_users WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if user:
+                memory["version"] = user["version"]
+                memory["lastUpdated"] = user["last_updated"]
+            for row in conn.execute(
+                "SELECT section, field, summary, updated_at FROM memory_profile WHERE user_id = ?",
+                (user_id,),
+            ):
+                memory.setdefault(row["section"], {})[row["field"]] = {
+                    "summary": row["summary"],
+                    "updatedAt": row["updated_at"],
+                }
+            memory["facts"] = [
+                _fact_to_dict(row)
+                for row in conn.execute("SELECT * FROM memory_facts WHERE user_id = ? ORDER BY seq", (user_id,))
+            ]
+        return memory
+
+    def save(self, user_id: str, memory_data: dict) -> bool:
+        """整体替换用户记忆（兼容接口；增量修改请用 add_fact / update_profile_field）"""
+        try:
+            memory_data["lastUpdated"] = _now()
+            with self._connect(write=True) as conn:
+                self._replace_all(conn, user_id, memory_data)
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"记忆写入失败 [{user_id}]: {e}")
+            return False
+
+    def add_fact(
+        self,
+        user_id: str,
+        content: str,
+        category: str = "preference",
+        confidence: float = 0.9,
+        source: str = "",
+        max_facts: int = 200,
+    ) -> Optional[str]:
+        """添加一条事实（单行插入；超过上限时移除置信度最低、最早的事实）"""
+        fact_id = f"fact_{uuid.uuid4().hex[:8]}"
+        with self._connect(write=True) as conn:
+            self._touch_user(conn, user_id)
+            self._insert_fact(conn, user_id, {
+                "id": fact_id,
+                "content": content,
+                "category": category,
+                "confidence": confidence,
+                "createdAt": _now(),
+                "source": source,
+            })
+            count = conn.execute("SELECT COUNT(*) FROM memory_facts WHERE user_id = ?", (user_id,)).fetchone()[0]
+            if count > max_facts:
+                self._delete_facts(
+                    conn,
+                    "seq IN (SELECT seq FROM memory_facts WHERE user_id = ? ORDER BY confidence, seq LIMIT ?)",
+                    (user_id, count - max_facts),
+                )
+        return fact_id
+
+    def remove_fact(self, user_id: str, fact_id: str) -> bool:
+        """删除一条事实"""
+        with self._connect(write=True) as conn:
+            removed = self._delete_facts(conn, "user_id = ? AND id = ?", (user_id, fact_id))
+            if removed:
+                self._touch_user(conn, user_id)
+        return removed > 0
+
+    def get_facts_by_category(self, user_id: str, category: str) -> List[dict]:
+        """按类别查询事实（走 (user_id, category) 索引）"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM memory_facts WHERE user_id = ? AND category = ? ORDER BY seq",
+                (user_id, category),
+            ).fetchall()
+        return [_fact_to_dict(row) for row in rows]
+
+    def get_recent_facts(self, user_id: str, category: str = None, limit: int = 20) -> List[dict]:
+        """最近添加的事实（可按类别过滤），新的在前"""
+        with self._connect() as conn:
+            if category:
+                rows = conn.execute(
+                    "SELECT * FROM memory_facts WHERE user_id = ? AND category = ? ORDER BY seq DESC LIMIT ?",
+                    (user_id, category, limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM memory_facts WHERE user_id = ? ORDER BY seq DESC LIMIT ?",
+                    (user_id, limit),
+                ).fetchall()
+        return [_fact_to_dict(row) for row in rows]
+
+    def get_top_facts(self, user_id: str, limit: int = 10) -> List[dict]:
+        """置信度最高的事实"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM memory_facts WHERE user_id = ? ORDER BY confidence DESC, seq LIMIT ?",
+                (user_id, limit),
+            ).fetchall()
+        return [_fact_to_dict(row) for row in rows]
+
+    def search_facts(self, user_id: str, query: str, top_k: int = 10) -> List[dict]:
+        """与查询最相关的 top-k 事实（BM25，同分按置信度）；无命中返回空列表"""
+        match = build_relevance_query(query)
+        if not match or not self._fts:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT f.* FROM memory_facts_fts JOIN memory_facts f ON f.seq = memory_facts_fts.rowid "
+                "WHERE memory_facts_fts MATCH ? AND f.user_id = ? "
+                "ORDER BY bm25(memory_facts_fts), f.confidence DESC LIMIT ?",
+                (match, user_id, top_k),
+            ).fetchall()
+        return [_fact_to_dict(row) for row in rows]
+
+    def update_profile_field(
+        self, user_id: str, section: str, field: str, summary: str
+    ) -> bool:
+        """更新记忆 profile 字段（单行 upsert）"""
+        template = create_empty_memory(user_id)
+        with self._connect(write=True) as conn:
+            known = field in template.get(section, {}) if isinstance(template.get(section), dict) else False
+            if not known and not conn.execute(
+                "SELECT 1 FROM memory_profile WHERE user_id = ? AND section = ? AND field = ?",
+                (user_id, section, field),
+            ).fetchone():
+                return False
+            now = self._touch_user(conn, user_id)
+            conn.execute(
+                "INSERT INTO memory_profile (user_id, section, field, summary, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(user_id, section, field) DO UPDATE SET "
+                "summary = excluded.summary, updated_at = excluded.updated_at",
+                (user_id, section, field, summary, now),
+            )
+        return True
+
+    def _profile_summaries(self, user_id: str) -> Dict[str, Dict[str, str]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT section, field, summary FROM memory_profile WHERE user_id = ? AND summary != ''",
+                (user_id,),
+            ).fetchall()
+        summaries: Dict[str, Dict[str, str]] = {}
+        for row in rows:
+            summaries.setdefault(row["section"], {})[row["field"]] = row["summary"]
+        return summaries
+
+    def format_for_injection(self, user_id: str, query: str = None, top_k: int = 10) -> str:
+        """格式化记忆为系统提示词注入片段；传入 query 时优先注入与之相关的事实"""
+        summaries = self._profile_summaries(user_id)
+
+        parts = []
+
+        # Writing Profile
+        wp = summaries.get("writingProfile", {})
+        profile_lines = []
+        for key, label in [
+            ("preferredStyle", "写作风格"),
+            ("preferredLength", "文章长度"),
+            ("preferredAudience", "目标受众"),
+            ("preferredImageStyle", "配图风格"),
+        ]:
+            if wp.get(key):
+                profile_lines.append(f"- {label}: {wp[key]}")
+        if profile_lines:
+            parts.append("用户写作偏好:\n" + "\n".join(profile_lines))
+
+        # Topic History
+        th = summaries.get("topicHistory", {})
+        topic_lines = []
+        for key, label in [
+            ("recentTopics", "近期主题"),
+            ("topicClusters", "核心领域"),
+            ("avoidTopics", "已写主题"),
+        ]:
+            if th.get(key):
+                topic_lines.append(f"- {label}: {th[key]}")
+        if topic_lines:
+            parts.append("主题历史:\n" + "\n".join(topic_lines))
+
+        # Key Facts：相关事实在前，不足 top_k 时用高置信度事实补齐
+        facts = self.search_facts(user_id, query, top_k) if query else []
+        if len(facts) < top_k:
+            chosen = {f["id"] for f in facts}
+            facts += [f for f in self.get_top_facts(user_id, top_k) if f["id"] not in chosen][:top_k - len(facts)]
+        if facts:
+            fact_lines = [f"- [{f['category']}] {f['content']}" for f in facts]
+            parts.append("关键事实:\n" + "\n".join(fact_lines))
+
+        if not parts:
+            return ""
+
+        return "<user-memory>\n" + "\n\n".join(parts) + "\n</user-memory>"
+
+    def exists(self, user_id: str) -> bool:
+        """检查用户是否有记忆"""
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM memory_users WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def delete(self, user_id: str) -> bool:
+        """删除用户记忆"""
+        with self._connect(write=True) as conn:
+            self._delete_facts(conn, "user_id = ?", (user_id,))
+            conn.execute("DELETE FROM memory_profile WHERE user_id = ?", (user_id,))
+            return conn.execute("DELETE FROM memory_users WHERE user_id = ?", (user_id,)).rowcount > 0
@@ -3,6 +3,9 @@ MemoryStorage — 按用户隔离的 JSON 文件持久化记忆存储（102.03
 
 借鉴 DeerFlow memory.json 存储 + mtime 缓存 + 原子写入模式，
 适配 VibeBlog 多用户博客生成场景。
+
+默认后端为 SQLite（见 sqlite_storage.py），通过 create_memory_storage 按
+MEMORY_STORAGE_BACKEND (json | sqlite) 选择。
 """
 
 import json
@@ -164,8 +167,8 @@ class MemoryStorage:
         }
         return self.save(user_id, memory)
 
-    def format_for_injection(self, user_id: str) -> str:
-        """格式化记忆为系统提示词注入片段"""
+    def format_for_injection(self, user_id: str, query: str = None, top_k: int = 10) -> str:
+        """格式化记忆为系统提示词注入片段（JSON 后端不做相关性检索，query 仅为接口兼容）"""
         memory = self.load(user_id)
 
         parts = []
@@ -202,7 +205,7 @@ class MemoryStorage:
         # Key Facts
         facts = memory.get("facts", [])
         if facts:
-            top_facts = sorted(facts, key=lambda f: f.get("confidence", 0), reverse=True)[:10]
+            top_facts = sorted(facts, key=lambda f: f.get("confidence", 0), reverse=True)[:top_k]
             fact_lines = [f"- [{f['category']}] {f['content']}" for f in top_facts]
             parts.append("关键事实:\n" + "\n".join(fact_lines))
 
@@ -224,3 +227,17 @@ class MemoryStorage:
             file_path.unlink()
             return True
         return False
+
+
+def create_memory_storage(config=None):
+    """按配置创建记忆存储（storage_backend: json | sqlite）"""
+    from .config import BlogMemoryConfig
+
+    config = config or BlogMemoryConfig.from_env()
+    if config.storage_backend == "json":
+        return MemoryStorage(storage_path=config.storage_path)
+    if config.storage_backend != "sqlite":
+        raise ValueError(f"未知的记忆存储后端: {config.storage_backend}")
+    from .sqlite_storage import SQLiteMemoryStorage
+
+    return SQLiteMemoryStorage(storage_path=config.storage_path)
@@ -8,6 +8,37 @@ from . import is_enabled, resolve_style
 logger = logging.getLogger("services.blog_generator.generator")
 _MISSING_IMAGE_TASK = object()
 
+# ArtistAgent.run 只读取这些字段；其余（搜索结果、知识库等）不随配图任务复制
+ARTIST_STATE_KEYS = (
+    "error",
+    "sections",
+    "outline",
+    "topic",
+    "target_length",
+    "target_images_count",
+    "image_preplan",
+    "image_style",
+    "aspect_ratio",
+    "audience_adaptation",
+    "image_enhancement",
+    "enhancement_style",
+)
+# 配图会修改的字段需要独立副本，避免与主流程并发写同一对象
+_ARTIST_MUTABLE_KEYS = ("sections",)
+
+
+def build_artist_state(state):
+    """Build the slim, detached state snapshot handed to the async artist."""
+    artist_state = {}
+    for key in ARTIST_STATE_KEYS:
+        if key not in state:
+            continue
+        value = state[key]
+        if key in _ARTIST_MUTABLE_KEYS:
+            value = copy.deepcopy(value)
+        artist_state[key] = value
+    return artist_state
+
 
 def coder_and_artist_node(
     state,
@@ -17,6 +48,7 @@ def coder_and_artist_node(
     image_task_registry,
     executor_factory,
     uuid_factory,
+    artist_max_workers=None,
 ):
     logger.info("=== Step 5: 代码生成 + 配图异步启动 ===")
     try:
@@ -28,11 +60,13 @@ def coder_and_artist_node(
     state["sections"] = artist.preprocess_ascii_flowcharts(
         state.get("sections", [])
     )
-    artist_state = copy.deepcopy(state)
+    artist_state = build_artist_state(state)
     image_executor = executor_factory(
         max_workers=1, thread_name_prefix="artist"
     )
-    future = image_executor.submit(artist.run, artist_state)
+    future = image_executor.submit(
+        artist.run, artist_state, max_workers=artist_max_workers
+    )
     image_task_id = uuid_factory()
     image_task_registry.register(image_task_id, future, image_executor)
     state["_image_task_id"] = image_task_id
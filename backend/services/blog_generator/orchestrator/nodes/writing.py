@@ -28,7 +28,7 @@ def writer_node(state, *, writer, layer_validator, memory_storage, configured_st
     if memory_storage:
         try:
             memory_injection = memory_storage.format_for_injection(
-                state.get("user_id", "default")
+                state.get("user_id", "default"), query=state.get("topic")
             )
             if memory_injection:
                 background = state.get("background_knowledge", "")
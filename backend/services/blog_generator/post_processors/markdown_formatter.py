@@ -3,12 +3,20 @@ Markdown 后处理器：修复分割线前后的换行符问题
 
 用于处理生成的 Markdown 文件中分割线（---）前后缺少换行符的问题，
 确保 Markdown 格式规范且渲染正确。
+
+format_content 以逐行流水线一次遍历完成全部修复（结果与依次执行
+fix_separator_spacing → fix_multiple_blank_lines → fix_heading_spacing 完全一致），
+不再对整篇文章做多轮正则扫描；process_directory 多进程并行处理。
 """
 
 import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+
+from utils.atomic_write import atomic_write
 
 
 class MarkdownFormatter:
@@ -100,7 +108,7 @@ class MarkdownFormatter:
     
     def format_content(self, content: str) -> str:
         """
-        执行完整的 Markdown 格式化流程
+        执行完整的 Markdown 格式化流程（单次逐行遍历）
         
         Args:
             content (str): 原始 Markdown 内容
@@ -108,19 +116,22 @@ class MarkdownFormatter:
         Returns:
             str: 格式化后的内容
         """
-        # Step 1: 修复分割线间距
-        content = self.fix_separator_spacing(content)
+        lines = content.split('\n')
+        # Step 1: 分割线间距 → Step 2: 多余空行 → Step 3: 标题前后空行
+        lines = _fix_separator_lines(lines)
+        lines = _collapse_blank_lines(lines, max_blanks=2)
+        lines = _blank_before_headings(lines)
+        lines = _blank_after_headings(lines)
         
-        # Step 2: 修复多余空行
+        # Step 4: 移除文件末尾多余空行（保留单个换行符）
+        return '\n'.join(lines).rstrip() + '\n'
+    
+    def format_content_legacy(self, content: str) -> str:
+        """多轮正则实现（保留作对照基准）"""
+        content = self.fix_separator_spacing(content)
         content = self.fix_multiple_blank_lines(content, max_blanks=2)
-        
-        # Step 3: 修复标题间距
         content = self.fix_heading_spacing(content)
-        
-        # Step 4: 移除文件末尾多余空行（保留单个换行符）
-        content = content.rstrip() + '\n'
-        
-        return content
+        return content.rstrip() + '\n'
     
     def process_file(self, file_path: str) -> bool:
         """
@@ -148,8 +159,7 @@ class MarkdownFormatter:
             
             # Step 4: 如果内容有变化，写回文件
             if content != formatted_content:
-                with open(path, 'w', encoding='utf-8') as f:
-                    f.write(formatted_content)
+                atomic_write(str(path), formatted_content)
                 print(f"[SUCCESS] 已修复文件: {file_path}")
                 return True
             else:
@@ -160,13 +170,15 @@ class MarkdownFormatter:
             print(f"[ERROR] 处理文件失败 {file_path}: {str(e)}")
             return False
     
-    def process_directory(self, directory_path: str, pattern: str = "*.md") -> int:
+    def process_directory(self, directory_path: str, pattern: str = "*.md",
+                          max_workers: Optional[int] = None) -> int:
         """
-        批量处理目录下的 Markdown 文件
+        批量处理目录下的 Markdown 文件（多进程并行）
         
         Args:
             directory_path (str): 目录路径
             pattern (str): 文件匹配模式，默认 *.md
+            max_workers (int): 并行进程数，默认 CPU 核数；1 表示串行
         
         Returns:
             int: 成功处理的文件数量
@@ -179,16 +191,20 @@ class MarkdownFormatter:
                 return 0
             
             # Step 2: 查找所有匹配的 Markdown 文件
-            md_files = list(dir_path.glob(pattern))
+            md_files = [str(f) for f in dir_path.glob(pattern)]
             if not md_files:
                 print(f"[INFO] 目录中未找到匹配的文件: {directory_path}")
                 return 0
             
-            # Step 3: 逐个处理文件
-            success_count = 0
-            for md_file in md_files:
-                if self.process_file(str(md_file)):
-                    success_count += 1
+            # Step 3: 并行处理文件（格式化是纯 CPU 计算，用进程池绕开 GIL）
+            workers = min(max_workers or os.cpu_count() or 1, len(md_files))
+            if workers <= 1:
+                results = [self.process_file(f) for f in md_files]
+            else:
+                chunksize = max(1, len(md_files) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_process_file, md_files, chunksize=chunksize))
+            success_count = sum(1 for ok in results if ok)
             
             # Step 4: 输出处理统计
             print(f"[INFO] 处理完成: {success_count}/{len(md_files)} 个文件")
@@ -199,6 +215,163 @@ class MarkdownFormatter:
             return 0
 
 
+def _process_file(file_path: str) -> bool:
+    """进程池 worker"""
+    return MarkdownFormatter().process_file(file_path)
+
+
+# --- 逐行流水线（与 MarkdownFormatter 中各正则等价） ---
+#
+# 文本按 '\n' 切分为行，'\n'.join(lines) 可还原原文；每个阶段是一个生成器，
+# 只保留少量前瞻行，因此整篇文章只被遍历一次。
+
+def _fix_separator_lines(lines: Iterable[str]) -> Iterator[str]:
+    """等价于 fix_separator_spacing：---X 拆为 ---/X，独立的 --- 前后加空行"""
+    for line in lines:
+        dashes = len(line) - len(line.lstrip('-'))
+        if dashes >= 3:
+            if dashes == len(line):
+                yield ''
+                yield line
+                yield ''
+                continue
+            if not line[dashes].isspace():
+                yield ''
+                yield line[:dashes]
+                yield ''
+                yield ''
+                yield line[dashes:]
+                continue
+        yield line
+
+
+def _collapse_blank_lines(lines: Iterable[str], max_blanks: int = 2) -> Iterator[str]:
+    """等价于 fix_multiple_blank_lines：连续换行符超过 max_blanks + 1 个时压缩"""
+    max_newlines = max_blanks + 1
+    blanks = 0
+    seen_text = False
+    for line in lines:
+        if line == '':
+            blanks += 1
+            continue
+        # 连续空行两侧各有一个换行符（开头处只有一侧）
+        newlines = blanks - 1 + (1 if seen_text else 0) + 1
+        if blanks and newlines > max_newlines:
+            blanks = max_newlines + 1 - (1 if seen_text else 0) - 1
+        for _ in range(blanks):
+            yield ''
+        blanks = 0
+        seen_text = True
+        yield line
+    # 末尾的连续空行（右侧没有换行符）
+    newlines = blanks - 1 + (1 if seen_text else 0)
+    if blanks and newlines > max_newlines:
+        blanks = max_newlines + 1 - (1 if seen_text else 0)
+    for _ in range(blanks):
+        yield ''
+
+
+def _heading_prefix(line: str) -> int:
+    """行首 # 的个数（超过 6 个视为 0）"""
+    count = len(line) - len(line.lstrip('#'))
+    return count if count <= 6 else 0
+
+
+def _blank_before_headings(lines: Iterable[str]) -> Iterator[str]:
+    """等价于 fix_heading_spacing 第一步：非空行后紧跟的标题前插入空行
+
+    正则 ([^\n])\n(#{1,6}\s) 的一次匹配会吃掉标题的 # 及其后一个空白符；
+    若标题行很短（如 "##"、"## "），下一行就拿不到前一行末字符，不再匹配。
+    """
+    iterator = iter(lines)
+    try:
+        current = next(iterator)
+    except StopIteration:
+        return
+    previous: Optional[str] = None
+    previous_consumed = False
+    for upcoming in _with_sentinel(iterator):
+        is_last = upcoming is _END
+        consumed = False
+        hashes = _heading_prefix(current)
+        if previous and not previous_consumed and hashes:
+            if hashes < len(current):
+                matched = current[hashes].isspace()
+            else:
+                matched = not is_last  # 行尾换行符充当 \s
+            if matched:
+                yield ''
+                consumed = len(current) <= hashes + 1
+        yield current
+        if is_last:
+            return
+        previous, previous_consumed, current = current, consumed, upcoming
+
+
+def _blank_after_headings(lines: Iterable[str]) -> Iterator[str]:
+    """等价于 fix_heading_spacing 第二步：(#{1,6}\s[^\n]+)\n([^\n\s]) 之间插入空行
+
+    该正则不锚定行首，行内任意位置的 "# x" 都会命中；# 在行尾时 \s 匹配换行符，
+    [^\n]+ 会延伸到下一整行。每次匹配会吃掉其后一行的首字符。
+    """
+    iterator = iter(lines)
+    buffer: deque = deque()
+
+    def fill(count: int) -> bool:
+        while len(buffer) < count:
+            try:
+                buffer.append(next(iterator))
+            except StopIteration:
+                return False
+        return True
+
+    start = 0
+    while fill(1):
+        has_next = fill(2)
+        has_next_next = has_next and fill(3)
+        line = buffer[0]
+        nxt = buffer[1] if has_next else None
+        nxt2 = buffer[2] if has_next_next else None
+        kind = _scan_heading_match(line, start, nxt, nxt2)
+        if kind == 'same':
+            yield buffer.popleft()
+            yield ''
+        elif kind == 'next':
+            yield buffer.popleft()
+            yield buffer.popleft()
+            yield ''
+        else:
+            yield buffer.popleft()
+            start = 0
+            continue
+        start = 1
+
+
+def _scan_heading_match(line: str, start: int, nxt: Optional[str], nxt2: Optional[str]) -> Optional[str]:
+    """在 line[start:] 中找最左匹配；'same' 在本行后插空行，'next' 在下一行后插空行"""
+    position = line.find('#', start)
+    while position != -1:
+        run = len(line) - position - len(line[position:].lstrip('#'))
+        end = position + run
+        if run <= 6:
+            if end < len(line):
+                if (line[end].isspace() and end + 1 < len(line)
+                        and nxt and not nxt[0].isspace()):
+                    return 'same'
+            elif nxt and nxt2 and not nxt2[0].isspace():
+                return 'next'
+        position = line.find('#', position + 1)
+    return None
+
+
+_END = object()
+
+
+def _with_sentinel(iterator: Iterator[str]) -> Iterator:
+    yield from iterator
+    yield _END
+
+
 # --- 使用示例 ---
 if __name__ == "__main__":
     import sys
@@ -1,15 +1,42 @@
 """
 TaskQueueManager 桥接 — 生成过程中同步进度/状态到排队系统
+
+生成线程只把更新放进内存通道后立即返回，不等待任何数据库写入：
+- 通道按 task_id 合并：同一任务只保留最新一条进度，状态更新覆盖未处理的进度
+- 通道有上限（QUEUE_BRIDGE_MAX_PENDING 个任务），满时丢弃新任务的进度并记录日志；
+  状态更新不受上限限制，也不会被丢弃
+- 后台事件循环中的单个常驻消费者按顺序写入 TaskQueueManager
+
+queue_manager 由 create_app 通过 set_queue_manager() 注册，不依赖请求上下文。
+
+环境变量：
+- QUEUE_BRIDGE_MAX_PENDING: 通道中最多同时挂起的任务数（默认 1000）
 """
 import asyncio
+import atexit
 import logging
+import os
+import threading
 from datetime import datetime
+from typing import Optional
+
+from utils.background_loop import get_background_loop, run_async
 
 logger = logging.getLogger(__name__)
 
+_registered_queue_manager = None
+
+
+def set_queue_manager(queue_manager):
+    """注册进度/状态的目标 queue_manager（None 表示取消注册）"""
+    global _registered_queue_manager
+    _registered_queue_manager = queue_manager
+
 
 def _get_queue_manager():
-    """获取 queue_manager 实例，失败返回 None"""
+    """获取 queue_manager 实例，未注册时回退到 Flask current_app，失败返回 None"""
+    if _registered_queue_manager is not None:
+        return _registered_queue_manager
     try:
         from flask import current_app
         return getattr(current_app._get_current_object(), 'queue_manager', None)
@@ -17,9 +44,154 @@ def _get_queue_manager():
         return None
 
 
-def _run(coro):
-    """在同步上下文中运行异步协程"""
-    return asyncio.run(coro)
+async def _apply_status(qm, task_id: str, status: str, word_count: int,
+                        image_count: int, error_msg: str):
+    from models.scheduling import QueueStatus
+
+    await qm.flush_progress(task_id, release=True)
+    task = await qm.db.get_task(task_id)
+    if not task:
+        logger.warning(f"[QueueBridge] 任务 {task_id} 不存在，跳过状态更新")
+        return
+    task.status = QueueStatus(status)
+    task.completed_at = datetime.now()
+    task.progress = 100 if status == "completed" else task.progress
+    if status == "completed":
+        task.output_word_count = word_count
+        task.output_image_count = image_count
+        task.current_stage = "done"
+    else:
+        task.current_stage = "failed"
+        task.stage_detail = error_msg[:200] if error_msg else "unknown"
+    await qm.save_task(task)
+    logger.info(f"[QueueBridge] 任务 {task_id} 状态更新: {status}")
+
+
+class ProgressChannel:
+    """生成线程 → 排队系统的有界、按任务合并的更新通道"""
+
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        # task_id → (kind, queue_manager, args)，kind 为 'progress' 或 'status'
+        self._pending: dict[str, tuple] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drain_lock: Optional[asyncio.Lock] = None
+        self._consumer: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.dropped = 0
+        self.applied = 0
+
+    def publish_progress(self, qm, task_id: str, progress: int,
+                         stage: str, detail: str) -> bool:
+        """放入一条进度（不阻塞）；通道已满返回 False"""
+        with self._lock:
+            current = self._pending.get(task_id)
+            if current and current[0] == 'status':
+                return True
+            if current is None and len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 100 == 0:
+                    logger.warning(f"[QueueBridge] 进度通道已满，累计丢弃 {self.dropped} 条进度")
+                return False
+            was_empty = not self._pending
+            self._pending[task_id] = ('progress', qm, (progress, stage, detail))
+        if was_empty:
+            self._wake()
+        return True
+
+    def publish_status(self, qm, task_id: str, status: str, word_count: int,
+                       image_count: int, error_msg: str):
+        """放入一条最终状态（不阻塞，不丢弃，覆盖该任务未处理的进度）"""
+        with self._lock:
+            was_empty = not self._pending
+            self._pending[task_id] = (
+                'status', qm, (status, word_count, image_count, error_msg)
+            )
+        if was_empty:
+            self._wake()
+
+    def _wake(self):
+        bg = get_background_loop()
+        loop = bg.loop
+        if self._loop is not loop:
+            with self._lock:
+                if self._loop is not loop:
+                    self._loop = loop
+                    bg.call_soon(self._start_consumer)
+                    return
+        bg.call_soon(self._wakeup_set)
+
+    def _wakeup_set(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _start_consumer(self):
+        self._wakeup = asyncio.Event()
+        self._drain_lock = asyncio.Lock()
+        self._wakeup.set()
+        self._consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    async def _consume(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.warning(f"[QueueBridge] 写入排队系统失败: {e}")
+
+    async def drain(self):
+        """处理当前所有挂起的更新（在后台事件循环中调用，串行执行）"""
+        if self._drain_lock is None:
+            self._drain_lock = asyncio.Lock()
+        async with self._drain_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            for task_id, (kind, qm, args) in batch.items():
+                try:
+                    if kind == 'status':
+                        await _apply_status(qm, task_id, *args)
+                    else:
+                        await qm.update_progress(task_id, *args)
+                    self.applied += 1
+                except Exception as e:
+                    if kind == 'status':
+                        logger.warning(f"[QueueBridge] 更新状态失败 ({task_id} → {args[0]}): {e}")
+                    else:
+                        logger.debug(f"更新进度失败: {e}")
+
+    def flush(self, timeout: Optional[float] = None):
+        """同步等待所有已放入的更新写完（测试/进程退出时使用）"""
+        run_async(self.drain(), timeout)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+_channel: Optional[ProgressChannel] = None
+_channel_lock = threading.Lock()
+
+
+def get_progress_channel() -> ProgressChannel:
+    global _channel
+    if _channel is None:
+        with _channel_lock:
+            if _channel is None:
+                _channel = ProgressChannel(
+                    max_pending=int(os.environ.get('QUEUE_BRIDGE_MAX_PENDING', '1000'))
+                )
+                atexit.register(_flush_on_exit, _channel)
+    return _channel
+
+
+def _flush_on_exit(channel: ProgressChannel):
+    if channel.pending_count():
+        try:
+            channel.flush(timeout=5)
+        except Exception as e:
+            logger.warning(f"[QueueBridge] 退出前写入排队系统失败: {e}")
 
 
 def update_queue_progress(
@@ -29,7 +201,7 @@ def update_queue_progress(
     detail: str = "",
 ):
     """
-    更新任务进度到排队系统（供 Dashboard 进度条展示）。
+    更新任务进度到排队系统（供 Dashboard 进度条展示），立即返回。
 
     Args:
         task_id: 任务 ID
@@ -41,11 +213,7 @@ def update_queue_progress(
         qm = _get_queue_manager()
         if not qm:
             return
-
-        async def _update():
-            await qm.update_progress(task_id, progress, stage, detail)
-
-        _run(_update())
+        get_progress_channel().publish_progress(qm, task_id, progress, stage, detail)
     except Exception as e:
         logger.debug(f"更新进度失败: {e}")
 
@@ -58,7 +226,7 @@ def update_queue_status(
     error_msg: str = "",
 ):
     """
-    更新任务最终状态到排队系统。
+    更新任务最终状态到排队系统，立即返回（写入由后台消费者完成）。
 
     Args:
         task_id: 任务 ID
@@ -71,27 +239,8 @@ def update_queue_status(
         qm = _get_queue_manager()
         if not qm:
             return
-
-        from models.scheduling import QueueStatus
-
-        async def _update():
-            task = await qm.db.get_task(task_id)
-            if not task:
-                logger.warning(f"[QueueBridge] 任务 {task_id} 不存在，跳过状态更新")
-                return
-            task.status = QueueStatus(status)
-            task.completed_at = datetime.now()
-            task.progress = 100 if status == "completed" else task.progress
-            if status == "completed":
-                task.output_word_count = word_count
-                task.output_image_count = image_count
-                task.current_stage = "done"
-            else:
-                task.current_stage = "failed"
-                task.stage_detail = error_msg[:200] if error_msg else "unknown"
-            await qm.db.save_task(task)
-            logger.info(f"[QueueBridge] 任务 {task_id} 状态更新: {status}")
-
-        _run(_update())
+        get_progress_channel().publish_status(
+            qm, task_id, status, word_count, image_count, error_msg
+        )
     except Exception as e:
         logger.warning(f"[QueueBridge] 更新状态失败 ({task_id} → {status}): {e}")
@@ -3,11 +3,12 @@ arXiv 搜索服务 - 学术论文搜索
 """
 
 import logging
-import requests
 import xml.etree.ElementTree as ET
 from typing import Dict, Any, List, Optional
 from urllib.parse import quote
 
+from utils import http_client
+
 logger = logging.getLogger(__name__)
 
 # 全局 arXiv 服务实例
@@ -58,7 +59,7 @@ class ArxivService:
                 'sortOrder': 'descending'
             }
             
-            response = requests.get(self.BASE_URL, params=params, timeout=30)
+            response = http_client.get(self.BASE_URL, params=params, timeout=30)
             response.raise_for_status()
             
             # 解析 XML 响应
@@ -15,7 +15,7 @@
 """
 import logging
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from ..schemas.outputs import DeepResearchAnalysisOutput
 from ..structured_output import parse_structured_output, repair_legacy_json
@@ -74,7 +74,8 @@ class DeepResearchEngine:
             return [], 80
 
     def run(self, topic: str, target_audience: str = "",
-            initial_results: List[Dict] = None) -> Dict[str, Any]:
+            initial_results: List[Dict] = None,
+            task_id: Optional[str] = None) -> Dict[str, Any]:
         """
         执行深度研究。
 
@@ -82,6 +83,7 @@ class DeepResearchEngine:
             topic: 研究主题
             target_audience: 目标受众
             initial_results: 初始搜索结果（可选，避免重复搜索）
+            task_id: 任务 ID，用于任务内重复查询复用
 
         Returns:
             {'results': List[Dict], 'rounds': int, 'total_queries': int,
@@ -116,7 +118,7 @@ class DeepResearchEngine:
                     continue
                 total_queries += 1
                 try:
-                    result = self.search_service.search(query, max_results=5)
+                    result = self.search_service.search(query, max_results=5, task_id=task_id)
                     if result.get('success') and result.get('results'):
                         for r in result['results']:
                             url = r.get('url', '')
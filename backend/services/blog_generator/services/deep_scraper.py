@@ -8,13 +8,17 @@
 对搜索结果 Top N URL 进行深度抓取，结果作为高质量素材注入 Writer。
 """
 import logging
+import math
 import os
 import re
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
-import requests
+from services.blog_generator.services.page_cache import PageCache
+from utils import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -35,12 +39,23 @@ HIGH_QUALITY_DOMAINS = {
 
 
 class HttpxScraper:
-    """httpx 降级抓取器（带 User-Agent 伪装）"""
+    """httpx 降级抓取器（带 User-Agent 伪装，复用共享 httpx 连接池）
 
-    def __init__(self, timeout: int = 20, max_retries: int = 3, base_wait: float = 1.0):
+    配置了 page_cache 时，对带 ETag/Last-Modified 的缓存条目发送条件请求，
+    304 直接复用缓存正文，200 则把提取后的正文与新的校验信息写回缓存。
+    """
+
+    def __init__(
+        self,
+        timeout: int = 20,
+        max_retries: int = 3,
+        base_wait: float = 1.0,
+        page_cache: Optional[PageCache] = None,
+    ):
         self.timeout = timeout
         self.max_retries = max_retries
         self.base_wait = base_wait
+        self.page_cache = page_cache
 
     def scrape(
         self,
@@ -59,6 +74,14 @@ class HttpxScraper:
             ),
             "Accept": "text/html,application/xhtml+xml",
         }
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if cached is not None and cached.source == "httpx":
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        else:
+            cached = None
         for attempt in range(retry_limit):
             remaining = deadline - time.monotonic() if deadline is not None else None
             if remaining is not None and remaining <= 0:
@@ -69,12 +92,24 @@ class HttpxScraper:
                 else request_timeout
             )
             try:
-                resp = requests.get(url, headers=headers, timeout=attempt_timeout)
+                resp = http_client.fetch(url, headers=headers, timeout=attempt_timeout)
+                if resp.status_code == 304 and cached is not None:
+                    self.page_cache.touch(url)
+                    logger.info(f"httpx 条件请求未修改，复用缓存: {url}")
+                    return cached.text
                 if resp.status_code == 200 and resp.text.strip():
                     # 简单提取正文（去除 HTML 标签）
                     text = self._html_to_text(resp.text)
                     if text:
                         logger.info(f"httpx 抓取成功: {url} ({len(text)} chars)")
+                        if self.page_cache is not None:
+                            self.page_cache.put(
+                                url,
+                                text,
+                                source="httpx",
+                                etag=resp.headers.get("ETag"),
+                                last_modified=resp.headers.get("Last-Modified"),
+                            )
                         return text
             except Exception as e:
                 logger.warning(f"httpx 抓取失败 (attempt {attempt + 1}): {e}")
@@ -114,6 +149,9 @@ class DeepScraper:
         mini_timeout: float = 8,
         mini_total_timeout: float = 20,
         mini_top_n: int = 1,
+        page_cache: Optional[PageCache] = None,
+        max_concurrency: int = 4,
+        per_host_limit: int = 2,
     ):
         from services.blog_generator.services.jina_reader import JinaReader
         self.jina = JinaReader(
@@ -121,7 +159,10 @@ class DeepScraper:
             timeout=timeout,
             max_retries=max_retries,
         )
-        self.httpx = HttpxScraper(timeout=timeout, max_retries=max_retries)
+        self.httpx = HttpxScraper(
+            timeout=timeout, max_retries=max_retries, page_cache=page_cache
+        )
+        self.page_cache = page_cache
         self.llm_service = llm_service
         self.top_n = top_n
         self.timeout = timeout
@@ -136,6 +177,13 @@ class DeepScraper:
         self.mini_total_timeout = max(0.01, mini_total_timeout)
         self.mini_top_n = max(1, mini_top_n)
 
+        # 全局并发上限 + 单 host 礼貌限制（同一实例被多个任务共享，对整个进程生效）
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self._global_slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
         # Goal-directed extractor (feature toggle, default off)
         self._extractor = None
         if os.environ.get("GOAL_EXTRACTION_ENABLED", "false").lower() == "true":
@@ -175,7 +223,6 @@ class DeepScraper:
             return []
 
         enriched = []
-        scraped_sources = []
         effective_goal = goal or f"收集与「{topic}」相关的关键技术信息、核心概念和实践案例"
 
         def _extract_one(item: Dict, full_text: str) -> Dict:
@@ -202,28 +249,54 @@ class DeepScraper:
 
         required_successes = min(self.min_successful_sources, len(selected))
         deadline = time.monotonic() + total_timeout
-        for index, item in enumerate(selected):
-            if len(scraped_sources) >= required_successes:
-                break
-
-            remaining = deadline - time.monotonic()
-            if remaining <= 0:
-                break
-
-            sources_left = len(selected) - index
-            source_deadline = time.monotonic() + (remaining / sources_left)
-            url = item.get("url", "")
-            try:
-                full_text = self._scrape_single(
-                    url,
-                    timeout=request_timeout,
-                    max_retries=self.max_retries,
-                    deadline=source_deadline,
-                )
-                if full_text:
-                    scraped_sources.append((item, full_text))
-            except Exception as e:
-                logger.warning(f"深度抓取任务失败 [{url}]: {e}")
+        # 候选来源同时抓取（受全局并发与单 host 名额约束），够数后取消其余，失败的由排队候选补位
+        width = min(self.max_concurrency, len(selected))
+        pending = list(enumerate(selected))
+        in_flight = {}
+        scraped_by_index = {}
+        cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=width, thread_name_prefix="deep-scrape")
+        try:
+            while len(scraped_by_index) < required_successes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                while pending and len(in_flight) < width:
+                    waves = math.ceil(len(pending) / width)
+                    source_deadline = time.monotonic() + (remaining / waves)
+                    index, item = pending.pop(0)
+                    future = executor.submit(
+                        self._scrape_polite,
+                        item.get("url", ""),
+                        timeout=request_timeout,
+                        max_retries=self.max_retries,
+                        deadline=source_deadline,
+                        cancelled=cancelled,
+                    )
+                    in_flight[future] = index
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    item = selected[index]
+                    try:
+                        full_text = future.result()
+                        if full_text:
+                            scraped_by_index[index] = (item, full_text)
+                    except Exception as e:
+                        logger.warning(f"深度抓取任务失败 [{item.get('url', '')}]: {e}")
+        finally:
+            # 够数或超出预算：尚在等待名额的抓取直接放弃；已发出的请求在后台跑完
+            # （结果仍会写入页面缓存），不阻塞本次返回
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # 同一轮可能多个来源同时完成：只提炼排名靠前的所需数量
+        kept = sorted(scraped_by_index)[:required_successes]
+        scraped_sources = [scraped_by_index[i] for i in kept]
 
         for item, full_text in scraped_sources:
             try:
@@ -269,15 +342,35 @@ class DeepScraper:
         max_retries: Optional[int] = None,
         deadline: Optional[float] = None,
     ) -> Optional[str]:
-        """抓取单个 URL（Jina → httpx 降级）"""
-        # 先尝试 Jina
+        """抓取单个 URL（页面缓存 → Jina → httpx 降级）"""
         scrape_kwargs = {"timeout": timeout, "max_retries": max_retries}
         if deadline is not None:
             scrape_kwargs["deadline"] = deadline
+
+        revalidated = False
+        if self.page_cache is not None:
+            fresh = self.page_cache.get_fresh(url)
+            if fresh is not None:
+                logger.info(f"深度抓取命中缓存: {url}")
+                return fresh.text
+            stale = self.page_cache.get(url)
+            if stale is not None and stale.source == "httpx" and stale.has_validators:
+                # 过期条目带校验信息：先发条件请求，304 时零正文传输
+                revalidated = True
+                text = self.httpx.scrape(url, **scrape_kwargs)
+                if text:
+                    return text
+
+        # 先尝试 Jina
         text = self.jina.scrape(url, **scrape_kwargs)
         if text:
+            if self.page_cache is not None:
+                self.page_cache.put(url, text, source="jina")
             return text
 
+        if revalidated:
+            return None
+
         if deadline is not None and time.monotonic() >= deadline:
             logger.info(f"Jina 已用完来源预算，跳过 httpx: {url}")
             return None
@@ -286,6 +379,47 @@ class DeepScraper:
         logger.info(f"Jina 失败，降级 httpx: {url}")
         return self.httpx.scrape(url, **scrape_kwargs)
 
+    def _scrape_polite(
+        self,
+        url: str,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        deadline: Optional[float] = None,
+        cancelled: Optional[threading.Event] = None,
+    ) -> Optional[str]:
+        """在全局并发与单 host 名额内执行 _scrape_single；拿到名额时调用方已取消则放弃"""
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            host_slot = self._host_slots.setdefault(
+                host, threading.BoundedSemaphore(self.per_host_limit)
+            )
+
+        def _wait_time() -> Optional[float]:
+            if deadline is None:
+                return None
+            return max(0.0, deadline - time.monotonic())
+
+        if not self._global_slots.acquire(timeout=_wait_time()):
+            logger.info(f"深度抓取等待并发名额超时: {url}")
+            return None
+        try:
+            if not host_slot.acquire(timeout=_wait_time()):
+                logger.info(f"深度抓取等待 host 名额超时: {url}")
+                return None
+            try:
+                if cancelled is not None and cancelled.is_set():
+                    return None
+                return self._scrape_single(
+                    url,
+                    timeout=timeout,
+                    max_retries=max_retries,
+                    deadline=deadline,
+                )
+            finally:
+                host_slot.release()
+        finally:
+            self._global_slots.release()
+
     def _extract_info(self, full_text: str, topic: str) -> str:
         """使用 LLM 从全文提取与主题相关的信息"""
         truncated = self._truncate(full_text, max_chars=40000)
@@ -0,0 +1,140 @@
+"""
+Embedding 持久化缓存 — 按内容哈希复用远程 embedding
+
+启用 OpenAI embedding 后，同一批搜索片段、章节段落、知识分块会在每个任务、
+每轮修订、每次去重时被重复 embedding。本模块以 (模型, 文本 sha256) 为键
+把向量落盘到 SQLite：
+- 批量查询：一次 SQL 取回整批文本的已缓存向量
+- 未命中的文本由调用方合并为一次 embedding 请求，结果批量写回
+- 向量以 float32 二进制存储，按模型隔离，换模型不会串用
+
+环境变量：
+- EMBEDDING_CACHE_ENABLED: 是否启用，默认 true
+- EMBEDDING_CACHE_DB: SQLite 文件路径，默认 var/cache/embeddings.db
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from infrastructure.paths import RuntimePaths
+
+logger = logging.getLogger(__name__)
+
+# SQLite 单条语句的参数上限保守取值
+_LOOKUP_BATCH = 500
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite embedding 缓存（线程安全）"""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, content_hash)
+            )
+        """)
+        self._conn.commit()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """批量查询，返回与 texts 对齐的向量列表（未命中为 None）"""
+        hashes = [content_hash(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_BATCH):
+                batch = unique[start:start + _LOOKUP_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT content_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND content_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=np.float32)
+            vectors = [found.get(h) for h in hashes]
+            hit_count = sum(v is not None for v in vectors)
+            self.hits += hit_count
+            self.misses += len(vectors) - hit_count
+        return vectors
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """批量写入"""
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            array = np.asarray(vector, dtype=np.float32)
+            rows.append((model, content_hash(text), len(array), array.tobytes(), now))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, content_hash, dim, vector, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """获取全局 embedding 缓存，EMBEDDING_CACHE_ENABLED=false 时返回 None"""
+    global _embedding_cache
+    if os.environ.get('EMBEDDING_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                db_path = os.environ.get('EMBEDDING_CACHE_DB')
+                if not db_path:
+                    project_root = Path(__file__).resolve().parent.parent.parent.parent.parent
+                    db_path = str(RuntimePaths.from_env(project_root=project_root).cache / 'embeddings.db')
+                try:
+                    _embedding_cache = EmbeddingCache(db_path=db_path)
+                    logger.info(f"💾 Embedding 缓存已启用: {db_path}")
+                except Exception as e:
+                    logger.warning(f"Embedding 缓存初始化失败，禁用缓存: {e}")
+                    return None
+    return _embedding_cache
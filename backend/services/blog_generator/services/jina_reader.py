@@ -9,7 +9,7 @@ import os
 import time
 from typing import Optional
 
-import requests
+from utils import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -73,7 +73,7 @@ class JinaReader:
                 else request_timeout
             )
             try:
-                resp = requests.get(
+                resp = http_client.get(
                     jina_url,
                     headers=headers,
                     timeout=attempt_timeout,
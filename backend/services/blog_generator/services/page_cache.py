@@ -0,0 +1,212 @@
+"""
+深度抓取页面缓存 — 跨任务复用已抓取的正文
+
+同一主题的任务会反复抓取相同的热门页面。本模块把抓取结果落盘：
+- 新鲜期内（DEEP_SCRAPE_CACHE_TTL）直接返回缓存正文，不发请求
+- 过期但带 ETag/Last-Modified 的条目，由 HttpxScraper 发条件请求，304 时复用缓存
+- 只保存提取后的纯文本（Jina Markdown 或 _html_to_text 结果），不保存原始 HTML
+
+每个 URL 一个 JSON 文件，按 URL 哈希分桶存放在 var/cache/pages 下，
+写入走 atomic_write，多线程/多进程并发写同一条目不会产生半截文件。
+条目数超过上限时按最近使用时间（文件 mtime，命中时刷新）淘汰最久未用的条目，
+进程内首次写入及此后每 100 次写入检查一次。
+
+环境变量：
+- DEEP_SCRAPE_CACHE_ENABLED: 是否启用，默认 true
+- DEEP_SCRAPE_CACHE_TTL: 新鲜期（秒），默认 21600（6 小时）
+- DEEP_SCRAPE_CACHE_DIR: 缓存目录，默认 var/cache/pages
+- DEEP_SCRAPE_CACHE_MAX_ENTRIES: 最多保留的页面数，默认 5000，0 表示不限制
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urldefrag
+
+from infrastructure.paths import RuntimePaths
+from utils.atomic_write import atomic_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_MAX_ENTRIES = 5000
+_PRUNE_EVERY = 100
+
+
+@dataclass
+class CachedPage:
+    """缓存的页面正文及其校验信息"""
+    url: str
+    text: str
+    source: str  # "jina" | "httpx"
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def is_fresh(self, ttl_seconds: float, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return now - self.fetched_at < ttl_seconds
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class PageCache:
+    """基于文件的页面缓存（线程安全）"""
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        if cache_dir is None:
+            project_root = Path(__file__).resolve().parent.parent.parent.parent.parent
+            cache_dir = os.environ.get("DEEP_SCRAPE_CACHE_DIR") or (
+                RuntimePaths.from_env(project_root=project_root).cache / "pages"
+            )
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(0, max_entries)
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(url: str) -> str:
+        return urldefrag(url.strip())[0]
+
+    def _path_for(self, url: str) -> Path:
+        digest = hashlib.sha256(self._normalize(url).encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """读取缓存条目（不判断是否过期）"""
+        path = self._path_for(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return CachedPage(**data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"页面缓存损坏，忽略 [{url}]: {e}")
+            return None
+
+    def get_fresh(self, url: str) -> Optional[CachedPage]:
+        """读取新鲜期内的缓存条目，并记录命中统计"""
+        page = self.get(url)
+        with self._lock:
+            if page is not None and page.is_fresh(self.ttl_seconds):
+                self.hits += 1
+            else:
+                self.misses += 1
+                return None
+        try:
+            # 刷新 mtime：淘汰按最近使用排序
+            os.utime(self._path_for(url))
+        except OSError:
+            pass
+        return page
+
+    def put(
+        self,
+        url: str,
+        text: str,
+        source: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        page = CachedPage(
+            url=self._normalize(url),
+            text=text,
+            source=source,
+            fetched_at=time.time(),
+            etag=etag if isinstance(etag, str) else None,
+            last_modified=last_modified if isinstance(last_modified, str) else None,
+        )
+        try:
+            atomic_write(str(self._path_for(url)), json.dumps(asdict(page), ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"页面缓存写入失败 [{url}]: {e}")
+            return
+        with self._lock:
+            self._puts += 1
+            due = self.max_entries and self._puts % _PRUNE_EVERY == 1
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """淘汰超出 max_entries 的最久未用条目，返回删除的条目数"""
+        if not self.max_entries:
+            return 0
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return 0
+        entries.sort()
+        removed = 0
+        for _, path in entries[:excess]:
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        logger.info(f"页面缓存已淘汰 {removed} 条最久未用的条目（上限 {self.max_entries}）")
+        return removed
+
+    def touch(self, url: str) -> Optional[CachedPage]:
+        """条件请求返回 304 后刷新抓取时间"""
+        page = self.get(url)
+        if page is None:
+            return None
+        with self._lock:
+            self.revalidated += 1
+        self.put(url, page.text, page.source, page.etag, page.last_modified)
+        return page
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "max_entries": self.max_entries,
+                "cache_dir": str(self.cache_dir),
+            }
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """获取全局页面缓存，DEEP_SCRAPE_CACHE_ENABLED=false 时返回 None"""
+    global _page_cache
+    if os.environ.get("DEEP_SCRAPE_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache(
+                    ttl_seconds=float(
+                        os.environ.get("DEEP_SCRAPE_CACHE_TTL", str(DEFAULT_TTL_SECONDS))
+                    ),
+                    max_entries=int(
+                        os.environ.get("DEEP_SCRAPE_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))
+                    ),
+                )
+    return _page_cache
@@ -0,0 +1,243 @@
+"""
+跨任务搜索结果缓存 — SmartSearchService 按源缓存原始结果
+
+每日批量生成的相关主题会反复发出几乎相同的搜索。本模块按
+(搜索源, 规范化查询, 路由参数) 缓存各源返回的结果，跨任务、跨进程重启复用。
+
+- 按源设置 TTL：arXiv 论文变化慢，通用搜索变化快
+- 时效性主题（「最新」「发布」「news」、当年年份等）自动收紧为短 TTL
+- 只缓存成功且非空的结果；按源统计命中率，便于调参
+
+环境变量：
+- SEARCH_CACHE_ENABLED: 是否启用，默认 true
+- SEARCH_CACHE_DB: SQLite 文件路径，默认 var/cache/search_cache.db
+- SEARCH_CACHE_TTL_<SOURCE>: 某个源的 TTL（秒），如 SEARCH_CACHE_TTL_ARXIV；
+  专业博客统一用 SEARCH_CACHE_TTL_BLOG
+- SEARCH_CACHE_FRESH_TTL: 时效性主题的 TTL（秒），默认 3600
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from infrastructure.paths import RuntimePaths
+
+logger = logging.getLogger(__name__)
+
+# 各源默认 TTL（秒）
+DEFAULT_SOURCE_TTLS = {
+    'arxiv': 7 * 86400,
+    'blog': 3 * 86400,
+    'general': 86400,
+    'google': 86400,
+    'sogou': 86400,
+}
+DEFAULT_TTL = 86400
+DEFAULT_FRESH_TTL = 3600
+
+# 时效性主题：缓存很快过期
+TIME_SENSITIVE_KEYWORDS = (
+    '最新', '最近', '近期', '今日', '今天', '本周', '本月', '新闻', '快讯', '动态', '发布', '刚刚',
+    'latest', 'news', 'today', 'this week', 'release', 'released', 'announce', 'breaking',
+)
+
+
+def normalize_query(query: str) -> str:
+    """NFKC + 小写 + 空白折叠"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', query)).strip().lower()
+
+
+def is_time_sensitive(query: str) -> bool:
+    """查询是否带时效性（关键词或当年/去年年份）"""
+    text = normalize_query(query)
+    if any(kw in text for kw in TIME_SENSITIVE_KEYWORDS):
+        return True
+    year = datetime.now().year
+    return str(year) in text or str(year - 1) in text
+
+
+class SearchResultCache:
+    """SQLite 搜索结果缓存（线程安全）"""
+
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        source_ttls: Optional[Dict[str, float]] = None,
+        fresh_ttl: float = DEFAULT_FRESH_TTL,
+    ):
+        self.source_ttls = dict(DEFAULT_SOURCE_TTLS)
+        if source_ttls:
+            self.source_ttls.update(source_ttls)
+        self.fresh_ttl = fresh_ttl
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._puts = 0
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_cache (
+                cache_key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                query TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    @staticmethod
+    def _source_family(source: str) -> str:
+        # blog:langchain → blog
+        return source.split(':', 1)[0]
+
+    @staticmethod
+    def make_key(source: str, query: str, params: Optional[Dict[str, Any]] = None) -> str:
+        raw = json.dumps(
+            [source, normalize_query(query), params or {}],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, source: str, query: str) -> float:
+        ttl = self.source_ttls.get(source, self.source_ttls.get(self._source_family(source), DEFAULT_TTL))
+        if is_time_sensitive(query):
+            ttl = min(ttl, self.fresh_ttl)
+        return ttl
+
+    def _count(self, source: str, field: str) -> None:
+        stats = self._stats.setdefault(source, {'hits': 0, 'misses': 0})
+        stats[field] += 1
+
+    def get(
+        self,
+        source: str,
+        query: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_age: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """读取未过期的缓存结果（返回副本）；max_age 可进一步收紧新鲜度"""
+        ttl = self.ttl_for(source, query)
+        if max_age is not None:
+            ttl = min(ttl, max_age)
+        key = self.make_key(source, query, params)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM search_cache WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+            if row is None or time.time() - row[1] >= ttl:
+                self._count(source, 'misses')
+                return None
+            self._count(source, 'hits')
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def put(
+        self,
+        source: str,
+        query: str,
+        result: Dict[str, Any],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """缓存一次成功的源结果"""
+        if not result.get('success') or not result.get('results'):
+            return
+        try:
+            payload = json.dumps(copy.deepcopy(result), ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"搜索结果无法序列化，跳过缓存 [{source}]: {e}")
+            return
+        key = self.make_key(source, query, params)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (cache_key, source, query, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, source, normalize_query(query), payload, time.time()),
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._prune_locked()
+            self._conn.commit()
+
+    def _prune_locked(self) -> None:
+        oldest = time.time() - max(self.source_ttls.values())
+        self._conn.execute("DELETE FROM search_cache WHERE created_at < ?", (oldest,))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """按源的命中统计"""
+        with self._lock:
+            per_source = {
+                source: {
+                    **counts,
+                    'hit_rate': round(counts['hits'] / (counts['hits'] + counts['misses']), 3),
+                }
+                for source, counts in self._stats.items()
+                if counts['hits'] + counts['misses']
+            }
+            entries = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        hits = sum(s['hits'] for s in per_source.values())
+        lookups = hits + sum(s['misses'] for s in per_source.values())
+        return {
+            'entries': entries,
+            'hits': hits,
+            'lookups': lookups,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'sources': per_source,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+            self._conn.commit()
+            self._stats.clear()
+
+
+def _ttls_from_env() -> Dict[str, float]:
+    ttls = {}
+    for source in DEFAULT_SOURCE_TTLS:
+        value = os.environ.get(f'SEARCH_CACHE_TTL_{source.upper()}')
+        if value:
+            ttls[source] = float(value)
+    return ttls
+
+
+_search_result_cache: Optional[SearchResultCache] = None
+_search_result_cache_lock = threading.Lock()
+
+
+def get_search_result_cache() -> Optional[SearchResultCache]:
+    """获取全局搜索结果缓存，SEARCH_CACHE_ENABLED=false 时返回 None"""
+    global _search_result_cache
+    if os.environ.get('SEARCH_CACHE_ENABLED', 'true').lower() != 'true':
+        return None
+    if _search_result_cache is None:
+        with _search_result_cache_lock:
+            if _search_result_cache is None:
+                db_path = os.environ.get('SEARCH_CACHE_DB')
+                if not db_path:
+                    project_root = Path(__file__).resolve().parent.parent.parent.parent.parent
+                    db_path = str(RuntimePaths.from_env(project_root=project_root).cache / 'search_cache.db')
+                try:
+                    _search_result_cache = SearchResultCache(
+                        db_path=db_path,
+                        source_ttls=_ttls_from_env(),
+                        fresh_ttl=float(os.environ.get('SEARCH_CACHE_FRESH_TTL', str(DEFAULT_FRESH_TTL))),
+                    )
+                    logger.info(f"💾 搜索结果缓存已启用: {db_path}")
+                except Exception as e:
+                    logger.warning(f"搜索结果缓存初始化失败，禁用缓存: {e}")
+                    return None
+    return _search_result_cache
@@ -9,6 +9,9 @@ import logging
 import requests
 from typing import Dict, Any, List, Optional
 
+from utils import http_client
+from utils.query_deduplicator import get_task_deduplicator
+
 logger = logging.getLogger(__name__)
 
 # 全局搜索服务实例
@@ -35,13 +38,15 @@ class SearchService:
         """检查服务是否可用"""
         return bool(self.api_key)
     
-    def search(self, query: str, max_results: int = 5) -> Dict[str, Any]:
+    def search(self, query: str, max_results: int = 5, task_id: Optional[str] = None) -> Dict[str, Any]:
         """
         搜索背景知识
         
         Args:
             query: 搜索关键词
             max_results: 最大结果数
+            task_id: 任务 ID；设置后同一任务内的近似重复查询直接复用结果
+                （按调用传入：实例是进程级单例，并发任务共享）
             
         Returns:
             {
@@ -60,9 +65,22 @@ class SearchService:
                 'error': '智谱 API Key 未配置'
             }
         
+        dedup = get_task_deduplicator(task_id) if task_id else None
+        if dedup is not None:
+            reused = self._reuse_result(dedup, query, max_results)
+            if reused is not None:
+                return reused
+
         try:
             logger.info(f"使用智谱 Web Search 搜索: {query}")
-            return self._search_zai(query, max_results)
+            result = self._search_zai(query, max_results)
+            if dedup is not None and result.get('success'):
+                dedup.record(
+                    query,
+                    agent="search",
+                    results={'max_results': max_results, 'response': self._snapshot(result)},
+                )
+            return result
             
         except Exception as e:
             logger.error(f"搜索失败: {e}", exc_info=True)
@@ -73,6 +91,26 @@ class SearchService:
                 'error': str(e)
             }
     
+    @staticmethod
+    def _snapshot(response: Dict[str, Any]) -> Dict[str, Any]:
+        """复制结果条目：调用方会就地修改条目（如 SubQueryEngine 写入 _sub_query）"""
+        return {**response, 'results': [dict(item) for item in response.get('results', [])]}
+
+    @staticmethod
+    def _reuse_result(dedup, query: str, max_results: int) -> Optional[Dict[str, Any]]:
+        """37.04: 复用同一任务内重复/近似重复查询的结果（结果条目为副本，调用方可修改）"""
+        match = dedup.lookup(query, agent="search")
+        if match is None or not match.results:
+            return None
+        if match.results['max_results'] < max_results:
+            return None
+        response = match.results['response']
+        logger.info(f"🔁 复用近似查询结果: {query} ≈ {match.query}")
+        reused = SearchService._snapshot(response)
+        reused['results'] = reused['results'][:max_results]
+        reused['reused_from'] = match.query
+        return reused
+
     def _search_zai(self, query: str, max_results: int = 5) -> Dict[str, Any]:
         """使用智谱 Web Search API 搜索"""
         try:
@@ -101,15 +139,16 @@ class SearchService:
             }
             
             logger.info(f"🌐 使用智谱 Web Search 搜索: {query}")
-            logger.info(f"🌐 API URL: {url}")
-            logger.info(f"🌐 请求参数: {json.dumps(payload, ensure_ascii=False)}")
+            logger.debug(f"🌐 API URL: {url}")
+            logger.debug(f"🌐 请求参数: {json.dumps(payload, ensure_ascii=False)}")
             
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            logger.info(f"API 响应状态码: {response.status_code}")
+            response = http_client.post(url, json=payload, headers=headers, timeout=30)
+            logger.debug(f"API 响应状态码: {response.status_code}")
             response.raise_for_status()
             
             data = response.json()
-            logger.info(f"智谱搜索完整响应: {json.dumps(data, ensure_ascii=False)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"智谱搜索完整响应: {json.dumps(data, ensure_ascii=False)}")
             
             # 解析搜索结果（统一格式）
             parsed_results = []
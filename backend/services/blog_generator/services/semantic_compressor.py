@@ -11,76 +11,186 @@
 - SEMANTIC_COMPRESS_TOP_K: 保留的 top-K 片段数（默认 10）
 - SEMANTIC_COMPRESS_MAX_CHARS: 单条结果最大字符数（默认 2000）
 - EMBEDDING_PROVIDER: embedding 提供商（openai / local，默认 local）
+- SEMANTIC_HASH_DIM: 本地哈希向量化维度（默认 1048576）
+- EMBEDDING_CACHE_ENABLED / EMBEDDING_CACHE_DB: 远程 embedding 持久化缓存（见 embedding_cache.py）
 """
 import logging
-import math
 import os
-from typing import Dict, List, Tuple
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .embedding_cache import EmbeddingCache, get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_HASH_DIM = 1 << 20
+
 
-def _cosine_similarity(a: List[float], b: List[float]) -> float:
+def _cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
     """计算余弦相似度"""
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = math.sqrt(sum(x * x for x in a))
-    norm_b = math.sqrt(sum(x * x for x in b))
-    if norm_a == 0 or norm_b == 0:
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    norm = np.linalg.norm(a) * np.linalg.norm(b)
+    if norm == 0:
         return 0.0
-    return dot / (norm_a * norm_b)
+    return float(a @ b / norm)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """行 L2 归一化（零向量保持为零）"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+@dataclass
+class SparseRows:
+    """COO 形式的稀疏行矩阵，每行已 L2 归一化；列为哈希桶编号"""
+    rows: np.ndarray
+    cols: np.ndarray
+    data: np.ndarray
+    n_rows: int
+    n_features: int
+
+    def row_scores(self, row: int) -> np.ndarray:
+        """第 row 行与所有行的余弦相似度（O(非零元) 的稀疏点积）"""
+        mask = self.rows == row
+        lookup = np.zeros(self.n_features, dtype=np.float64)
+        lookup[self.cols[mask]] = self.data[mask]
+        return np.bincount(self.rows, weights=self.data * lookup[self.cols], minlength=self.n_rows)
+
+    def to_dense(self) -> np.ndarray:
+        """只保留出现过的桶，压缩为 n_rows × 非零桶数 的稠密矩阵"""
+        used, inverse = np.unique(self.cols, return_inverse=True)
+        dense = np.zeros((self.n_rows, len(used)), dtype=np.float64)
+        dense[self.rows, inverse] = self.data
+        return dense
+
+
+class HashingVectorizer:
+    """
+    词袋哈希向量化器：词 → crc32 % n_features，固定维度，不依赖逐次构建的词表。
+
+    分词与旧版本地 embedding 一致（小写 + 空白切分、词频加权），
+    哈希维度足够大时碰撞可忽略，余弦相似度与按词表计算的结果等价。
+    """
+
+    def __init__(self, n_features: int = None, max_cached_words: int = 200_000):
+        self.n_features = n_features or int(os.environ.get('SEMANTIC_HASH_DIM', str(DEFAULT_HASH_DIM)))
+        self._max_cached_words = max_cached_words
+        self._buckets: Dict[str, int] = {}
+
+    def _bucket(self, word: str) -> int:
+        bucket = self._buckets.get(word)
+        if bucket is None:
+            if len(self._buckets) >= self._max_cached_words:
+                self._buckets.clear()
+            bucket = zlib.crc32(word.encode('utf-8')) % self.n_features
+            self._buckets[word] = bucket
+        return bucket
+
+    def transform(self, texts: Sequence[str]) -> SparseRows:
+        rows: List[int] = []
+        cols: List[int] = []
+        counts: List[int] = []
+        for i, text in enumerate(texts):
+            words = Counter(text.lower().split())
+            rows.extend([i] * len(words))
+            cols.extend(map(self._bucket, words))
+            counts.extend(words.values())
+
+        n = len(texts)
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return SparseRows(empty, empty, np.zeros(0), n, self.n_features)
+
+        # 合并同一行内哈希碰撞的词，再按行 L2 归一化
+        keys = np.asarray(rows, dtype=np.int64) * self.n_features + np.asarray(cols, dtype=np.int64)
+        keys, inverse = np.unique(keys, return_inverse=True)
+        data = np.bincount(inverse, weights=np.asarray(counts, dtype=np.float64))
+        row_ids = keys // self.n_features
+        norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=n))
+        data /= norms[row_ids]
+        return SparseRows(row_ids, keys % self.n_features, data, n, self.n_features)
 
 
 class EmbeddingProvider:
     """Embedding 提供商抽象层"""
 
-    def __init__(self):
+    def __init__(self, cache: Optional[EmbeddingCache] = None, shared_cache: bool = False):
         self._provider = os.environ.get('EMBEDDING_PROVIDER', 'local')
+        self._model_name = os.environ.get('EMBEDDING_MODEL', 'text-embedding-3-small')
         self._model = None
+        self._vectorizer = HashingVectorizer()
+        self._cache = cache
+        # 使用全局缓存时，首次远程请求才打开：本地模式不会创建缓存文件
+        self._shared_cache = shared_cache and cache is None
+        self.api_calls = 0
+        self.api_texts = 0
 
     def embed(self, texts: List[str]) -> List[List[float]]:
         """批量生成 embedding"""
         if self._provider == 'openai':
-            return self._embed_openai(texts)
+            return self._embed_openai(texts).tolist()
         return self._embed_local(texts)
 
-    def _embed_openai(self, texts: List[str]) -> List[List[float]]:
-        """使用 OpenAI embedding API"""
+    def _get_cache(self) -> Optional[EmbeddingCache]:
+        if self._shared_cache:
+            self._cache = get_embedding_cache()
+            self._shared_cache = False
+        return self._cache
+
+    def _embed_openai(self, texts: List[str]) -> np.ndarray:
+        """使用 OpenAI embedding API；命中缓存的文本不再请求，未命中的合并为一次请求"""
         try:
             from langchain_openai import OpenAIEmbeddings
             if self._model is None:
-                self._model = OpenAIEmbeddings(
-                    model=os.environ.get('EMBEDDING_MODEL', 'text-embedding-3-small'),
-                )
-            return self._model.embed_documents(texts)
+                self._model = OpenAIEmbeddings(model=self._model_name)
+
+            cache = self._get_cache()
+            cached = cache.get_many(self._model_name, texts) if cache else [None] * len(texts)
+            missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+            fresh: Dict[str, np.ndarray] = {}
+            if missing:
+                vectors = self._model.embed_documents(missing)
+                self.api_calls += 1
+                self.api_texts += len(missing)
+                if cache:
+                    cache.put_many(self._model_name, missing, vectors)
+                fresh = {t: np.asarray(v, dtype=np.float32) for t, v in zip(missing, vectors)}
+            if len(texts) > len(missing):
+                logger.debug(f"[Embedding] 复用缓存 {len(texts) - len(missing)} 条，请求 {len(missing)} 条")
+            return np.vstack([v if v is not None else fresh[t] for t, v in zip(texts, cached)])
         except Exception as e:
             logger.warning(f"OpenAI embedding 失败，回退到本地: {e}")
-            return self._embed_local(texts)
+            return self._vectorizer.transform(texts).to_dense()
 
     def _embed_local(self, texts: List[str]) -> List[List[float]]:
-        """本地 TF-IDF 近似 embedding（零依赖降级方案）"""
-        # 构建词汇表
-        vocab = {}
-        for text in texts:
-            for word in text.lower().split():
-                if word not in vocab:
-                    vocab[word] = len(vocab)
-
-        if not vocab:
-            return [[0.0] for _ in texts]
-
-        dim = len(vocab)
-        embeddings = []
-        for text in texts:
-            vec = [0.0] * dim
-            words = text.lower().split()
-            if not words:
-                embeddings.append(vec)
-                continue
-            for word in words:
-                if word in vocab:
-                    vec[vocab[word]] += 1.0 / len(words)
-            embeddings.append(vec)
-        return embeddings
+        """本地哈希词袋 embedding（零外部服务降级方案）"""
+        return self._vectorizer.transform(texts).to_dense().tolist()
+
+    def _embed_matrix(self, texts: List[str]) -> np.ndarray:
+        """行归一化的稠密 embedding 矩阵"""
+        if self._provider == 'openai':
+            return _normalize_rows(self._embed_openai(texts).astype(np.float64))
+        return self._vectorizer.transform(texts).to_dense()
+
+    def query_similarity(self, query: str, texts: List[str]) -> np.ndarray:
+        """query 与每条文本的余弦相似度向量"""
+        if self._provider == 'openai':
+            matrix = self._embed_matrix([query] + list(texts))
+            return matrix[1:] @ matrix[0]
+        # 本地路径走稀疏点积，避免把长文档展开成稠密矩阵
+        return self._vectorizer.transform([query] + list(texts)).row_scores(0)[1:]
+
+    def pairwise_similarity(self, texts: List[str]) -> np.ndarray:
+        """文本两两之间的余弦相似度矩阵"""
+        matrix = self._embed_matrix(texts)
+        return matrix @ matrix.T
 
 
 class SemanticCompressor:
@@ -89,7 +199,7 @@ class SemanticCompressor:
     def __init__(self, top_k: int = None, max_chars: int = None):
         self.top_k = top_k or int(os.environ.get('SEMANTIC_COMPRESS_TOP_K', '10'))
         self.max_chars = max_chars or int(os.environ.get('SEMANTIC_COMPRESS_MAX_CHARS', '2000'))
-        self._embedding = EmbeddingProvider()
+        self._embedding = EmbeddingProvider(shared_cache=True)
 
     def compress(self, query: str, search_results: List[Dict],
                  top_k: int = None) -> List[Dict]:
@@ -118,30 +228,20 @@ class SemanticCompressor:
                     text = text[:self.max_chars]
                 texts.append(text)
 
-            # 生成 embedding
-            all_texts = [query] + texts
-            embeddings = self._embedding.embed(all_texts)
-            query_emb = embeddings[0]
-            doc_embs = embeddings[1:]
-
-            # 计算相似度并排序
-            scored: List[Tuple[float, int]] = []
-            for i, doc_emb in enumerate(doc_embs):
-                sim = _cosine_similarity(query_emb, doc_emb)
-                scored.append((sim, i))
-
-            scored.sort(key=lambda x: -x[0])
+            # 矩阵级相似度，稳定排序保证同分时保持原始顺序
+            sims = self._embedding.query_similarity(query, texts)
+            order = np.argsort(-sims, kind='stable')[:k]
 
             # 保留 top-K
             result = []
-            for sim, idx in scored[:k]:
+            for idx in order:
                 item = search_results[idx].copy()
-                item['_relevance_score'] = round(sim, 4)
+                item['_relevance_score'] = round(float(sims[idx]), 4)
                 result.append(item)
 
             logger.info(
                 f"[SemanticCompressor] {len(search_results)} → {len(result)} 条 "
-                f"(top-{k}, 最高相似度 {scored[0][0]:.3f})"
+                f"(top-{k}, 最高相似度 {sims[order[0]]:.3f})"
             )
             return result
 
@@ -9,10 +9,13 @@ publication info, year, and PDF URLs.
 import logging
 import os
 import time
-import requests
 from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
 
+import requests
+
+from utils import http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,7 +54,7 @@ class SerperScholarService:
         last_err = None
         for attempt in range(self.MAX_RETRIES):
             try:
-                resp = requests.post(
+                resp = http_client.post(
                     self.SCHOLAR_URL, json=payload, headers=headers,
                     timeout=self.timeout
                 )
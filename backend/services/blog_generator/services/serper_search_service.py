@@ -10,9 +10,12 @@ import logging
 import os
 import re
 import time
-import requests
 from typing import Any, Dict, List, Optional
 
+import requests
+
+from utils import http_client
+
 logger = logging.getLogger(__name__)
 
 _serper_service: Optional["SerperSearchService"] = None
@@ -62,7 +65,7 @@ class SerperSearchService:
         last_err = None
         for attempt in range(self.MAX_RETRIES):
             try:
-                resp = requests.post(self.BASE_URL, json=payload, headers=headers, timeout=self.timeout)
+                resp = http_client.post(self.BASE_URL, json=payload, headers=headers, timeout=self.timeout)
                 resp.raise_for_status()
                 data = resp.json()
 
@@ -5,11 +5,16 @@
 import logging
 import os
 import re
-from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from functools import partial
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.query_deduplicator import get_task_deduplicator
 
 from .search_service import get_search_service
 from .arxiv_service import get_arxiv_service
+from .search_cache import DEFAULT_FRESH_TTL, SearchResultCache, get_search_result_cache, is_time_sensitive
 from ..schemas.outputs import SearchRouterOutput
 from ..structured_output import parse_structured_output, repair_legacy_json
 
@@ -162,18 +167,20 @@ class SmartSearchService:
     智能搜索服务 - 根据主题智能选择搜索源
     """
     
-    def __init__(self, llm_client=None):
+    def __init__(self, llm_client=None, result_cache: Optional[SearchResultCache] = None):
         """
         初始化智能搜索服务
 
         Args:
             llm_client: LLM 客户端，用于智能路由
+            result_cache: 跨任务搜索结果缓存（默认使用全局缓存，SEARCH_CACHE_ENABLED=false 时关闭）
         """
         self.llm = llm_client
+        self.result_cache = result_cache if result_cache is not None else get_search_result_cache()
         self.max_workers = int(os.environ.get('BLOG_GENERATOR_MAX_WORKERS', '3'))
-        # 37.04: 查询重复检测
-        from utils.query_deduplicator import QueryDeduplicator
-        self.deduplicator = QueryDeduplicator()
+        # 提前返回（默认关闭，需显式开启）：软截止时间（秒，0 为等待全部源）与“足够”的结果条数（0 不启用）
+        self.soft_deadline = float(os.environ.get('SMART_SEARCH_SOFT_DEADLINE', '0'))
+        self.min_results = int(os.environ.get('SMART_SEARCH_MIN_RESULTS', '0'))
         # 71: SourceCurator 源质量评估与健康检查
         from .source_curator import SourceCurator
         self.curator = SourceCurator()
@@ -184,7 +191,16 @@ class SmartSearchService:
             self._credibility_filter = SourceCredibilityFilter(llm_client)
             logger.info("源可信度筛选已启用 (41.02)")
     
-    def search(self, topic: str, article_type: str = '', max_results_per_source: int = 5) -> Dict[str, Any]:
+    def search(
+        self,
+        topic: str,
+        article_type: str = '',
+        max_results_per_source: int = 5,
+        max_cache_age: Optional[float] = None,
+        min_results: Optional[int] = None,
+        soft_deadline: Optional[float] = None,
+        task_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
         智能搜索 - 根据主题选择搜索源并并行执行
         
@@ -192,29 +208,161 @@ class SmartSearchService:
             topic: 搜索主题
             article_type: 文章类型
             max_results_per_source: 每个源的最大结果数
+            max_cache_age: 可接受的缓存结果最大年龄（秒），0 表示强制实时搜索
+            min_results: 收集到这么多条结果即提前返回（默认 SMART_SEARCH_MIN_RESULTS，0 不启用）
+            soft_deadline: 软截止时间（秒），到点后不再等待慢源（默认 SMART_SEARCH_SOFT_DEADLINE）
+            task_id: 任务 ID；设置后同一任务内的近似重复主题复用本任务已有的合并结果
             
         Returns:
             合并后的搜索结果
         """
         logger.info(f"🧠 智能搜索开始: {topic}")
 
-        # 37.04: 查询重复检测
-        if self.deduplicator.is_duplicate(topic, agent="smart_search"):
-            logger.warning(f"🔁 重复查询跳过: {topic}")
-            allowed = self.deduplicator.rollback()
-            return {
-                'success': True,
-                'results': [],
-                'summary': '',
-                'sources_used': [],
-                'error': None,
-                'skipped_duplicate': True,
-                'rollback_allowed': allowed,
-            }
-        self.deduplicator.record(topic, agent="smart_search")
-        self.deduplicator.reset_rollback_count()
+        # 37.04: 任务内查询重复检测（含近似重复），命中且结果未超龄时复用上次的合并结果
+        dedup = get_task_deduplicator(task_id) if task_id else None
+        if dedup is not None:
+            reused = self._reuse_merged(dedup, topic, max_cache_age)
+            if reused is not None:
+                return reused
 
         # 第一步：LLM 判断需要哪些搜索源
+        sources, search_tasks = self._plan_search(topic)
+
+        # 第二步：并行执行搜索（命中跨任务缓存的源不发请求，慢源到软截止时间后不再等待）
+        all_results = []
+        stream_stats: Dict[str, Any] = {}
+        for batch in self._stream_sources(
+            search_tasks,
+            max_results_per_source,
+            max_cache_age=max_cache_age,
+            min_results=min_results,
+            soft_deadline=soft_deadline,
+            stats=stream_stats,
+        ):
+            all_results.extend(batch['results'])
+
+        cache_hits = stream_stats.get('cache_hits', 0)
+        if self.result_cache is not None and search_tasks:
+            stats = self.result_cache.get_stats()
+            logger.info(
+                f"💾 搜索缓存: 本次命中 {cache_hits}/{len(search_tasks)} 个源，"
+                f"累计命中率 {stats['hit_rate']:.0%} ({stats['hits']}/{stats['lookups']})"
+            )
+        
+        # 第三步：合并去重
+        merged_results = self._merge_and_dedupe(all_results)
+
+        # 统一清洗所有搜索结果：HTML 标签 + source 字段
+        for item in merged_results:
+            self._clean_item(item)
+
+        # 第四步：41.02 源可信度筛选（LLM 四维评估）
+        if self._credibility_filter and merged_results:
+            merged_results = self._credibility_filter.curate(
+                query=topic, search_results=merged_results,
+            )
+
+        logger.info(f"🧠 智能搜索完成: 共 {len(merged_results)} 条结果")
+        
+        response = {
+            'success': True,
+            'results': merged_results,
+            'summary': self._generate_summary(merged_results),
+            'sources_used': sources,
+            'error': None,
+            'cache_hits': cache_hits,
+            'pending_sources': stream_stats.get('pending_sources', []),
+        }
+        if dedup is not None:
+            dedup.record(
+                topic,
+                agent="smart_search",
+                results={
+                    'recorded_at': time.time(),
+                    'response': {**response, 'results': [dict(item) for item in merged_results]},
+                },
+            )
+            dedup.reset_rollback_count()
+        return response
+
+    def _reuse_max_age(self, topic: str, max_cache_age: Optional[float]) -> float:
+        """任务内复用结果的最大年龄：与跨任务缓存一致，时效性主题收紧为短 TTL"""
+        limit = float('inf') if max_cache_age is None else max_cache_age
+        if is_time_sensitive(topic):
+            fresh_ttl = self.result_cache.fresh_ttl if self.result_cache is not None else DEFAULT_FRESH_TTL
+            limit = min(limit, fresh_ttl)
+        return limit
+
+    def _reuse_merged(self, dedup, topic: str, max_cache_age: Optional[float]) -> Optional[Dict[str, Any]]:
+        """复用同一任务内重复/近似重复主题的合并结果（max_cache_age=0 或结果超龄时重新搜索）"""
+        match = dedup.lookup(topic, agent="smart_search")
+        if match is None or not match.results:
+            return None
+        age = time.time() - match.results['recorded_at']
+        if age >= self._reuse_max_age(topic, max_cache_age):
+            logger.info(f"🔁 近似主题结果已超龄 ({age:.0f}s)，重新搜索: {topic}")
+            return None
+        logger.warning(f"🔁 重复查询跳过: {topic} ≈ {match.query}")
+        previous = match.results['response']
+        return {
+            'success': True,
+            'results': [dict(item) for item in previous.get('results', [])],
+            'summary': previous.get('summary', ''),
+            'sources_used': previous.get('sources_used', []),
+            'error': None,
+            'skipped_duplicate': True,
+            'reused_from': match.query,
+            'rollback_allowed': dedup.rollback(),
+        }
+
+    def search_stream(
+        self,
+        topic: str,
+        max_results_per_source: int = 5,
+        max_cache_age: Optional[float] = None,
+        min_results: Optional[int] = None,
+        soft_deadline: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式智能搜索 - 每个源完成即产出新增的去重结果
+
+        不经过查询去重、源质量排序和可信度筛选；调用方可在拿到足够结果后
+        直接停止迭代，未完成的源在后台跑完并写入搜索缓存。
+
+        Yields:
+            {'source': 源名称, 'results': 新增结果（已按 URL 去重并清洗）,
+             'total': 累计结果数, 'from_cache': 是否来自缓存}
+        """
+        _, search_tasks = self._plan_search(topic)
+        seen_urls = set()
+        total = 0
+        for batch in self._stream_sources(
+            search_tasks,
+            max_results_per_source,
+            max_cache_age=max_cache_age,
+            min_results=min_results,
+            soft_deadline=soft_deadline,
+        ):
+            fresh = []
+            for item in batch['results']:
+                url = item.get('url', '')
+                if url:
+                    if url in seen_urls:
+                        continue
+                    seen_urls.add(url)
+                fresh.append(self._clean_item(item))
+            if not fresh:
+                continue
+            total += len(fresh)
+            yield {
+                'source': batch['source'],
+                'results': fresh,
+                'total': total,
+                'from_cache': batch['from_cache'],
+            }
+
+    def _plan_search(self, topic: str) -> Tuple[List[str], List[tuple]]:
+        """路由 + 健康检查，返回 (使用的源, [(源名称, 查询, 执行函数)])"""
         routing_result = self._route_search_sources(topic)
         
         sources = routing_result.get('sources', ['general'])
@@ -230,97 +378,164 @@ class SmartSearchService:
         # 71: 健康检查 — 过滤不健康的源
         sources = self.curator.get_healthy_sources(sources)
 
-        # 第二步：并行执行搜索
-        all_results = []
-        search_tasks = []
+        search_tasks: List[tuple] = []
         
-        # 准备搜索任务
         if 'arxiv' in sources:
-            search_tasks.append(('arxiv', arxiv_query))
+            search_tasks.append(('arxiv', arxiv_query, self._search_arxiv))
         
         # 专业博客搜索
         for source in sources:
             if source in PROFESSIONAL_BLOGS:
-                search_tasks.append(('blog', source, blog_query))
+                search_tasks.append((f'blog:{source}', blog_query, partial(self._search_blog, source)))
         
         # 通用搜索（始终包含）
         if 'general' in sources or not search_tasks:
-            search_tasks.append(('general', blog_query))
+            search_tasks.append(('general', blog_query, self._search_general))
 
         # Google 搜索（75.02 Serper）
         if 'google' in sources:
-            search_tasks.append(('google', blog_query))
+            search_tasks.append(('google', blog_query, self._search_google))
 
         # 搜狗搜索（75.07 腾讯云 SearchPro）
         if 'sogou' in sources:
-            search_tasks.append(('sogou', blog_query))
-        
-        # 并行执行
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {}
-            
-            for task in search_tasks:
-                if task[0] == 'arxiv':
-                    future = executor.submit(self._search_arxiv, task[1], max_results_per_source)
-                    futures[future] = 'arxiv'
-                elif task[0] == 'blog':
-                    future = executor.submit(self._search_blog, task[1], task[2], max_results_per_source)
-                    futures[future] = f'blog:{task[1]}'
-                elif task[0] == 'general':
-                    future = executor.submit(self._search_general, task[1], max_results_per_source)
-                    futures[future] = 'general'
-                elif task[0] == 'google':
-                    future = executor.submit(self._search_google, task[1], max_results_per_source)
-                    futures[future] = 'google'
-                elif task[0] == 'sogou':
-                    future = executor.submit(self._search_sogou, task[1], max_results_per_source)
-                    futures[future] = 'sogou'
-            
-            for future in as_completed(futures):
-                source_name = futures[future]
-                try:
-                    result = future.result()
-                    if result.get('success') and result.get('results'):
-                        all_results.extend(result['results'])
+            search_tasks.append(('sogou', blog_query, self._search_sogou))
+
+        return sources, search_tasks
+
+    def _stream_sources(
+        self,
+        search_tasks: List[tuple],
+        max_results: int,
+        max_cache_age: Optional[float] = None,
+        min_results: Optional[int] = None,
+        soft_deadline: Optional[float] = None,
+        stats: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """按完成顺序产出各源结果；够数或到软截止时间即停止等待"""
+        min_results = self.min_results if min_results is None else min_results
+        soft_deadline = self.soft_deadline if soft_deadline is None else soft_deadline
+        stats = stats if stats is not None else {}
+        stats['cache_hits'] = 0
+        stats['pending_sources'] = []
+        collected = 0
+
+        live_tasks = []
+        for source_name, query, search_fn in search_tasks:
+            cached = self._get_cached(source_name, query, max_results, max_cache_age)
+            if cached is None:
+                live_tasks.append((source_name, query, search_fn))
+                continue
+            stats['cache_hits'] += 1
+            collected += len(cached['results'])
+            logger.info(f"💾 {source_name} 命中搜索缓存: {len(cached['results'])} 条结果")
+            yield {'source': source_name, 'results': cached['results'], 'from_cache': True}
+
+        if not live_tasks:
+            return
+        if min_results and collected >= min_results:
+            logger.info(f"⚡ 缓存结果已足够 ({collected} 条)，跳过 {len(live_tasks)} 个源")
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='smart-search')
+        futures = {}
+        for source_name, query, search_fn in live_tasks:
+            future = executor.submit(search_fn, query, max_results)
+            futures[future] = (source_name, query)
+
+        deadline = time.monotonic() + soft_deadline if soft_deadline else None
+        pending = set(futures)
+        processed = set()
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"⏱️ 到达软截止时间 ({soft_deadline}s)，不再等待慢源")
+                    break
+                for future in done:
+                    source_name, query = futures[future]
+                    processed.add(future)
+                    result = self._on_source_done(source_name, query, max_results, future)
+                    if result:
+                        collected += len(result['results'])
                         logger.info(f"✅ {source_name} 搜索完成: {len(result['results'])} 条结果")
-                        # 71: 记录成功
-                        self.curator.record_success(source_name.replace('blog:', ''))
-                    elif not result.get('success'):
-                        # 71: 记录失败
-                        self.curator.record_failure(source_name.replace('blog:', ''))
-                except Exception as e:
-                    logger.error(f"❌ {source_name} 搜索失败: {e}")
-                    # 71: 记录失败
-                    self.curator.record_failure(source_name.replace('blog:', ''))
-        
-        # 第三步：合并去重
-        merged_results = self._merge_and_dedupe(all_results)
-
-        # 统一清洗所有搜索结果：HTML 标签 + source 字段
-        for item in merged_results:
-            if not item.get('source') or item.get('source') == '通用搜索':
-                item['source'] = item.get('url', '通用搜索')
-            if item.get('title'):
-                item['title'] = re.sub(r'<[^>]+>', '', item['title'])
-            if item.get('content'):
-                item['content'] = re.sub(r'<[^>]+>', '', item['content'])
+                        yield {'source': source_name, 'results': result['results'], 'from_cache': False}
+                if min_results and collected >= min_results and pending:
+                    logger.info(f"⚡ 已收集 {collected} 条结果，提前返回")
+                    break
+        finally:
+            # 未等待的慢源继续在后台执行，完成后照常写缓存与健康记录
+            for future, (source_name, query) in futures.items():
+                if future not in processed:
+                    future.add_done_callback(partial(self._on_source_done, source_name, query, max_results))
+            stats['pending_sources'] = [futures[f][0] for f in pending]
+            if pending:
+                logger.info(f"⏳ 慢源在后台完成并写入缓存: {stats['pending_sources']}")
+            executor.shutdown(wait=False)
+
+    def _on_source_done(
+        self, source_name: str, query: str, max_results: int, future
+    ) -> Optional[Dict[str, Any]]:
+        """单个源完成：写缓存 + 71 源健康记录，返回成功且非空的结果"""
+        curator_name = source_name.replace('blog:', '')
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"❌ {source_name} 搜索失败: {e}")
+            self.curator.record_failure(curator_name)
+            return None
+        if result.get('success') and result.get('results'):
+            self._put_cached(source_name, query, max_results, result)
+            self.curator.record_success(curator_name)
+            return result
+        if not result.get('success'):
+            self.curator.record_failure(curator_name)
+        return None
 
-        # 第四步：41.02 源可信度筛选（LLM 四维评估）
-        if self._credibility_filter and merged_results:
-            merged_results = self._credibility_filter.curate(
-                query=topic, search_results=merged_results,
+    @staticmethod
+    def _clean_item(item: Dict[str, Any]) -> Dict[str, Any]:
+        """清洗单条结果：HTML 标签 + source 字段"""
+        if not item.get('source') or item.get('source') == '通用搜索':
+            item['source'] = item.get('url', '通用搜索')
+        if item.get('title'):
+            item['title'] = re.sub(r'<[^>]+>', '', item['title'])
+        if item.get('content'):
+            item['content'] = re.sub(r'<[^>]+>', '', item['content'])
+        return item
+    
+    # ===== 跨任务搜索结果缓存 =====
+
+    def _get_cached(
+        self,
+        source_name: str,
+        query: str,
+        max_results: int,
+        max_cache_age: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        if self.result_cache is None or max_cache_age == 0:
+            return None
+        try:
+            return self.result_cache.get(
+                source_name, query, params={'max_results': max_results}, max_age=max_cache_age,
             )
+        except Exception as e:
+            logger.warning(f"读取搜索缓存失败 [{source_name}]: {e}")
+            return None
+
+    def _put_cached(self, source_name: str, query: str, max_results: int, result: Dict[str, Any]) -> None:
+        if self.result_cache is None:
+            return
+        try:
+            self.result_cache.put(source_name, query, result, params={'max_results': max_results})
+        except Exception as e:
+            logger.warning(f"写入搜索缓存失败 [{source_name}]: {e}")
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """跨任务搜索缓存命中统计（按源）"""
+        if self.result_cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.result_cache.get_stats()}
 
-        logger.info(f"🧠 智能搜索完成: 共 {len(merged_results)} 条结果")
-        
-        return {
-            'success': True,
-            'results': merged_results,
-            'summary': self._generate_summary(merged_results),
-            'sources_used': sources,
-            'error': None
-        }
-    
     def _route_search_sources(self, topic: str) -> Dict[str, Any]:
         """使用 LLM 判断需要哪些搜索源"""
         if not self.llm:
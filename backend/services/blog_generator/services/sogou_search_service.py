@@ -16,7 +16,7 @@ import time
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
 
-import requests
+from utils import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -142,8 +142,8 @@ class SogouSearchService:
         if TC_REGION:
             headers["X-TC-Region"] = TC_REGION
 
-        resp = requests.post(TC_ENDPOINT, headers=headers, data=payload,
-                             timeout=self.timeout)
+        resp = http_client.post(TC_ENDPOINT, headers=headers, data=payload,
+                                timeout=self.timeout)
         resp.raise_for_status()
         return resp.json()
 
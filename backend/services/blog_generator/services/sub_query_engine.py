@@ -141,7 +141,7 @@ class SubQueryEngine:
 
     def parallel_search(
         self, sub_queries: List[str], original_topic: str = '',
-        max_results_per_query: int = 5,
+        max_results_per_query: int = 5, task_id: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """并行执行所有子查询的搜索，委托 SmartSearchService"""
         queries = list(sub_queries)
@@ -153,7 +153,7 @@ class SubQueryEngine:
         all_results = []
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             futures = {
-                executor.submit(self._execute_single_search, q, max_results_per_query): q
+                executor.submit(self._execute_single_search, q, max_results_per_query, task_id): q
                 for q in queries
             }
             for future in as_completed(futures):
@@ -169,10 +169,12 @@ class SubQueryEngine:
         logger.info(f"并行搜索完成: {len(all_results)} 条原始 → {len(merged)} 条去重")
         return merged
 
-    def _execute_single_search(self, query: str, max_results: int) -> List[Dict[str, Any]]:
+    def _execute_single_search(
+        self, query: str, max_results: int, task_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         if not self.search_service:
             return []
-        result = self.search_service.search(query, max_results=max_results)
+        result = self.search_service.search(query, max_results=max_results, task_id=task_id)
         if result.get('success') and result.get('results'):
             for item in result['results']:
                 item['_sub_query'] = query
@@ -194,13 +196,16 @@ class SubQueryEngine:
 
     # ── 完整流程 ──────────────────────────────
 
-    def run(self, topic: str, target_audience: str = '', max_results: int = 15) -> Dict[str, Any]:
-        """完整的子查询并行研究流程"""
+    def run(
+        self, topic: str, target_audience: str = '', max_results: int = 15,
+        task_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """完整的子查询并行研究流程（task_id 用于任务内重复查询复用）"""
         # Step 1: 可选的初始搜索获取 context
         context = ''
         if self.context_enabled and self.search_service:
             try:
-                initial = self.search_service.search(topic, max_results=3)
+                initial = self.search_service.search(topic, max_results=3, task_id=task_id)
                 if initial.get('success') and initial.get('results'):
                     context = '\n'.join([
                         f"- {r.get('title', '')}: {(r.get('content', '') or '')[:200]}"
@@ -215,7 +220,9 @@ class SubQueryEngine:
 
         # Step 3: 并行搜索
         per_query = max(3, max_results // max(len(sub_queries), 1))
-        results = self.parallel_search(sub_queries, original_topic=topic, max_results_per_query=per_query)
+        results = self.parallel_search(
+            sub_queries, original_topic=topic, max_results_per_query=per_query, task_id=task_id,
+        )
 
         return {
             'results': results[:max_results],
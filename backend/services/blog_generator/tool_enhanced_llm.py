@@ -7,14 +7,22 @@
 3. 执行工具调用并将结果回注
 4. 继续推理直到 LLM 给出最终回答
 
+同一轮的多个工具调用并发执行（受每轮并发上限和单工具超时约束），
+同一对话内参数相同的调用只执行一次，结果按原顺序回注。
+
 环境变量：
 - LLM_TOOLS_ENABLED: 是否启用（默认 false）
 - LLM_TOOLS_MAX_ROUNDS: 最大工具调用轮数（默认 3）
+- LLM_TOOLS_MAX_PARALLEL: 每轮最多并发执行的工具调用数（默认 4）
+- LLM_TOOLS_TIMEOUT: 单个工具调用超时（秒，默认 60）
 """
 import json
 import logging
 import os
-from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +31,13 @@ class ToolDefinition:
     """工具定义"""
 
     def __init__(self, name: str, description: str,
-                 parameters: Dict[str, Any], handler: Callable):
+                 parameters: Dict[str, Any], handler: Callable,
+                 timeout: Optional[float] = None):
         self.name = name
         self.description = description
         self.parameters = parameters
         self.handler = handler
+        self.timeout = timeout
 
     def to_openai_schema(self) -> Dict:
         """转换为 OpenAI function calling 格式"""
@@ -79,6 +89,26 @@ class ToolFactory:
         )
 
 
+def _run_with_timeout(func: Callable, kwargs: Dict[str, Any], timeout: float) -> Tuple[bool, Any]:
+    """在独立线程中执行工具，超时后放弃等待（与 BlogToolManager 相同的 threading 超时保护）"""
+    outcome: Dict[str, Any] = {}
+
+    def _run():
+        try:
+            outcome["result"] = func(**kwargs)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    thread.join(timeout=timeout)
+    if thread.is_alive():
+        return False, f"工具调用失败: 超时（{timeout:.0f}s）"
+    if "error" in outcome:
+        return False, f"工具调用失败: {outcome['error']}"
+    return True, outcome.get("result")
+
+
 class ToolEnhancedLLM:
     """工具增强 LLM 包装器"""
 
@@ -86,6 +116,8 @@ class ToolEnhancedLLM:
         self.llm = llm_client
         self.tools = tools or []
         self.max_rounds = int(os.environ.get('LLM_TOOLS_MAX_ROUNDS', '3'))
+        self.max_parallel = max(1, int(os.environ.get('LLM_TOOLS_MAX_PARALLEL', '4')))
+        self.tool_timeout = float(os.environ.get('LLM_TOOLS_TIMEOUT', '60'))
         self._tool_map = {t.name: t for t in self.tools}
 
     def chat_with_tools(self, messages: List[Dict], **kwargs) -> str:
@@ -103,6 +135,8 @@ class ToolEnhancedLLM:
 
         tool_schemas = [t.to_openai_schema() for t in self.tools]
         current_messages = list(messages)
+        # 本次对话内成功的工具结果：(工具名, 规范化参数) → 结果
+        result_cache: Dict[Tuple[str, str], Any] = {}
 
         for round_num in range(self.max_rounds):
             # 调用 LLM（带工具定义）
@@ -136,26 +170,10 @@ class ToolEnhancedLLM:
                     return response.get('content', str(response))
                 return str(response)
 
-            # 执行工具调用
-            for tc in tool_calls:
-                func_name = tc.get('function', {}).get('name', '') if isinstance(tc, dict) else getattr(tc.function, 'name', '')
-                func_args_str = tc.get('function', {}).get('arguments', '{}') if isinstance(tc, dict) else getattr(tc.function, 'arguments', '{}')
-                tc_id = tc.get('id', '') if isinstance(tc, dict) else getattr(tc, 'id', '')
-
-                tool = self._tool_map.get(func_name)
-                if not tool:
-                    logger.warning(f"[ToolEnhancedLLM] 未知工具: {func_name}")
-                    continue
-
-                try:
-                    args = json.loads(func_args_str) if isinstance(func_args_str, str) else func_args_str
-                    result = tool.handler(**args)
-                    logger.info(f"[ToolEnhancedLLM] 工具调用: {func_name}({args}) → {len(str(result))} 字符")
-                except Exception as e:
-                    result = f"工具调用失败: {e}"
-                    logger.warning(f"[ToolEnhancedLLM] {func_name} 执行失败: {e}")
-
-                # 回注工具结果
+            # 执行工具调用，按原顺序回注结果
+            calls = [c for c in (self._parse_tool_call(tc) for tc in tool_calls) if c]
+            results = self._execute_tool_calls(calls, result_cache)
+            for (tc, func_name, func_args_str, tc_id, _, _), result in zip(calls, results):
                 current_messages.append({
                     "role": "assistant",
                     "tool_calls": [tc] if isinstance(tc, dict) else [{"id": tc_id, "function": {"name": func_name, "arguments": func_args_str}, "type": "function"}],
@@ -168,3 +186,64 @@ class ToolEnhancedLLM:
 
         # 达到最大轮数，做最后一次普通调用
         return self.llm.chat(messages=current_messages, **kwargs)
+
+    def _parse_tool_call(self, tc) -> Optional[tuple]:
+        """解析工具调用 → (原始调用, 工具名, 参数串, 调用 ID, 参数, 缓存键)；未知工具返回 None"""
+        func_name = tc.get('function', {}).get('name', '') if isinstance(tc, dict) else getattr(tc.function, 'name', '')
+        func_args_str = tc.get('function', {}).get('arguments', '{}') if isinstance(tc, dict) else getattr(tc.function, 'arguments', '{}')
+        tc_id = tc.get('id', '') if isinstance(tc, dict) else getattr(tc, 'id', '')
+
+        if func_name not in self._tool_map:
+            logger.warning(f"[ToolEnhancedLLM] 未知工具: {func_name}")
+            return None
+        try:
+            args = json.loads(func_args_str) if isinstance(func_args_str, str) else func_args_str
+            key = (func_name, json.dumps(args, sort_keys=True, ensure_ascii=False))
+        except (TypeError, ValueError) as e:
+            args, key = e, None
+        return tc, func_name, func_args_str, tc_id, args, key
+
+    def _execute_tool_calls(self, calls: List[tuple], result_cache: Dict) -> List[Any]:
+        """并发执行一轮工具调用，相同调用只执行一次，返回与 calls 对齐的结果"""
+        results: List[Any] = [None] * len(calls)
+        # 缓存键 → 需要该结果的调用下标（首个下标负责执行）
+        to_run: Dict[Any, List[int]] = {}
+        for i, (_, func_name, _, _, args, key) in enumerate(calls):
+            if isinstance(args, Exception):
+                results[i] = f"工具调用失败: {args}"
+                logger.warning(f"[ToolEnhancedLLM] {func_name} 执行失败: {args}")
+            elif key in result_cache:
+                results[i] = result_cache[key]
+                logger.info(f"[ToolEnhancedLLM] 复用工具结果: {func_name}({args})")
+            else:
+                to_run.setdefault(key, []).append(i)
+        if not to_run:
+            return results
+
+        def run(index: int) -> Tuple[bool, Any]:
+            _, func_name, _, _, args, _ = calls[index]
+            tool = self._tool_map[func_name]
+            started = time.time()
+            ok, result = _run_with_timeout(tool.handler, args, tool.timeout or self.tool_timeout)
+            if ok:
+                logger.info(
+                    f"[ToolEnhancedLLM] 工具调用: {func_name}({args}) → {len(str(result))} 字符 "
+                    f"({time.time() - started:.1f}s)"
+                )
+            else:
+                logger.warning(f"[ToolEnhancedLLM] {func_name} 执行失败: {result}")
+            return ok, result
+
+        firsts = [indexes[0] for indexes in to_run.values()]
+        if len(firsts) == 1:
+            outcomes = [run(firsts[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(firsts))) as pool:
+                outcomes = list(pool.map(run, firsts))
+
+        for (key, indexes), (ok, result) in zip(to_run.items(), outcomes):
+            if ok:
+                result_cache[key] = result
+            for i in indexes:
+                results[i] = result
+        return results
@@ -0,0 +1,617 @@
+"""
+Mermaid 本地语法检查与自动修复
+
+覆盖 flowchart/graph、sequenceDiagram、classDiagram、stateDiagram 四类图表中
+最常见的机械性错误：括号不配对、保留字作为节点 ID、含特殊字符的节点文本未加引号、
+结构位置上的全角标点、subgraph/end 与块结构不配对等。这些问题在本地确定性修复，
+只有修复后仍无法通过检查的图表才交给 LLM（ArtistAgent._repair_mermaid）处理。
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DIAGRAM_HEADER_PATTERN = re.compile(
+    r'^(flowchart|graph|sequenceDiagram|classDiagram|stateDiagram|gantt|pie|erDiagram|mindmap|timeline)'
+)
+
+# 会被 Mermaid 解析为关键字、不能直接作为 flowchart 节点 ID 的单词
+FLOWCHART_RESERVED_IDS = frozenset({
+    'end', 'subgraph', 'graph', 'flowchart', 'style',
+    'class', 'classDef', 'click', 'linkStyle',
+})
+
+_FLOWCHART_DIRECTIVE_RE = re.compile(
+    r'^(style|classDef|class|click|linkStyle|direction)\s+(?![-=.<>])'
+)
+_SUBGRAPH_RE = re.compile(r'^subgraph\b')
+_END_RE = re.compile(r'^end\s*;?$')
+_ID_RE = re.compile(r'\w+')
+_LINK_RE = re.compile(r'<?(?:-{2,}|={2,}|-\.+-|~{3,})(?:>|[ox](?!\w))?')
+_TEXT_LINK_RE = re.compile(r'(?:--|==|-\.)(?=\s)')
+_TEXT_LINK_END_RE = re.compile(r'\s(?:-{2,}(?:>|[ox](?!\w))?|={2,}>?|\.-+>?)')
+_FULLWIDTH_LINK_RE = re.compile(r'[-－—]{1,3}[>＞]|[-－—]{2,3}|→|[=＝]{2,}[>＞]?')
+_LABEL_BOUNDARY_RE = re.compile(r'\s+(?:<?-{2,}|={2,}|-\.|[-－—]{1,3}[>＞]|→)')
+_CLASS_SUFFIX_RE = re.compile(r':::\w+')
+
+# (开始符, 可接受的闭合符)，长的开始符优先匹配
+_FLOWCHART_SHAPES = (
+    ('(((', (')))',)),
+    ('([', ('])',)),
+    ('[[', (']]',)),
+    ('[(', (')]',)),
+    ('((', ('))',)),
+    ('{{', ('}}',)),
+    ('[/', ('/]', '\\]')),
+    ('[\\', ('\\]', '/]')),
+    ('[', (']',)),
+    ('(', (')',)),
+    ('{', ('}',)),
+    ('>', (']',)),
+)
+# 紧跟在节点 ID 后、明显用作节点形状的全角括号
+_FULLWIDTH_SHAPES = {'【': ('】', ']'), '［': ('］', ']')}
+_LABEL_SPECIAL_CHARS = frozenset('()[]{}"')
+
+_SEQUENCE_BLOCK_OPENERS = frozenset({
+    'loop', 'alt', 'opt', 'par', 'critical', 'break', 'rect', 'box',
+})
+_SEQUENCE_KEYWORDS = frozenset({
+    'participant', 'actor', 'activate', 'deactivate', 'autonumber', 'title',
+    'create', 'destroy', 'link', 'links', 'properties', 'details',
+    'else', 'and', 'option',
+})
+_SEQUENCE_MESSAGE_RE = re.compile(
+    r'^(?P<src>[^\s:]+?)\s*'
+    r'(?P<arrow><<-->>|<<->>|-->>|->>|--x|-x|--\)|-\)|-->|->)'
+    r'(?P<act>[+-]?)\s*(?P<dst>[^\s:;+-][^\s:;]*)\s*(?P<rest>.*)$'
+)
+_SEQUENCE_NOTE_RE = re.compile(r'^[Nn]ote\s+(?:left of|right of|over)\s+[^:：]+$')
+# Mermaid 实体编码：# 与 ; 在消息文本中会被词法分析器截断，已编码的实体原样保留
+_SEQUENCE_TEXT_ESCAPE_RE = re.compile(r'#\w+;|[#;]')
+_SEQUENCE_TEXT_ENTITIES = {'#': '#35;', ';': '#59;'}
+
+_BLOCK_OPEN_RE = re.compile(r'^(class|namespace|state)\b.*\{\s*$')
+_CLASS_RELATION_RE = re.compile(
+    r'(?:<\|--|--\|>|\*--|--\*|o--|--o|<\.\.|\.\.>|\.\.\|>|<\|\.\.|-->|<--|--|\.\.)'
+)
+_CLASS_RELATION_LINE_RE = re.compile(
+    r'^\w+(?:\s*"[^"]*")?\s*(?:<\|--|--\|>|\*--|--\*|o--|--o|<\.\.|\.\.>|\.\.\|>|<\|\.\.|-->|<--|--|\.\.)'
+)
+_STRUCTURAL_FULLWIDTH = str.maketrans({
+    '－': '-', '—': '-', '＞': '>', '＜': '<', '｛': '{', '｝': '}',
+    '［': '[', '］': ']', '＊': '*', '｜': '|',
+})
+
+
+@dataclass
+class MermaidLintResult:
+    """本地检查/修复结果"""
+    code: str
+    diagram_type: str
+    errors: List[str] = field(default_factory=list)
+    fixes: List[str] = field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+
+# (描述, 是否已在输出中修复)
+_Issue = Tuple[str, bool]
+
+
+def lint_mermaid(code: str) -> List[str]:
+    """检查 Mermaid 代码，返回错误列表（不修改代码）"""
+    _, _, issues = _check(code)
+    return [message for message, _ in issues]
+
+
+def autofix_mermaid(code: str) -> MermaidLintResult:
+    """
+    确定性修复 Mermaid 代码中的机械性错误
+
+    Returns:
+        MermaidLintResult: code 为修复后的代码，errors 为修复后仍存在的问题
+    """
+    fixes = []
+    diagram_type = ''
+    for _ in range(2):
+        fixed_code, diagram_type, issues = _check(code)
+        fixes.extend(message for message, fixed in issues if fixed)
+        if fixed_code == code:
+            break
+        code = fixed_code
+    _, diagram_type, issues = _check(code)
+    return MermaidLintResult(
+        code=code,
+        diagram_type=diagram_type,
+        errors=[message for message, _ in issues],
+        fixes=fixes,
+    )
+
+
+def _header_line(lines: List[str]) -> Optional[Tuple[int, str]]:
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped and not stripped.startswith('%%'):
+            return index, stripped
+    return None
+
+
+def _check(code: str) -> Tuple[str, str, List[_Issue]]:
+    lines = code.strip().split('\n')
+    issues: List[_Issue] = []
+
+    header = _header_line(lines)
+    if header is not None and header[1].lower() == 'mermaid':
+        del lines[header[0]]
+        issues.append(("多余的 mermaid 标记行", True))
+        header = _header_line(lines)
+
+    match = DIAGRAM_HEADER_PATTERN.match(header[1]) if header else None
+    if header and not match:
+        canonical = _canonical_header(header[1])
+        if canonical:
+            lines[header[0]] = lines[header[0]].replace(
+                header[1], canonical + header[1][len(canonical):], 1
+            )
+            issues.append(("图表类型声明大小写错误", True))
+            match = DIAGRAM_HEADER_PATTERN.match(canonical)
+        elif any(_LINK_RE.search(line) for line in lines):
+            lines.insert(header[0], 'flowchart TD')
+            issues.append(("缺少图表类型声明", True))
+            header = (header[0], 'flowchart TD')
+            match = DIAGRAM_HEADER_PATTERN.match(header[1])
+    if not match:
+        issues.append(("缺少图表类型声明", False))
+        return '\n'.join(lines), '', issues
+
+    diagram_type = 'flowchart' if match.group(1) == 'graph' else match.group(1)
+    checker = _CHECKERS.get(diagram_type)
+    if checker:
+        body = checker(lines[header[0] + 1:], header[0] + 2, issues)
+        lines = lines[:header[0] + 1] + body
+    return '\n'.join(lines), diagram_type, issues
+
+
+def _canonical_header(header: str) -> str:
+    lowered = header.lower()
+    for keyword in ('flowchart', 'graph', 'sequenceDiagram', 'classDiagram', 'stateDiagram'):
+        if lowered.startswith(keyword.lower()):
+            return keyword
+    return ''
+
+
+def _indent_of(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+# ========== flowchart / graph ==========
+
+def _check_flowchart(lines: List[str], first_lineno: int, issues: List[_Issue]) -> List[str]:
+    out = []
+    renames: Dict[str, str] = {}
+    known_ids = set(_ID_RE.findall('\n'.join(lines)))
+    subgraph_count = sum(1 for line in lines if _SUBGRAPH_RE.match(line.strip()))
+    end_count = sum(1 for line in lines if _END_RE.match(line.strip()))
+    if subgraph_count != end_count:
+        issues.append((f"subgraph({subgraph_count}) 与 end({end_count}) 不匹配", True))
+
+    depth = 0
+    directive_lines = []
+    for offset, line in enumerate(lines):
+        lineno = first_lineno + offset
+        stripped = line.strip()
+        if not stripped or stripped.startswith('%%'):
+            out.append(line)
+        elif _END_RE.match(stripped):
+            if depth == 0:
+                continue
+            depth -= 1
+            out.append(line)
+        elif _SUBGRAPH_RE.match(stripped):
+            depth += 1
+            out.append(_fix_subgraph_title(line, lineno, issues))
+        elif _FLOWCHART_DIRECTIVE_RE.match(stripped):
+            directive_lines.append(len(out))
+            out.append(line)
+        else:
+            indent = _indent_of(line)
+            fixed = _fix_flowchart_statement(stripped, lineno, renames, known_ids, issues)
+            out.append(indent + fixed)
+
+    for index in directive_lines:
+        out[index] = _rename_directive_ids(out[index], renames)
+    if depth > 0:
+        out.extend(['end'] * depth)
+    return out
+
+
+def _fix_subgraph_title(line: str, lineno: int, issues: List[_Issue]) -> str:
+    match = re.match(r'^(\s*subgraph\s+)(\w+)\[', line)
+    if not match:
+        return line
+    start = match.end()
+    shape = _parse_label(line, start, (']',), lineno, issues)
+    if shape is None:
+        return line
+    label, resume, closer = shape
+    return line[:start] + label + closer + line[resume:]
+
+
+def _fix_flowchart_statement(
+    line: str,
+    lineno: int,
+    renames: Dict[str, str],
+    known_ids: set,
+    issues: List[_Issue],
+) -> str:
+    out = []
+    i, n = 0, len(line)
+    while i < n:
+        ch = line[i]
+        if ch.isspace() or ch in '&;':
+            out.append(ch)
+            i += 1
+            continue
+        if ch == '；':
+            out.append(';')
+            issues.append((f"第 {lineno} 行: 全角分号", True))
+            i += 1
+            continue
+        if ch == '"':
+            end = line.find('"', i + 1)
+            end = n - 1 if end == -1 else end
+            out.append(line[i:end + 1])
+            i = end + 1
+            continue
+        if ch in '|｜':
+            end = min((p for p in (line.find('|', i + 1), line.find('｜', i + 1)) if p != -1), default=-1)
+            if end == -1:
+                issues.append((f"第 {lineno} 行: 连线文字缺少闭合的 |", False))
+                out.append(line[i:])
+                break
+            if ch != '|' or line[end] != '|':
+                issues.append((f"第 {lineno} 行: 连线文字使用了全角竖线", True))
+            out.append('|' + line[i + 1:end] + '|')
+            i = end + 1
+            continue
+        class_suffix = _CLASS_SUFFIX_RE.match(line, i)
+        if class_suffix:
+            out.append(class_suffix.group())
+            i = class_suffix.end()
+            continue
+
+        fullwidth_link = _FULLWIDTH_LINK_RE.match(line, i)
+        if fullwidth_link and not fullwidth_link.group().isascii():
+            token = fullwidth_link.group()
+            head = '>' if token[-1] in '>＞' or token == '→' else ''
+            body = '==' if token[0] in '=＝' else '--'
+            out.append(body + (head or body[0]))
+            issues.append((f"第 {lineno} 行: 连线使用了全角字符 '{token}'", True))
+            i = fullwidth_link.end()
+            continue
+        link = _LINK_RE.match(line, i)
+        text_link = None
+        if link and link.group() in ('--', '==') and link.end() < n and line[link.end()].isspace():
+            text_link = link
+        elif not link:
+            text_link = _TEXT_LINK_RE.match(line, i)
+        if text_link:
+            end = _TEXT_LINK_END_RE.search(line, text_link.end())
+            stop = end.end() if end else n
+            out.append(line[i:stop])
+            i = stop
+            continue
+        if link:
+            out.append(link.group())
+            i = link.end()
+            continue
+
+        id_match = _ID_RE.match(line, i)
+        if id_match:
+            node_id = id_match.group()
+            if node_id in FLOWCHART_RESERVED_IDS:
+                if node_id not in renames:
+                    renamed = node_id[0].upper() + node_id[1:]
+                    while renamed in known_ids:
+                        renamed += '_'
+                    renames[node_id] = renamed
+                    issues.append((f"第 {lineno} 行: 保留字 '{node_id}' 不能作为节点 ID", True))
+                node_id = renames[node_id]
+            out.append(node_id)
+            i = id_match.end()
+            if line.startswith('@{', i):
+                close = line.find('}', i)
+                stop = n if close == -1 else close + 1
+                out.append(line[i:stop])
+                i = stop
+                continue
+            i = _append_shape(line, i, lineno, out, issues)
+            continue
+
+        if ch in ')]}':
+            issues.append((f"第 {lineno} 行: 多余的右括号 '{ch}'", True))
+            i += 1
+            continue
+        if ch in '[({':
+            issues.append((f"第 {lineno} 行: 节点缺少 ID", False))
+            out.append(line[i:])
+            break
+        out.append(ch)
+        i += 1
+    return ''.join(out)
+
+
+def _append_shape(line: str, start: int, lineno: int, out: List[str], issues: List[_Issue]) -> int:
+    """解析节点 ID 之后的形状与文本，写入 out，返回下一个扫描位置"""
+    if start >= len(line):
+        return start
+    fullwidth = _FULLWIDTH_SHAPES.get(line[start])
+    if fullwidth:
+        shape = _parse_label(line, start + 1, fullwidth, lineno, issues)
+        if shape is None:
+            return start
+        label, resume, _ = shape
+        issues.append((f"第 {lineno} 行: 节点形状使用了全角括号", True))
+        out.append('[' + label + ']')
+        return resume
+
+    for opener, closers in _FLOWCHART_SHAPES:
+        if line.startswith(opener, start):
+            break
+    else:
+        return start
+    shape = _parse_label(line, start + len(opener), closers, lineno, issues, strict=len(opener) > 1)
+    if shape is None and len(opener) > 1:
+        opener = opener[0]
+        closers = dict(_FLOWCHART_SHAPES)[opener]
+        shape = _parse_label(line, start + 1, closers, lineno, issues)
+    label, resume, closer = shape
+    out.append(opener + label + closer)
+    return resume
+
+
+def _parse_label(
+    line: str,
+    start: int,
+    closers: Tuple[str, ...],
+    lineno: int,
+    issues: List[_Issue],
+    strict: bool = False,
+) -> Optional[Tuple[str, int, str]]:
+    """
+    从 start 开始寻找节点文本的闭合符
+
+    Returns:
+        (可直接输出的文本, 闭合符之后的扫描位置, 应输出的闭合符)；
+        strict 模式下找不到闭合符返回 None
+    """
+    n = len(line)
+    if line.startswith('"', start):
+        end_quote = line.find('"', start + 1)
+        if end_quote != -1:
+            for closer in closers:
+                if line.startswith(closer, end_quote + 1):
+                    return line[start:end_quote + 1], end_quote + 1 + len(closer), closer
+
+    depth = 0
+    k = start
+    while k < n:
+        if depth == 0:
+            for closer in closers:
+                if line.startswith(closer, k):
+                    return _quote_label(line[start:k], lineno, issues), k + len(closer), closer
+        ch = line[k]
+        if ch == '"':
+            end_quote = line.find('"', k + 1)
+            if end_quote != -1:
+                k = end_quote
+        elif ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            depth = max(0, depth - 1)
+        k += 1
+
+    if strict:
+        return None
+    # 括号不配对：以下一个连线之前的最后一个闭合符为界，没有则补全闭合符
+    boundary = _LABEL_BOUNDARY_RE.search(line, start)
+    segment_end = boundary.start() if boundary else n
+    segment = line[start:segment_end]
+    for closer in closers:
+        last = segment.rfind(closer)
+        if last != -1:
+            issues.append((f"第 {lineno} 行: 节点文本括号不配对", True))
+            return _quote_label(segment[:last], lineno, issues, force=True), start + last + len(closer), closer
+    issues.append((f"第 {lineno} 行: 节点缺少闭合的 '{closers[0]}'", True))
+    label = segment.rstrip()
+    return _quote_label(label, lineno, issues), start + len(label), closers[0]
+
+
+def _quote_label(label: str, lineno: int, issues: List[_Issue], force: bool = False) -> str:
+    stripped = label.strip()
+    if stripped.startswith('"') and stripped.endswith('"') and len(stripped) > 1:
+        return label
+    if not force and not (_LABEL_SPECIAL_CHARS & set(label)):
+        return label
+    if not force:
+        issues.append((f"第 {lineno} 行: 含特殊字符的节点文本未加引号", True))
+    return '"' + label.replace('"', '#quot;') + '"'
+
+
+def _rename_directive_ids(line: str, renames: Dict[str, str]) -> str:
+    if not renames:
+        return line
+    match = re.match(r'^(\s*(?:style|click|class)\s+)([^\s]+)(.*)$', line)
+    if not match:
+        return line
+    ids = [renames.get(item, item) for item in match.group(2).split(',')]
+    return match.group(1) + ','.join(ids) + match.group(3)
+
+
+# ========== sequenceDiagram ==========
+
+def _check_sequence(lines: List[str], first_lineno: int, issues: List[_Issue]) -> List[str]:
+    out = []
+    depth = 0
+    for offset, line in enumerate(lines):
+        lineno = first_lineno + offset
+        stripped = line.strip()
+        keyword = stripped.split(None, 1)[0] if stripped else ''
+        if not stripped or stripped.startswith('%%') or keyword in _SEQUENCE_KEYWORDS:
+            out.append(line)
+        elif keyword == 'end':
+            if depth == 0:
+                issues.append((f"第 {lineno} 行: 多余的 end", True))
+                continue
+            depth -= 1
+            out.append(line)
+        elif keyword in _SEQUENCE_BLOCK_OPENERS:
+            depth += 1
+            out.append(line)
+        elif keyword.lower() == 'note':
+            out.append(_fix_sequence_note(line, lineno, issues))
+        else:
+            out.append(_fix_sequence_message(line, lineno, issues))
+    if depth > 0:
+        issues.append((f"{depth} 个 loop/alt/opt 等块缺少 end", True))
+        out.extend(['end'] * depth)
+    return out
+
+
+def _split_text(line: str, lineno: int, issues: List[_Issue]) -> Tuple[str, Optional[str]]:
+    """按第一个冒号切分语句与文本，全角冒号视为冒号"""
+    ascii_at, fullwidth_at = line.find(':'), line.find('：')
+    if fullwidth_at != -1 and (ascii_at == -1 or fullwidth_at < ascii_at):
+        issues.append((f"第 {lineno} 行: 使用了全角冒号", True))
+        return line[:fullwidth_at], line[fullwidth_at + 1:]
+    if ascii_at != -1:
+        return line[:ascii_at], line[ascii_at + 1:]
+    return line, None
+
+
+def _escape_sequence_text(text: str, lineno: int, issues: List[_Issue]) -> str:
+    escaped = _SEQUENCE_TEXT_ESCAPE_RE.sub(
+        lambda match: _SEQUENCE_TEXT_ENTITIES.get(match.group(), match.group()), text
+    )
+    if escaped != text:
+        issues.append((f"第 {lineno} 行: 文本中的 # 或 ; 未转义", True))
+    return escaped
+
+
+def _fix_sequence_note(line: str, lineno: int, issues: List[_Issue]) -> str:
+    head, text = _split_text(line, lineno, issues)
+    if text is None:
+        if not _SEQUENCE_NOTE_RE.match(line.strip()):
+            issues.append((f"第 {lineno} 行: Note 缺少冒号", False))
+        return line
+    return head + ':' + _escape_sequence_text(text, lineno, issues)
+
+
+def _fix_sequence_message(line: str, lineno: int, issues: List[_Issue]) -> str:
+    indent = _indent_of(line)
+    head, text = _split_text(line.strip(), lineno, issues)
+    normalized = head.translate(_STRUCTURAL_FULLWIDTH)
+    match = _SEQUENCE_MESSAGE_RE.match(normalized.strip())
+    if not match:
+        return line if text is None else indent + head + ':' + text
+    if normalized != head:
+        issues.append((f"第 {lineno} 行: 消息箭头使用了全角字符", True))
+    if text is None:
+        rest = match.group('rest')
+        if not rest:
+            issues.append((f"第 {lineno} 行: 消息缺少冒号和文本", False))
+            return line
+        issues.append((f"第 {lineno} 行: 消息缺少冒号", True))
+        text = ' ' + rest
+        normalized = normalized.strip()[:match.start('rest')].rstrip()
+    elif match.group('rest'):
+        return line
+    return indent + normalized + ':' + _escape_sequence_text(text, lineno, issues)
+
+
+# ========== classDiagram / stateDiagram ==========
+
+def _check_braced(
+    lines: List[str],
+    first_lineno: int,
+    issues: List[_Issue],
+    relations_in_blocks: bool,
+) -> List[str]:
+    out = []
+    blocks: List[str] = []
+    in_note = False
+    for offset, line in enumerate(lines):
+        lineno = first_lineno + offset
+        stripped = line.strip()
+        if in_note:
+            in_note = stripped != 'end note'
+            out.append(line)
+            continue
+        if not stripped or stripped.startswith('%%'):
+            out.append(line)
+            continue
+        if re.match(r'^note\s', stripped) and ':' not in stripped and '：' not in stripped \
+                and '"' not in stripped:
+            in_note = True
+            out.append(line)
+            continue
+
+        structural = stripped
+        if stripped.endswith(('｛', '｝')):
+            structural = stripped[:-1] + stripped[-1].translate(_STRUCTURAL_FULLWIDTH)
+            issues.append((f"第 {lineno} 行: 使用了全角花括号", True))
+        # 类体内出现新的类声明或关系定义，说明上一个类体漏了闭合的 }
+        if blocks and blocks[-1] == 'class' and (
+            re.match(r'^(?:class|namespace)\s', structural)
+            or _CLASS_RELATION_LINE_RE.match(structural)
+        ):
+            issues.append((f"第 {lineno} 行之前的类定义缺少闭合的 }}", True))
+            blocks.pop()
+            out.append(_indent_of(line) + '}')
+
+        block_open = _BLOCK_OPEN_RE.match(structural)
+        if structural == '}':
+            if not blocks:
+                issues.append((f"第 {lineno} 行: 多余的 }}", True))
+                continue
+            blocks.pop()
+        elif block_open:
+            blocks.append(block_open.group(1))
+        elif not blocks or relations_in_blocks:
+            structural = _fix_relation_line(structural, lineno, issues)
+        out.append(_indent_of(line) + structural)
+    if blocks:
+        issues.append((f"{len(blocks)} 个块缺少闭合的 }}", True))
+        out.extend(['}'] * len(blocks))
+    return out
+
+
+def _fix_relation_line(line: str, lineno: int, issues: List[_Issue]) -> str:
+    if '：' not in line:
+        return line
+    head, text = _split_text(line, lineno, issues)
+    normalized = head.translate(_STRUCTURAL_FULLWIDTH)
+    if not _CLASS_RELATION_RE.search(normalized):
+        return line
+    if text is None:
+        return normalized
+    return normalized.rstrip() + ' : ' + text.strip()
+
+
+def _check_class(lines: List[str], first_lineno: int, issues: List[_Issue]) -> List[str]:
+    return _check_braced(lines, first_lineno, issues, relations_in_blocks=False)
+
+
+def _check_state(lines: List[str], first_lineno: int, issues: List[_Issue]) -> List[str]:
+    return _check_braced(lines, first_lineno, issues, relations_in_blocks=True)
+
+
+_CHECKERS = {
+    'flowchart': _check_flowchart,
+    'sequenceDiagram': _check_sequence,
+    'classDiagram': _check_class,
+    'stateDiagram': _check_state,
+}
@@ -100,19 +100,11 @@ def run_chat_generate(
                 if 'error' in write_result:
                     logger.warning('写作章节 %s 失败: %s', sid, write_result['error'])
                     continue
-                # 更新 session sections
-                section_data = write_result.get('section', {})
-                sections = list(session.sections or [])
-                updated = False
-                for i, s in enumerate(sections):
-                    if s.get('id') == sid:
-                        sections[i] = section_data
-                        updated = True
-                        break
-                if not updated:
-                    sections.append(section_data)
-                session_mgr.update(session_id, sections=sections, status='writing')
-                session = session_mgr.get(session_id)
+                # 只写入这一章节，本地会话同步更新，不整份重新加载
+                section = write_result.get('section', {})
+                session_mgr.update_section(session_id, section, section_id=sid, status='writing')
+                session.replace_section(section, section_id=sid)
+                session.status = 'writing'
 
             # 4. 审核
             _report(task_manager, task_id, 'review')
@@ -1,13 +1,25 @@
 """
 WritingSession 数据模型 + WritingSessionManager SQLite 持久化
 对话式写作会话管理
+
+存储结构：
+- writing_sessions: 会话标量字段 + 小型 JSON 字段（outline、key_concepts、code_blocks、images）
+- writing_session_sections: 每个章节一行（按位置），带内容哈希；更新 sections 时
+  只写入哈希变化的行，update_section 只触及单个章节
+- writing_search_results: 搜索结果按内容哈希只存一份，跨会话共享
+- writing_session_search_results: 会话对搜索结果的引用（位置 → 哈希）
+
+所有操作在同一把锁内、以单个事务执行，共享连接不会被并发请求打乱。
+旧库中 writing_sessions.sections / search_results 的整块 JSON 在初始化时迁移到新表。
 """
+import hashlib
 import json
+import sqlite3
+import threading
 import uuid
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
-from typing import Optional, List
-import sqlite3
+from typing import Dict, Iterable, List, Optional
 
 
 @dataclass
@@ -29,9 +41,21 @@ class WritingSession:
     created_at: str = ""
     updated_at: str = ""
 
+    def replace_section(self, section: dict, section_id: str = None) -> None:
+        """在内存中按 update_section 的规则替换或追加章节，避免写入后整份重新加载"""
+        target = section_id if section_id is not None else section.get("id")
+        for i, existing in enumerate(self.sections):
+            if existing.get("id") == target:
+                self.sections[i] = section
+                return
+        self.sections.append(section)
 
-# JSON 序列化的字段列表
-_JSON_FIELDS = {"outline", "sections", "search_results", "key_concepts", "code_blocks", "images"}
+
+# JSON 序列化的字段列表（sections / search_results 存在子表中）
+_JSON_FIELDS = {"outline", "key_concepts", "code_blocks", "images"}
+
+# 按行存储的列表字段
+_CHILD_FIELDS = {"sections", "search_results"}
 
 # 所有可更新的字段
 _ALL_FIELDS = {
@@ -40,52 +64,198 @@ _ALL_FIELDS = {
     "key_concepts", "code_blocks", "images", "status",
 }
 
+# SQLite 单条语句的参数上限保守取值
+_QUERY_BATCH = 500
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _hash(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _batches(items: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(items), _QUERY_BATCH):
+        yield items[start:start + _QUERY_BATCH]
+
 
 class WritingSessionManager:
     def __init__(self, db_path: str = ":memory:"):
+        self._lock = threading.RLock()
         self._conn = sqlite3.connect(db_path, check_same_thread=False)
         self._conn.row_factory = sqlite3.Row
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
         self._create_table()
 
     def _create_table(self):
-        self._conn.execute("""
-            CREATE TABLE IF NOT EXISTS writing_sessions (
-                session_id TEXT PRIMARY KEY,
-                topic TEXT NOT NULL,
-                user_id TEXT DEFAULT '',
-                article_type TEXT DEFAULT 'problem-solution',
-                target_audience TEXT DEFAULT 'beginner',
-                target_length TEXT DEFAULT 'medium',
-                outline TEXT,
-                sections TEXT,
-                search_results TEXT,
-                research_summary TEXT,
-                key_concepts TEXT,
-                code_blocks TEXT,
-                images TEXT,
-                status TEXT DEFAULT 'created',
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
-            )
-        """)
-        self._conn.commit()
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS writing_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    user_id TEXT DEFAULT '',
+                    article_type TEXT DEFAULT 'problem-solution',
+                    target_audience TEXT DEFAULT 'beginner',
+                    target_length TEXT DEFAULT 'medium',
+                    outline TEXT,
+                    sections TEXT,
+                    search_results TEXT,
+                    research_summary TEXT,
+                    key_concepts TEXT,
+                    code_blocks TEXT,
+                    images TEXT,
+                    status TEXT DEFAULT 'created',
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS writing_session_sections (
+                    session_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    section_id TEXT,
+                    content_hash TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (session_id, position)
+                );
+
+                CREATE TABLE IF NOT EXISTS writing_search_results (
+                    content_hash TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS writing_session_search_results (
+                    session_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    PRIMARY KEY (session_id, position)
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_ws_sections_section_id
+                    ON writing_session_sections(session_id, section_id);
+                CREATE INDEX IF NOT EXISTS idx_ws_search_refs_hash
+                    ON writing_session_search_results(content_hash);
+            """)
         self._migrate()
 
     def _migrate(self):
-        cursor = self._conn.execute("PRAGMA table_info(writing_sessions)")
-        columns = {row[1] for row in cursor.fetchall()}
-        if "user_id" not in columns:
-            self._conn.execute("ALTER TABLE writing_sessions ADD COLUMN user_id TEXT DEFAULT ''")
-            self._conn.commit()
-
-    def _row_to_session(self, row: sqlite3.Row) -> WritingSession:
-        d = dict(row)
-        for f in _JSON_FIELDS:
-            if d.get(f) is not None:
-                d[f] = json.loads(d[f])
-            elif f in ("sections", "search_results", "key_concepts", "code_blocks", "images"):
-                d[f] = []
-        return WritingSession(**d)
+        with self._lock, self._conn:
+            cursor = self._conn.execute("PRAGMA table_info(writing_sessions)")
+            columns = {row[1] for row in cursor.fetchall()}
+            if "user_id" not in columns:
+                self._conn.execute("ALTER TABLE writing_sessions ADD COLUMN user_id TEXT DEFAULT ''")
+
+            # 整块 JSON 的 sections / search_results 拆到子表，原列置空
+            rows = self._conn.execute(
+                "SELECT session_id, sections, search_results FROM writing_sessions "
+                "WHERE sections IS NOT NULL OR search_results IS NOT NULL"
+            ).fetchall()
+            for row in rows:
+                if row["sections"] is not None:
+                    self._write_sections(row["session_id"], json.loads(row["sections"]) or [])
+                if row["search_results"] is not None:
+                    self._write_search_results(row["session_id"], json.loads(row["search_results"]) or [])
+            if rows:
+                self._conn.execute(
+                    "UPDATE writing_sessions SET sections = NULL, search_results = NULL "
+                    "WHERE sections IS NOT NULL OR search_results IS NOT NULL"
+                )
+
+    # ========== 子表读写（调用方持有锁并处于事务中） ==========
+
+    def _write_sections(self, session_id: str, sections: List[dict]):
+        """按位置比较内容哈希，只写入变化的章节行"""
+        existing = dict(self._conn.execute(
+            "SELECT position, content_hash FROM writing_session_sections WHERE session_id = ?",
+            (session_id,),
+        ).fetchall())
+        for position, section in enumerate(sections):
+            data = _dumps(section)
+            digest = _hash(data)
+            if existing.get(position) == digest:
+                continue
+            self._conn.execute(
+                "INSERT OR REPLACE INTO writing_session_sections "
+                "(session_id, position, section_id, content_hash, data) VALUES (?, ?, ?, ?, ?)",
+                (session_id, position, section.get("id"), digest, data),
+            )
+        if len(existing) > len(sections):
+            self._conn.execute(
+                "DELETE FROM writing_session_sections WHERE session_id = ? AND position >= ?",
+                (session_id, len(sections)),
+            )
+
+    def _write_search_results(self, session_id: str, results: List[dict]):
+        """搜索结果按内容哈希存一份，会话只保存引用"""
+        old_hashes = [row[0] for row in self._conn.execute(
+            "SELECT content_hash FROM writing_session_search_results WHERE session_id = ?",
+            (session_id,),
+        )]
+        refs = []
+        for position, result in enumerate(results):
+            data = _dumps(result)
+            digest = _hash(data)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO writing_search_results (content_hash, data) VALUES (?, ?)",
+                (digest, data),
+            )
+            refs.append((session_id, position, digest))
+        self._conn.execute(
+            "DELETE FROM writing_session_search_results WHERE session_id = ?", (session_id,)
+        )
+        self._conn.executemany(
+            "INSERT INTO writing_session_search_results (session_id, position, content_hash) VALUES (?, ?, ?)",
+            refs,
+        )
+        self._collect_search_results(set(old_hashes) - {ref[2] for ref in refs})
+
+    def _collect_search_results(self, hashes: Iterable[str]):
+        """删除不再被任何会话引用的搜索结果"""
+        for batch in _batches(list(hashes)):
+            placeholders = ", ".join(["?"] * len(batch))
+            self._conn.execute(
+                f"DELETE FROM writing_search_results WHERE content_hash IN ({placeholders}) "
+                "AND NOT EXISTS (SELECT 1 FROM writing_session_search_results r "
+                "WHERE r.content_hash = writing_search_results.content_hash)",
+                batch,
+            )
+
+    def _load_children(self, session_ids: List[str]) -> Dict[str, Dict[str, list]]:
+        children = {sid: {"sections": [], "search_results": []} for sid in session_ids}
+        for batch in _batches(session_ids):
+            placeholders = ", ".join(["?"] * len(batch))
+            for row in self._conn.execute(
+                f"SELECT session_id, data FROM writing_session_sections "
+                f"WHERE session_id IN ({placeholders}) ORDER BY session_id, position",
+                batch,
+            ):
+                children[row[0]]["sections"].append(json.loads(row[1]))
+            for row in self._conn.execute(
+                f"SELECT r.session_id, s.data FROM writing_session_search_results r "
+                f"JOIN writing_search_results s ON s.content_hash = r.content_hash "
+                f"WHERE r.session_id IN ({placeholders}) ORDER BY r.session_id, r.position",
+                batch,
+            ):
+                children[row[0]]["search_results"].append(json.loads(row[1]))
+        return children
+
+    def _rows_to_sessions(self, rows: List[sqlite3.Row]) -> List[WritingSession]:
+        children = self._load_children([row["session_id"] for row in rows])
+        sessions = []
+        for row in rows:
+            d = dict(row)
+            for f in _JSON_FIELDS:
+                if d.get(f) is not None:
+                    d[f] = json.loads(d[f])
+                elif f in ("key_concepts", "code_blocks", "images"):
+                    d[f] = []
+            d.update(children[d["session_id"]])
+            sessions.append(WritingSession(**d))
+        return sessions
+
+    # ========== 公共接口 ==========
 
     def create(self, topic: str, user_id: str = "", **kwargs) -> WritingSession:
         now = datetime.now(timezone.utc).isoformat()
@@ -98,66 +268,131 @@ class WritingSessionManager:
             **{k: v for k, v in kwargs.items() if k in _ALL_FIELDS},
         )
         cols = asdict(session)
+        sections = cols.pop("sections")
+        search_results = cols.pop("search_results")
         for f in _JSON_FIELDS:
             if cols[f] is not None:
-                cols[f] = json.dumps(cols[f], ensure_ascii=False)
+                cols[f] = _dumps(cols[f])
         placeholders = ", ".join(["?"] * len(cols))
         col_names = ", ".join(cols.keys())
-        self._conn.execute(
-            f"INSERT INTO writing_sessions ({col_names}) VALUES ({placeholders})",
-            list(cols.values()),
-        )
-        self._conn.commit()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO writing_sessions ({col_names}) VALUES ({placeholders})",
+                list(cols.values()),
+            )
+            self._write_sections(session.session_id, sections)
+            self._write_search_results(session.session_id, search_results)
         return session
 
     def get(self, session_id: str, user_id: str = None) -> Optional[WritingSession]:
-        if user_id:
-            row = self._conn.execute(
-                "SELECT * FROM writing_sessions WHERE session_id = ? AND user_id = ?",
-                (session_id, user_id),
-            ).fetchone()
-        else:
-            row = self._conn.execute(
-                "SELECT * FROM writing_sessions WHERE session_id = ?", (session_id,)
-            ).fetchone()
-        if row is None:
-            return None
-        return self._row_to_session(row)
+        with self._lock:
+            if user_id:
+                row = self._conn.execute(
+                    "SELECT * FROM writing_sessions WHERE session_id = ? AND user_id = ?",
+                    (session_id, user_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT * FROM writing_sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+            if row is None:
+                return None
+            return self._rows_to_sessions([row])[0]
 
     def update(self, session_id: str, **kwargs) -> Optional[WritingSession]:
         updates = {k: v for k, v in kwargs.items() if k in _ALL_FIELDS}
         if not updates:
             return self.get(session_id)
+        sections = updates.pop("sections", None)
+        search_results = updates.pop("search_results", None)
         updates["updated_at"] = datetime.now(timezone.utc).isoformat()
         set_parts = []
         values = []
         for k, v in updates.items():
             set_parts.append(f"{k} = ?")
-            values.append(json.dumps(v, ensure_ascii=False) if k in _JSON_FIELDS and v is not None else v)
+            values.append(_dumps(v) if k in _JSON_FIELDS and v is not None else v)
         values.append(session_id)
-        self._conn.execute(
-            f"UPDATE writing_sessions SET {', '.join(set_parts)} WHERE session_id = ?",
-            values,
-        )
-        self._conn.commit()
-        return self.get(session_id)
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    f"UPDATE writing_sessions SET {', '.join(set_parts)} WHERE session_id = ?",
+                    values,
+                )
+                if cursor.rowcount:
+                    if sections is not None:
+                        self._write_sections(session_id, sections)
+                    if search_results is not None:
+                        self._write_search_results(session_id, search_results)
+            return self.get(session_id)
+
+    def update_section(
+        self, session_id: str, section: dict, section_id: str = None, status: str = None
+    ) -> bool:
+        """
+        替换单个章节（按 section_id，默认取 section["id"]），不存在时追加到末尾。
+        只写入这一行，耗时与会话中其他章节的大小无关；status 在同一事务中更新，
+        不重新加载会话。返回会话是否存在。
+        """
+        target = section_id if section_id is not None else section.get("id")
+        data = _dumps(section)
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock, self._conn:
+            if status is None:
+                cursor = self._conn.execute(
+                    "UPDATE writing_sessions SET updated_at = ? WHERE session_id = ?", (now, session_id)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "UPDATE writing_sessions SET status = ?, updated_at = ? WHERE session_id = ?",
+                    (status, now, session_id),
+                )
+            if not cursor.rowcount:
+                return False
+            row = self._conn.execute(
+                "SELECT MIN(position) FROM writing_session_sections WHERE session_id = ? AND section_id = ?",
+                (session_id, target),
+            ).fetchone()
+            position = row[0]
+            if position is None:
+                position = self._conn.execute(
+                    "SELECT COALESCE(MAX(position) + 1, 0) FROM writing_session_sections WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO writing_session_sections "
+                "(session_id, position, section_id, content_hash, data) VALUES (?, ?, ?, ?, ?)",
+                (session_id, position, section.get("id"), _hash(data), data),
+            )
+        return True
 
     def list(self, limit: int = 20, offset: int = 0, user_id: str = None) -> List[WritingSession]:
-        if user_id:
-            rows = self._conn.execute(
-                "SELECT * FROM writing_sessions WHERE user_id = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                (user_id, limit, offset),
-            ).fetchall()
-        else:
-            rows = self._conn.execute(
-                "SELECT * FROM writing_sessions ORDER BY created_at DESC LIMIT ? OFFSET ?",
-                (limit, offset),
-            ).fetchall()
-        return [self._row_to_session(r) for r in rows]
+        with self._lock:
+            if user_id:
+                rows = self._conn.execute(
+                    "SELECT * FROM writing_sessions WHERE user_id = ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                    (user_id, limit, offset),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM writing_sessions ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                    (limit, offset),
+                ).fetchall()
+            return self._rows_to_sessions(rows)
 
     def delete(self, session_id: str) -> bool:
-        cursor = self._conn.execute(
-            "DELETE FROM writing_sessions WHERE session_id = ?", (session_id,)
-        )
-        self._conn.commit()
-        return cursor.rowcount > 0
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM writing_sessions WHERE session_id = ?", (session_id,)
+            )
+            if not cursor.rowcount:
+                return False
+            hashes = [row[0] for row in self._conn.execute(
+                "SELECT content_hash FROM writing_session_search_results WHERE session_id = ?",
+                (session_id,),
+            )]
+            self._conn.execute("DELETE FROM writing_session_sections WHERE session_id = ?", (session_id,))
+            self._conn.execute(
+                "DELETE FROM writing_session_search_results WHERE session_id = ?", (session_id,)
+            )
+            self._collect_search_results(set(hashes))
+        return True
@@ -87,6 +87,15 @@ class DatabaseService:
     def update_document_summary(self, doc_id: str, summary: str):
         return self.documents.update_document_summary(doc_id, summary)
 
+    def set_document_hash(self, doc_id: str, content_hash: str):
+        return self.documents.set_document_hash(doc_id, content_hash)
+
+    def find_document_by_hash(self, content_hash: str, file_type: str) -> Optional[Dict[str, Any]]:
+        return self.documents.find_document_by_hash(content_hash, file_type)
+
+    def reuse_parsed_document(self, doc_id: str, source_id: str) -> bool:
+        return self.documents.reuse_parsed_document(doc_id, source_id)
+
     def save_chunks(self, doc_id: str, chunks: List[Dict[str, Any]]):
         return self.documents.save_chunks(doc_id, chunks)
 
@@ -150,6 +159,24 @@ class DatabaseService:
     def count_history_by_type(self, content_type: str = None) -> int:
         return self.history.count_history_by_type(content_type)
 
+    def list_history_page(
+        self,
+        content_type: str = None,
+        book_id: str = None,
+        limit: int = 20,
+        cursor: str = None,
+        include_total: bool = True
+    ) -> Dict[str, Any]:
+        return self.history.list_history_page(content_type, book_id, limit, cursor, include_total)
+
+    def search_history(
+        self,
+        query: str,
+        content_type: str = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        return self.history.search_history(query, content_type, limit)
+
     def save_xhs_record(
         self,
         history_id: str,
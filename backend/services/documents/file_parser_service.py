@@ -5,21 +5,25 @@
 - 知识分块功能
 - 图片摘要生成（多模态模型）
 """
+import asyncio
 import os
 import re
-import time
 import uuid
 import base64
 import logging
 import zipfile
-import io
 from pathlib import Path
 from typing import Optional, List, Tuple, Callable, Dict, Any
 
-import requests
+import httpx
 from jinja2 import Environment, FileSystemLoader
 
 from infrastructure.paths import RuntimePaths
+from utils import http_client
+from utils.background_loop import run_async
+
+from .markdown_chunker import MarkdownChunker
+from .mineru_poller import MineruPoller
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +36,9 @@ _templates_dir = (
 )
 _jinja_env = Environment(loader=FileSystemLoader(str(_templates_dir)))
 
+# 上传/下载时每次读写的字节数
+_STREAM_CHUNK_SIZE = 1024 * 1024
+
 
 class FileParserService:
     """文件解析服务，支持 MinerU OCR 解析 PDF"""
@@ -62,6 +69,7 @@ class FileParserService:
             RuntimePaths.from_env(project_root=project_root).uploads
         )
         self.pdf_max_pages = pdf_max_pages
+        self._poller: Optional[MineruPoller] = None
 
         logger.info(f"FileParserService 初始化完成, upload_folder={self.upload_folder}, pdf_max_pages={self.pdf_max_pages}")
 
@@ -70,6 +78,15 @@ class FileParserService:
         file_path: str,
         filename: str,
         on_progress: Callable[[int, int, str, str], None] = None
+    ) -> dict:
+        """同步解析文件（在后台事件循环中执行 parse_file_async 并等待结果）"""
+        return run_async(self.parse_file_async(file_path, filename, on_progress))
+
+    async def parse_file_async(
+        self,
+        file_path: str,
+        filename: str,
+        on_progress: Callable[[int, int, str, str], None] = None
     ) -> dict:
         """
         解析文件
@@ -97,11 +114,11 @@ class FileParserService:
                 logger.info(f"直接读取文本文件: {filename}")
                 if on_progress:
                     on_progress(1, 1, "读取文本文件", filename)
-                return self._parse_text_file(file_path)
+                return await asyncio.to_thread(self._parse_text_file, file_path)
 
             # PDF 文件检查页数限制
             if file_ext == 'pdf':
-                page_count = self._get_pdf_page_count(file_path)
+                page_count = await asyncio.to_thread(self._get_pdf_page_count, file_path)
                 if page_count > self.pdf_max_pages:
                     logger.warning(f"PDF 页数超限: {page_count} 页 (最大 {self.pdf_max_pages} 页)")
                     return {
@@ -116,7 +133,7 @@ class FileParserService:
 
             # 其他文件使用 MinerU 解析
             logger.info(f"使用 MinerU 解析文件: {filename}")
-            return self._parse_with_mineru(file_path, filename, on_progress)
+            return await self._parse_with_mineru(file_path, filename, on_progress)
 
         except Exception as e:
             logger.error(f"文件解析异常: {e}", exc_info=True)
@@ -182,7 +199,7 @@ class FileParserService:
                 'error': f"读取文本文件失败: {e}"
             }
 
-    def _parse_with_mineru(
+    async def _parse_with_mineru(
         self,
         file_path: str,
         filename: str,
@@ -193,7 +210,7 @@ class FileParserService:
         logger.info("Step 1/3: 获取上传 URL...")
         if on_progress:
             on_progress(1, 3, "准备上传", f"正在获取上传地址...")
-        batch_id, upload_url, error = self._get_upload_url(filename)
+        batch_id, upload_url, error = await self._get_upload_url(filename)
         if error:
             return {
                 'success': False,
@@ -208,7 +225,7 @@ class FileParserService:
         logger.info(f"Step 2/3: 上传文件... batch_id={batch_id}")
         if on_progress:
             on_progress(2, 3, "上传文件", f"正在上传 {filename}...")
-        error = self._upload_file(file_path, upload_url)
+        error = await self._upload_file(file_path, upload_url)
         if error:
             return {
                 'success': False,
@@ -219,12 +236,12 @@ class FileParserService:
                 'error': error
             }
 
-        # Step 3: 轮询解析结果
+        # Step 3: 等待共享轮询器返回解析结果
         logger.info("Step 3/3: 等待解析完成...")
         if on_progress:
             on_progress(3, 3, "解析文档", "MinerU 正在解析文档内容...")
         extract_id = str(uuid.uuid4())[:8]
-        markdown, images, mineru_folder, error = self._poll_and_download(
+        markdown, images, mineru_folder, error = await self._poll_and_download(
             batch_id, extract_id, on_progress
         )
         if error:
@@ -246,13 +263,21 @@ class FileParserService:
             'error': None
         }
 
-    def _get_upload_url(self, filename: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
-        """从 MinerU 获取上传 URL"""
-        headers = {
+    def _auth_headers(self) -> Dict[str, str]:
+        return {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.mineru_token}"
         }
 
+    @property
+    def poller(self) -> MineruPoller:
+        """所有解析任务共用的结果轮询器"""
+        if self._poller is None:
+            self._poller = MineruPoller(self.result_api_template, self._auth_headers())
+        return self._poller
+
+    async def _get_upload_url(self, filename: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """从 MinerU 获取上传 URL"""
         payload = {
             "files": [{"name": filename}],
             "model_version": "vlm"
@@ -260,9 +285,10 @@ class FileParserService:
 
         try:
             logger.info(f"请求 MinerU 上传 URL: {self.upload_url_api}")
-            response = requests.post(
+            response = await http_client.async_fetch(
                 self.upload_url_api,
-                headers=headers,
+                method='POST',
+                headers=self._auth_headers(),
                 json=payload,
                 timeout=30
             )
@@ -281,7 +307,7 @@ class FileParserService:
             logger.info(f"成功获取上传 URL: batch_id={batch_id}")
             return batch_id, upload_url, None
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             error_msg = f"网络请求失败: {e}"
             logger.error(error_msg, exc_info=True)
             return None, None, error_msg
@@ -290,120 +316,69 @@ class FileParserService:
             logger.error(error_msg, exc_info=True)
             return None, None, error_msg
 
-    def _upload_file(self, file_path: str, upload_url: str) -> Optional[str]:
-        """上传文件到 MinerU"""
-        try:
+    async def _upload_file(self, file_path: str, upload_url: str) -> Optional[str]:
+        """上传文件到 MinerU（分块读取文件，不整体载入内存）"""
+        async def file_chunks():
             with open(file_path, 'rb') as f:
-                response = requests.put(
-                    upload_url,
-                    data=f,
-                    timeout=300
-                )
-                response.raise_for_status()
+                while True:
+                    chunk = await asyncio.to_thread(f.read, _STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        try:
+            # 预签名 URL 不接受分块传输编码，需显式给出 Content-Length
+            headers = {'Content-Length': str(os.path.getsize(file_path))}
+            response = await http_client.async_fetch(
+                upload_url,
+                method='PUT',
+                content=file_chunks(),
+                headers=headers,
+                timeout=300
+            )
+            response.raise_for_status()
             return None
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return f"文件上传失败: {e}"
         except IOError as e:
             return f"文件读取失败: {e}"
 
-    def _poll_and_download(
+    async def _poll_and_download(
         self,
         batch_id: str,
         extract_id: str,
         on_progress: Callable = None,
         max_wait: int = 600
     ) -> Tuple[Optional[str], Optional[List[dict]], Optional[str], Optional[str]]:
-        """轮询解析结果并下载"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.mineru_token}"
-        }
-
-        result_url = self.result_api_template.format(batch_id)
-        start_time = time.time()
-        poll_count = 0
-
-        while True:
-            if time.time() - start_time > max_wait:
-                return None, None, None, f"解析超时 ({max_wait}s)"
+        """等待解析结果并下载"""
+        zip_url, error = await self.poller.wait(batch_id, max_wait=max_wait, on_progress=on_progress)
+        if error:
+            return None, None, None, error
+        logger.info("解析完成，开始下载结果...")
+        if on_progress:
+            on_progress(3, 3, "下载结果", "解析完成，正在下载结果...")
+        return await self._download_and_extract(zip_url, extract_id)
 
-            try:
-                response = requests.get(result_url, headers=headers, timeout=30)
-                response.raise_for_status()
-                task_info = response.json()
-
-                if task_info.get("code") != 0:
-                    return None, None, None, f"查询状态失败: {task_info.get('msg')}"
-
-                state = task_info["data"]["extract_result"][0]["state"]
-
-                if state == "done":
-                    logger.info("解析完成，开始下载结果...")
-                    if on_progress:
-                        on_progress(3, 3, "下载结果", "解析完成，正在下载结果...")
-                    zip_url = task_info["data"]["extract_result"][0]["full_zip_url"]
-                    return self._download_and_extract(zip_url, extract_id)
-                elif state == "failed":
-                    err_msg = task_info["data"]["extract_result"][0].get("err_msg", "未知错误")
-                    return None, None, None, f"解析失败: {err_msg}"
-                else:
-                    poll_count += 1
-                    elapsed = int(time.time() - start_time)
-                    logger.info(f"当前状态: {state}, 继续等待...")
-                    if on_progress and poll_count % 3 == 0:  # 每 6 秒更新一次
-                        on_progress(3, 3, "解析文档", f"MinerU 正在解析... 已等待 {elapsed} 秒")
-                    time.sleep(2)
-
-            except requests.RequestException as e:
-                logger.warning(f"轮询请求失败: {e}, 重试中...")
-                time.sleep(2)
-
-    def _download_and_extract(
+    async def _download_and_extract(
         self,
         zip_url: str,
         extract_id: str
     ) -> Tuple[Optional[str], Optional[List[dict]], Optional[str], Optional[str]]:
-        """下载并解压结果"""
+        """流式下载结果 ZIP 到磁盘，再逐个成员解压"""
+        storage_dir = Path(self.upload_folder) / 'mineru_files' / extract_id
+        zip_path = storage_dir.with_suffix('.zip.part')
         try:
-            response = requests.get(zip_url, timeout=120)
-            response.raise_for_status()
-
-            # 创建存储目录
-            storage_dir = Path(self.upload_folder) / 'mineru_files' / extract_id
             storage_dir.mkdir(parents=True, exist_ok=True)
-
-            markdown_content = None
-            images = []
-
-            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                z.extractall(storage_dir)
-                logger.info(f"解压 {len(z.namelist())} 个文件到 {storage_dir}")
-
-                # 查找 Markdown 文件
-                for name in z.namelist():
-                    if name.lower().endswith('.md'):
-                        md_path = storage_dir / name
-                        with open(md_path, 'r', encoding='utf-8') as f:
-                            markdown_content = f.read()
-                        logger.info(f"找到 Markdown 文件: {name}")
-                        break
-
-                # 收集图片文件
-                for name in z.namelist():
-                    if name.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
-                        img_path = storage_dir / name
-                        # 生成访问 URL
-                        url = f"/files/mineru/{extract_id}/{name}"
-
-                        # 尝试从文件名中提取页码
-                        page_num = self._extract_page_num_from_filename(name)
-
-                        images.append({
-                            'path': str(img_path),
-                            'url': url,
-                            'filename': os.path.basename(name),
-                            'page_num': page_num
-                        })
+            async with http_client.async_host_slot(zip_url):
+                async with http_client.get_async_client().stream('GET', zip_url, timeout=120) as response:
+                    response.raise_for_status()
+                    with open(zip_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes(_STREAM_CHUNK_SIZE):
+                            await asyncio.to_thread(f.write, chunk)
+
+            markdown_content, images = await asyncio.to_thread(
+                self._extract_zip, zip_path, storage_dir, extract_id
+            )
 
             if markdown_content is None:
                 return None, None, None, "未找到 Markdown 文件"
@@ -416,12 +391,52 @@ class FileParserService:
 
             return markdown_content, images, str(storage_dir), None
 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             return None, None, None, f"下载结果失败: {e}"
         except zipfile.BadZipFile:
             return None, None, None, "下载的文件不是有效的 ZIP 文件"
         except Exception as e:
             return None, None, None, f"处理结果失败: {e}"
+        finally:
+            if zip_path.exists():
+                zip_path.unlink()
+
+    def _extract_zip(
+        self,
+        zip_path: Path,
+        storage_dir: Path,
+        extract_id: str
+    ) -> Tuple[Optional[str], List[dict]]:
+        """逐个成员解压，顺带读取首个 Markdown 文件并收集图片"""
+        markdown_content = None
+        images = []
+
+        with zipfile.ZipFile(zip_path) as z:
+            members = z.infolist()
+            for member in members:
+                z.extract(member, storage_dir)
+                name = member.filename
+                lower = name.lower()
+
+                # 查找 Markdown 文件
+                if markdown_content is None and lower.endswith('.md'):
+                    with open(storage_dir / name, 'r', encoding='utf-8') as f:
+                        markdown_content = f.read()
+                    logger.info(f"找到 Markdown 文件: {name}")
+
+                # 收集图片文件
+                elif lower.endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
+                    images.append({
+                        'path': str(storage_dir / name),
+                        # 生成访问 URL
+                        'url': f"/files/mineru/{extract_id}/{name}",
+                        'filename': os.path.basename(name),
+                        # 尝试从文件名中提取页码
+                        'page_num': self._extract_page_num_from_filename(name)
+                    })
+            logger.info(f"解压 {len(members)} 个文件到 {storage_dir}")
+
+        return markdown_content, images
 
     def _extract_page_num_from_filename(self, filename: str) -> int:
         """
@@ -495,7 +510,8 @@ class FileParserService:
         self,
         markdown: str,
         chunk_size: int = 2000,
-        chunk_overlap: int = 200
+        chunk_overlap: int = 200,
+        max_tokens: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         将 Markdown 内容分块
@@ -503,142 +519,23 @@ class FileParserService:
         策略：
         1. 优先按标题分块（## 或 ###）
         2. 如果单个章节过长，再按段落分块
-        3. 保留分块位置信息
+        3. 保留分块位置信息与标题路径
 
         Args:
-            markdown: Markdown 内容
+            markdown: Markdown 内容（也可以是逐行产出的文件对象）
             chunk_size: 目标分块大小（字符）
             chunk_overlap: 分块重叠大小
+            max_tokens: 每个分块的 token 预算，None 表示只按字符限制
 
         Returns:
-            分块列表，每个分块包含 {chunk_type, title, content, start_pos, end_pos}
+            分块列表，每个分块包含 {chunk_type, title, content, start_pos, end_pos, breadcrumbs}
         """
-        chunks = []
-
-        # 按标题分割（## 或 ###）
-        sections = self._split_by_headers(markdown)
-
-        for section in sections:
-            title = section.get('title', '')
-            content = section.get('content', '')
-            start_pos = section.get('start_pos', 0)
-
-            if len(content) <= chunk_size:
-                # 内容不超过限制，直接作为一个分块
-                chunks.append({
-                    'chunk_type': 'section',
-                    'title': title,
-                    'content': content,
-                    'start_pos': start_pos,
-                    'end_pos': start_pos + len(content)
-                })
-            else:
-                # 内容过长，按段落再分块
-                sub_chunks = self._split_by_paragraphs(
-                    content, chunk_size, chunk_overlap, start_pos, title
-                )
-                chunks.extend(sub_chunks)
+        chunker = MarkdownChunker(chunk_size, chunk_overlap, max_tokens=max_tokens)
+        chunks = list(chunker.iter_chunks(markdown))
 
         logger.info(f"Markdown 分块完成: {len(chunks)} 块")
         return chunks
 
-    def _split_by_headers(self, markdown: str) -> List[Dict[str, Any]]:
-        """按标题分割 Markdown"""
-        sections = []
-
-        # 匹配 ## 或 ### 标题
-        header_pattern = r'^(#{2,3})\s+(.+)$'
-        lines = markdown.split('\n')
-
-        current_section = {'title': '', 'content': '', 'start_pos': 0}
-        current_pos = 0
-
-        for line in lines:
-            match = re.match(header_pattern, line)
-            if match:
-                # 保存之前的 section
-                if current_section['content'].strip():
-                    sections.append(current_section)
-
-                # 开始新 section
-                current_section = {
-                    'title': match.group(2).strip(),
-                    'content': line + '\n',
-                    'start_pos': current_pos
-                }
-            else:
-                current_section['content'] += line + '\n'
-
-            current_pos += len(line) + 1  # +1 for newline
-
-        # 保存最后一个 section
-        if current_section['content'].strip():
-            sections.append(current_section)
-
-        # 如果没有找到任何标题，整个文档作为一个 section
-        if not sections:
-            sections.append({
-                'title': '',
-                'content': markdown,
-                'start_pos': 0
-            })
-
-        return sections
-
-    def _split_by_paragraphs(
-        self,
-        content: str,
-        chunk_size: int,
-        chunk_overlap: int,
-        base_pos: int,
-        parent_title: str
-    ) -> List[Dict[str, Any]]:
-        """按段落分块长内容"""
-        chunks = []
-
-        # 按空行分割段落
-        paragraphs = re.split(r'\n\s*\n', content)
-
-        current_chunk = ''
-        current_start = base_pos
-        chunk_index = 0
-
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
-
-            if len(current_chunk) + len(para) + 2 <= chunk_size:
-                current_chunk += para + '\n\n'
-            else:
-                # 保存当前分块
-                if current_chunk.strip():
-                    chunks.append({
-                        'chunk_type': 'paragraph',
-                        'title': f"{parent_title} (Part {chunk_index + 1})" if parent_title else f"Part {chunk_index + 1}",
-                        'content': current_chunk.strip(),
-                        'start_pos': current_start,
-                        'end_pos': current_start + len(current_chunk)
-                    })
-                    chunk_index += 1
-
-                # 开始新分块（带重叠）
-                overlap_text = current_chunk[-chunk_overlap:] if len(current_chunk) > chunk_overlap else ''
-                current_start = current_start + len(current_chunk) - len(overlap_text)
-                current_chunk = overlap_text + para + '\n\n'
-
-        # 保存最后一个分块
-        if current_chunk.strip():
-            chunks.append({
-                'chunk_type': 'paragraph',
-                'title': f"{parent_title} (Part {chunk_index + 1})" if parent_title else f"Part {chunk_index + 1}",
-                'content': current_chunk.strip(),
-                'start_pos': current_start,
-                'end_pos': current_start + len(current_chunk)
-            })
-
-        return chunks
-
     # ========== 二期新增：图片摘要 ==========
 
     def generate_image_captions(
@@ -671,46 +568,82 @@ class FileParserService:
                 result.append(img)
                 continue
 
-            img_path = img.get('path', '')
-            if not img_path or not os.path.exists(img_path):
-                result.append(img)
-                continue
-
-            try:
-                # 读取图片并转为 base64
-                with open(img_path, 'rb') as f:
-                    img_data = f.read()
-                img_base64 = base64.b64encode(img_data).decode('utf-8')
-
-                # 确定 MIME 类型
-                ext = os.path.splitext(img_path)[1].lower()
-                mime_map = {
-                    '.png': 'image/png',
-                    '.jpg': 'image/jpeg',
-                    '.jpeg': 'image/jpeg',
-                    '.gif': 'image/gif',
-                    '.webp': 'image/webp'
-                }
-                mime_type = mime_map.get(ext, 'image/jpeg')
-
-                # 调用多模态模型生成描述
-                template = _jinja_env.get_template('image_caption.j2')
-                prompt = template.render(max_length=200)
-                caption = llm_service.chat_with_image(prompt, img_base64, mime_type)
-
-                if caption:
-                    img['caption'] = caption
-                    logger.info(f"图片摘要生成成功: {img.get('filename', '')}")
-                    processed += 1
-
-            except Exception as e:
-                logger.warning(f"图片摘要生成失败: {img_path}, 错误: {e}")
+            if self._caption_image(img, llm_service):
+                processed += 1
 
             result.append(img)
 
         logger.info(f"图片摘要生成完成: {processed}/{len(images)} 张")
         return result
 
+    async def generate_image_captions_async(
+        self,
+        images: List[Dict[str, Any]],
+        llm_service=None,
+        max_images: int = 10
+    ) -> List[Dict[str, Any]]:
+        """
+        并发为图片生成摘要（结果与 generate_image_captions 一致）
+
+        按顺序每轮并发处理「剩余名额」张图片，失败的名额顺延给后面的图片，
+        因此成功生成摘要的图片仍是最靠前的 max_images 张。
+        """
+        if not llm_service:
+            logger.warning("未提供 LLM 服务，跳过图片摘要生成")
+            return images
+
+        candidates = [img for img in images if img.get('path') and os.path.exists(img['path'])]
+        processed = 0
+        position = 0
+        while processed < max_images and position < len(candidates):
+            wave = candidates[position:position + max_images - processed]
+            position += len(wave)
+            outcomes = await asyncio.gather(
+                *(asyncio.to_thread(self._caption_image, img, llm_service) for img in wave)
+            )
+            processed += sum(1 for ok in outcomes if ok)
+
+        logger.info(f"图片摘要生成完成: {processed}/{len(images)} 张")
+        return images
+
+    def _caption_image(self, img: Dict[str, Any], llm_service) -> bool:
+        """为单张图片生成摘要，成功时写入 img['caption']"""
+        img_path = img.get('path', '')
+        if not img_path or not os.path.exists(img_path):
+            return False
+
+        try:
+            # 读取图片并转为 base64
+            with open(img_path, 'rb') as f:
+                img_data = f.read()
+            img_base64 = base64.b64encode(img_data).decode('utf-8')
+
+            # 确定 MIME 类型
+            ext = os.path.splitext(img_path)[1].lower()
+            mime_map = {
+                '.png': 'image/png',
+                '.jpg': 'image/jpeg',
+                '.jpeg': 'image/jpeg',
+                '.gif': 'image/gif',
+                '.webp': 'image/webp'
+            }
+            mime_type = mime_map.get(ext, 'image/jpeg')
+
+            # 调用多模态模型生成描述
+            template = _jinja_env.get_template('image_caption.j2')
+            prompt = template.render(max_length=200)
+            caption = llm_service.chat_with_image(prompt, img_base64, mime_type)
+
+            if caption:
+                img['caption'] = caption
+                logger.info(f"图片摘要生成成功: {img.get('filename', '')}")
+                return True
+
+        except Exception as e:
+            logger.warning(f"图片摘要生成失败: {img_path}, 错误: {e}")
+
+        return False
+
     def generate_document_summary(
         self,
         markdown: str,
@@ -0,0 +1,132 @@
+"""
+知识文档入库流水线 — 上传后的解析、分块、摘要在后台事件循环中以协程执行
+
+原先每个上传文档占用一个线程：线程大部分时间在轮询 MinerU 时 sleep，之后再
+串行生成文档摘要和逐张图片摘要。现在每个文档是后台事件循环中的一个协程：
+- MinerU 轮询由 FileParserService 的共享轮询器统一完成（指数退避）
+- 结果 ZIP 流式下载到磁盘后逐个成员解压
+- 文档摘要与图片摘要并发调用 LLM
+- 数据库写入、分块等同步操作放到线程池执行，不阻塞事件循环
+
+同时入库的文档数只受事件循环调度，不再受线程数限制。
+
+内容指纹去重：上传时边写盘边计算 SHA-256，入库全部完成后把指纹写入文档记录。
+再次上传相同内容的文件时直接复制已有的解析结果、分块、图片描述和摘要，
+不调用 MinerU 和 LLM。
+
+用法：
+    from services.documents.ingestion import save_upload, reuse_parsed_document, submit_ingestion
+    content_hash = save_upload(file.stream, file_path)
+    if not reuse_parsed_document(db_service, doc_id, content_hash, file_type):
+        submit_ingestion(doc_id, file_path, filename, db_service=..., file_parser=..., content_hash=content_hash)
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import logging
+from typing import BinaryIO, Optional
+
+from utils.background_loop import submit_async
+
+logger = logging.getLogger(__name__)
+
+_UPLOAD_BLOCK_SIZE = 1 << 20
+
+
+def save_upload(stream: BinaryIO, file_path: str) -> str:
+    """把上传流分块写入磁盘，同时计算内容 SHA-256，返回十六进制指纹"""
+    digest = hashlib.sha256()
+    with open(file_path, 'wb') as f:
+        for block in iter(lambda: stream.read(_UPLOAD_BLOCK_SIZE), b''):
+            digest.update(block)
+            f.write(block)
+    return digest.hexdigest()
+
+
+def reuse_parsed_document(db_service, doc_id: str, content_hash: str, file_type: str) -> Optional[str]:
+    """内容相同的文档已入库时复用其结果，返回来源文档 ID；无可复用结果返回 None"""
+    try:
+        source = db_service.find_document_by_hash(content_hash, file_type)
+        if source and source['id'] != doc_id and db_service.reuse_parsed_document(doc_id, source['id']):
+            return source['id']
+    except Exception as e:
+        logger.warning(f"复用文档解析结果失败，改为重新解析: {doc_id}, {e}")
+    return None
+
+
+async def ingest_document(
+    doc_id: str,
+    file_path: str,
+    filename: str,
+    *,
+    db_service,
+    file_parser,
+    llm_service=None,
+    chunk_size: int = 2000,
+    chunk_overlap: int = 200,
+    chunk_max_tokens: Optional[int] = None,
+    content_hash: Optional[str] = None,
+) -> bool:
+    """解析并入库单个文档，返回是否成功（失败原因写入文档状态）
+
+    content_hash 在全部结果落库后写入，之后相同内容的上传即可直接复用。
+    """
+    try:
+        await asyncio.to_thread(db_service.update_document_status, doc_id, 'parsing')
+
+        if not file_parser:
+            await asyncio.to_thread(db_service.update_document_status, doc_id, 'error', '文件解析服务不可用')
+            return False
+
+        result = await file_parser.parse_file_async(file_path, filename)
+
+        if not result.get('success'):
+            await asyncio.to_thread(
+                db_service.update_document_status, doc_id, 'error', result.get('error', '解析失败')
+            )
+            return False
+
+        markdown = result.get('markdown', '')
+        images = result.get('images', [])
+        mineru_folder = result.get('mineru_folder')
+
+        await asyncio.to_thread(db_service.save_parse_result, doc_id, markdown, mineru_folder)
+
+        chunks = await asyncio.to_thread(
+            file_parser.chunk_markdown, markdown, chunk_size, chunk_overlap, chunk_max_tokens
+        )
+        await asyncio.to_thread(db_service.save_chunks, doc_id, chunks)
+
+        # 文档摘要与图片摘要同时进行
+        summary: Optional[str] = None
+        if llm_service:
+            summary_call = asyncio.to_thread(file_parser.generate_document_summary, markdown, llm_service)
+            if images:
+                summary, images = await asyncio.gather(
+                    summary_call,
+                    file_parser.generate_image_captions_async(images, llm_service),
+                )
+            else:
+                summary = await summary_call
+        if summary:
+            await asyncio.to_thread(db_service.update_document_summary, doc_id, summary)
+        if images:
+            await asyncio.to_thread(db_service.save_images, doc_id, images)
+        if content_hash:
+            await asyncio.to_thread(db_service.set_document_hash, doc_id, content_hash)
+
+        logger.info(f"文档解析完成: {doc_id}, chunks={len(chunks)}, images={len(images)}")
+        return True
+
+    except Exception as e:
+        logger.error(f"文档解析异常: {doc_id}, {e}", exc_info=True)
+        try:
+            await asyncio.to_thread(db_service.update_document_status, doc_id, 'error', str(e))
+        except Exception as status_error:
+            logger.warning(f"更新文档状态失败: {doc_id}, {status_error}")
+        return False
+
+
+def submit_ingestion(doc_id: str, file_path: str, filename: str, **kwargs) -> concurrent.futures.Future:
+    """在后台事件循环中入库文档，立即返回 Future（参数同 ingest_document）"""
+    return submit_async(ingest_document(doc_id, file_path, filename, **kwargs))
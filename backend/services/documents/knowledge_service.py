@@ -10,15 +10,92 @@
 - 支持知识分块
 - 两级结构：文档摘要 + 分块内容
 - 图片摘要整合
+
+查询感知融合（v2 接口）：
+- 传入 query（当前主题或章节）时按语义相似度排序，来源先验只作为加权项
+  （embedding 走 EmbeddingProvider，启用远程 embedding 时命中持久化缓存）
+- 近重复去重：字符 shingle 的 SimHash 指纹 + 分段分桶，每条只与同桶指纹比较，整体线性
+- 按 token 预算装箱：放不下的条目跳过、继续尝试更小的条目，不再截断字符
+
+环境变量：
+- KNOWLEDGE_MAX_DOC_ITEMS: 融合结果中文档知识最大条目数（默认 10）
+- KNOWLEDGE_PROMPT_MAX_TOKENS: summarize_for_prompt_v2 的默认 token 预算（默认 20000）
 """
 import os
 import re
 import logging
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import List, Dict, Any, Optional, Literal
 
+import numpy as np
+
+from utils.context_guard import estimate_tokens
+
 logger = logging.getLogger(__name__)
 
+# SimHash 参数：64 位指纹，字符 4-gram
+_SIMHASH_BITS = 64
+_SHINGLE_SIZE = 4
+_BIT_SHIFTS = np.arange(_SIMHASH_BITS, dtype=np.uint64)
+_SHINGLE_BASE = np.uint64(0x100000001B3)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """字符 shingle 的 64 位哈希（去重后）；按码点向量化计算，结果与进程无关"""
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    count = max(1, len(codes) - _SHINGLE_SIZE + 1)
+    keys = np.zeros(count, dtype=np.uint64)
+    for offset in range(min(_SHINGLE_SIZE, len(codes))):
+        keys = keys * _SHINGLE_BASE + codes[offset:offset + count]
+    # splitmix64 终混，让相邻 shingle 的哈希位充分打散（uint64 乘法按 2^64 回绕）
+    keys ^= keys >> np.uint64(30)
+    keys *= _MIX_1
+    keys ^= keys >> np.uint64(27)
+    keys *= _MIX_2
+    keys ^= keys >> np.uint64(31)
+    return np.unique(keys)
+
+
+def _simhash(text: str) -> int:
+    """文本的 64 位 SimHash 指纹（字符 shingle，对中英文都有效）"""
+    normalized = ' '.join(text.lower().split())
+    if not normalized:
+        return 0
+    hashes = _shingle_hashes(normalized)
+    ones = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).sum(axis=0)
+    bits = (ones * 2 > len(hashes)).astype(np.uint64)
+    return int((bits << _BIT_SHIFTS).sum())
+
+
+class _NearDuplicateIndex:
+    """
+    SimHash 近重复索引
+
+    指纹切成 max_distance + 1 段：汉明距离不超过 max_distance 的两个指纹
+    至少有一段完全相同（鸽巢原理），因此只需与同段同值的桶内指纹比较。
+    默认 7：一两处改动的段落通常在 2~8 位以内，无关文本约相差 32 位。
+    """
+
+    def __init__(self, max_distance: int = 7):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.width = _SIMHASH_BITS // self.bands
+        self.mask = (1 << self.width) - 1
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+
+    def add_if_new(self, fingerprint: int) -> bool:
+        """指纹与已有指纹都不相近时加入索引并返回 True，否则返回 False"""
+        keys = [(fingerprint >> (band * self.width)) & self.mask for band in range(self.bands)]
+        for bucket, key in zip(self.buckets, keys):
+            for other in bucket.get(key, ()):
+                if bin(fingerprint ^ other).count('1') <= self.max_distance:
+                    return False
+        for bucket, key in zip(self.buckets, keys):
+            bucket.setdefault(key, []).append(fingerprint)
+        return True
+
 
 @dataclass
 class KnowledgeItem:
@@ -29,6 +106,7 @@ class KnowledgeItem:
     url: Optional[str] = None                        # 网络来源 URL
     file_name: Optional[str] = None                  # 文档文件名
     relevance_score: float = 0.0                     # 相关性评分
+    breadcrumbs: List[str] = field(default_factory=list)  # 文档分块所在章节的标题路径
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -38,7 +116,8 @@ class KnowledgeItem:
             'content': self.content,
             'url': self.url,
             'file_name': self.file_name,
-            'relevance_score': self.relevance_score
+            'relevance_score': self.relevance_score,
+            'breadcrumbs': list(self.breadcrumbs),
         }
 
     @classmethod
@@ -50,7 +129,8 @@ class KnowledgeItem:
             content=data.get('content', ''),
             url=data.get('url'),
             file_name=data.get('file_name'),
-            relevance_score=data.get('relevance_score', 0.0)
+            relevance_score=data.get('relevance_score', 0.0),
+            breadcrumbs=list(data.get('breadcrumbs') or []),
         )
 
 
@@ -64,14 +144,19 @@ class KnowledgeService:
     - 简单去重
     """
 
-    def __init__(self, max_content_length: int = 8000):
+    # 有 query 时来源先验（摘要 1.0 / 分块 0.9 / 图片 0.7 / 网络 0.5）在排序分中的权重
+    PRIOR_WEIGHT = 0.2
+
+    def __init__(self, max_content_length: int = 8000, embedding_provider=None):
         """
         初始化知识服务
 
         Args:
             max_content_length: 单条知识最大长度（超过则截断）
+            embedding_provider: 相关性排序用的 EmbeddingProvider（默认首次使用时创建）
         """
         self.max_content_length = max_content_length
+        self._embedding = embedding_provider
         logger.info(f"KnowledgeService 初始化完成, max_content_length={max_content_length}")
 
     def prepare_document_knowledge(
@@ -318,7 +403,7 @@ class KnowledgeService:
 
         Args:
             documents: 文档列表，包含 {filename, summary, ...}
-            chunks: 分块列表，包含 {document_id, title, content, ...}
+            chunks: 分块列表，包含 {document_id, title, content, breadcrumbs, ...}
             images: 图片列表，包含 {document_id, caption, ...}
 
         Returns:
@@ -365,6 +450,7 @@ class KnowledgeService:
             for chunk in doc_chunks:
                 chunk_title = chunk.get('title', '')
                 chunk_content = chunk.get('content', '')
+                breadcrumbs = list(chunk.get('breadcrumbs') or [])
 
                 if not chunk_content:
                     continue
@@ -372,12 +458,16 @@ class KnowledgeService:
                 # 截断过长内容
                 content = self._truncate_content(chunk_content)
 
+                # 标题带上级章节路径（最后一级即分块自身标题），脱离原文后仍能看出所在位置
+                path = ' > '.join([*breadcrumbs[:-1], chunk_title] if chunk_title else breadcrumbs)
+
                 items.append(KnowledgeItem(
                     source_type='document',
-                    title=f"{filename} - {chunk_title}" if chunk_title else filename,
+                    title=f"{filename} - {path}" if path else filename,
                     content=content,
                     file_name=filename,
-                    relevance_score=0.9
+                    relevance_score=0.9,
+                    breadcrumbs=breadcrumbs,
                 ))
 
             # 3. 图片摘要（作为补充知识）
@@ -401,21 +491,59 @@ class KnowledgeService:
         logger.info(f"准备分块知识: {len(items)} 条 (来自 {len(documents)} 个文档)")
         return items
 
+    def _get_embedding(self):
+        if self._embedding is None:
+            from services.blog_generator.services.semantic_compressor import EmbeddingProvider
+            self._embedding = EmbeddingProvider(shared_cache=True)
+        return self._embedding
+
+    def rank_by_relevance(
+        self,
+        query: Optional[str],
+        items: List[KnowledgeItem]
+    ) -> List[KnowledgeItem]:
+        """
+        按与 query 的相关性排序（稳定排序，同分保持原顺序）
+
+        有 query 时 relevance_score = (1 - PRIOR_WEIGHT) × 余弦相似度 + PRIOR_WEIGHT × 来源先验，
+        返回新的条目对象，不修改传入的条目；无 query 或 embedding 失败时按来源先验排序。
+
+        Args:
+            query: 当前主题或章节（标题 + 要点）
+            items: 知识条目列表
+
+        Returns:
+            排序后的知识条目列表
+        """
+        if query and items:
+            try:
+                texts = [f"{item.title}\n{item.content}" for item in items]
+                similarities = self._get_embedding().query_similarity(query, texts)
+                weight = self.PRIOR_WEIGHT
+                items = [
+                    replace(item, relevance_score=round((1 - weight) * float(sim) + weight * item.relevance_score, 4))
+                    for item, sim in zip(items, similarities)
+                ]
+            except Exception as e:
+                logger.warning(f"知识相关性排序失败，按来源优先级排序: {e}")
+        return sorted(items, key=lambda x: x.relevance_score, reverse=True)
+
     def get_merged_knowledge_v2(
         self,
         documents: List[Dict[str, Any]],
         chunks: List[Dict[str, Any]],
         images: List[Dict[str, Any]],
         web_knowledge: List[KnowledgeItem],
-        max_items: int = 30
+        max_items: int = 30,
+        query: Optional[str] = None
     ) -> List[KnowledgeItem]:
         """
         融合分块知识和网络搜索知识（二期）
 
         策略：
-        1. 文档摘要优先
-        2. 相关分块补充
-        3. 网络知识填充
+        1. 文档知识与网络知识统一按相关性排序（无 query 时：文档摘要 > 分块 > 图片 > 网络）
+        2. 按排序依次收录，文档知识最多 KNOWLEDGE_MAX_DOC_ITEMS 条
+        3. 去重：网络知识标题与已收录条目相同，或内容与已收录条目近重复（SimHash）
 
         Args:
             documents: 文档列表
@@ -423,50 +551,63 @@ class KnowledgeService:
             images: 图片列表
             web_knowledge: 网络搜索知识
             max_items: 最大返回条目数
+            query: 当前主题或章节，用于相关性排序（可选）
 
         Returns:
-            融合后的知识列表
+            融合后的知识列表（按相关性降序）
         """
         # 准备分块知识
         doc_knowledge = self.prepare_chunked_knowledge(documents, chunks, images)
+        candidates = self.rank_by_relevance(query, doc_knowledge + list(web_knowledge))
 
         result = []
         max_doc_items = int(os.getenv('KNOWLEDGE_MAX_DOC_ITEMS', '10'))
+        doc_count = web_added = duplicates = 0
+        seen_titles = set()
+        index = _NearDuplicateIndex()
 
-        # 1. 添加文档知识（按相关性排序）
-        doc_knowledge.sort(key=lambda x: x.relevance_score, reverse=True)
-        doc_count = min(len(doc_knowledge), max_doc_items)
-        result.extend(doc_knowledge[:doc_count])
-        logger.info(f"添加文档知识: {doc_count} 条")
-
-        # 2. 添加网络知识（去重）
-        web_added = 0
-        for web_item in web_knowledge:
+        for item in candidates:
             if len(result) >= max_items:
                 break
+            if item.source_type == 'document':
+                if doc_count >= max_doc_items:
+                    continue
+            elif item.title and item.title in seen_titles:
+                continue
 
-            if not self._is_duplicate_simple(web_item, result):
-                result.append(web_item)
+            if not index.add_if_new(_simhash(item.content)):
+                duplicates += 1
+                continue
+
+            result.append(item)
+            seen_titles.add(item.title)
+            if item.source_type == 'document':
+                doc_count += 1
+            else:
                 web_added += 1
 
+        logger.info(f"添加文档知识: {doc_count} 条")
         logger.info(f"添加网络知识: {web_added} 条")
-        logger.info(f"融合完成 (v2): 共 {len(result)} 条知识")
+        logger.info(f"融合完成 (v2): 共 {len(result)} 条知识，跳过近重复 {duplicates} 条")
 
         return result
 
     def summarize_for_prompt_v2(
         self,
         knowledge_items: List[KnowledgeItem],
-        max_total_length: int = 30000
+        max_total_length: int = 30000,
+        max_tokens: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         将知识条目整理为 Prompt 可用的格式（二期增强）
 
-        增强：按文档分组展示
+        增强：按文档分组展示；按传入顺序（相关性）装箱到 token 预算，
+        放不下的条目整条跳过，继续尝试后面更短的条目
 
         Args:
-            knowledge_items: 知识条目列表
-            max_total_length: 最大总长度
+            knowledge_items: 知识条目列表（通常已按相关性排序）
+            max_total_length: 最大总长度（字符）
+            max_tokens: token 预算，默认读取 KNOWLEDGE_PROMPT_MAX_TOKENS
 
         Returns:
             {
@@ -476,31 +617,40 @@ class KnowledgeService:
                 'knowledge_stats': dict
             }
         """
+        if max_tokens is None:
+            max_tokens = int(os.getenv('KNOWLEDGE_PROMPT_MAX_TOKENS', '20000'))
+
         doc_refs = []
         web_refs = []
 
+        # 装箱
+        selected = []
+        total_length = 0
+        total_tokens = 0
+        for item in knowledge_items:
+            block = f"### {item.title}\n\n{item.content}"
+            tokens = estimate_tokens(block)
+            if total_tokens + tokens > max_tokens or total_length + len(item.content) > max_total_length:
+                continue
+            selected.append((item, block))
+            total_tokens += tokens
+            total_length += len(item.content)
+
         # 按来源分组
         doc_items = [i for i in knowledge_items if i.source_type == 'document']
         web_items = [i for i in knowledge_items if i.source_type == 'web_search']
+        doc_blocks = [(i, b) for i, b in selected if i.source_type == 'document']
+        web_blocks = [(i, b) for i, b in selected if i.source_type == 'web_search']
 
         knowledge_parts = []
-        total_length = 0
 
         # 文档知识
-        if doc_items:
+        if doc_blocks:
             knowledge_parts.append("## 📚 文档知识\n")
             seen_files = set()
 
-            for item in doc_items:
-                if total_length + len(item.content) > max_total_length:
-                    remaining = max_total_length - total_length
-                    if remaining > 500:
-                        truncated = item.content[:remaining] + "\n...(内容已截断)"
-                        knowledge_parts.append(f"### {item.title}\n\n{truncated}")
-                    break
-
-                knowledge_parts.append(f"### {item.title}\n\n{item.content}")
-                total_length += len(item.content)
+            for item, block in doc_blocks:
+                knowledge_parts.append(block)
 
                 if item.file_name and item.file_name not in seen_files:
                     doc_refs.append({
@@ -510,15 +660,11 @@ class KnowledgeService:
                     seen_files.add(item.file_name)
 
         # 网络知识
-        if web_items and total_length < max_total_length:
+        if web_blocks:
             knowledge_parts.append("\n## 🌐 网络知识\n")
 
-            for item in web_items:
-                if total_length + len(item.content) > max_total_length:
-                    break
-
-                knowledge_parts.append(f"### {item.title}\n\n{item.content}")
-                total_length += len(item.content)
+            for item, block in web_blocks:
+                knowledge_parts.append(block)
 
                 web_refs.append({
                     'title': item.title,
@@ -534,7 +680,9 @@ class KnowledgeService:
             'knowledge_stats': {
                 'doc_items': len(doc_items),
                 'web_items': len(web_items),
-                'total_length': total_length
+                'total_length': total_length,
+                'total_tokens': total_tokens,
+                'dropped_items': len(knowledge_items) - len(selected)
             }
         }
 
@@ -0,0 +1,298 @@
+"""
+Markdown 知识分块 — 单次遍历、按行流式处理
+
+分块规则（与原 _split_by_headers + _split_by_paragraphs 的输出一致）：
+1. 按 ## / ### 标题切分章节，章节不超过 chunk_size 时整体作为一个 section 分块
+2. 超长章节按空行切分段落，段落累积到 chunk_size 后输出 paragraph 分块，
+   下一分块以上一分块末尾 chunk_overlap 个字符开头
+
+实现上逐行读取，章节只缓存到 chunk_size 为止；一旦确定超长就转为逐段落输出，
+缓存随之释放。因此内存占用只与 chunk_size 和最长段落有关，与文档总长度无关。
+所有缓冲区都是「片段列表 + 累计长度」，输出时才 join 一次。
+
+在此基础上新增：
+- max_tokens：每个分块的 token 预算（与字符上限同时生效），单个段落超预算时按行/按字符切开
+- breadcrumbs：分块所在章节的标题路径（# ~ ######，忽略代码块内的 # 行）
+"""
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from utils.context_guard import estimate_tokens
+
+_SECTION_HEADER_RE = re.compile(r'^(#{2,3})\s+(.+)$')
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.+)$')
+
+
+def _default_token_counter(text: str) -> int:
+    return estimate_tokens(text, method="char")
+
+
+def iter_lines(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    """逐行产出，语义同 str.split('\\n')；source 可以是字符串或文件对象等行迭代器"""
+    if isinstance(source, str):
+        start = 0
+        while True:
+            end = source.find('\n', start)
+            if end == -1:
+                yield source[start:]
+                return
+            yield source[start:end]
+            start = end + 1
+
+    ended_with_newline = True
+    for line in source:
+        ended_with_newline = line.endswith('\n')
+        yield line[:-1] if ended_with_newline else line
+    if ended_with_newline:
+        yield ''
+
+
+class _Buffer:
+    """片段列表 + 累计长度/token 数"""
+
+    __slots__ = ('parts', 'length', 'tokens')
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.length = 0
+        self.tokens = 0
+
+    def append(self, text: str, tokens: int = 0):
+        self.parts.append(text)
+        self.length += len(text)
+        self.tokens += tokens
+
+    def text(self) -> str:
+        if len(self.parts) > 1:
+            self.parts = [''.join(self.parts)]
+        return self.parts[0] if self.parts else ''
+
+    def tail(self, count: int) -> str:
+        """末尾 count 个字符（count <= length）"""
+        pieces, remaining = [], count
+        for part in reversed(self.parts):
+            if remaining <= 0:
+                break
+            pieces.append(part[-remaining:] if len(part) > remaining else part)
+            remaining -= len(part)
+        return ''.join(reversed(pieces))
+
+
+class _ParagraphChunker:
+    """把一个超长章节的段落累积成 paragraph 分块"""
+
+    def __init__(self, chunker: 'MarkdownChunker', title: str, base_pos: int, breadcrumbs: List[str]):
+        self.chunker = chunker
+        self.title = title
+        self.start = base_pos
+        self.breadcrumbs = breadcrumbs
+        self.index = 0
+        self.current = _Buffer()
+        self.paragraph: List[str] = []
+
+    def feed_line(self, line: str) -> Iterator[Dict[str, Any]]:
+        """空白行结束当前段落（等价于 re.split(r'\\n\\s*\\n')）"""
+        if line.strip():
+            self.paragraph.append(line)
+        elif self.paragraph:
+            yield from self._flush_paragraph()
+
+    def finish(self) -> Iterator[Dict[str, Any]]:
+        if self.paragraph:
+            yield from self._flush_paragraph()
+        text = self.current.text()
+        if text.strip():
+            yield self._chunk(text)
+
+    def _flush_paragraph(self) -> Iterator[Dict[str, Any]]:
+        para = '\n'.join(self.paragraph).strip()
+        self.paragraph = []
+        for piece in self.chunker.split_oversized(para):
+            yield from self._add(piece)
+
+    def _add(self, para: str) -> Iterator[Dict[str, Any]]:
+        chunker = self.chunker
+        para_tokens = chunker.count_tokens(para)
+        current = self.current
+        fits = current.length + len(para) + 2 <= chunker.chunk_size
+        if fits and chunker.max_tokens:
+            fits = current.tokens + para_tokens <= chunker.max_tokens
+        if fits:
+            current.append(para, para_tokens)
+            current.append('\n\n')
+            return
+
+        # 保存当前分块
+        text = current.text()
+        if text.strip():
+            yield self._chunk(text)
+            self.index += 1
+
+        # 开始新分块（带重叠；与原实现一致，chunk_overlap=0 时切片 [-0:] 取整块）
+        overlap = chunker.chunk_overlap
+        overlap_text = ''
+        if current.length > overlap:
+            overlap_text = current.tail(overlap) if overlap > 0 else text
+        overlap_tokens = chunker.count_tokens(overlap_text)
+        if chunker.max_tokens and overlap_tokens + para_tokens > chunker.max_tokens:
+            overlap_text, overlap_tokens = '', 0
+        self.start = self.start + current.length - len(overlap_text)
+        self.current = _Buffer()
+        self.current.append(overlap_text, overlap_tokens)
+        self.current.append(para, para_tokens)
+        self.current.append('\n\n')
+
+    def _chunk(self, text: str) -> Dict[str, Any]:
+        part = f"Part {self.index + 1}"
+        return {
+            'chunk_type': 'paragraph',
+            'title': f"{self.title} ({part})" if self.title else part,
+            'content': text.strip(),
+            'start_pos': self.start,
+            'end_pos': self.start + len(text),
+            'breadcrumbs': list(self.breadcrumbs),
+        }
+
+
+class MarkdownChunker:
+    """流式 Markdown 分块器"""
+
+    def __init__(
+        self,
+        chunk_size: int = 2000,
+        chunk_overlap: int = 200,
+        max_tokens: Optional[int] = None,
+        token_counter: Optional[Callable[[str], int]] = None,
+    ):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.max_tokens = max_tokens or None
+        self._count = token_counter or _default_token_counter
+
+    def count_tokens(self, text: str) -> int:
+        return self._count(text) if self.max_tokens and text else 0
+
+    def split_oversized(self, para: str) -> List[str]:
+        """单个段落超过 token 预算时按行、再按字符切开"""
+        if not self.max_tokens or self._count(para) <= self.max_tokens:
+            return [para]
+        pieces: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for line in para.split('\n'):
+            line_tokens = self._count(line)
+            if line_tokens > self.max_tokens:
+                if current:
+                    pieces.append('\n'.join(current))
+                    current, current_tokens = [], 0
+                step = max(1, len(line) * self.max_tokens // line_tokens)
+                pieces.extend(line[i:i + step] for i in range(0, len(line), step))
+                continue
+            if current and current_tokens + line_tokens > self.max_tokens:
+                pieces.append('\n'.join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += line_tokens
+        if current:
+            pieces.append('\n'.join(current))
+        return [p.strip() for p in pieces if p.strip()]
+
+    def iter_chunks(self, source: Union[str, Iterable[str]]) -> Iterator[Dict[str, Any]]:
+        """
+        逐个产出分块 {chunk_type, title, content, start_pos, end_pos, breadcrumbs}
+
+        Args:
+            source: Markdown 字符串，或逐行产出的可迭代对象（如打开的文件）
+        """
+        headings: List[str] = []
+        heading_levels: List[int] = []
+        in_fence = False
+        has_content = False
+
+        title, start_pos, crumbs = '', 0, []
+        section = _Buffer()  # 章节确定超长之前的缓存
+        splitter: Optional[_ParagraphChunker] = None
+        position = 0
+
+        for line in iter_lines(source):
+            # 维护标题路径（代码块内的 # 行不是标题）
+            if line.lstrip().startswith('```'):
+                in_fence = not in_fence
+            elif not in_fence:
+                heading = _HEADING_RE.match(line)
+                if heading:
+                    level = len(heading.group(1))
+                    while heading_levels and heading_levels[-1] >= level:
+                        heading_levels.pop()
+                        headings.pop()
+                    heading_levels.append(level)
+                    headings.append(heading.group(2).strip())
+
+            match = _SECTION_HEADER_RE.match(line)
+            if match:
+                yield from self._close_section(title, start_pos, crumbs, section, splitter)
+                title, start_pos, crumbs = match.group(2).strip(), position, list(headings)
+                section, splitter = _Buffer(), None
+            has_content = has_content or bool(line.strip())
+
+            if splitter is not None:
+                yield from splitter.feed_line(line)
+            else:
+                section.append(line + '\n', self.count_tokens(line + '\n'))
+                # 确定超长后转为逐段落输出并释放缓存
+                # （留 1 字符余量：全文只有空白时原实现按原文长度判断）
+                if section.length > self.chunk_size + 1:
+                    splitter = _ParagraphChunker(self, title, start_pos, crumbs)
+                    for buffered in iter_lines(section.text()[:-1]):
+                        yield from splitter.feed_line(buffered)
+                    section = _Buffer()
+
+            position += len(line) + 1
+
+        if not has_content:
+            # 全文只有空白：原实现把整篇原文作为一个 section
+            content = section.text()[:-1]
+            if splitter is None and len(content) <= self.chunk_size:
+                yield {
+                    'chunk_type': 'section',
+                    'title': '',
+                    'content': content,
+                    'start_pos': 0,
+                    'end_pos': len(content),
+                    'breadcrumbs': [],
+                }
+            return
+
+        yield from self._close_section(title, start_pos, crumbs, section, splitter)
+
+    def _close_section(
+        self,
+        title: str,
+        start_pos: int,
+        crumbs: List[str],
+        section: _Buffer,
+        splitter: Optional[_ParagraphChunker],
+    ) -> Iterator[Dict[str, Any]]:
+        if splitter is not None:
+            yield from splitter.finish()
+            return
+        content = section.text()
+        if not content.strip():
+            return
+        within_tokens = not self.max_tokens or section.tokens <= self.max_tokens
+        if len(content) <= self.chunk_size and within_tokens:
+            # 内容不超过限制，直接作为一个分块
+            yield {
+                'chunk_type': 'section',
+                'title': title,
+                'content': content,
+                'start_pos': start_pos,
+                'end_pos': start_pos + len(content),
+                'breadcrumbs': list(crumbs),
+            }
+            return
+        # 内容过长，按段落再分块
+        splitter = _ParagraphChunker(self, title, start_pos, crumbs)
+        for line in iter_lines(content[:-1]):
+            yield from splitter.feed_line(line)
+        yield from splitter.finish()
@@ -0,0 +1,197 @@
+"""
+MinerU 解析结果轮询器 — 所有在途解析任务共用一个轮询协程
+
+每个上传到 MinerU 的文件原先独占一个线程，每 2 秒 sleep + 查询一次。本模块在
+后台事件循环中维护一个轮询协程：
+- 每个 batch 按指数退避安排下一次查询（初始间隔 → 翻倍 → 上限）
+- 到期的 batch 并发查询，无到期任务时休眠到最近的到期时间（新任务注册会唤醒）
+- 没有在途任务时轮询协程自动退出，下次注册时再启动
+- 单个 batch 的异常响应只让该 batch 失败；轮询协程意外退出时所有等待方立即
+  收到错误，等待时间也以 max_wait 为上限，不会永久挂起
+
+环境变量：
+- MINERU_POLL_INITIAL_INTERVAL: 首次查询前的等待时间（秒），默认 1
+- MINERU_POLL_MAX_INTERVAL: 退避后的最大查询间隔（秒），默认 15
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+from utils import http_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PollJob:
+    batch_id: str
+    future: asyncio.Future
+    started: float
+    deadline: float
+    next_poll: float
+    interval: float
+    on_progress: Optional[Callable] = None
+    polls: int = 0
+    max_wait: float = 0
+
+
+class MineruPoller:
+    """按 batch_id 等待 MinerU 解析完成，返回 (full_zip_url, error)"""
+
+    def __init__(
+        self,
+        result_api_template: str,
+        headers: Dict[str, str],
+        initial_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        backoff_factor: float = 2.0,
+    ):
+        self.result_api_template = result_api_template
+        self.headers = headers
+        self.initial_interval = (
+            initial_interval if initial_interval is not None
+            else float(os.environ.get('MINERU_POLL_INITIAL_INTERVAL', '1'))
+        )
+        self.max_interval = (
+            max_interval if max_interval is not None
+            else float(os.environ.get('MINERU_POLL_MAX_INTERVAL', '15'))
+        )
+        self.backoff_factor = backoff_factor
+        self._jobs: Dict[str, _PollJob] = {}
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests_sent = 0
+
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    async def wait(
+        self,
+        batch_id: str,
+        max_wait: float = 600,
+        on_progress: Callable = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """注册 batch 并等待结果（必须在同一个事件循环中调用）"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 事件循环变化（如 fork 后重建）时丢弃旧状态
+            self._loop, self._jobs, self._runner = loop, {}, None
+            self._wakeup = asyncio.Event()
+
+        now = loop.time()
+        job = _PollJob(
+            batch_id=batch_id,
+            future=loop.create_future(),
+            started=now,
+            deadline=now + max_wait,
+            next_poll=now + self.initial_interval,
+            interval=self.initial_interval,
+            on_progress=on_progress,
+            max_wait=max_wait,
+        )
+        self._jobs[batch_id] = job
+        if self._runner is None or self._runner.done():
+            self._runner = loop.create_task(self._run())
+        self._wakeup.set()
+        try:
+            return await asyncio.wait_for(job.future, timeout=max_wait)
+        except asyncio.TimeoutError:
+            return None, f"解析超时 ({int(max_wait)}s)"
+        finally:
+            self._jobs.pop(batch_id, None)
+
+    async def _run(self):
+        try:
+            await self._run_loop()
+        except Exception as e:
+            logger.exception(f"MinerU 轮询协程异常退出: {e}")
+            for job in list(self._jobs.values()):
+                self._finish(job, None, f"轮询异常: {e}")
+
+    async def _run_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._jobs:
+            self._wakeup.clear()
+            now = loop.time()
+            due = [job for job in self._jobs.values() if job.next_poll <= now and not job.future.done()]
+            if due:
+                await asyncio.gather(*(self._poll(job) for job in due))
+                continue
+            pending = [job.next_poll for job in self._jobs.values() if not job.future.done()]
+            if not pending:
+                # 结果已设置、等待方尚未移除任务
+                await asyncio.sleep(0)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, min(pending) - now))
+            except asyncio.TimeoutError:
+                pass
+
+    def _finish(self, job: _PollJob, zip_url: Optional[str], error: Optional[str]):
+        if not job.future.done():
+            job.future.set_result((zip_url, error))
+
+    def _schedule_next(self, job: _PollJob, now: float):
+        job.interval = min(job.interval * self.backoff_factor, self.max_interval)
+        job.next_poll = min(now + job.interval, job.deadline)
+
+    async def _poll(self, job: _PollJob):
+        try:
+            await self._poll_once(job)
+        except Exception as e:
+            logger.warning(f"轮询 batch_id={job.batch_id} 异常: {e}")
+            self._finish(job, None, f"查询状态失败: {e}")
+
+    async def _poll_once(self, job: _PollJob):
+        loop = asyncio.get_running_loop()
+        if loop.time() >= job.deadline:
+            self._finish(job, None, f"解析超时 ({int(job.max_wait)}s)")
+            return
+
+        url = self.result_api_template.format(job.batch_id)
+        try:
+            self.requests_sent += 1
+            response = await http_client.async_fetch(url, headers=self.headers, timeout=30)
+            response.raise_for_status()
+            task_info = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"轮询请求失败: {e}, 重试中...")
+            self._schedule_next(job, loop.time())
+            return
+
+        if not isinstance(task_info, dict):
+            self._finish(job, None, f"查询状态失败: 响应格式异常 {type(task_info).__name__}")
+            return
+
+        if task_info.get("code") != 0:
+            self._finish(job, None, f"查询状态失败: {task_info.get('msg')}")
+            return
+
+        try:
+            extract_result = task_info["data"]["extract_result"][0]
+            state = extract_result["state"]
+        except (KeyError, IndexError, TypeError) as e:
+            self._finish(job, None, f"查询状态失败: 响应格式异常 {e}")
+            return
+
+        if state == "done":
+            logger.info(f"解析完成: batch_id={job.batch_id}")
+            self._finish(job, extract_result.get("full_zip_url"), None)
+        elif state == "failed":
+            self._finish(job, None, f"解析失败: {extract_result.get('err_msg', '未知错误')}")
+        else:
+            job.polls += 1
+            now = loop.time()
+            elapsed = int(now - job.started)
+            logger.info(f"当前状态: {state}, 继续等待... batch_id={job.batch_id}")
+            if job.on_progress:
+                try:
+                    job.on_progress(3, 3, "解析文档", f"MinerU 正在解析... 已等待 {elapsed} 秒")
+                except Exception as e:
+                    logger.debug(f"进度回调失败: {e}")
+            self._schedule_next(job, now)
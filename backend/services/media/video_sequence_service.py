@@ -20,8 +20,12 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Dict, Any, Optional, Callable
 
+from utils import http_client
+
 logger = logging.getLogger(__name__)
 
+_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 class TransitionType(Enum):
     """转场类型"""
@@ -548,7 +552,7 @@ Animation requirements:
                 if len(local_videos) == 1:
                     # 只有一个视频，直接复制
                     import shutil
-                    shutil.copy(local_videos[0], output_path)
+                    await asyncio.to_thread(shutil.copy, local_videos[0], output_path)
                 else:
                     # 多个视频，使用 concat 合成
                     await self._ffmpeg_concat(local_videos, output_path, timeline)
@@ -561,7 +565,7 @@ Animation requirements:
 
                 if self.oss_service and self.oss_service.is_available:
                     logger.info("开始上传视频到 OSS...")
-                    result = self.oss_service.upload_file(output_path)
+                    result = await asyncio.to_thread(self.oss_service.upload_file, output_path)
                     logger.info(f"OSS 上传结果: {result}")
                     if result.get('success'):
                         final_url = result.get('url')
@@ -580,16 +584,14 @@ Animation requirements:
             return None
 
     async def _download_video(self, url: str, local_path: str) -> bool:
-        """下载视频到本地"""
-        import requests
-
+        """流式下载视频到本地（经共享 AsyncClient，写盘在线程池执行，不阻塞事件循环）"""
         try:
-            response = requests.get(url, timeout=60, stream=True)
-            response.raise_for_status()
-
-            with open(local_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            async with http_client.async_host_slot(url):
+                async with http_client.get_async_client().stream('GET', url, timeout=60) as response:
+                    response.raise_for_status()
+                    with open(local_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes(_DOWNLOAD_CHUNK_SIZE):
+                            await asyncio.to_thread(f.write, chunk)
 
             return True
         except Exception as e:
@@ -1,13 +1,16 @@
 """Publishing workflows and platform integrations."""
 
+from .docx_exporter import DocxExporter, get_docx_exporter
 from .oss_service import OSSService, get_oss_service, init_oss_service
 from .publishers import Publisher
 from .xhs_service import XHSService, get_xhs_service, init_xhs_service
 
 __all__ = [
+    "DocxExporter",
     "OSSService",
     "Publisher",
     "XHSService",
+    "get_docx_exporter",
     "get_oss_service",
     "get_xhs_service",
     "init_oss_service",
@@ -0,0 +1,407 @@
+"""
+Markdown → Word (.docx) 导出
+
+- 块级分词：预编译的单个正则对每行分类，按行迭代 Markdown，代码块整体输出
+- 图片：分词后立即并发获取，文档构建与获取并行。只接受三类来源：
+  本地 outputs / uploads 目录中的文件、data: URI、配置的 OSS（及白名单）主机；
+  远程图片解析后的地址与每一跳重定向都拒绝内网/回环地址，按字节上限流式读取并
+  校验 Content-Type，结果按 URL 哈希缓存在本地。其余来源的图片跳过
+- 输出：docx 先写入 SpooledTemporaryFile（小文件留在内存，大文件落盘），
+  由路由以流的形式发送；同一篇文章（内容哈希相同）的重复导出直接返回缓存文件
+
+环境变量：
+- DOCX_EXPORT_CACHE_MAX: 缓存的导出结果个数上限，默认 100（0 表示不缓存）
+- DOCX_EXPORT_IMAGE_WORKERS: 图片并发下载线程数，默认 8
+- DOCX_EXPORT_SPOOL_SIZE: 导出文件超过该字节数后改写临时文件，默认 8388608
+- DOCX_EXPORT_IMAGE_HOSTS: 允许下载图片的额外主机（逗号分隔，如 OSS 自定义域名）；
+  OSS_BUCKET_NAME 配置时 <bucket>.<OSS_ENDPOINT> 自动允许
+- DOCX_EXPORT_IMAGE_MAX_BYTES: 单张远程图片的字节上限，默认 10485760
+"""
+import base64
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from infrastructure.paths import RuntimePaths
+from utils import http_client
+
+logger = logging.getLogger(__name__)
+
+# 导出格式变化时递增，使旧缓存失效
+EXPORT_FORMAT_VERSION = "1"
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+_BLOCK_RE = re.compile(
+    r'(?P<heading>#{1,4}) (?P<heading_text>.*)'
+    r'|[-*] (?P<bullet>.*)'
+    r'|\d+\.\s(?P<number>.*)'
+    r'|> (?P<quote>.*)'
+    r'|!\[(?P<alt>[^\]]*)\]\((?P<src>[^)\s]+)(?:\s+"[^"]*")?\)'
+    r'|(?P<image_like>!\[)'
+)
+_INLINE_RE = re.compile(r'\*\*(.*?)\*\*|\*(.*?)\*|`([^`]+)`|\[([^\]]+)\]\([^)]+\)')
+_EMPHASIS_RE = re.compile(r'\*\*(.*?)\*\*|\*(.*?)\*')
+_DATA_URI_RE = re.compile(r'data:image/(?P<ext>[\w.+-]+);base64,(?P<data>.+)', re.DOTALL)
+
+# (kind, text, extra)：heading 的 extra 为级别，image 的 extra 为 URL
+Block = Tuple[str, str, object]
+
+_MAX_PICTURE_WIDTH_INCHES = 6
+
+_MAX_REDIRECTS = 3
+
+
+class _RefusedImage(Exception):
+    """图片来源不在允许范围内（不会重试，也不影响导出缓存）"""
+
+
+def _allowed_image_hosts() -> Set[str]:
+    hosts = {h.strip().lower() for h in os.environ.get('DOCX_EXPORT_IMAGE_HOSTS', '').split(',') if h.strip()}
+    bucket = os.environ.get('OSS_BUCKET_NAME')
+    if bucket:
+        hosts.add(f"{bucket}.{os.environ.get('OSS_ENDPOINT', 'oss-cn-hangzhou.aliyuncs.com')}".lower())
+    return hosts
+
+
+def _check_public_host(host: str, port: int):
+    """解析主机名，任一地址不是公网地址就拒绝（防止借导出访问内网服务）"""
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise OSError(f"无法解析 {host}: {e}") from e
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split('%', 1)[0])
+        if not address.is_global or address.is_multicast:
+            raise _RefusedImage(f"{host} 解析到非公网地址 {address}")
+
+
+def _strip_inline(text: str) -> str:
+    """去除加粗/斜体/行内代码/链接标记"""
+    return _INLINE_RE.sub(lambda m: next(g for g in m.groups() if g is not None), text)
+
+
+def _strip_emphasis(text: str) -> str:
+    return _EMPHASIS_RE.sub(lambda m: next(g for g in m.groups() if g is not None), text)
+
+
+def tokenize_markdown(markdown: str) -> Iterator[Block]:
+    """按行把 Markdown 切分为块：heading / bullet / number / quote / code / image / paragraph"""
+    code_lines: Optional[List[str]] = None
+    for raw in io.StringIO(markdown):
+        line = raw.rstrip('\r\n')
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            if code_lines is None:
+                code_lines = []
+            else:
+                yield ('code', '\n'.join(code_lines), None)
+                code_lines = None
+            continue
+        if code_lines is not None:
+            code_lines.append(line)
+            continue
+        if not stripped:
+            continue
+
+        match = _BLOCK_RE.match(stripped)
+        if match is None:
+            yield ('paragraph', _strip_inline(stripped), None)
+        elif match.group('heading'):
+            yield ('heading', _strip_inline(match.group('heading_text')), len(match.group('heading')))
+        elif match.group('bullet') is not None:
+            yield ('bullet', match.group('bullet'), None)
+        elif match.group('number') is not None:
+            yield ('number', match.group('number'), None)
+        elif match.group('quote') is not None:
+            yield ('quote', _strip_emphasis(match.group('quote')), None)
+        elif match.group('src'):
+            yield ('image', match.group('alt'), match.group('src'))
+        # 其余以 ![ 开头但无法解析的图片标记直接跳过
+
+    if code_lines:
+        yield ('code', '\n'.join(code_lines), None)
+
+
+def _prune(directory: Path, max_entries: int):
+    """按修改时间淘汰最旧的缓存文件"""
+    try:
+        entries = [p for p in directory.iterdir() if p.is_file() and not p.name.endswith('.tmp')]
+    except FileNotFoundError:
+        return
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=lambda p: p.stat().st_mtime)
+    for stale in entries[:len(entries) - max_entries]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+
+def _write_atomic(target: Path, source: BinaryIO):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(target.parent), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(source, f)
+        os.replace(tmp_path, target)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class DocxExporter:
+    """Markdown → docx 导出器（线程安全，可在多个请求间共享）"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_cached: Optional[int] = None,
+        image_workers: Optional[int] = None,
+        spool_size: Optional[int] = None,
+    ):
+        root = Path(cache_dir) if cache_dir else RuntimePaths.from_env().cache
+        self.export_dir = root / "docx_exports"
+        self.image_dir = root / "docx_images"
+        self.max_cached = (
+            max_cached if max_cached is not None
+            else int(os.environ.get('DOCX_EXPORT_CACHE_MAX', '100'))
+        )
+        self.image_workers = image_workers or int(os.environ.get('DOCX_EXPORT_IMAGE_WORKERS', '8'))
+        self.spool_size = spool_size or int(os.environ.get('DOCX_EXPORT_SPOOL_SIZE', str(8 * 1024 * 1024)))
+
+    @staticmethod
+    def content_key(markdown: str) -> str:
+        digest = hashlib.sha256(EXPORT_FORMAT_VERSION.encode())
+        digest.update(markdown.encode('utf-8'))
+        return digest.hexdigest()
+
+    def cached_path(self, markdown: str) -> Path:
+        return self.export_dir / f"{self.content_key(markdown)}.docx"
+
+    def export(
+        self,
+        markdown: str,
+        output_folders: Iterable[str] = (),
+        upload_folders: Iterable[str] = (),
+    ) -> BinaryIO:
+        """
+        导出 docx，返回定位在开头的只读文件对象（调用方负责关闭）
+
+        Args:
+            markdown: Markdown 内容
+            output_folders: 本地 outputs 目录，./images/、/outputs/ 图片直接从这里读取
+            upload_folders: 本地 uploads 目录，/files/mineru/ 图片（文档解析结果）从这里读取
+
+        Raises:
+            ImportError: 未安装 python-docx
+        """
+        cached = self.cached_path(markdown)
+        if self.max_cached > 0 and cached.is_file():
+            try:
+                os.utime(cached)
+                logger.info(f"Word 导出命中缓存: {cached.name}")
+                return open(cached, 'rb')
+            except OSError:
+                pass
+
+        blocks = list(tokenize_markdown(markdown))
+        image_urls = list(dict.fromkeys(extra for kind, _, extra in blocks if kind == 'image'))
+
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        complete = True
+        try:
+            if image_urls:
+                with ThreadPoolExecutor(
+                    max_workers=min(self.image_workers, len(image_urls)),
+                    thread_name_prefix='docx-image',
+                ) as pool:
+                    folders = [str(f) for f in output_folders if f]
+                    uploads = [str(f) for f in upload_folders if f]
+                    images = {
+                        url: pool.submit(self._fetch_image, url, folders, uploads)
+                        for url in image_urls
+                    }
+                    self._build(blocks, images).save(spool)
+                    # 允许的图片没取到（网络抖动等）时不缓存，下次导出重新获取
+                    complete = all(
+                        future.result() or not self._fetchable(url) for url, future in images.items()
+                    )
+            else:
+                self._build(blocks, {}).save(spool)
+
+            if self.max_cached > 0 and complete:
+                spool.seek(0)
+                try:
+                    _write_atomic(cached, spool)
+                    _prune(self.export_dir, self.max_cached)
+                except OSError as e:
+                    logger.warning(f"写入 Word 导出缓存失败: {e}")
+            spool.seek(0)
+            return spool
+        except Exception:
+            spool.close()
+            raise
+
+    # ========== 文档构建 ==========
+
+    def _build(self, blocks: List[Block], images: Dict[str, Future]):
+        from docx import Document
+        from docx.shared import Inches, Pt
+
+        doc = Document()
+
+        # 设置默认字体
+        style = doc.styles['Normal']
+        style.font.name = 'Microsoft YaHei'
+        style.font.size = Pt(11)
+        max_width = Inches(_MAX_PICTURE_WIDTH_INCHES)
+
+        for kind, text, extra in blocks:
+            if kind == 'heading':
+                doc.add_heading(text, level=extra)
+            elif kind == 'bullet':
+                doc.add_paragraph(text, style='List Bullet')
+            elif kind == 'number':
+                doc.add_paragraph(text, style='List Number')
+            elif kind == 'quote':
+                p = doc.add_paragraph()
+                p.paragraph_format.left_indent = Inches(0.5)
+                p.add_run(text)
+            elif kind == 'code':
+                run = doc.add_paragraph().add_run(text)
+                run.font.name = 'Consolas'
+                run.font.size = Pt(9)
+            elif kind == 'image':
+                self._add_picture(doc, images[extra].result(), extra, max_width)
+            else:
+                doc.add_paragraph(text)
+        return doc
+
+    @staticmethod
+    def _add_picture(doc, path: Optional[str], url: str, max_width: int):
+        if not path:
+            return
+        try:
+            shape = doc.add_picture(path)
+        except Exception as e:
+            logger.warning(f"插入图片失败 {url[:80]}: {e}")
+            return
+        if shape.width > max_width:
+            shape.height = int(shape.height * max_width / shape.width)
+            shape.width = max_width
+
+    # ========== 图片获取 ==========
+
+    def _fetch_image(self, url: str, output_folders: List[str], upload_folders: List[str]) -> Optional[str]:
+        """返回图片的本地路径（来源不允许或获取失败返回 None）"""
+        local = self._resolve_local(url, output_folders, upload_folders)
+        if local:
+            return local
+        if not self._fetchable(url):
+            logger.info(f"跳过不在允许来源中的图片: {url[:80]}")
+            return None
+
+        cache_name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        cached = self.image_dir / cache_name
+        if cached.is_file():
+            return str(cached)
+
+        try:
+            data_uri = _DATA_URI_RE.match(url)
+            if data_uri:
+                content = base64.b64decode(data_uri.group('data'), validate=False)
+            else:
+                content = self._download(url)
+            _write_atomic(cached, io.BytesIO(content))
+            _prune(self.image_dir, max(self.max_cached, 1) * 10)
+            return str(cached)
+        except _RefusedImage as e:
+            logger.warning(f"拒绝下载图片 {url[:80]}: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"下载图片失败 {url[:80]}: {e}")
+            return None
+
+    @staticmethod
+    def _fetchable(url: str) -> bool:
+        """data: URI 或允许主机上的 http(s) 图片"""
+        if _DATA_URI_RE.match(url):
+            return True
+        parts = urlsplit(url)
+        return parts.scheme in ('http', 'https') and (parts.hostname or '').lower() in _allowed_image_hosts()
+
+    def _download(self, url: str) -> bytes:
+        """逐跳检查主机与解析地址，按字节上限流式读取"""
+        max_bytes = int(os.environ.get('DOCX_EXPORT_IMAGE_MAX_BYTES', str(10 * 1024 * 1024)))
+        for _ in range(_MAX_REDIRECTS + 1):
+            if not self._fetchable(url):
+                raise _RefusedImage("重定向到不允许的主机")
+            parts = urlsplit(url)
+            _check_public_host(parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+            response = http_client.get(url, allow_redirects=False, stream=True)
+            try:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers.get('Location', ''))
+                    continue
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+                if not content_type.startswith('image/'):
+                    raise _RefusedImage(f"Content-Type 不是图片: {content_type or '未知'}")
+                declared = response.headers.get('Content-Length')
+                if declared and declared.isdigit() and int(declared) > max_bytes:
+                    raise _RefusedImage(f"图片超过 {max_bytes} 字节")
+                buffer = io.BytesIO()
+                for chunk in response.iter_content(64 * 1024):
+                    buffer.write(chunk)
+                    if buffer.tell() > max_bytes:
+                        raise _RefusedImage(f"图片超过 {max_bytes} 字节")
+                return buffer.getvalue()
+            finally:
+                response.close()
+        raise _RefusedImage("重定向次数过多")
+
+    @staticmethod
+    def _resolve_local(url: str, output_folders: List[str], upload_folders: List[str] = ()) -> Optional[str]:
+        """./images/x、/outputs/<dir>/x → outputs 目录，/files/mineru/x → uploads 目录中的文件（不允许越出目录）"""
+        if url.startswith('./images/'):
+            folders, relative = output_folders, 'images/' + url[len('./images/'):]
+        elif url.startswith('/outputs/'):
+            folders, relative = output_folders, url[len('/outputs/'):]
+        elif url.startswith('/files/mineru/'):
+            folders, relative = upload_folders, 'mineru_files/' + url[len('/files/mineru/'):]
+        else:
+            return None
+        for folder in folders:
+            root = os.path.realpath(folder)
+            candidate = os.path.realpath(os.path.join(root, relative))
+            if os.path.commonpath([root, candidate]) == root and os.path.isfile(candidate):
+                return candidate
+        return None
+
+
+_exporter: Optional[DocxExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_docx_exporter() -> DocxExporter:
+    """获取 DocxExporter 单例"""
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = DocxExporter()
+    return _exporter
@@ -13,10 +13,11 @@ import re
 import json
 import logging
 import asyncio
-import threading
 from typing import Optional, List, Dict, Any, Callable
 from dataclasses import dataclass, field
 
+from utils.background_loop import submit_async
+
 logger = logging.getLogger(__name__)
 
 
@@ -636,7 +637,7 @@ class XHSService:
         app=None
     ):
         """
-        异步生成小红书系列（在后台线程执行，通过 SSE 推送进度）
+        异步生成小红书系列（在后台事件循环执行，通过 SSE 推送进度）
 
         Args:
             task_id: 任务 ID
@@ -649,31 +650,23 @@ class XHSService:
             task_manager: 任务管理器（用于 SSE 推送）
             app: Flask 应用实例
         """
-        def run_in_thread():
+        async def run_generation():
             try:
+                generation = self._run_generation_with_sse(
+                    task_id=task_id,
+                    topic=topic,
+                    count=count,
+                    style=style,
+                    content=content,
+                    generate_video=generate_video,
+                    layouts=layouts,
+                    task_manager=task_manager
+                )
                 if app:
                     with app.app_context():
-                        asyncio.run(self._run_generation_with_sse(
-                            task_id=task_id,
-                            topic=topic,
-                            count=count,
-                            style=style,
-                            content=content,
-                            generate_video=generate_video,
-                            layouts=layouts,
-                            task_manager=task_manager
-                        ))
+                        await generation
                 else:
-                    asyncio.run(self._run_generation_with_sse(
-                        task_id=task_id,
-                        topic=topic,
-                        count=count,
-                        style=style,
-                        content=content,
-                        generate_video=generate_video,
-                        layouts=layouts,
-                        task_manager=task_manager
-                    ))
+                    await generation
             except Exception as e:
                 logger.error(f"小红书生成失败: {e}", exc_info=True)
                 if task_manager:
@@ -682,8 +675,8 @@ class XHSService:
                         'recoverable': False
                     })
 
-        thread = threading.Thread(target=run_in_thread, daemon=True)
-        thread.start()
+        # 在进程级后台事件循环中执行（阻塞步骤已通过 run_in_executor 下放到线程池）
+        submit_async(run_generation())
         logger.info(f"小红书生成任务已启动: {task_id}")
 
     async def _run_generation_with_sse(
@@ -1008,7 +1001,8 @@ class XHSService:
                 from services.database_service import get_db_service
                 db_service = get_db_service()
                 if db_service:
-                    db_service.save_xhs_record(
+                    await asyncio.to_thread(
+                        db_service.save_xhs_record,
                         history_id=task_id,
                         topic=topic,
                         style=style,
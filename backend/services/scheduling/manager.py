@@ -6,9 +6,22 @@ TaskQueueManager — 排队引擎 + Worker + 事件系统
 - asyncio.Semaphore 并发控制
 - SQLite 持久化
 - 事件回调系统（SSE 桥接）
+- 进度合并写入：进度在内存中更新，阶段切换或超过落库间隔时
+  批量写入窄列 UPDATE；状态变更仍立即整行持久化
+- Dashboard 快照缓存：由一条聚合查询生成，本进程的状态变更事件使其失效，
+  进度直接叠加内存中的最新值；version 为内容摘要，供 ETag/304 使用
+
+环境变量：
+- TASK_PROGRESS_FLUSH_INTERVAL: 同阶段进度落库间隔（秒，默认 2）
+- QUEUE_SNAPSHOT_TTL: 快照最长缓存时间（秒，默认 5），兜底其他进程的写入
 """
 import asyncio
+import copy
+import hashlib
+import json
 import logging
+import os
+import time
 from datetime import datetime
 from typing import Callable, Optional
 
@@ -17,6 +30,15 @@ from repositories.tasks import TaskDB
 
 logger = logging.getLogger(__name__)
 
+# 快照中各状态最多展示的任务数
+SNAPSHOT_LIMITS = {
+    QueueStatus.QUEUED: 50,
+    QueueStatus.RUNNING: 50,
+    QueueStatus.COMPLETED: 20,
+    QueueStatus.FAILED: 10,
+    QueueStatus.CANCELLED: 10,
+}
+
 
 class TaskQueueManager:
     def __init__(self, db_path: str = "data/task_queue.db",
@@ -36,6 +58,18 @@ class TaskQueueManager:
         }
         self._worker_task: Optional[asyncio.Task] = None
         self._blog_generator = None
+        self.progress_flush_interval = float(
+            os.environ.get('TASK_PROGRESS_FLUSH_INTERVAL', '2')
+        )
+        # 正在上报进度的任务（内存中的最新状态）及尚未落库的进度
+        self._progress_tasks: dict[str, BlogTask] = {}
+        self._pending_progress: dict[str, tuple] = {}
+        self._last_progress_flush: dict[str, float] = {}
+        # Dashboard 快照：_snapshot_base 来自数据库，_snapshot 叠加了内存进度
+        self.snapshot_ttl = float(os.environ.get('QUEUE_SNAPSHOT_TTL', '5'))
+        self._snapshot_base: Optional[dict] = None
+        self._snapshot_loaded_at = 0.0
+        self._snapshot: Optional[dict] = None
 
     async def init(self):
         """初始化数据库 + 恢复未完成任务"""
@@ -51,7 +85,7 @@ class TaskQueueManager:
         """入队，返回 task_id"""
         queued_count = await self.db.count_by_status(QueueStatus.QUEUED)
         task.queue_position = queued_count + 1
-        await self.db.save_task(task)
+        await self.save_task(task)
         await self._queue.put((
             -task.priority.value,
             task.created_at.timestamp(),
@@ -66,6 +100,7 @@ class TaskQueueManager:
 
     async def cancel(self, task_id: str) -> bool:
         """取消任务"""
+        await self.flush_progress(task_id, release=True)
         task = await self.db.get_task(task_id)
         if not task:
             return False
@@ -74,7 +109,7 @@ class TaskQueueManager:
         task.status = QueueStatus.CANCELLED
         task.updated_at = datetime.now()
         task.completed_at = datetime.now()
-        await self.db.save_task(task)
+        await self.save_task(task)
         if task_id in self._running_tasks:
             self._running_tasks[task_id].cancel()
         await self._emit('task_cancelled', task)
@@ -84,46 +119,112 @@ class TaskQueueManager:
     async def get_task(self, task_id: str) -> Optional[BlogTask]:
         return await self.db.get_task(task_id)
 
+    async def save_task(self, task: BlogTask):
+        """整行保存任务并使快照失效（绕过 Worker 写入任务时也应使用此方法）"""
+        await self.db.save_task(task)
+        self._invalidate_snapshot()
+
     async def get_queue_snapshot(self) -> dict:
-        """Dashboard 用的队列快照"""
+        """Dashboard 用的队列快照（带 version，内容不变时 version 不变）"""
+        now = time.monotonic()
+        if (self._snapshot_base is None
+                or now - self._snapshot_loaded_at >= self.snapshot_ttl):
+            self._snapshot_base = await self._load_snapshot_base()
+            self._snapshot_loaded_at = now
+            self._snapshot = None
+        if self._snapshot is None:
+            self._snapshot = self._build_snapshot()
+        return self._snapshot
+
+    async def _load_snapshot_base(self) -> dict:
+        tasks, counts, completed_today = await self.db.get_queue_overview(
+            SNAPSHOT_LIMITS
+        )
         return {
-            'queued': [t.model_dump() for t in
-                       await self.db.get_tasks_by_status(QueueStatus.QUEUED)],
-            'running': [t.model_dump() for t in
-                        await self.db.get_tasks_by_status(QueueStatus.RUNNING)],
-            'completed': [t.model_dump() for t in
-                          await self.db.get_tasks_by_status(
-                              QueueStatus.COMPLETED, limit=20)],
-            'failed': [t.model_dump() for t in
-                       await self.db.get_tasks_by_status(
-                           QueueStatus.FAILED, limit=10)],
-            'cancelled': [t.model_dump() for t in
-                          await self.db.get_tasks_by_status(
-                              QueueStatus.CANCELLED, limit=10)],
+            'queued': [t.model_dump() for t in tasks[QueueStatus.QUEUED]],
+            'running': [t.model_dump() for t in tasks[QueueStatus.RUNNING]],
+            'completed': [t.model_dump() for t in tasks[QueueStatus.COMPLETED]],
+            'failed': [t.model_dump() for t in tasks[QueueStatus.FAILED]],
+            'cancelled': [t.model_dump() for t in tasks[QueueStatus.CANCELLED]],
             'stats': {
-                'queued_count': await self.db.count_by_status(
-                    QueueStatus.QUEUED),
-                'running_count': await self.db.count_by_status(
-                    QueueStatus.RUNNING),
-                'completed_today': await self.db.count_completed_today(),
-                'failed_count': await self.db.count_by_status(
-                    QueueStatus.FAILED),
-                'cancelled_count': await self.db.count_by_status(
-                    QueueStatus.CANCELLED),
+                'queued_count': counts.get(QueueStatus.QUEUED, 0),
+                'running_count': counts.get(QueueStatus.RUNNING, 0),
+                'completed_today': completed_today,
+                'failed_count': counts.get(QueueStatus.FAILED, 0),
+                'cancelled_count': counts.get(QueueStatus.CANCELLED, 0),
                 'max_concurrent': self.max_concurrent,
             },
         }
 
+    def _build_snapshot(self) -> dict:
+        """在数据库快照上叠加内存中的最新进度，并计算 version"""
+        snapshot = copy.deepcopy(self._snapshot_base)
+        for item in snapshot['running']:
+            task = self._progress_tasks.get(item['id'])
+            if task:
+                item.update(
+                    progress=task.progress,
+                    current_stage=task.current_stage,
+                    stage_detail=task.stage_detail,
+                    updated_at=task.updated_at,
+                )
+        payload = json.dumps(snapshot, sort_keys=True, default=str)
+        snapshot['version'] = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+        return snapshot
+
+    def _invalidate_snapshot(self, progress_only: bool = False):
+        self._snapshot = None
+        if not progress_only:
+            self._snapshot_base = None
+
     async def update_progress(self, task_id: str, progress: int,
                               stage: str = "", detail: str = ""):
-        task = await self.db.get_task(task_id)
-        if task and task.status == QueueStatus.RUNNING:
-            task.progress = progress
-            task.current_stage = stage
-            task.stage_detail = detail
-            task.updated_at = datetime.now()
-            await self.db.save_task(task)
-            await self._emit('task_progress', task)
+        task = self._progress_tasks.get(task_id)
+        if task is None:
+            task = await self.db.get_task(task_id)
+            if not task or task.status != QueueStatus.RUNNING:
+                return
+            self._progress_tasks[task_id] = task
+        stage_changed = stage != task.current_stage
+        task.progress = progress
+        task.current_stage = stage
+        task.stage_detail = detail
+        task.updated_at = datetime.now()
+        self._pending_progress[task_id] = (
+            progress, stage, detail, task.updated_at.isoformat(), task_id,
+        )
+        elapsed = time.monotonic() - self._last_progress_flush.get(task_id, 0.0)
+        if stage_changed or elapsed >= self.progress_flush_interval:
+            await self.flush_progress()
+        self._invalidate_snapshot(progress_only=True)
+        await self._emit('task_progress', task)
+
+    async def flush_progress(self, task_id: Optional[str] = None,
+                             release: bool = False):
+        """把内存中的进度批量写入数据库
+
+        Args:
+            task_id: 只写入该任务；None 表示写入全部待落库进度
+            release: 写入后不再在内存中跟踪该任务（任务状态即将变更）
+        """
+        if task_id is None:
+            task_ids = list(self._pending_progress)
+        else:
+            task_ids = [task_id]
+        updates = [u for u in (self._pending_progress.pop(tid, None)
+                               for tid in task_ids) if u]
+        if updates:
+            now = time.monotonic()
+            for update in updates:
+                self._last_progress_flush[update[-1]] = now
+            await self.db.update_progress_many(updates)
+        if release and task_id is not None:
+            self._release_progress(task_id)
+
+    def _release_progress(self, task_id: str):
+        self._progress_tasks.pop(task_id, None)
+        self._pending_progress.pop(task_id, None)
+        self._last_progress_flush.pop(task_id, None)
 
     # ── Worker ──
 
@@ -137,6 +238,7 @@ class TaskQueueManager:
     async def stop_worker(self):
         if self._worker_task:
             self._worker_task.cancel()
+        await self.flush_progress()
 
     async def _worker_loop(self):
         while True:
@@ -171,7 +273,9 @@ class TaskQueueManager:
             task.status = QueueStatus.RUNNING
             task.started_at = start_time
             task.progress = 0
-            await self.db.save_task(task)
+            await self.save_task(task)
+            # 进度直接更新这个对象，后续整行保存时带上最新进度
+            self._progress_tasks[task_id] = task
             await self._emit('task_started', task)
             result = await self._run_blog_generation(task)
             task.status = QueueStatus.COMPLETED
@@ -181,7 +285,7 @@ class TaskQueueManager:
                 task.output_url = result.get('url')
                 task.output_word_count = result.get('word_count')
                 task.output_image_count = result.get('image_count')
-            await self.db.save_task(task)
+            await self.save_task(task)
             duration = int(
                 (task.completed_at - start_time).total_seconds() * 1000
             )
@@ -198,11 +302,11 @@ class TaskQueueManager:
         except asyncio.CancelledError:
             task.status = QueueStatus.CANCELLED
             task.completed_at = datetime.now()
-            await self.db.save_task(task)
+            await self.save_task(task)
         except Exception as e:
             task.status = QueueStatus.FAILED
             task.completed_at = datetime.now()
-            await self.db.save_task(task)
+            await self.save_task(task)
             duration = int(
                 (datetime.now() - start_time).total_seconds() * 1000
             )
@@ -218,6 +322,7 @@ class TaskQueueManager:
             await self._emit('task_failed', task)
             logger.error(f"[Queue] 失败: {task_id} - {e}")
         finally:
+            self._release_progress(task_id)
             self._semaphore.release()
 
     async def _run_blog_generation(self, task: BlogTask) -> dict | None:
@@ -248,7 +353,7 @@ class TaskQueueManager:
             task.status = QueueStatus.FAILED
             task.completed_at = datetime.now()
             task.stage_detail = "服务重启，任务中断"
-            await self.db.save_task(task)
+            await self.save_task(task)
             logger.warning(
                 f"[Queue] 标记中断任务为失败: {task.id} '{task.name}'"
             )
@@ -258,7 +363,7 @@ class TaskQueueManager:
             task.status = QueueStatus.FAILED
             task.completed_at = datetime.now()
             task.stage_detail = "服务重启，排队任务已清理"
-            await self.db.save_task(task)
+            await self.save_task(task)
 
         total = len(running) + len(queued)
         if total:
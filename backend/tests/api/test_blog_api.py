@@ -224,6 +224,91 @@ class TestHistoryAPI:
 
         mock_db_service.get_history.assert_called_once_with('test-id')
 
+    def test_list_history_with_cursor(self, client, mock_db_service):
+        """传入 cursor 时走游标分页"""
+        mock_db_service.list_history_page.return_value = {
+            'records': [{'id': '3'}], 'next_cursor': 'abc', 'has_more': True, 'total': 40,
+        }
+
+        response = client.get('/api/history?cursor=&page_size=1&type=blog')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['next_cursor'] == 'abc'
+        assert data['has_more'] is True
+        assert data['total'] == 40
+        mock_db_service.list_history_page.assert_called_once_with(
+            content_type='blog', book_id=None, limit=1, cursor=None
+        )
+        mock_db_service.list_history_by_type.assert_not_called()
+
+    def test_list_history_invalid_cursor(self, client, mock_db_service):
+        """非法游标返回 400"""
+        mock_db_service.list_history_page.side_effect = ValueError('无效的分页游标')
+
+        response = client.get('/api/history?cursor=bad')
+
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+    def test_search_history(self, client, mock_db_service):
+        """全文搜索接口"""
+        mock_db_service.search_history.return_value = [
+            {'id': '1', 'title': 'RAG', 'snippet': '<mark>检索</mark>增强', 'score': 3.2}
+        ]
+
+        response = client.get('/api/history/search?q=检索&type=blog&limit=5')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['count'] == 1
+        assert data['results'][0]['snippet'] == '<mark>检索</mark>增强'
+        mock_db_service.search_history.assert_called_once_with('检索', content_type='blog', limit=5)
+
+    def test_search_history_requires_query(self, client, mock_db_service):
+        response = client.get('/api/history/search?q=')
+        assert response.status_code == 400
+        mock_db_service.search_history.assert_not_called()
+
+    def test_export_word_streams_docx(self, client, monkeypatch, tmp_path):
+        """Word 导出以附件流返回，重复导出命中缓存"""
+        pytest.importorskip('docx')
+        from services.publishing.docx_exporter import DocxExporter
+
+        exporter = DocxExporter(cache_dir=str(tmp_path))
+        monkeypatch.setattr('routes.history_routes.get_docx_exporter', lambda: exporter)
+        payload = {'markdown': '# 标题\n\n正文', 'title': '测试文章'}
+
+        response = client.post('/api/export/word', json=payload)
+
+        assert response.status_code == 200
+        assert response.mimetype.endswith('wordprocessingml.document')
+        assert 'attachment' in response.headers['Content-Disposition']
+        assert response.data[:2] == b'PK'
+        assert exporter.cached_path(payload['markdown']).is_file()
+        assert client.post('/api/export/word', json=payload).data == response.data
+
+    def test_blogs_with_book_info_return_hydrated_content(self, client, monkeypatch, tmp_path):
+        """书籍视图的博客列表返回正文等大字段，不暴露内部哈希列"""
+        from services.database_service import DatabaseService
+
+        db = DatabaseService(str(tmp_path / "books.db"))
+        db.save_history("b1", "主题", "tutorial", "medium", "# 正文\n\n内容", '{"sections": []}',
+                        citations='[{"url": "https://example.com"}]')
+        monkeypatch.setattr('routes.book_routes.get_db_service', lambda: db)
+
+        response = client.get('/api/blogs/with-book-info')
+
+        blog = response.get_json()['blogs'][0]
+        assert blog['markdown_content'] == "# 正文\n\n内容"
+        assert blog['outline'] == '{"sections": []}'
+        assert blog['citations'] == '[{"url": "https://example.com"}]'
+        assert not any(key.endswith('_hash') for key in blog)
+
+    def test_export_word_requires_markdown(self, client):
+        response = client.post('/api/export/word', json={'title': 'x'})
+        assert response.status_code == 400
+
     def test_get_history_by_id_not_found(self, client, mock_db_service):
         """测试历史记录不存在"""
         mock_db_service.get_history.return_value = None
@@ -367,11 +452,13 @@ class TestTaskAPI:
 class TestDocumentUploadAPI:
     """测试文档上传 API"""
 
-    def test_upload_document_success(self, client, mock_file_parser):
+    def test_upload_document_success(self, client, mock_file_parser, monkeypatch, tmp_path):
         """测试上传文档成功"""
         from io import BytesIO
         import uuid
 
+        monkeypatch.setitem(client.application.config, 'UPLOAD_FOLDER', str(tmp_path))
+
         # Mock file parser service
         mock_file_parser.parse_document_async.return_value = None
 
@@ -383,6 +470,7 @@ class TestDocumentUploadAPI:
             # Mock create_document to return a document ID
             test_doc_id = f"doc_{uuid.uuid4().hex[:8]}"
             mock_db.create_document.return_value = test_doc_id
+            mock_db.find_document_by_hash.return_value = None
 
         # 创建测试文件
         data = {
@@ -406,6 +494,33 @@ class TestDocumentUploadAPI:
         # 验证数据库调用
         mock_db.create_document.assert_called_once()
 
+    def test_upload_known_document_reuses_parse_result(self, client, monkeypatch, tmp_path):
+        """测试上传内容相同的文档时直接复用已有解析结果"""
+        import hashlib
+        from io import BytesIO
+
+        monkeypatch.setitem(client.application.config, 'UPLOAD_FOLDER', str(tmp_path))
+        content = b'# Known Document\n\nSame bytes as last week.'
+        submitted = []
+        monkeypatch.setattr('routes.blog_routes.submit_ingestion', lambda *a, **kw: submitted.append(a))
+        mock_db = client.application.mock_db_service
+        mock_db.find_document_by_hash.return_value = {'id': 'doc_original', 'status': 'ready'}
+        mock_db.reuse_parsed_document.return_value = True
+
+        response = client.post(
+            '/api/blog/upload',
+            data={'file': (BytesIO(content), 'known.md')},
+            content_type='multipart/form-data'
+        )
+
+        result = response.get_json()
+        assert response.status_code == 200
+        assert result['status'] == 'ready'
+        assert result['reused_from'] == 'doc_original'
+        mock_db.find_document_by_hash.assert_called_once_with(hashlib.sha256(content).hexdigest(), 'md')
+        mock_db.reuse_parsed_document.assert_called_once_with(result['document_id'], 'doc_original')
+        assert submitted == []
+
     def test_upload_document_no_file(self, client):
         """测试没有上传文件"""
         response = client.post('/api/blog/upload')
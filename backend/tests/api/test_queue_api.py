@@ -0,0 +1,40 @@
+"""
+队列 API 测试 — /api/queue/tasks 快照的 ETag / 304
+"""
+import pytest
+from flask import Flask
+
+from api.routes import queue_routes
+from models.scheduling import BlogGenerationConfig, BlogTask
+from services.scheduling.manager import TaskQueueManager
+from utils.background_loop import run_async
+
+
+@pytest.fixture
+def queue_client(tmp_path):
+    manager = TaskQueueManager(db_path=str(tmp_path / "queue.db"))
+    run_async(manager.init())
+    queue_routes.init_queue_routes(manager)
+    app = Flask(__name__)
+    app.register_blueprint(queue_routes.queue_bp)
+    yield app.test_client(), manager
+    queue_routes.init_queue_routes(None)
+
+
+def test_snapshot_returns_304_when_unchanged(queue_client):
+    client, manager = queue_client
+    first = client.get('/api/queue/tasks')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.get_json()['version'] in etag
+
+    cached = client.get('/api/queue/tasks', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+    run_async(manager.enqueue(BlogTask(
+        name="新任务", generation=BlogGenerationConfig(topic="AI"),
+    )))
+    changed = client.get('/api/queue/tasks', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.get_json()['stats']['queued_count'] == 1
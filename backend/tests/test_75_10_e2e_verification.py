@@ -91,7 +91,7 @@ class TestE2ESearchRouting:
     @patch('routes.blog_routes.get_search_service')
     @patch('routes.blog_routes.get_llm_service')
     @patch('routes.blog_routes.get_knowledge_service')
-    @patch('services.blog_generator.services.serper_search_service.requests.post')
+    @patch('services.blog_generator.services.serper_search_service.http_client.post')
     def test_search_google_reaches_api(
         self, mock_post, mock_ks, mock_llm, mock_ss, mock_init_ss
     ):
@@ -133,7 +133,7 @@ class TestE2ESearchRouting:
     @patch('routes.blog_routes.get_search_service')
     @patch('routes.blog_routes.get_llm_service')
     @patch('routes.blog_routes.get_knowledge_service')
-    @patch('services.blog_generator.services.sogou_search_service.requests.post')
+    @patch('services.blog_generator.services.sogou_search_service.http_client.post')
     def test_search_sogou_reaches_api(
         self, mock_post, mock_ks, mock_llm, mock_ss, mock_init_ss
     ):
@@ -0,0 +1,102 @@
+"""
+进程级后台事件循环 — 单元测试
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from utils.background_loop import BackgroundLoop
+
+
+@pytest.fixture
+def bg():
+    loop = BackgroundLoop("test-loop")
+    yield loop
+    loop.stop()
+
+
+class TestBackgroundLoop:
+
+    def test_run_returns_result_on_one_persistent_loop(self, bg):
+        async def current():
+            return asyncio.get_running_loop()
+
+        assert bg.run(current()) is bg.run(current()) is bg.loop
+
+    def test_loop_bound_objects_survive_across_calls(self, bg):
+        lock = bg.run(_make_lock())
+        semaphore = bg.run(_make_semaphore())
+
+        async def use():
+            async with lock, semaphore:
+                await asyncio.sleep(0)
+            return True
+
+        # asyncio.run 每次新建循环时，这些对象在第二个循环上会报错
+        results = [bg.submit(use()) for _ in range(10)]
+        assert all(f.result(5) for f in results)
+
+    def test_timers_keep_firing_after_submitting_call_returns(self, bg):
+        fired = threading.Event()
+
+        async def arm():
+            asyncio.get_running_loop().call_later(0.05, fired.set)
+
+        bg.run(arm())
+        assert fired.wait(2)
+
+    def test_exceptions_propagate_to_caller(self, bg):
+        async def boom():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            bg.run(boom())
+
+    def test_timeout_cancels_coroutine(self, bg):
+        cancelled = threading.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(concurrent.futures.TimeoutError):
+            bg.run(slow(), timeout=0.05)
+        assert cancelled.wait(2)
+
+    def test_blocking_wait_from_loop_thread_is_rejected(self, bg):
+        async def nested():
+            return bg.run(asyncio.sleep(0))
+
+        with pytest.raises(RuntimeError):
+            bg.run(nested())
+
+    def test_concurrent_callers_from_many_threads(self, bg):
+        async def work(i):
+            await asyncio.sleep(0.01)
+            return i
+
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda i: bg.run(work(i)), range(32)))
+        assert results == list(range(32))
+        assert time.perf_counter() - started < 2
+
+    def test_restarts_after_stop(self, bg):
+        first = bg.loop
+        bg.stop()
+        assert bg.run(asyncio.sleep(0, result=1)) == 1
+        assert bg.loop is not first
+
+
+async def _make_lock():
+    return asyncio.Lock()
+
+
+async def _make_semaphore():
+    return asyncio.Semaphore(2)
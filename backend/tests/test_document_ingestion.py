@@ -0,0 +1,312 @@
+"""
+文档入库流水线测试：本地假 MinerU 服务 + 共享轮询器 + 并发摘要 + 内容指纹去重
+"""
+import asyncio
+import hashlib
+import io
+import json
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.documents.file_parser_service import FileParserService
+from services.database_service import DatabaseService
+from services.documents.ingestion import ingest_document, reuse_parsed_document, save_upload, submit_ingestion
+from utils.background_loop import run_async
+
+
+class FakeMineru:
+    """最小化的 MinerU v4 批量接口：申请上传地址 → PUT 上传 → 轮询状态 → 下载 ZIP"""
+
+    def __init__(self, ready_after=3):
+        self.ready_after = ready_after
+        self.lock = threading.Lock()
+        self.batches = {}
+        self.poll_times = {}
+        self.uploads = {}
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _json(self, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers['Content-Length'])
+                name = json.loads(self.rfile.read(length))['files'][0]['name']
+                with fake.lock:
+                    batch_id = f"b{len(fake.batches)}"
+                    fake.batches[batch_id] = name
+                    fake.poll_times[batch_id] = []
+                self._json({'code': 0, 'data': {
+                    'batch_id': batch_id,
+                    'file_urls': [f"{fake.base_url}/upload/{batch_id}"],
+                }})
+
+            def do_PUT(self):
+                batch_id = self.path.rsplit('/', 1)[-1]
+                length = int(self.headers['Content-Length'])
+                with fake.lock:
+                    fake.uploads[batch_id] = self.rfile.read(length)
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_GET(self):
+                batch_id = self.path.rsplit('/', 1)[-1]
+                if self.path.startswith('/zip/'):
+                    body = fake.zip_for(batch_id)
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+                with fake.lock:
+                    polls = fake.poll_times[batch_id]
+                    polls.append(time.monotonic())
+                    name = fake.batches[batch_id]
+                if 'garbled' in name:
+                    self._json([])
+                    return
+                if 'broken' in name:
+                    result = {'state': 'failed', 'err_msg': 'bad pdf'}
+                elif len(polls) >= fake.ready_after:
+                    result = {'state': 'done', 'full_zip_url': f"{fake.base_url}/zip/{batch_id}"}
+                else:
+                    result = {'state': 'running'}
+                self._json({'code': 0, 'data': {'extract_result': [result]}})
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def zip_for(self, batch_id):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as z:
+            z.writestr('full.md', f"# {self.batches[batch_id]}\n\n正文内容\n\n![](images/page_1.png)\n![](images/page_2.png)\n")
+            z.writestr('images/page_1.png', b'png-1')
+            z.writestr('images/page_2.png', b'png-2')
+        return buffer.getvalue()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SlowLLM:
+    """记录同时在途调用数的假 LLM"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+
+    def _call(self, result):
+        with self.lock:
+            self.active += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return result
+
+    def chat(self, messages):
+        return self._call("文档摘要")
+
+    def chat_with_image(self, prompt, image_base64, mime_type):
+        return self._call("图片描述")
+
+
+@pytest.fixture
+def mineru():
+    server = FakeMineru()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def parser(mineru, tmp_path, monkeypatch):
+    monkeypatch.setenv('MINERU_POLL_INITIAL_INTERVAL', '0.05')
+    monkeypatch.setenv('MINERU_POLL_MAX_INTERVAL', '0.2')
+    return FileParserService('token', mineru_api_base=mineru.base_url, upload_folder=str(tmp_path / "uploads"))
+
+
+def _pdf(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"%PDF-1.4 /Type /Page >> " + b"x" * 2048)
+    return str(path)
+
+
+def test_parse_file_against_fake_mineru(parser, mineru, tmp_path):
+    result = parser.parse_file(_pdf(tmp_path, "a.pdf"), "a.pdf")
+
+    assert result['success'], result['error']
+    assert result['markdown'].startswith("# a.pdf")
+    assert "/files/mineru/" in result['markdown']
+    assert sorted(img['filename'] for img in result['images']) == ['page_1.png', 'page_2.png']
+    assert mineru.uploads['b0'].startswith(b"%PDF")
+    # 下载的 ZIP 临时文件已清理
+    assert not list((tmp_path / "uploads" / "mineru_files").glob("*.part"))
+
+
+def test_poll_interval_backs_off(parser, mineru, tmp_path):
+    mineru.ready_after = 5
+    assert parser.parse_file(_pdf(tmp_path, "slow.pdf"), "slow.pdf")['success']
+
+    times = mineru.poll_times['b0']
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert len(times) == 5
+    assert gaps[0] < gaps[-1]
+    assert gaps[-1] >= 0.15
+
+
+def test_failed_parse_reports_error(parser, tmp_path):
+    db_service = MagicMock()
+    ok = run_async(ingest_document(
+        "doc_x", _pdf(tmp_path, "broken.pdf"), "broken.pdf",
+        db_service=db_service, file_parser=parser,
+    ))
+
+    assert ok is False
+    db_service.update_document_status.assert_called_with("doc_x", 'error', "解析失败: bad pdf")
+
+
+def test_malformed_poll_response_fails_only_that_batch(parser, tmp_path):
+    async def both():
+        return await asyncio.gather(
+            parser.parse_file_async(_pdf(tmp_path, "garbled.pdf"), "garbled.pdf"),
+            parser.parse_file_async(_pdf(tmp_path, "fine.pdf"), "fine.pdf"),
+        )
+
+    garbled, fine = run_async(both())
+
+    assert not garbled['success']
+    assert "响应格式异常" in garbled['error']
+    assert fine['success'], fine['error']
+    assert parser.poller.pending() == 0
+
+
+def test_poller_crash_releases_waiters(parser, monkeypatch):
+    async def crash(job):
+        raise RuntimeError("boom")
+
+    poller = parser.poller
+    monkeypatch.setattr(poller, '_run_loop', lambda: crash(None))
+
+    zip_url, error = run_async(poller.wait("b-crash", max_wait=5))
+
+    assert zip_url is None
+    assert "boom" in error
+    assert poller.pending() == 0
+
+
+def test_many_documents_ingested_concurrently(parser, mineru, tmp_path):
+    db_service = MagicMock()
+    llm = SlowLLM(delay=0.3)
+
+    started = time.monotonic()
+    futures = [
+        submit_ingestion(
+            f"doc_{i}", _pdf(tmp_path, f"d{i}.pdf"), f"d{i}.pdf",
+            db_service=db_service, file_parser=parser, llm_service=llm,
+            chunk_size=500, chunk_overlap=50,
+        )
+        for i in range(10)
+    ]
+    assert all(f.result(timeout=30) for f in futures)
+    elapsed = time.monotonic() - started
+
+    # 串行时仅 LLM 调用就需要 10 × 3 × 0.3 = 9s，轮询等待另需 10 × 0.35s
+    assert elapsed < 8
+    assert llm.peak >= 3
+    assert db_service.save_chunks.call_count == 10
+    assert db_service.update_document_summary.call_count == 10
+    saved_images = [call.args[1] for call in db_service.save_images.call_args_list]
+    assert all(img['caption'] == "图片描述" for images in saved_images for img in images)
+    assert parser.poller.pending() == 0
+
+
+def test_async_captions_keep_sequential_semantics(tmp_path):
+    parser = FileParserService('token', upload_folder=str(tmp_path))
+    images = []
+    for i in range(6):
+        path = tmp_path / f"{i}.png"
+        path.write_bytes(b"img")
+        images.append({'path': str(path), 'filename': f"{i}.png"})
+    images.insert(1, {'path': str(tmp_path / "missing.png"), 'filename': "missing.png"})
+
+    llm = MagicMock()
+    # 第 0 张失败，名额顺延给后面的图片
+    llm.chat_with_image.side_effect = lambda prompt, data, mime: None if data == "" else "ok"
+    images[0]['path'] = str(tmp_path / "empty.png")
+    (tmp_path / "empty.png").write_bytes(b"")
+
+    result = run_async(parser.generate_image_captions_async(images, llm, max_images=3))
+
+    assert [img['filename'] for img in result if 'caption' in img] == ["1.png", "2.png", "3.png"]
+
+
+def test_save_upload_fingerprints_stream(tmp_path):
+    content = b"%PDF-1.4 " + bytes(range(256)) * 9000
+    path = tmp_path / "upload.pdf"
+
+    digest = save_upload(io.BytesIO(content), str(path))
+
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert path.read_bytes() == content
+
+
+def test_reupload_reuses_chunks_images_and_summary(parser, mineru, tmp_path):
+    db_service = DatabaseService(str(tmp_path / "db.sqlite"))
+    llm = SlowLLM(delay=0)
+    pdf = _pdf(tmp_path, "report.pdf")
+    with open(pdf, 'rb') as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+
+    db_service.create_document("doc_a", "report.pdf", pdf, 2072, "pdf")
+    # 入库完成前没有指纹，不会被复用
+    assert reuse_parsed_document(db_service, "doc_b", content_hash, "pdf") is None
+    assert run_async(ingest_document(
+        "doc_a", pdf, "report.pdf", db_service=db_service, file_parser=parser,
+        llm_service=llm, chunk_size=500, chunk_overlap=50, content_hash=content_hash,
+    ))
+    polls_before = sum(len(times) for times in mineru.poll_times.values())
+    llm_calls_before = llm.calls
+
+    db_service.create_document("doc_b", "copy.pdf", pdf, 2072, "pdf")
+    assert reuse_parsed_document(db_service, "doc_b", content_hash, "pdf") == "doc_a"
+    # 同样的字节按其他类型上传不复用
+    assert reuse_parsed_document(db_service, "doc_c", content_hash, "txt") is None
+
+    original, copy = db_service.get_document("doc_a"), db_service.get_document("doc_b")
+    assert copy['status'] == 'ready'
+    assert copy['source_document_id'] == "doc_a"
+    for field in ('markdown_content', 'summary', 'mineru_folder', 'content_hash'):
+        assert copy[field] == original[field]
+    strip = lambda rows: [{k: v for k, v in r.items() if k not in ('id', 'document_id', 'created_at')} for r in rows]
+    assert strip(db_service.get_chunks_by_document("doc_b")) == strip(db_service.get_chunks_by_document("doc_a"))
+    images = db_service.get_images_by_document("doc_b")
+    assert [img['id'] for img in images] == ["img_doc_b_0", "img_doc_b_1"]
+    assert all(img['caption'] == "图片描述" for img in images)
+    # 没有再次调用 MinerU 或 LLM
+    assert sum(len(times) for times in mineru.poll_times.values()) == polls_before
+    assert llm.calls == llm_calls_before
+
+    # 删除来源文档不影响复用方
+    db_service.delete_document("doc_a")
+    assert len(db_service.get_chunks_by_document("doc_b")) > 0
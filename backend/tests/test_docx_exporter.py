@@ -0,0 +1,205 @@
+"""
+DocxExporter 测试：块级分词、图片并发获取与本地缓存、按内容哈希缓存导出结果
+"""
+import base64
+import socket
+import struct
+import zlib
+from unittest.mock import patch
+
+import pytest
+
+docx = pytest.importorskip("docx")
+
+from services.publishing.docx_exporter import DocxExporter, tokenize_markdown
+
+
+def _png(width=4, height=4):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    raw = b''.join(b'\x00' + b'\xff\x00\x00' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw))
+            + chunk(b'IEND', b''))
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    return DocxExporter(cache_dir=str(tmp_path / "cache"), max_cached=2, image_workers=4)
+
+
+def _paragraphs(fileobj):
+    return [p.text for p in docx.Document(fileobj).paragraphs]
+
+
+def test_tokenizer_blocks():
+    markdown = (
+        "# 标题 **粗**\n\n正文 `code` 与 [链接](http://x)\n- 列表\n1. 编号\n> 引用 *斜*\n"
+        "```python\n# 注释不是标题\nprint(1)\n```\n![图](./images/a.png)\n![坏图\n##### 五级\n"
+    )
+    assert list(tokenize_markdown(markdown)) == [
+        ('heading', '标题 粗', 1),
+        ('paragraph', '正文 code 与 链接', None),
+        ('bullet', '列表', None),
+        ('number', '编号', None),
+        ('quote', '引用 斜', None),
+        ('code', '# 注释不是标题\nprint(1)', None),
+        ('image', '图', './images/a.png'),
+        ('paragraph', '##### 五级', None),
+    ]
+
+
+def test_export_embeds_local_and_data_uri_images(exporter, tmp_path):
+    outputs = tmp_path / "outputs"
+    (outputs / "images").mkdir(parents=True)
+    (outputs / "images" / "a.png").write_bytes(_png())
+    data_uri = "data:image/png;base64," + base64.b64encode(_png(8, 8)).decode()
+    markdown = f"# 文章\n\n![a](./images/a.png)\n\n段落\n\n![b]({data_uri})\n\n![escape](/outputs/../../secret.png)\n"
+
+    with exporter.export(markdown, output_folders=[str(outputs)]) as f:
+        document = docx.Document(f)
+
+    assert len(document.inline_shapes) == 2
+    assert [p.text for p in document.paragraphs if p.text] == ["文章", "段落"]
+
+
+class FakeResponse:
+    def __init__(self, content=None, content_type='image/png', status=200, location=None):
+        self.content = _png() if content is None else content
+        self.headers = {'Content-Type': content_type, 'Content-Length': str(len(self.content))}
+        if location:
+            self.headers['Location'] = location
+        self.is_redirect = location is not None
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, size):
+        for i in range(0, len(self.content), size):
+            yield self.content[i:i + size]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def image_hosts(monkeypatch):
+    """img.example.com 在白名单中且解析到公网地址，internal.example.com 解析到元数据地址"""
+    monkeypatch.setenv('DOCX_EXPORT_IMAGE_HOSTS', 'img.example.com,internal.example.com')
+    addresses = {'img.example.com': '93.184.216.34', 'internal.example.com': '169.254.169.254'}
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (addresses[host], port))]
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+
+
+def test_remote_images_fetched_concurrently_and_cached(exporter, image_hosts):
+    urls = [f"https://img.example.com/{i}.png" for i in range(3)]
+    markdown = "\n".join(f"![{i}]({url})" for i, url in enumerate(urls))
+
+    with patch("services.publishing.docx_exporter.http_client.get", side_effect=lambda *a, **k: FakeResponse()) as get:
+        exporter.export(markdown).close()
+        assert get.call_count == 3
+        # 导出结果缓存被清空后，图片仍从本地缓存读取
+        for path in exporter.export_dir.iterdir():
+            path.unlink()
+        with exporter.export(markdown) as f:
+            assert len(docx.Document(f).inline_shapes) == 3
+        assert get.call_count == 3
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8080/admin.png",
+    "http://169.254.169.254/latest/meta-data",
+    "https://unknown.example.org/a.png",
+    "/api/internal.png",
+    "file:///etc/passwd",
+])
+def test_disallowed_image_sources_are_skipped(exporter, image_hosts, url):
+    markdown = f"# 图\n\n![x]({url})"
+
+    with patch("services.publishing.docx_exporter.http_client.get") as get:
+        with exporter.export(markdown) as f:
+            assert len(docx.Document(f).inline_shapes) == 0
+
+    get.assert_not_called()
+    # 永久拒绝的来源不影响导出缓存
+    assert exporter.cached_path(markdown).exists()
+
+
+def test_allowed_host_resolving_to_internal_address_refused(exporter, image_hosts):
+    with patch("services.publishing.docx_exporter.http_client.get") as get:
+        with exporter.export("![x](https://internal.example.com/a.png)") as f:
+            assert len(docx.Document(f).inline_shapes) == 0
+    get.assert_not_called()
+
+
+def test_redirect_to_internal_host_refused(exporter, image_hosts):
+    redirect = FakeResponse(location="https://internal.example.com/secret.png")
+    with patch("services.publishing.docx_exporter.http_client.get", return_value=redirect) as get:
+        with exporter.export("![x](https://img.example.com/r.png)") as f:
+            assert len(docx.Document(f).inline_shapes) == 0
+    assert get.call_count == 1
+    assert all(call.kwargs['allow_redirects'] is False for call in get.call_args_list)
+
+
+@pytest.mark.parametrize("response", [
+    FakeResponse(content=b"<html>login</html>", content_type='text/html'),
+    FakeResponse(content=b"x" * 2048, content_type='image/png'),
+])
+def test_non_image_or_oversized_response_skipped(exporter, image_hosts, monkeypatch, response):
+    monkeypatch.setenv('DOCX_EXPORT_IMAGE_MAX_BYTES', '1024')
+    response.headers.pop('Content-Length')
+    with patch("services.publishing.docx_exporter.http_client.get", return_value=response):
+        with exporter.export("![x](https://img.example.com/big.png)") as f:
+            assert len(docx.Document(f).inline_shapes) == 0
+    assert not exporter.image_dir.exists() or not any(exporter.image_dir.iterdir())
+
+
+def test_parsed_document_images_read_from_uploads(exporter, tmp_path):
+    uploads = tmp_path / "uploads"
+    (uploads / "mineru_files" / "e1" / "images").mkdir(parents=True)
+    (uploads / "mineru_files" / "e1" / "images" / "p.png").write_bytes(_png())
+    markdown = "![p](/files/mineru/e1/images/p.png)\n![escape](/files/mineru/../../secret.png)"
+
+    with exporter.export(markdown, upload_folders=[str(uploads)]) as f:
+        assert len(docx.Document(f).inline_shapes) == 1
+
+
+def test_export_with_missing_image_not_cached(exporter, image_hosts):
+    markdown = "# 图\n\n![a](https://img.example.com/a.png)"
+
+    with patch("services.publishing.docx_exporter.http_client.get", side_effect=OSError("timeout")):
+        with exporter.export(markdown) as f:
+            assert len(docx.Document(f).inline_shapes) == 0
+    assert not exporter.cached_path(markdown).exists()
+
+    with patch("services.publishing.docx_exporter.http_client.get", return_value=FakeResponse()):
+        with exporter.export(markdown) as f:
+            assert len(docx.Document(f).inline_shapes) == 1
+    assert exporter.cached_path(markdown).exists()
+
+
+def test_repeat_export_served_from_cache(exporter):
+    markdown = "# 缓存\n\n正文"
+    with exporter.export(markdown) as f:
+        first = f.read()
+
+    with patch.object(DocxExporter, "_build", side_effect=AssertionError("should hit cache")):
+        with exporter.export(markdown) as f:
+            assert f.read() == first
+
+    for i in range(3):
+        exporter.export(f"# 其他 {i}").close()
+    assert len(list(exporter.export_dir.iterdir())) == 2
+
+
+def test_large_export_spills_to_disk(tmp_path):
+    exporter = DocxExporter(cache_dir=str(tmp_path), max_cached=0, spool_size=1024)
+    markdown = "\n\n".join(f"第 {i} 段 " + "内容" * 50 for i in range(500))
+
+    with exporter.export(markdown) as f:
+        assert f._rolled
+        assert len(_paragraphs(f)) == 500
+    assert not exporter.export_dir.exists()
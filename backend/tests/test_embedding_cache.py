@@ -0,0 +1,121 @@
+"""
+Embedding 持久化缓存 — 单元测试
+"""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from services.blog_generator.cross_section_dedup import CrossSectionDeduplicator
+from services.blog_generator.services.embedding_cache import EmbeddingCache
+from services.blog_generator.services.semantic_compressor import EmbeddingProvider, SemanticCompressor
+
+
+class FakeEmbeddings:
+    """记录每次请求的假 embedding 模型：向量由文本长度和首字符决定"""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), float(ord(t[0]) if t else 0), 1.0] for t in texts]
+
+
+@pytest.fixture
+def remote_provider(monkeypatch):
+    monkeypatch.setenv('EMBEDDING_PROVIDER', 'openai')
+
+    def make(cache):
+        provider = EmbeddingProvider(cache=cache)
+        provider._model = FakeEmbeddings()
+        return provider
+    return make
+
+
+class TestEmbeddingCache:
+
+    def test_batch_lookup_aligned_with_input(self):
+        cache = EmbeddingCache()
+        cache.put_many('m', ['a', 'b'], [[1.0, 2.0], [3.0, 4.0]])
+        vectors = cache.get_many('m', ['b', 'x', 'a', 'b'])
+        assert vectors[1] is None
+        assert vectors[0].tolist() == [3.0, 4.0] == vectors[3].tolist()
+        assert vectors[2].tolist() == [1.0, 2.0]
+        assert cache.get_stats()['hits'] == 3
+
+    def test_models_are_isolated(self):
+        cache = EmbeddingCache()
+        cache.put_many('small', ['a'], [[1.0]])
+        assert cache.get_many('large', ['a']) == [None]
+
+    def test_persists_across_instances(self, tmp_path):
+        db = str(tmp_path / 'embeddings.db')
+        EmbeddingCache(db_path=db).put_many('m', ['a'], [[0.5, 0.25]])
+        assert EmbeddingCache(db_path=db).get_many('m', ['a'])[0].tolist() == [0.5, 0.25]
+
+
+class TestProviderWithCache:
+
+    def test_only_new_texts_are_requested(self, remote_provider):
+        cache = EmbeddingCache()
+        first = remote_provider(cache)
+        first.embed(['alpha', 'beta', 'alpha'])
+        assert first._model.calls == [['alpha', 'beta']]
+
+        second = remote_provider(cache)
+        vectors = second.embed(['beta', 'gamma', 'alpha'])
+        assert second._model.calls == [['gamma']]
+        assert second.api_texts == 1
+        assert vectors[0] == [4.0, float(ord('b')), 1.0]
+
+    def test_fully_cached_batch_makes_no_request(self, remote_provider):
+        cache = EmbeddingCache()
+        remote_provider(cache).embed(['alpha', 'beta'])
+        provider = remote_provider(cache)
+        provider.pairwise_similarity(['beta', 'alpha'])
+        assert provider._model.calls == []
+        assert provider.api_calls == 0
+
+    def test_without_cache_every_call_requests(self, remote_provider):
+        provider = remote_provider(None)
+        provider.embed(['alpha'])
+        provider.embed(['alpha'])
+        assert provider.api_calls == 2
+
+    def test_api_failure_falls_back_to_local(self, remote_provider):
+        provider = remote_provider(EmbeddingCache())
+        provider._model.embed_documents = lambda texts: (_ for _ in ()).throw(RuntimeError('down'))
+        matrix = provider._embed_matrix(['a b', 'a b'])
+        assert np.allclose(matrix @ matrix.T, 1.0)
+
+
+class TestCallersShareCache:
+
+    def test_compressor_and_dedup_reuse_embeddings_across_rounds(self, monkeypatch):
+        monkeypatch.setenv('EMBEDDING_PROVIDER', 'openai')
+        cache = EmbeddingCache()
+        fake = FakeEmbeddings()
+        paragraph = 'x' * 60
+        sections = [{'content': paragraph}, {'content': paragraph + ' extra words'}]
+        results = [{'content': f'snippet {i}'} for i in range(5)]
+
+        with patch('services.blog_generator.services.semantic_compressor.get_embedding_cache', return_value=cache), \
+                patch('langchain_openai.OpenAIEmbeddings', return_value=fake):
+            for _ in range(2):
+                SemanticCompressor(top_k=2).compress('query', results)
+                CrossSectionDeduplicator(min_paragraph_len=20).detect_duplicates(sections)
+
+        requested = [t for call in fake.calls for t in call]
+        assert len(requested) == len(set(requested)) == 8
+        assert cache.get_stats()['hits'] == 8
+
+    def test_local_provider_never_opens_cache(self, monkeypatch):
+        monkeypatch.setenv('EMBEDDING_PROVIDER', 'local')
+        sections = [{'content': 'x' * 60}, {'content': 'x' * 60 + ' extra words'}]
+
+        with patch('services.blog_generator.services.semantic_compressor.get_embedding_cache') as factory:
+            SemanticCompressor(top_k=2).compress('query', [{'content': 'snippet'}])
+            CrossSectionDeduplicator(min_paragraph_len=20).detect_duplicates(sections)
+
+        factory.assert_not_called()
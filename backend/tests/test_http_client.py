@@ -0,0 +1,138 @@
+"""
+共享 HTTP 连接池单元测试 + 本地服务器基准
+
+基准对比：逐次 requests.get（每次新建连接） vs 共享连接池（keep-alive 复用）。
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils import http_client
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        with self.server.stats_lock:
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        time.sleep(self.server.delay)
+        body = b"<html><body><p>ok</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.stats_lock:
+            self.server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    server.daemon_threads = True
+    server.stats_lock = threading.Lock()
+    server.connections = 0
+    server.active = 0
+    server.max_active = 0
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    http_client.close_all()
+    yield
+    http_client.close_all()
+
+
+def _url(server, path="/"):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+class TestSharedClients:
+
+    def test_session_is_shared(self):
+        assert http_client.get_session() is http_client.get_session()
+
+    def test_httpx_client_is_shared(self):
+        assert http_client.get_httpx_client() is http_client.get_httpx_client()
+
+    def test_session_reuses_connections(self, local_server):
+        for _ in range(10):
+            assert http_client.get(_url(local_server)).status_code == 200
+        assert local_server.connections == 1
+
+    def test_fetch_reuses_connections(self, local_server):
+        for _ in range(10):
+            assert http_client.fetch(_url(local_server)).status_code == 200
+        assert local_server.connections == 1
+
+    def test_fetch_respects_per_host_cap(self, local_server, monkeypatch):
+        monkeypatch.setattr(http_client, "MAX_CONNECTIONS_PER_HOST", 2)
+        local_server.delay = 0.05
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: http_client.fetch(_url(local_server)), range(8)))
+        assert local_server.max_active <= 2
+
+    def test_session_respects_per_host_cap(self, local_server, monkeypatch):
+        monkeypatch.setattr(http_client, "MAX_CONNECTIONS_PER_HOST", 2)
+        local_server.delay = 0.05
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: http_client.get(_url(local_server)), range(8)))
+        assert local_server.connections <= 2
+
+    def test_async_fetch_reuses_client_within_loop(self, local_server):
+        async def run():
+            first = http_client.get_async_client()
+            responses = [await http_client.async_fetch(_url(local_server)) for _ in range(5)]
+            assert http_client.get_async_client() is first
+            await http_client.aclose_current()
+            return responses
+
+        responses = asyncio.run(run())
+        assert all(r.status_code == 200 for r in responses)
+        assert local_server.connections == 1
+
+
+@pytest.mark.slow
+def test_benchmark_pooled_vs_unpooled(local_server):
+    """本地基准：50 次请求的新建连接数与耗时"""
+    url = _url(local_server)
+    requests_count = 50
+
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        requests.get(url, timeout=5)
+    unpooled_seconds = time.perf_counter() - start
+    unpooled_connections = local_server.connections
+
+    local_server.connections = 0
+    start = time.perf_counter()
+    for _ in range(requests_count):
+        http_client.get(url)
+    pooled_seconds = time.perf_counter() - start
+    pooled_connections = local_server.connections
+
+    assert unpooled_connections == requests_count
+    assert pooled_connections == 1
+    assert pooled_seconds < unpooled_seconds
@@ -0,0 +1,161 @@
+"""
+查询感知知识融合测试：相关性排序 + SimHash 近重复去重 + token 预算装箱
+"""
+import random
+from unittest.mock import Mock
+
+import pytest
+
+from services.blog_generator.services.semantic_compressor import EmbeddingProvider
+from services.documents.knowledge_service import (
+    KnowledgeItem,
+    KnowledgeService,
+    _NearDuplicateIndex,
+    _simhash,
+)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv('EMBEDDING_PROVIDER', 'local')
+    monkeypatch.setenv('SEMANTIC_HASH_DIM', str(1 << 16))
+    return KnowledgeService(embedding_provider=EmbeddingProvider())
+
+
+DOCUMENTS = [{'id': 'd1', 'filename': 'guide.pdf', 'summary': 'An overview of database internals and caching.'}]
+CHUNKS = [
+    {'document_id': 'd1', 'title': 'B-tree', 'content': 'btree index pages split when full and keep keys sorted for range scans'},
+    {'document_id': 'd1', 'title': 'Cache', 'content': 'lru cache eviction keeps hot pages in memory and evicts cold pages first'},
+    {'document_id': 'd1', 'title': 'WAL', 'content': 'write ahead log records changes before pages are flushed for crash recovery'},
+]
+
+
+def _web(title, content):
+    return KnowledgeItem(source_type='web_search', title=title, content=content,
+                         url=f"https://example.com/{title}", relevance_score=0.5)
+
+
+def test_without_query_keeps_source_priority(service):
+    web = [_web('w1', 'something unrelated about gardening tomatoes'), _web('B-tree', 'title clash')]
+
+    merged = service.get_merged_knowledge_v2(DOCUMENTS, CHUNKS, [], web)
+
+    assert [i.title for i in merged] == [
+        'guide.pdf - 摘要', 'guide.pdf - B-tree', 'guide.pdf - Cache', 'guide.pdf - WAL', 'w1', 'B-tree',
+    ]
+
+
+def test_query_ranks_relevant_chunk_first(service):
+    web = [_web('lru', 'how an lru cache evicts cold pages from memory')]
+
+    merged = service.get_merged_knowledge_v2(DOCUMENTS, CHUNKS, [], web, query='lru cache eviction of cold pages')
+
+    assert merged[0].title == 'guide.pdf - Cache'
+    assert merged[1].title == 'lru'
+    assert merged[0].relevance_score > merged[-1].relevance_score
+    # 传入的条目不被修改
+    assert web[0].relevance_score == 0.5
+
+
+def test_chunk_titles_carry_breadcrumb_path(service):
+    chunks = [
+        {'document_id': 'd1', 'title': '安装 (Part 2)', 'content': 'pip install', 'breadcrumbs': ['指南', '快速开始', '安装']},
+        {'document_id': 'd1', 'title': '', 'content': '前言', 'breadcrumbs': []},
+    ]
+
+    items = service.prepare_chunked_knowledge([{'id': 'd1', 'filename': 'guide.md'}], chunks)
+
+    assert [i.title for i in items] == ['guide.md - 指南 > 快速开始 > 安装 (Part 2)', 'guide.md']
+    assert items[0].breadcrumbs == ['指南', '快速开始', '安装']
+    assert KnowledgeItem.from_dict(items[0].to_dict()) == items[0]
+
+
+def test_near_duplicate_web_copy_is_dropped(service):
+    copy = _web('mirror', CHUNKS[2]['content'].replace('crash recovery', 'crash recovery.'))
+    distinct = _web('other', 'rust ownership and borrowing rules prevent data races at compile time')
+
+    merged = service.get_merged_knowledge_v2(DOCUMENTS, CHUNKS, [], [copy, distinct])
+
+    titles = [i.title for i in merged]
+    assert 'mirror' not in titles
+    assert 'other' in titles
+
+
+def test_simhash_index_matches_bruteforce():
+    texts = [f"段落 {i % 40} 讲解缓存一致性与写回策略 " * 3 + ("附注" if i % 3 else "") for i in range(200)]
+    fingerprints = [_simhash(t) for t in texts]
+    index = _NearDuplicateIndex()
+    kept = []
+    for fp in fingerprints:
+        expected = all(bin(fp ^ other).count('1') > index.max_distance for other in kept)
+        assert index.add_if_new(fp) is expected
+        if expected:
+            kept.append(fp)
+    assert 0 < len(kept) < len(texts)
+
+
+def test_merge_scales_linearly(service, monkeypatch):
+    monkeypatch.setenv('KNOWLEDGE_MAX_DOC_ITEMS', '100000')
+    rng = random.Random(48)
+    vocabulary = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(3, 9))) for _ in range(3000)]
+    chunks = [
+        {'document_id': 'd1', 'title': f"c{i}", 'content': ' '.join(rng.choices(vocabulary, k=300))}
+        for i in range(1000)
+    ]
+
+    indexes = []
+
+    class RecordingIndex(_NearDuplicateIndex):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            indexes.append(self)
+
+    monkeypatch.setattr('services.documents.knowledge_service._NearDuplicateIndex', RecordingIndex)
+    merged = service.get_merged_knowledge_v2(DOCUMENTS, chunks, [], [], max_items=10_000, query='topic 42')
+
+    assert len(merged) == 1001
+    # 每个新指纹只与同段同值桶内的指纹比较；两两比较需要约 50 万次
+    comparisons = sum(len(fps) * (len(fps) - 1) // 2
+                      for bucket in indexes[0].buckets for fps in bucket.values())
+    assert comparisons < 1001 * 1000 // 2 // 20
+
+def test_token_budget_packs_by_relevance(service):
+    items = [
+        KnowledgeItem(source_type='document', title='big', content='x' * 4000, file_name='a.pdf'),
+        KnowledgeItem(source_type='document', title='small', content='y' * 400, file_name='a.pdf'),
+        _web('tiny', 'z' * 200),
+    ]
+
+    summary = service.summarize_for_prompt_v2(items, max_tokens=300)
+
+    text = summary['background_knowledge']
+    assert 'x' * 100 not in text
+    assert 'y' * 400 in text and 'z' * 200 in text
+    assert '内容已截断' not in text
+    stats = summary['knowledge_stats']
+    assert stats['dropped_items'] == 1
+    assert stats['total_tokens'] <= 300
+    assert summary['web_references'] == [{'title': 'tiny', 'url': 'https://example.com/tiny'}]
+
+
+def test_researcher_merges_documents_by_topic(service, monkeypatch):
+    from services.blog_generator.agents.researcher import ResearcherAgent
+
+    monkeypatch.setenv('RESEARCHER_CACHE_ENABLED', 'false')
+    monkeypatch.setenv('SMART_SEARCH_ENABLED', 'false')
+    agent = ResearcherAgent(Mock(), knowledge_service=service)
+    monkeypatch.setattr(agent, 'search', lambda topic, audience: [
+        {'title': 'garden', 'content': 'growing tomatoes in a small garden bed', 'url': 'https://example.com/g'},
+        {'title': 'lru', 'content': 'lru cache eviction keeps hot pages in memory', 'url': 'https://example.com/l'},
+    ])
+    merge = Mock(wraps=service.get_merged_knowledge_v2)
+    monkeypatch.setattr(service, 'get_merged_knowledge_v2', merge)
+
+    state = agent.run({
+        'topic': 'lru cache eviction',
+        'document_knowledge': [{'file_name': 'notes.md', 'content': 'notes on lru cache eviction and hot pages'}],
+    })
+
+    assert merge.call_args.kwargs['query'] == 'lru cache eviction'
+    assert state['knowledge_source_stats'] == {'document_count': 1, 'web_count': 2, 'total_items': 3}
+    assert state['background_knowledge'].index('lru cache eviction keeps') < state['background_knowledge'].index('tomatoes')
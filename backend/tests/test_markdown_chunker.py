@@ -0,0 +1,171 @@
+"""
+流式 Markdown 分块测试：与原分块实现逐字段一致 + token 预算 + 标题路径
+"""
+import io
+import random
+import re
+import tracemalloc
+
+import pytest
+
+from services.documents.file_parser_service import FileParserService
+from services.documents.markdown_chunker import MarkdownChunker
+
+
+def _legacy_chunk_markdown(markdown, chunk_size=2000, chunk_overlap=200):
+    """原 _split_by_headers + _split_by_paragraphs 实现（对照基准）"""
+    sections = []
+    current = {'title': '', 'content': '', 'start_pos': 0}
+    pos = 0
+    for line in markdown.split('\n'):
+        match = re.match(r'^(#{2,3})\s+(.+)$', line)
+        if match:
+            if current['content'].strip():
+                sections.append(current)
+            current = {'title': match.group(2).strip(), 'content': line + '\n', 'start_pos': pos}
+        else:
+            current['content'] += line + '\n'
+        pos += len(line) + 1
+    if current['content'].strip():
+        sections.append(current)
+    if not sections:
+        sections.append({'title': '', 'content': markdown, 'start_pos': 0})
+
+    chunks = []
+    for section in sections:
+        title, content, start = section['title'], section['content'], section['start_pos']
+        if len(content) <= chunk_size:
+            chunks.append({'chunk_type': 'section', 'title': title, 'content': content,
+                           'start_pos': start, 'end_pos': start + len(content)})
+            continue
+        chunk, index = '', 0
+        for para in re.split(r'\n\s*\n', content):
+            para = para.strip()
+            if not para:
+                continue
+            if len(chunk) + len(para) + 2 <= chunk_size:
+                chunk += para + '\n\n'
+            else:
+                if chunk.strip():
+                    chunks.append({'chunk_type': 'paragraph',
+                                   'title': f"{title} (Part {index + 1})" if title else f"Part {index + 1}",
+                                   'content': chunk.strip(), 'start_pos': start, 'end_pos': start + len(chunk)})
+                    index += 1
+                overlap = chunk[-chunk_overlap:] if len(chunk) > chunk_overlap else ''
+                start = start + len(chunk) - len(overlap)
+                chunk = overlap + para + '\n\n'
+        if chunk.strip():
+            chunks.append({'chunk_type': 'paragraph',
+                           'title': f"{title} (Part {index + 1})" if title else f"Part {index + 1}",
+                           'content': chunk.strip(), 'start_pos': start, 'end_pos': start + len(chunk)})
+    return chunks
+
+
+def _without_breadcrumbs(chunks):
+    return [{k: v for k, v in c.items() if k != 'breadcrumbs'} for c in chunks]
+
+
+FIXTURE = """# 机器学习入门
+
+本书介绍机器学习的基本概念。
+
+## 第一章 监督学习
+
+监督学习使用带标签的数据。
+
+### 1.1 线性回归
+
+线性回归拟合一条直线。
+
+```python
+# 这不是标题
+model.fit(x, y)
+```
+
+### 1.2 逻辑回归
+
+""" + "\n\n".join(f"逻辑回归第 {i} 段：" + "分类问题的概率建模。" * 12 for i in range(20)) + """
+
+## 第二章 无监督学习
+
+聚类与降维。
+"""
+
+
+@pytest.fixture
+def parser(tmp_path):
+    return FileParserService('token', upload_folder=str(tmp_path))
+
+
+def test_fixture_output_matches_legacy(parser):
+    for size, overlap in [(2000, 200), (300, 50), (120, 0)]:
+        chunks = parser.chunk_markdown(FIXTURE, size, overlap)
+        assert _without_breadcrumbs(chunks) == _legacy_chunk_markdown(FIXTURE, size, overlap)
+
+
+def test_matches_legacy_fuzz():
+    rng = random.Random(46)
+    pieces = ['## ', '### ', '# ', '#### ', 'text', '文本', ' ', '\t', '\n', '\n\n', '\n \n', '```', '  ']
+    for _ in range(3000):
+        markdown = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 60)))
+        size = rng.choice([1, 5, 12, 30, 80])
+        overlap = rng.choice([0, 1, 4, 10])
+        chunker = MarkdownChunker(size, overlap)
+        assert _without_breadcrumbs(chunker.iter_chunks(markdown)) == \
+            _legacy_chunk_markdown(markdown, size, overlap), (markdown, size, overlap)
+
+
+def test_file_object_source_matches_string():
+    chunker = MarkdownChunker(300, 50)
+    for text in (FIXTURE, FIXTURE.rstrip('\n'), ''):
+        assert list(chunker.iter_chunks(io.StringIO(text))) == list(chunker.iter_chunks(text))
+
+
+def test_breadcrumbs_follow_heading_path(parser):
+    chunks = parser.chunk_markdown(FIXTURE, 300, 50)
+    by_title = {c['title']: c['breadcrumbs'] for c in chunks}
+    assert by_title['1.1 线性回归'] == ['机器学习入门', '第一章 监督学习', '1.1 线性回归']
+    assert by_title['1.2 逻辑回归 (Part 2)'] == ['机器学习入门', '第一章 监督学习', '1.2 逻辑回归']
+    assert by_title['第二章 无监督学习'] == ['机器学习入门', '第二章 无监督学习']
+
+
+def test_token_budget_respected():
+    counter = len  # 1 字符 = 1 token，便于断言
+    chunker = MarkdownChunker(chunk_size=10_000, chunk_overlap=20, max_tokens=100, token_counter=counter)
+    markdown = "## 长章节\n\n" + "\n\n".join("句子" * 30 for _ in range(10)) + "\n\n" + "超长段落" * 100
+
+    chunks = list(chunker.iter_chunks(markdown))
+
+    assert len(chunks) > 5
+    assert all(counter(c['content']) <= 100 for c in chunks)
+    # 预算足够时整节仍作为一个 section
+    assert [c['chunk_type'] for c in chunker.iter_chunks("## 短\n\n内容")] == ['section']
+
+
+@pytest.mark.slow
+def test_memory_bounded_and_linear_on_huge_document():
+    paragraph = "正文内容。" * 40 + "\n"
+
+    def lines():
+        # 3000 个普通章节 + 一个 8000 段的超长章节，逐行生成，不在内存中拼出全文
+        for i in range(3000):
+            yield f"## 第 {i} 节\n"
+            for _ in range(8):
+                yield "\n"
+                yield paragraph
+        yield "## 巨大章节\n"
+        for _ in range(8000):
+            yield "\n"
+            yield paragraph
+
+    chunker = MarkdownChunker(2000, 200)
+    tracemalloc.start()
+    count = 0
+    for _ in chunker.iter_chunks(lines()):
+        count += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert count > 3000
+    # 输入约 5MB 字符，分块器峰值内存只与 chunk_size 相关
+    assert peak < 500_000
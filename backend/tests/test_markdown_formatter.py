@@ -0,0 +1,78 @@
+"""
+MarkdownFormatter 单次遍历格式化测试
+"""
+import random
+
+import pytest
+
+from services.blog_generator.post_processors.markdown_formatter import MarkdownFormatter
+
+
+@pytest.fixture
+def formatter():
+    return MarkdownFormatter()
+
+
+SAMPLES = [
+    "",
+    "# 标题\n正文\n---\n## 小节\n内容",
+    "前文---## 标题\n\n\n\n\n后文",
+    "---\n\n\n\n\n---",
+    "##\n#\n# \nx",
+    "行内 # 井号\n紧跟一行\n#\n下一行\n再一行",
+    "```python\n# 注释\nprint(1)\n```\n",
+    "![img](data:image/png;base64," + "A" * 5000 + ")\n---\n结尾\n\n\n",
+]
+
+
+def test_matches_legacy_regex_pipeline(formatter):
+    for sample in SAMPLES:
+        assert formatter.format_content(sample) == formatter.format_content_legacy(sample)
+
+
+def test_matches_legacy_regex_pipeline_fuzz(formatter):
+    rng = random.Random(43)
+    alphabet = ['-', '---', '#', '##', ' ', '\t', '\n', '\n\n', 'a', '中', '|']
+    for _ in range(20000):
+        sample = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        assert formatter.format_content(sample) == formatter.format_content_legacy(sample), repr(sample)
+
+
+def test_process_directory_in_parallel(tmp_path, formatter):
+    originals = {}
+    for i in range(6):
+        content = f"# 文章 {i}\n正文---## 小节\n\n\n\n\n结尾"
+        (tmp_path / f"a{i}.md").write_text(content, encoding='utf-8')
+        originals[f"a{i}.md"] = content
+    (tmp_path / "skip.txt").write_text("---x", encoding='utf-8')
+
+    assert formatter.process_directory(str(tmp_path), max_workers=3) == 6
+    for name, content in originals.items():
+        text = (tmp_path / name).read_text(encoding='utf-8')
+        assert text == formatter.format_content_legacy(content)
+    assert (tmp_path / "skip.txt").read_text(encoding='utf-8') == "---x"
+
+
+def test_save_markdown_writes_formatted_content_once(tmp_path, monkeypatch):
+    from services.blog_generator import blog_service as blog_service_module
+    from utils import atomic_write as atomic_write_module
+
+    writes = []
+    original = atomic_write_module.atomic_write
+
+    def recording_write(filepath, content, encoding='utf-8'):
+        writes.append(content)
+        original(filepath, content, encoding)
+
+    monkeypatch.setattr(atomic_write_module, 'atomic_write', recording_write)
+    monkeypatch.setattr(blog_service_module, 'OUTPUTS_DIR', str(tmp_path))
+    service = blog_service_module.BlogService.__new__(blog_service_module.BlogService)
+    markdown = "# 标题\n正文---## 小节\n\n\n\n\n结尾"
+
+    path = service._save_markdown("task-1", markdown, {"title": "demo"})
+
+    assert len(writes) == 1
+    expected = MarkdownFormatter().format_content_legacy(markdown)
+    assert writes[0] == expected
+    with open(path, encoding='utf-8') as f:
+        assert f.read() == expected
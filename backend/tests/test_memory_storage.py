@@ -0,0 +1,181 @@
+"""
+用户记忆存储测试：SQLite 后端与 JSON 后端接口一致、JSON 迁移、并发写入、相关性检索
+"""
+import json
+import threading
+
+import pytest
+
+from services.blog_generator.memory import (
+    BlogMemoryConfig,
+    MemoryStorage,
+    SQLiteMemoryStorage,
+    create_empty_memory,
+    create_memory_storage,
+)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SQLiteMemoryStorage(storage_path=str(tmp_path))
+
+
+def _comparable(memory):
+    memory = json.loads(json.dumps(memory))
+    memory.pop("lastUpdated")
+    for section in memory.values():
+        if isinstance(section, dict):
+            for value in section.values():
+                value.pop("updatedAt", None)
+    for fact in memory["facts"]:
+        fact.pop("id")
+        fact.pop("createdAt")
+    return memory
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_backends_share_behaviour(tmp_path, backend):
+    store = create_memory_storage(BlogMemoryConfig(storage_backend=backend, storage_path=str(tmp_path)))
+    assert not store.exists("u1")
+    assert store.load("u1")["facts"] == []
+
+    kept = store.add_fact("u1", "喜欢代码示例", category="preference", confidence=0.95)
+    store.add_fact("u1", "写过 Rust 教程", category="behavior", confidence=0.8)
+    removed = store.add_fact("u1", "临时事实", confidence=0.5)
+    assert store.update_profile_field("u1", "writingProfile", "preferredStyle", "简洁")
+    assert not store.update_profile_field("u1", "writingProfile", "unknownField", "x")
+    assert store.remove_fact("u1", removed)
+    assert not store.remove_fact("u1", removed)
+
+    memory = store.load("u1")
+    assert store.exists("u1")
+    assert [f["id"] for f in memory["facts"]] == [kept, memory["facts"][1]["id"]]
+    assert [f["content"] for f in store.get_facts_by_category("u1", "behavior")] == ["写过 Rust 教程"]
+    assert memory["writingProfile"]["preferredStyle"]["summary"] == "简洁"
+    assert _comparable(memory)["writingProfile"] == _comparable(create_empty_memory("u1"))["writingProfile"] | {
+        "preferredStyle": {"summary": "简洁"}
+    }
+
+    injection = store.format_for_injection("u1")
+    assert injection.startswith("<user-memory>")
+    assert "- 写作风格: 简洁" in injection
+    assert injection.index("喜欢代码示例") < injection.index("写过 Rust 教程")
+
+    assert store.delete("u1")
+    assert not store.exists("u1")
+
+
+def test_same_operations_give_same_memory(tmp_path):
+    json_store = MemoryStorage(storage_path=str(tmp_path / "json"))
+    sqlite_store = SQLiteMemoryStorage(storage_path=str(tmp_path / "sqlite"))
+    for store in (json_store, sqlite_store):
+        for i in range(8):
+            store.add_fact("u", f"事实{i}", confidence=(i % 4) / 4, max_facts=5)
+        store.update_profile_field("u", "topicHistory", "recentTopics", "LLM 推理")
+
+    # JSON 后端裁剪时按置信度重排列表，SQLite 保持插入顺序；保留的事实集合相同
+    by_content = lambda memory: {**memory, "facts": sorted(memory["facts"], key=lambda f: f["content"])}
+    assert by_content(_comparable(sqlite_store.load("u"))) == by_content(_comparable(json_store.load("u")))
+    assert sqlite_store.format_for_injection("u") == json_store.format_for_injection("u")
+
+
+def test_save_replaces_whole_memory(storage):
+    storage.add_fact("u", "过时的偏好")
+    memory = create_empty_memory("u")
+    memory["facts"] = [{"id": "fact_keep", "content": "新事实", "category": "goal",
+                        "confidence": 0.7, "createdAt": "2026-01-01T00:00:00+00:00", "source": "s"}]
+    memory["qualityPreferences"]["revisionPatterns"]["summary"] = "常改标题"
+
+    assert storage.save("u", memory)
+
+    loaded = storage.load("u")
+    assert loaded["facts"] == memory["facts"]
+    assert loaded["qualityPreferences"]["revisionPatterns"]["summary"] == "常改标题"
+    assert storage.search_facts("u", "过时") == []
+
+
+def test_migrates_json_files_once(tmp_path):
+    legacy = MemoryStorage(storage_path=str(tmp_path))
+    fact_id = legacy.add_fact("alice", "偏好 Python 示例", category="preference", confidence=0.9)
+    legacy.update_profile_field("alice", "writingProfile", "preferredAudience", "初学者")
+    legacy.add_fact("bob", "关注数据库", confidence=0.6)
+    expected = {user: legacy.load(user) for user in ("alice", "bob")}
+
+    storage = SQLiteMemoryStorage(storage_path=str(tmp_path))
+
+    for user, memory in expected.items():
+        assert storage.load(user) == memory
+    assert not list(tmp_path.glob("*.json"))
+    assert sorted(p.name for p in tmp_path.glob("*.json.migrated")) == ["alice.json.migrated", "bob.json.migrated"]
+    assert storage.search_facts("alice", "Python")[0]["id"] == fact_id
+
+    # 再次打开不会重复导入
+    storage.add_fact("alice", "新事实")
+    assert len(SQLiteMemoryStorage(storage_path=str(tmp_path)).load("alice")["facts"]) == 2
+
+
+def test_concurrent_writers_do_not_lose_facts(tmp_path):
+    # 每个线程用独立实例，等同于多个进程共享同一数据库
+    errors = []
+
+    def writer(worker):
+        store = SQLiteMemoryStorage(storage_path=str(tmp_path))
+        try:
+            for i in range(25):
+                store.add_fact("shared", f"worker{worker} fact{i}", source=f"task:{worker}")
+                if i % 5 == 0:
+                    store.update_profile_field("shared", "topicHistory", "recentTopics", f"worker{worker}")
+        except Exception as e:  # pragma: no cover - 失败时在断言中报告
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    facts = SQLiteMemoryStorage(storage_path=str(tmp_path)).load("shared")["facts"]
+    assert len(facts) == 200
+    assert len({f["id"] for f in facts}) == 200
+
+
+def test_max_facts_trims_lowest_confidence(storage):
+    for i in range(6):
+        storage.add_fact("u", f"事实{i}", confidence=[0.9, 0.1, 0.5, 0.1, 0.8, 0.3][i], max_facts=4)
+
+    assert [f["content"] for f in storage.load("u")["facts"]] == ["事实0", "事实2", "事实4", "事实5"]
+
+
+def test_recent_facts_by_category(storage):
+    for i in range(5):
+        storage.add_fact("u", f"行为{i}", category="behavior")
+        storage.add_fact("u", f"偏好{i}", category="preference")
+    storage.add_fact("other", "别人的行为", category="behavior")
+
+    assert [f["content"] for f in storage.get_recent_facts("u", "behavior", limit=3)] == ["行为4", "行为3", "行为2"]
+    assert [f["content"] for f in storage.get_recent_facts("u", limit=2)] == ["偏好4", "行为4"]
+
+
+def test_injection_prefers_facts_relevant_to_query(storage):
+    for i in range(20):
+        storage.add_fact("u", f"高置信度的通用偏好{i}", confidence=0.95)
+    storage.add_fact("u", "读者希望异步编程部分多给 Rust 代码示例", confidence=0.6)
+    storage.add_fact("u", "Kubernetes 文章要附部署清单", confidence=0.6)
+    storage.add_fact("other", "异步编程相关但属于其他用户", confidence=0.99)
+
+    top = storage.search_facts("u", "写一篇 Rust 异步编程入门", top_k=3)
+    assert top[0]["content"] == "读者希望异步编程部分多给 Rust 代码示例"
+    assert all(f["content"] != "异步编程相关但属于其他用户" for f in top)
+    assert storage.search_facts("u", "kube")[0]["content"].startswith("Kubernetes")
+
+    injection = storage.format_for_injection("u", query="Rust 异步编程", top_k=10)
+    assert "Rust 代码示例" in injection
+    assert injection.count("\n- [") == 10
+    # 不传 query 时与旧行为一致：按置信度取前 10
+    assert "Rust 代码示例" not in storage.format_for_injection("u")
+
+
+def test_unknown_backend_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        create_memory_storage(BlogMemoryConfig(storage_backend="redis", storage_path=str(tmp_path)))
@@ -0,0 +1,131 @@
+"""
+Mermaid 本地语法检查与自动修复 — 单元测试
+
+BROKEN_CORPUS 收录 LLM 实际生成过的典型机械性错误，期望本地修复后无需 LLM 重试；
+VALID_CORPUS 中的合法图表必须原样通过、不被改写。
+"""
+
+import pytest
+
+from services.blog_generator.agents.artist import ArtistAgent
+from services.blog_generator.utils.mermaid_linter import autofix_mermaid, lint_mermaid
+
+
+VALID_CORPUS = [
+    "flowchart TD\n    A[开始] --> B{判断}\n    B -->|是| C[处理]\n    B -->|否| D[结束]",
+    "graph LR\n  A -- 调用 --> B\n  B -.-> C\n  C ==> D\n  D --o E\n  E <--> F",
+    "flowchart TD\n  A([开始]) --> B[[子程序]] --> C[(数据库)] --> D((圆))\n"
+    "  D --> E{{六边形}} --> F[/平行/] --> G>旗帜]",
+    'flowchart TD\n  A["已引号 (ok)"]:::hl --> B\n  class A,B hl\n'
+    '  style A fill:#f9f\n  classDef hl fill:#ff0',
+    "flowchart TD\n  subgraph 子图\n    C --> D\n  end\n  A --> C",
+    "%%{init: {'theme':'dark'}}%%\nflowchart TD\n  A --> B",
+    'flowchart TD\n  A@{ shape: rect, label: "x" } --> B',
+    "flowchart TD\n  A[开始] -- 这是 end 文字 --> B",
+    "sequenceDiagram\n  participant A as 用户\n  Alice->>Bob: Hello\n"
+    "  Note right of Bob: 思考\n  alt 成功\n    Bob-->>Alice: OK\n"
+    "  else 失败\n    Bob-->>Alice: Fail\n  end",
+    "sequenceDiagram\n  A->>B: #quot;ok#quot;\n  A-)B: async",
+    "classDiagram\n  namespace Zoo {\n    class A\n    class B\n  }\n  A <|-- B : 继承",
+    "classDiagram\n  class Animal {\n    +String name\n    +eat() void\n  }",
+    "stateDiagram-v2\n  [*] --> S1\n  S1 --> S2 : 触发\n  state S2 {\n    A --> B\n  }\n"
+    "  note right of S1\n    多行注释\n  end note\n  S2 --> [*]",
+    "gantt\n  title 计划\n  section A\n  任务1 :a1, 2024-01-01, 30d",
+]
+
+# (损坏的代码, 修复后应包含的片段)
+BROKEN_CORPUS = [
+    ("flowchart LR\n  A[函数 foo(x)] --> B[返回]", 'A["函数 foo(x)"]'),
+    ("flowchart TD\n  A[开始] --> end\n  style end fill:#f00", "style End fill"),
+    ("flowchart TD\n  A【开始】 --> B【结束】", "A[开始] --> B[结束]"),
+    ("flowchart TD\n  A[开始] ——> B[结束]\n  B －－＞ C", "B --> C"),
+    ("flowchart TD\n  A[开始 --> B[结束]", "A[开始] --> B[结束]"),
+    ("flowchart TD\n  A[开始] --> B[结束", "B[结束]"),
+    ("flowchart TD\n  A[foo (bar] --> B", 'A["foo (bar"] --> B'),
+    ("flowchart TD\n  A[开始]] --> B(结束))", "A[开始] --> B(结束)"),
+    ("flowchart TD\n  A -->｜否｜ D", "A -->|否| D"),
+    ("flowchart TD\n  subgraph S1[前端 (Web)]\n    A --> B\n  end", 'subgraph S1["前端 (Web)"]'),
+    ("flowchart TD\n  subgraph S1\n    A --> B\n  subgraph S2\n    C --> D\n  end", "end\nend"),
+    ("flowchart TD\n  A --> B\n  end", "A --> B"),
+    ("A --> B\nB --> C", "flowchart TD\nA --> B"),
+    ("mermaid\nflowchart TD\n  A --> B", "flowchart TD"),
+    ("Flowchart TD\n  A --> B", "flowchart TD"),
+    ("sequenceDiagram\n  A->>B: 请求; 数据", "请求#59; 数据"),
+    ("sequenceDiagram\n  B-->>A：响应", "B-->>A:响应"),
+    ("sequenceDiagram\n  A->>B 再次请求", "A->>B: 再次请求"),
+    ("sequenceDiagram\n  A－＞＞B: hi\n  A->>B: C# 代码", "A->>B: C#35; 代码"),
+    ("sequenceDiagram\n  loop 每秒\n    A->>B: ping", "ping\nend"),
+    ("classDiagram\n  class Animal {\n    +String name\n  class Dog\n  Animal <|-- Dog ： 继承",
+     "+String name\n  }\n  class Dog\n  Animal <|-- Dog : 继承"),
+    ("classDiagram\n  class A｛\n    +x\n  ｝\n  }", "class A{\n    +x\n  }"),
+    ("stateDiagram-v2\n  空闲 --> 运行 ： 启动\n  state 运行 {\n    A --> B", "运行 : 启动"),
+]
+
+# 语义性错误：本地无法确定意图，必须交给 LLM
+SEMANTIC_CORPUS = [
+    "flowchart TD\n  A -->|是 B",
+    "flowchart TD\n  A[开始] --> [结束]",
+    "sequenceDiagram\n  A->>B",
+    "这不是图表",
+]
+
+
+@pytest.mark.parametrize("code", VALID_CORPUS)
+def test_valid_diagrams_pass_unchanged(code):
+    assert lint_mermaid(code) == []
+    result = autofix_mermaid(code)
+    assert result.is_valid
+    assert result.code == code
+    assert result.fixes == []
+
+
+@pytest.mark.parametrize("code,expected", BROKEN_CORPUS)
+def test_mechanical_errors_fixed_locally(code, expected):
+    assert lint_mermaid(code), "损坏的图表应被检出"
+    result = autofix_mermaid(code)
+    assert result.is_valid, result.errors
+    assert result.fixes
+    assert expected in result.code
+    assert lint_mermaid(result.code) == []
+
+
+@pytest.mark.parametrize("code", SEMANTIC_CORPUS)
+def test_semantic_errors_are_escalated(code):
+    result = autofix_mermaid(code)
+    assert not result.is_valid
+
+
+def test_reserved_id_rename_avoids_collision():
+    result = autofix_mermaid("flowchart TD\n  End --> end")
+    assert result.is_valid
+    assert "End --> End_" in result.code
+
+
+class CountingLLM:
+    def __init__(self, reply=""):
+        self.calls = 0
+        self.reply = reply
+
+    def chat(self, **kwargs):
+        self.calls += 1
+        return self.reply
+
+
+def test_repair_skips_llm_for_mechanical_errors():
+    llm = CountingLLM()
+    agent = ArtistAgent(llm)
+    code = "flowchart TD\n  A[函数 foo(x)] --> end"
+    is_valid, error = agent._validate_mermaid(code)
+    assert not is_valid
+    repaired = agent._repair_mermaid(code, error)
+    assert llm.calls == 0
+    assert agent._validate_mermaid(repaired)[0]
+
+
+def test_repair_escalates_semantic_errors_to_llm():
+    llm = CountingLLM(reply="flowchart TD\n  A -->|是| B")
+    agent = ArtistAgent(llm)
+    code = "flowchart TD\n  A -->|是 B"
+    repaired = agent._repair_mermaid(code, agent._validate_mermaid(code)[1])
+    assert llm.calls == 1
+    assert repaired == "flowchart TD\n  A -->|是| B"
@@ -129,3 +129,148 @@ class TestClear:
         stats = d.get_stats()
         assert stats["total_queries"] == 0
         assert stats["consecutive_rollbacks"] == 0
+
+
+class TestNearDuplicate:
+    """近似重复检测"""
+
+    @pytest.mark.parametrize("first,second", [
+        ("Python 异步编程教程", "python异步编程 的 教程"),
+        ("LangGraph 多智能体 教程", "多智能体 LangGraph 入门"),
+        ("RAG 检索增强生成 原理", "检索增强生成 RAG 的原理"),
+        ("what is a large language model", "LLM"),
+        ("kubernetes operator tutorial", "k8s operator 教程"),
+    ])
+    def test_reordered_or_reworded_query_is_duplicate(self, first, second):
+        d = QueryDeduplicator()
+        d.record(first, "a")
+        assert d.is_duplicate(second, "a") is True
+
+    @pytest.mark.parametrize("first,second", [
+        ("python 3.11 新特性", "python 3.12 新特性"),
+        ("C++ 内存模型", "C# 内存模型"),
+        ("React hooks", "Vue hooks"),
+        ("transformer attention 机制", "transformer 架构"),
+    ])
+    def test_distinct_queries_not_merged(self, first, second):
+        d = QueryDeduplicator()
+        d.record(first, "a")
+        assert d.is_duplicate(second, "a") is False
+
+    def test_threshold_one_means_exact_only(self):
+        d = QueryDeduplicator(similarity_threshold=1.0)
+        d.record("Python 异步编程教程", "a")
+        assert d.is_duplicate("python异步编程 的 教程", "a") is False
+
+    def test_lookup_returns_recorded_results(self):
+        d = QueryDeduplicator()
+        d.record("LangGraph 教程", "a", results=["r1"])
+        match = d.lookup("langgraph 入门", "a")
+        assert match.query == "LangGraph 教程"
+        assert match.results == ["r1"]
+        assert d.get_stats()["near_duplicates"] == 1
+
+
+class TestTaskDeduplicator:
+    """任务级共享"""
+
+    def test_same_task_shares_instance(self):
+        from utils.query_deduplicator import get_task_deduplicator, release_task_deduplicator
+        assert get_task_deduplicator("t1") is get_task_deduplicator("t1")
+        assert get_task_deduplicator("t1") is not get_task_deduplicator("t2")
+        release_task_deduplicator("t1")
+        release_task_deduplicator("t2")
+
+    def test_release_drops_task_state(self):
+        from utils.query_deduplicator import get_task_deduplicator, release_task_deduplicator
+        get_task_deduplicator("t3").record("q", "search")
+        release_task_deduplicator("t3")
+        assert get_task_deduplicator("t3").is_duplicate("q", "search") is False
+        release_task_deduplicator("t3")
+
+
+# 录制的单任务查询日志（Researcher 生成查询 + SubQueryEngine 子查询 + 知识缺口补搜）
+RECORDED_TASK_QUERIES = [
+    "LangGraph 多智能体 教程",
+    "LangGraph multi agent tutorial",
+    "LangGraph 多智能体 入门",
+    "多智能体 LangGraph 教程",
+    "LangGraph 状态图 StateGraph 用法",
+    "StateGraph 用法 LangGraph",
+    "LangGraph checkpoint 持久化",
+    "LangGraph 的 checkpoint 持久化",
+    "LangGraph 与 CrewAI 对比",
+    "LangGraph vs CrewAI 对比",
+    "LangGraph human in the loop",
+    "LangGraph human-in-the-loop 人机协作",
+    "LangGraph 子图 subgraph",
+    "langgraph subgraph 子图",
+]
+
+
+def test_recorded_task_log_reduces_search_calls():
+    from unittest.mock import patch
+    from services.blog_generator.services.search_service import SearchService
+    from utils.query_deduplicator import release_task_deduplicator
+
+    service = SearchService(api_key="test")
+    calls = []
+
+    def fake_search(query, max_results=5):
+        calls.append(query)
+        return {
+            'success': True,
+            'results': [{'title': query, 'url': f'https://example.com/{len(calls)}', 'content': ''}],
+            'summary': '',
+            'error': None,
+        }
+
+    with patch.object(service, "_search_zai", side_effect=fake_search):
+        responses = [service.search(q, max_results=5, task_id="recorded-task") for q in RECORDED_TASK_QUERIES]
+    release_task_deduplicator("recorded-task")
+
+    assert all(r['success'] and r['results'] for r in responses)
+    # 14 条录制查询中 5 条是近似重复（词序/停用词/中英文写法不同）
+    assert len(calls) == 9
+    reused = [r for r in responses if r.get('reused_from')]
+    assert len(reused) == len(RECORDED_TASK_QUERIES) - len(calls)
+
+
+def test_reused_results_are_copies_and_respect_max_results():
+    from unittest.mock import patch
+    from services.blog_generator.services.search_service import SearchService
+    from utils.query_deduplicator import release_task_deduplicator
+
+    service = SearchService(api_key="test")
+    response = {
+        'success': True,
+        'results': [{'title': 't', 'url': 'u'}],
+        'summary': '',
+        'error': None,
+    }
+    with patch.object(service, "_search_zai", return_value=response) as search:
+        service.search("LangGraph 教程", max_results=3, task_id="copy-task")["results"][0]["_sub_query"] = "x"
+        reused = service.search("langgraph 入门", max_results=3, task_id="copy-task")
+        assert search.call_count == 1
+        assert "_sub_query" not in reused["results"][0]
+        service.search("langgraph 入门", max_results=10, task_id="copy-task")
+        assert search.call_count == 2
+    release_task_deduplicator("copy-task")
+
+
+def test_shared_search_service_scopes_reuse_to_each_call_task():
+    """单例 SearchService 被并发任务共享：复用只看本次调用传入的 task_id"""
+    from unittest.mock import patch
+    from services.blog_generator.services.search_service import SearchService
+    from utils.query_deduplicator import release_task_deduplicator
+
+    service = SearchService(api_key="test")
+    response = {'success': True, 'results': [{'title': 't', 'url': 'u'}], 'summary': '', 'error': None}
+    with patch.object(service, "_search_zai", return_value=response) as search:
+        service.search("LangGraph 教程", task_id="task-a")
+        assert service.search("langgraph 入门", task_id="task-b").get('reused_from') is None
+        assert service.search("langgraph 入门", task_id="task-a")['reused_from'] == "LangGraph 教程"
+        assert service.search("langgraph 入门").get('reused_from') is None
+        assert search.call_count == 3
+    release_task_deduplicator("task-a")
+    release_task_deduplicator("task-b")
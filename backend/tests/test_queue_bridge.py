@@ -0,0 +1,114 @@
+"""
+生成线程 → 排队系统的进度通道 — 单元测试
+"""
+import asyncio
+import time
+
+import pytest
+
+from models.scheduling import BlogGenerationConfig, BlogTask, QueueStatus
+from services.blog_generator import queue_bridge
+from services.blog_generator.queue_bridge import ProgressChannel
+from services.scheduling.manager import TaskQueueManager
+from utils.background_loop import run_async
+
+
+class RecordingManager:
+    """记录调用的假 queue_manager，可模拟慢写入"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.progress = []
+        self.flushed = []
+
+    async def update_progress(self, task_id, progress, stage="", detail=""):
+        await asyncio.sleep(self.delay)
+        self.progress.append((task_id, progress, stage))
+
+    async def flush_progress(self, task_id=None, release=False):
+        self.flushed.append(task_id)
+
+
+@pytest.fixture
+def paused_channel(monkeypatch):
+    """不自动唤醒消费者的通道，便于观察合并结果"""
+    channel = ProgressChannel(max_pending=2)
+    monkeypatch.setattr(channel, '_wake', lambda: None)
+    return channel
+
+
+class TestProgressChannel:
+
+    def test_updates_coalesced_per_task(self, paused_channel):
+        qm = RecordingManager()
+        for i in range(50):
+            paused_channel.publish_progress(qm, "a", i, "writer", "")
+        paused_channel.publish_progress(qm, "b", 7, "outliner", "")
+        paused_channel.flush(timeout=5)
+        assert qm.progress == [("a", 49, "writer"), ("b", 7, "outliner")]
+
+    def test_status_supersedes_progress(self, paused_channel, monkeypatch):
+        applied = []
+
+        async def fake_apply(qm, task_id, status, *args):
+            applied.append((task_id, status))
+
+        monkeypatch.setattr(queue_bridge, '_apply_status', fake_apply)
+        qm = RecordingManager()
+        paused_channel.publish_progress(qm, "a", 90, "assembler", "")
+        paused_channel.publish_status(qm, "a", "completed", 100, 1, "")
+        paused_channel.publish_progress(qm, "a", 95, "late", "")
+        paused_channel.flush(timeout=5)
+        assert applied == [("a", "completed")]
+        assert qm.progress == []
+
+    def test_bounded_but_never_drops_status(self, paused_channel):
+        qm = RecordingManager()
+        assert paused_channel.publish_progress(qm, "a", 1, "s", "")
+        assert paused_channel.publish_progress(qm, "b", 1, "s", "")
+        assert not paused_channel.publish_progress(qm, "c", 1, "s", "")
+        # 已挂起的任务仍可更新
+        assert paused_channel.publish_progress(qm, "a", 2, "s", "")
+        paused_channel.publish_status(qm, "c", "failed", 0, 0, "boom")
+        assert paused_channel.pending_count() == 3
+        assert paused_channel.dropped == 1
+
+    def test_publish_never_waits_for_slow_writes(self):
+        channel = ProgressChannel()
+        qm = RecordingManager(delay=0.05)
+        started = time.perf_counter()
+        for i in range(200):
+            channel.publish_progress(qm, f"t{i % 4}", i, "writer", "")
+        assert time.perf_counter() - started < 0.05
+        channel.flush(timeout=5)
+        assert {p[0] for p in qm.progress} == {"t0", "t1", "t2", "t3"}
+        assert len(qm.progress) < 200
+
+
+class TestBridgeEndToEnd:
+
+    def test_progress_and_status_reach_manager_without_app_context(self, tmp_path):
+        manager = TaskQueueManager(db_path=str(tmp_path / "queue.db"))
+        run_async(manager.init())
+        task = BlogTask(
+            name="博客", generation=BlogGenerationConfig(topic="AI"),
+            status=QueueStatus.RUNNING,
+        )
+        run_async(manager.save_task(task))
+
+        queue_bridge.set_queue_manager(manager)
+        try:
+            for i in range(30):
+                queue_bridge.update_queue_progress(task.id, i, stage="撰写", detail="writer")
+            queue_bridge.get_progress_channel().flush(timeout=5)
+            assert run_async(manager.get_queue_snapshot())['running'][0]['progress'] == 29
+
+            queue_bridge.update_queue_status(task.id, "completed", word_count=1200, image_count=3)
+            queue_bridge.get_progress_channel().flush(timeout=5)
+        finally:
+            queue_bridge.set_queue_manager(None)
+
+        loaded = run_async(manager.get_task(task.id))
+        assert loaded.status == QueueStatus.COMPLETED
+        assert loaded.progress == 100
+        assert loaded.output_word_count == 1200
@@ -0,0 +1,177 @@
+"""
+跨任务搜索结果缓存 — 单元测试
+"""
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.blog_generator.services.search_cache import (
+    SearchResultCache,
+    is_time_sensitive,
+    normalize_query,
+)
+from services.blog_generator.services.smart_search_service import SmartSearchService
+
+
+def _ok(query, n=2):
+    return {
+        'success': True,
+        'results': [
+            {'title': f'{query} {i}', 'url': f'https://example.com/{abs(hash(query))}/{i}', 'content': 'c'}
+            for i in range(n)
+        ],
+        'error': None,
+    }
+
+
+class TestSearchResultCache:
+
+    def test_normalized_query_hits(self):
+        cache = SearchResultCache()
+        cache.put('general', 'LangGraph  教程', _ok('q'))
+        assert cache.get('general', 'langgraph 教程') is not None
+        assert normalize_query(' LangGraph　教程 ') == 'langgraph 教程'
+
+    def test_key_includes_source_and_params(self):
+        cache = SearchResultCache()
+        cache.put('general', 'q', _ok('q'), params={'max_results': 5})
+        assert cache.get('google', 'q', params={'max_results': 5}) is None
+        assert cache.get('general', 'q', params={'max_results': 10}) is None
+        assert cache.get('general', 'q', params={'max_results': 5}) is not None
+
+    def test_failed_or_empty_results_not_cached(self):
+        cache = SearchResultCache()
+        cache.put('general', 'q', {'success': False, 'results': [], 'error': 'x'})
+        cache.put('google', 'q', {'success': True, 'results': []})
+        assert cache.get('general', 'q') is None
+        assert cache.get('google', 'q') is None
+
+    def test_per_source_ttl(self):
+        cache = SearchResultCache(source_ttls={'general': 0, 'arxiv': 3600})
+        cache.put('general', 'transformer', _ok('q'))
+        cache.put('arxiv', 'transformer', _ok('q'))
+        assert cache.get('general', 'transformer') is None
+        assert cache.get('arxiv', 'transformer') is not None
+
+    def test_blog_sources_share_family_ttl(self):
+        cache = SearchResultCache(source_ttls={'blog': 123})
+        assert cache.ttl_for('blog:langchain', 'q') == 123
+
+    @pytest.mark.parametrize('query', ['最新 AI 新闻', 'GPT release notes', f'{time.localtime().tm_year} 大模型盘点'])
+    def test_time_sensitive_topics_use_fresh_ttl(self, query):
+        assert is_time_sensitive(query)
+        cache = SearchResultCache(source_ttls={'general': 86400}, fresh_ttl=60)
+        assert cache.ttl_for('general', query) == 60
+
+    def test_max_age_override(self):
+        cache = SearchResultCache()
+        cache.put('general', 'q', _ok('q'))
+        assert cache.get('general', 'q', max_age=0) is None
+
+    def test_returns_copies(self):
+        cache = SearchResultCache()
+        cache.put('general', 'q', _ok('q'))
+        cache.get('general', 'q')['results'][0]['title'] = 'mutated'
+        assert cache.get('general', 'q')['results'][0]['title'] != 'mutated'
+
+    def test_persists_across_instances(self, tmp_path):
+        db = str(tmp_path / 'search_cache.db')
+        SearchResultCache(db_path=db).put('general', 'q', _ok('q'))
+        assert SearchResultCache(db_path=db).get('general', 'q') is not None
+
+    def test_hit_rate_stats(self):
+        cache = SearchResultCache()
+        cache.get('general', 'q')
+        cache.put('general', 'q', _ok('q'))
+        cache.get('general', 'q')
+        cache.get('general', 'q')
+        stats = cache.get_stats()
+        assert stats['hits'] == 2
+        assert stats['lookups'] == 3
+        assert stats['sources']['general']['hit_rate'] == pytest.approx(0.667, abs=0.001)
+
+
+class TestSmartSearchCaching:
+
+    def _service(self, cache):
+        service = SmartSearchService(llm_client=None, result_cache=cache)
+        service._route_search_sources = MagicMock(return_value={
+            'sources': ['general', 'arxiv'], 'arxiv_query': 'transformer', 'blog_query': 'transformer',
+        })
+        service._search_general = MagicMock(side_effect=lambda q, n: _ok(f'g-{q}'))
+        service._search_arxiv = MagicMock(side_effect=lambda q, n: _ok(f'a-{q}'))
+        return service
+
+    @patch.dict('os.environ', {'AI_BOOST_ENABLED': 'false'})
+    def test_second_task_served_from_cache(self):
+        cache = SearchResultCache()
+        first = self._service(cache)
+        first_result = first.search('transformer')
+
+        # 新任务 = 新的去重状态，但共享同一个结果缓存
+        second = self._service(cache)
+        second_result = second.search('transformer')
+
+        second._search_general.assert_not_called()
+        second._search_arxiv.assert_not_called()
+        assert second_result['cache_hits'] == 2
+        assert [r['url'] for r in second_result['results']] == [r['url'] for r in first_result['results']]
+        assert second.get_cache_stats()['hit_rate'] == 0.5
+
+    @patch.dict('os.environ', {'AI_BOOST_ENABLED': 'false'})
+    def test_max_cache_age_zero_forces_live_search(self):
+        cache = SearchResultCache()
+        self._service(cache).search('transformer')
+        service = self._service(cache)
+        result = service.search('transformer', max_cache_age=0)
+        assert result['cache_hits'] == 0
+        service._search_general.assert_called_once()
+
+    @patch.dict('os.environ', {'AI_BOOST_ENABLED': 'false'})
+    def test_duplicate_topic_reused_only_within_task(self):
+        from utils.query_deduplicator import release_task_deduplicator
+
+        service = self._service(None)
+        try:
+            service.search('transformer 教程', task_id='task-a')
+            reused = service.search('Transformer 的教程', task_id='task-a')
+            other_task = service.search('Transformer 的教程', task_id='task-b')
+        finally:
+            release_task_deduplicator('task-a')
+            release_task_deduplicator('task-b')
+
+        assert reused['skipped_duplicate'] and reused['reused_from'] == 'transformer 教程'
+        assert reused['results']
+        assert 'skipped_duplicate' not in other_task
+        assert service._search_general.call_count == 2
+
+    @patch.dict('os.environ', {'AI_BOOST_ENABLED': 'false'})
+    def test_task_reuse_respects_max_cache_age(self):
+        from utils.query_deduplicator import release_task_deduplicator
+
+        service = self._service(None)
+        try:
+            service.search('transformer', task_id='task-a')
+            live = service.search('transformer', task_id='task-a', max_cache_age=0)
+            with patch('services.blog_generator.services.smart_search_service.time.time',
+                       return_value=time.time() + 120):
+                stale = service.search('transformer', task_id='task-a', max_cache_age=60)
+        finally:
+            release_task_deduplicator('task-a')
+
+        assert 'skipped_duplicate' not in live
+        assert 'skipped_duplicate' not in stale
+        assert service._search_general.call_count == 3
+
+    @patch.dict('os.environ', {'AI_BOOST_ENABLED': 'false'})
+    def test_failed_source_is_retried_next_time(self):
+        cache = SearchResultCache()
+        first = self._service(cache)
+        first._search_arxiv = MagicMock(return_value={'success': False, 'results': [], 'error': 'down'})
+        first.search('transformer')
+
+        second = self._service(cache)
+        second.search('transformer')
+        second._search_general.assert_not_called()
+        second._search_arxiv.assert_called_once()
@@ -0,0 +1,148 @@
+"""
+SemanticCompressor 哈希向量化 + 矩阵相似度 — 单元测试与基准
+"""
+import math
+import random
+import time
+
+import pytest
+
+from services.blog_generator.cross_section_dedup import CrossSectionDeduplicator
+from services.blog_generator.services.semantic_compressor import (
+    HashingVectorizer,
+    SemanticCompressor,
+    _cosine_similarity,
+)
+
+
+def _legacy_rank(query, texts):
+    """旧实现：逐次构建词表 + 纯 Python 余弦相似度"""
+    all_texts = [query] + texts
+    vocab = {}
+    for text in all_texts:
+        for word in text.lower().split():
+            vocab.setdefault(word, len(vocab))
+    embeddings = []
+    for text in all_texts:
+        vec = [0.0] * max(len(vocab), 1)
+        words = text.lower().split()
+        for word in words:
+            vec[vocab[word]] += 1.0 / len(words)
+        embeddings.append(vec)
+
+    def cos(a, b):
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
+
+    scored = [(cos(embeddings[0], e), i) for i, e in enumerate(embeddings[1:])]
+    scored.sort(key=lambda x: -x[0])
+    return scored
+
+
+FIXTURE = [
+    {'title': 'a', 'content': 'LangGraph builds stateful multi agent workflows with graphs'},
+    {'title': 'b', 'content': 'Cooking pasta requires salted boiling water'},
+    {'title': 'c', 'snippet': 'LangGraph agent state graph checkpoint tutorial'},
+    {'title': 'd', 'body': 'Football season results and league tables'},
+    {'title': 'e', 'content': ''},
+    {'title': 'f', 'content': 'multi agent systems coordinate tools and memory'},
+    {'title': 'g', 'content': 'Gardening tips for spring flowers'},
+]
+
+
+def _texts(results):
+    return [r.get('content', '') or r.get('snippet', '') or r.get('body', '') for r in results]
+
+
+def _corpus(n_docs, seed=7):
+    rng = random.Random(seed)
+    vocab = [f'w{i}' for i in range(4000)]
+    return [
+        {'title': str(i), 'content': ' '.join(rng.choices(vocab, k=rng.randint(80, 300)))}
+        for i in range(n_docs)
+    ]
+
+
+class TestHashingVectorizer:
+
+    def test_fixed_dimension_independent_of_batch(self):
+        vectorizer = HashingVectorizer(n_features=1 << 16)
+        alone = vectorizer.transform(['agent graph'])
+        batched = vectorizer.transform(['unrelated words here', 'agent graph'])
+        assert list(alone.cols) == list(batched.cols[batched.rows == 1])
+
+    def test_rows_are_unit_norm_and_empty_rows_zero(self):
+        rows = HashingVectorizer().transform(['a a b', '', 'c'])
+        dense = rows.to_dense()
+        assert dense.shape[0] == 3
+        assert (dense[0] ** 2).sum() == pytest.approx(1.0)
+        assert not dense[1].any()
+
+    def test_cosine_similarity_accepts_lists(self):
+        assert _cosine_similarity([1.0, 0.0], [1.0, 0.0]) == pytest.approx(1.0)
+        assert _cosine_similarity([0.0, 0.0], [1.0, 0.0]) == 0.0
+
+
+class TestSemanticCompressor:
+
+    def test_matches_legacy_ranking_on_fixture(self):
+        query = 'LangGraph multi agent tutorial'
+        compressed = SemanticCompressor(top_k=3).compress(query, FIXTURE)
+
+        legacy = _legacy_rank(query, _texts(FIXTURE))[:3]
+        assert [r['title'] for r in compressed] == [FIXTURE[i]['title'] for _, i in legacy]
+        assert [r['_relevance_score'] for r in compressed] == [round(s, 4) for s, _ in legacy]
+
+    def test_ties_keep_original_order(self):
+        results = [{'title': str(i), 'content': 'unrelated'} for i in range(5)]
+        compressed = SemanticCompressor(top_k=2).compress('query', results)
+        assert [r['title'] for r in compressed] == ['0', '1']
+
+    def test_small_input_returned_unchanged(self):
+        assert SemanticCompressor(top_k=10).compress('q', FIXTURE) is FIXTURE
+
+    def test_does_not_mutate_input(self):
+        SemanticCompressor(top_k=2).compress('LangGraph', FIXTURE)
+        assert all('_relevance_score' not in r for r in FIXTURE)
+
+    def test_matches_legacy_ranking_on_500_plus_documents(self):
+        docs = _corpus(600)
+        query = 'w1 w2 w3 w42 w99 w1234'
+
+        compressed = SemanticCompressor(top_k=10, max_chars=2000).compress(query, docs)
+
+        legacy = _legacy_rank(query, [d['content'][:2000] for d in docs])[:10]
+        assert [r['title'] for r in compressed] == [docs[i]['title'] for _, i in legacy]
+
+    @pytest.mark.benchmark
+    def test_benchmark_500_plus_documents(self):
+        docs = _corpus(600)
+        query = 'w1 w2 w3 w42 w99 w1234'
+        compressor = SemanticCompressor(top_k=10, max_chars=2000)
+
+        started = time.perf_counter()
+        _legacy_rank(query, [d['content'][:2000] for d in docs])
+        legacy_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        compressor.compress(query, docs)
+        elapsed = time.perf_counter() - started
+
+        assert elapsed * 3 < legacy_elapsed, f"legacy {legacy_elapsed * 1000:.1f} ms, numpy {elapsed * 1000:.1f} ms"
+
+
+class TestCrossSectionDedupMatrix:
+
+    def test_detects_cross_section_duplicates_only(self):
+        shared = 'LangGraph uses a state graph to coordinate agents and persist checkpoints between steps.'
+        sections = [
+            {'content': f'{shared}\n\n{shared}'},
+            {'content': f'Completely different material about databases and indexes.\n\n{shared}'},
+        ]
+        dedup = CrossSectionDeduplicator(threshold=0.85, min_paragraph_len=20)
+        duplicates = dedup.detect_duplicates(sections)
+
+        assert {(d['section_a'], d['section_b']) for d in duplicates} == {(0, 1)}
+        assert len(duplicates) == 2
+        assert all(d['similarity'] == pytest.approx(1.0) for d in duplicates)
@@ -64,7 +64,7 @@ class TestSerperScholarService:
         assert result["success"] is False
         assert "not configured" in result["error"].lower()
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_success(self, mock_post, mock_scholar_response):
         mock_resp = MagicMock()
         mock_resp.json.return_value = mock_scholar_response
@@ -81,7 +81,7 @@ class TestSerperScholarService:
         assert result["results"][0]["pdf_url"] == "https://arxiv.org/pdf/1706.03762.pdf"
         assert result["results"][0]["publication_info"] == "Advances in Neural Information Processing Systems, 2017"
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_no_organic(self, mock_post):
         mock_resp = MagicMock()
         mock_resp.json.return_value = {"searchParameters": {"q": "xyz"}}
@@ -93,7 +93,7 @@ class TestSerperScholarService:
         assert result["success"] is True
         assert len(result["results"]) == 0
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_api_error_with_retry(self, mock_post):
         import requests as req
         mock_post.side_effect = req.exceptions.ConnectionError("timeout")
@@ -103,7 +103,7 @@ class TestSerperScholarService:
         assert result["success"] is False
         assert mock_post.call_count == 3  # MAX_RETRIES
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_retry_then_success(self, mock_post, mock_scholar_response):
         import requests as req
         mock_resp_ok = MagicMock()
@@ -116,7 +116,7 @@ class TestSerperScholarService:
         assert result["success"] is True
         assert mock_post.call_count == 2
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_uses_scholar_endpoint(self, mock_post, mock_scholar_response):
         mock_resp = MagicMock()
         mock_resp.json.return_value = mock_scholar_response
@@ -155,7 +155,7 @@ class TestSerperScholarService:
 class TestSerperScholarBatch:
     """Batch search tests"""
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_batch_parallel(self, mock_post, mock_scholar_response):
         mock_resp = MagicMock()
         mock_resp.json.return_value = mock_scholar_response
@@ -175,7 +175,7 @@ class TestSerperScholarBatch:
         assert result["success"] is True
         assert len(result["results"]) == 0
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_batch_partial_failure(self, mock_post, mock_scholar_response):
         import requests as req
         mock_resp_ok = MagicMock()
@@ -207,7 +207,7 @@ class TestScholarSearchTool:
         tool = ScholarSearchTool(api_key="")
         assert tool.is_available() is False
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_returns_search_response(self, mock_post, mock_scholar_response):
         mock_resp = MagicMock()
         mock_resp.json.return_value = mock_scholar_response
@@ -222,7 +222,7 @@ class TestScholarSearchTool:
         assert response.results[0].source_type == "scholar"
         assert "Attention Is All You Need" in response.results[0].title
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     def test_search_result_content_includes_metadata(self, mock_post, mock_scholar_response):
         mock_resp = MagicMock()
         mock_resp.json.return_value = mock_scholar_response
@@ -280,7 +280,7 @@ class TestScholarRetriever:
         retriever = ScholarRetriever()
         assert retriever.is_available() is False
 
-    @patch("services.blog_generator.services.serper_scholar_service.requests.post")
+    @patch("services.blog_generator.services.serper_scholar_service.http_client.post")
     @patch.dict(os.environ, {"SERPER_API_KEY": "test-key"})
     def test_scholar_retriever_search(self, mock_post, mock_scholar_response):
         mock_resp = MagicMock()
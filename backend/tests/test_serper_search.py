@@ -22,7 +22,7 @@ class TestSerperSearchService:
         assert result["success"] is False
         assert "未配置" in result["error"]
 
-    @patch("services.blog_generator.services.serper_search_service.requests.post")
+    @patch("services.blog_generator.services.serper_search_service.http_client.post")
     def test_search_success(self, mock_post):
         mock_resp = MagicMock()
         mock_resp.status_code = 200
@@ -43,7 +43,7 @@ class TestSerperSearchService:
         assert result["results"][0]["title"] == "Result 1"
         assert result["results"][0]["source"] == "Google"
 
-    @patch("services.blog_generator.services.serper_search_service.requests.post")
+    @patch("services.blog_generator.services.serper_search_service.http_client.post")
     def test_search_with_knowledge_graph(self, mock_post):
         mock_resp = MagicMock()
         mock_resp.json.return_value = {
@@ -68,7 +68,7 @@ class TestSerperSearchService:
         assert len(result["results"]) == 2
         assert result["results"][0]["source"] == "Google Knowledge Graph"
 
-    @patch("services.blog_generator.services.serper_search_service.requests.post")
+    @patch("services.blog_generator.services.serper_search_service.http_client.post")
     def test_search_with_answer_box(self, mock_post):
         mock_resp = MagicMock()
         mock_resp.json.return_value = {
@@ -89,7 +89,7 @@ class TestSerperSearchService:
         assert len(result["results"]) == 1
         assert result["results"][0]["source"] == "Google Answer Box"
 
-    @patch("services.blog_generator.services.serper_search_service.requests.post")
+    @patch("services.blog_generator.services.serper_search_service.http_client.post")
     def test_search_api_error(self, mock_post):
         import requests as req
         mock_post.side_effect = req.exceptions.ConnectionError("timeout")
@@ -100,7 +100,7 @@ class TestSerperSearchService:
         assert result["success"] is False
         assert "失败" in result["error"] or "timeout" in result["error"].lower()
 
-    @patch("services.blog_generator.services.serper_search_service.requests.post")
+    @patch("services.blog_generator.services.serper_search_service.http_client.post")
     def test_search_retry_on_failure(self, mock_post):
         """失败时应重试"""
         import requests as req
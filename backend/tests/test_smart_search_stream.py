@@ -0,0 +1,107 @@
+"""
+SmartSearchService 提前返回 / 流式合并 — 单元测试
+"""
+import os
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.blog_generator.services.search_cache import SearchResultCache
+from services.blog_generator.services.smart_search_service import SmartSearchService
+
+
+def _result(prefix, urls):
+    return {
+        'success': True,
+        'results': [{'title': f'<em>{prefix}</em> {u}', 'url': f'https://example.com/{u}', 'content': ''} for u in urls],
+        'error': None,
+    }
+
+
+def _slow(delay, result):
+    def run(query, max_results):
+        time.sleep(delay)
+        return result
+    return run
+
+
+@pytest.fixture
+def service():
+    with patch.dict('os.environ', {'AI_BOOST_ENABLED': 'false'}):
+        svc = SmartSearchService(llm_client=None, result_cache=SearchResultCache())
+        svc.max_workers = 3
+        svc._route_search_sources = MagicMock(return_value={
+            'sources': ['general', 'arxiv', 'google'], 'arxiv_query': 'q', 'blog_query': 'q',
+        })
+        svc._search_general = MagicMock(side_effect=_slow(0.0, _result('g', ['a', 'b'])))
+        svc._search_google = MagicMock(side_effect=_slow(0.05, _result('s', ['b', 'c'])))
+        svc._search_arxiv = MagicMock(side_effect=_slow(0.6, _result('x', ['d'])))
+        yield svc
+
+
+def test_soft_deadline_bounds_latency(service):
+    started = time.monotonic()
+    result = service.search('q', soft_deadline=0.2)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.5
+    assert result['pending_sources'] == ['arxiv']
+    assert {r['url'] for r in result['results']} == {
+        'https://example.com/a', 'https://example.com/b', 'https://example.com/c',
+    }
+
+
+def test_straggler_finishes_into_cache(service):
+    service.search('q', soft_deadline=0.2)
+    time.sleep(0.7)
+    assert service.result_cache.get('arxiv', 'q', params={'max_results': 5}) is not None
+
+
+def test_min_results_returns_early(service):
+    started = time.monotonic()
+    result = service.search('q', min_results=2, soft_deadline=5)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.3
+    assert len(result['results']) >= 2
+    assert 'arxiv' in result['pending_sources']
+
+
+def test_zero_soft_deadline_waits_for_all_sources(service):
+    result = service.search('q', soft_deadline=0)
+    assert result['pending_sources'] == []
+    assert 'https://example.com/d' in {r['url'] for r in result['results']}
+
+
+def test_stream_yields_incremental_deduplicated_batches(service):
+    started = time.monotonic()
+    batches = []
+    for batch in service.search_stream('q', soft_deadline=5):
+        batches.append((time.monotonic() - started, batch))
+
+    first_elapsed, first = batches[0]
+    assert first_elapsed < 0.3
+    assert first['source'] == 'general'
+
+    urls = [r['url'] for _, b in batches for r in b['results']]
+    assert len(urls) == len(set(urls)) == 4
+    assert batches[-1][1]['total'] == 4
+    assert all('<em>' not in r['title'] for _, b in batches for r in b['results'])
+
+
+def test_stream_consumer_can_stop_early(service):
+    stream = service.search_stream('q', soft_deadline=5)
+    first = next(stream)
+    stream.close()
+    assert first['results']
+    time.sleep(0.7)
+    # 提前停止后，慢源仍在后台完成并写入缓存
+    assert service.result_cache.get('arxiv', 'q', params={'max_results': 5}) is not None
+
+
+def test_soft_deadline_disabled_by_default():
+    with patch.dict('os.environ', {'AI_BOOST_ENABLED': 'false'}):
+        os.environ.pop('SMART_SEARCH_SOFT_DEADLINE', None)
+        svc = SmartSearchService(llm_client=None, result_cache=SearchResultCache())
+    assert svc.soft_deadline == 0
@@ -35,7 +35,7 @@ class TestSogouSearchService:
         assert result['success'] is False
         assert 'API Key 未配置' in result['error']
 
-    @patch('services.blog_generator.services.sogou_search_service.requests.post')
+    @patch('services.blog_generator.services.sogou_search_service.http_client.post')
     def test_search_success(self, mock_post):
         mock_resp = MagicMock()
         mock_resp.status_code = 200
@@ -74,7 +74,7 @@ class TestSogouSearchService:
         assert result['results'][1]['source_type'] == 'wechat'
         assert result['results'][1]['url'] == 'https://mp.weixin.qq.com/s/abc123'
 
-    @patch('services.blog_generator.services.sogou_search_service.requests.post')
+    @patch('services.blog_generator.services.sogou_search_service.http_client.post')
     def test_wechat_source_detection(self, mock_post):
         """微信公众号来源标记"""
         mock_resp = MagicMock()
@@ -98,7 +98,7 @@ class TestSogouSearchService:
         result = svc.search('test')
         assert result['results'][0]['source_type'] == 'wechat'
 
-    @patch('services.blog_generator.services.sogou_search_service.requests.post')
+    @patch('services.blog_generator.services.sogou_search_service.http_client.post')
     def test_search_api_error(self, mock_post):
         """API 返回错误"""
         mock_resp = MagicMock()
@@ -118,7 +118,7 @@ class TestSogouSearchService:
         assert result['success'] is False
         assert '认证失败' in result['error']
 
-    @patch('services.blog_generator.services.sogou_search_service.requests.post')
+    @patch('services.blog_generator.services.sogou_search_service.http_client.post')
     def test_search_http_error(self, mock_post):
         """HTTP 请求失败 + 重试"""
         mock_post.side_effect = Exception('Connection refused')
@@ -129,7 +129,7 @@ class TestSogouSearchService:
         # 应该重试了 3 次
         assert mock_post.call_count == 3
 
-    @patch('services.blog_generator.services.sogou_search_service.requests.post')
+    @patch('services.blog_generator.services.sogou_search_service.http_client.post')
     def test_search_retry_then_success(self, mock_post):
         """第一次失败，第二次成功"""
         fail_resp = MagicMock()
@@ -158,7 +158,7 @@ class TestSogouSearchService:
         assert len(result['results']) == 1
         assert mock_post.call_count == 2
 
-    @patch('services.blog_generator.services.sogou_search_service.requests.post')
+    @patch('services.blog_generator.services.sogou_search_service.http_client.post')
     def test_empty_pages(self, mock_post):
         """空结果"""
         mock_resp = MagicMock()
@@ -95,6 +95,30 @@ class TestTaskCRUD:
         assert tasks[0].name == "high"
         assert tasks[-1].name == "low"
 
+    @pytest.mark.asyncio
+    async def test_d6b_queue_overview_limits_each_status(self, db):
+        """D6b: 快照按状态取前 N 条，计数覆盖未列出的状态"""
+        for name, priority in [("low", TaskPriority.LOW), ("high", TaskPriority.HIGH), ("normal", TaskPriority.NORMAL)]:
+            await db.save_task(_make_task(name=name, priority=priority))
+        for i in range(2):
+            failed = _make_task(name=f"failed-{i}")
+            failed.status = QueueStatus.FAILED
+            await db.save_task(failed)
+        done = _make_task(name="done")
+        done.status = QueueStatus.COMPLETED
+        done.completed_at = datetime.utcnow()
+        await db.save_task(done)
+
+        tasks, counts, completed_today = await db.get_queue_overview(
+            {QueueStatus.QUEUED: 2, QueueStatus.RUNNING: 5, QueueStatus.COMPLETED: 0}
+        )
+
+        assert [t.name for t in tasks[QueueStatus.QUEUED]] == ["high", "normal"]
+        assert tasks[QueueStatus.RUNNING] == [] and tasks[QueueStatus.COMPLETED] == []
+        assert QueueStatus.FAILED not in tasks
+        assert counts == {QueueStatus.QUEUED: 3, QueueStatus.FAILED: 2, QueueStatus.COMPLETED: 1}
+        assert completed_today == 1
+
 
 class TestExecutionHistory:
     """D7-D8: 执行历史"""
@@ -246,3 +246,183 @@ class TestEvents:
         task = _make_task()
         await queue_manager.enqueue(task)
         assert task.id in events
+
+
+class TestProgressCoalescing:
+    """Q17-Q20: 进度合并写入"""
+
+    @staticmethod
+    def _count_writes(mgr):
+        writes = []
+        original = mgr.db.update_progress_many
+
+        async def counting(updates):
+            writes.append(list(updates))
+            await original(updates)
+
+        mgr.db.update_progress_many = counting
+        return writes
+
+    @staticmethod
+    async def _running_task(mgr):
+        task = _make_task(status=QueueStatus.RUNNING)
+        await mgr.db.save_task(task)
+        return task
+
+    @pytest.mark.asyncio
+    async def test_q17_same_stage_ticks_coalesced(self, queue_manager):
+        """Q17: 同阶段高频进度只落库一次，内存中始终是最新值"""
+        queue_manager.progress_flush_interval = 60
+        writes = self._count_writes(queue_manager)
+        task = await self._running_task(queue_manager)
+
+        for i in range(100):
+            await queue_manager.update_progress(task.id, i, "writer", f"段落 {i}")
+
+        assert len(writes) == 1
+        assert (await queue_manager.db.get_task(task.id)).progress == 0
+        await queue_manager.flush_progress()
+        loaded = await queue_manager.db.get_task(task.id)
+        assert loaded.progress == 99
+        assert loaded.stage_detail == "段落 99"
+
+    @pytest.mark.asyncio
+    async def test_q18_stage_change_flushes_all_pending(self, queue_manager):
+        """Q18: 阶段切换立即落库，并顺带批量写入其他任务的待写进度"""
+        queue_manager.progress_flush_interval = 60
+        writes = self._count_writes(queue_manager)
+        a = await self._running_task(queue_manager)
+        b = await self._running_task(queue_manager)
+
+        await queue_manager.update_progress(a.id, 10, "researcher")
+        await queue_manager.update_progress(b.id, 10, "researcher")
+        await queue_manager.update_progress(a.id, 20, "researcher")
+        await queue_manager.update_progress(b.id, 30, "outliner")
+
+        assert len(writes) == 3
+        assert {u[-1] for u in writes[-1]} == {a.id, b.id}
+        assert (await queue_manager.db.get_task(a.id)).progress == 20
+
+    @pytest.mark.asyncio
+    async def test_q19_progress_ignored_after_cancel(self, queue_manager):
+        """Q19: 取消后不再写入进度"""
+        task = await self._running_task(queue_manager)
+        await queue_manager.update_progress(task.id, 40, "writer")
+        assert await queue_manager.cancel(task.id)
+        await queue_manager.update_progress(task.id, 80, "artist")
+        await queue_manager.flush_progress()
+        loaded = await queue_manager.db.get_task(task.id)
+        assert loaded.status == QueueStatus.CANCELLED
+        assert loaded.progress == 40
+
+    @pytest.mark.asyncio
+    async def test_q20_worker_writes_drop(self, queue_manager):
+        """Q20: Worker 执行过程中进度写入次数远少于进度回调次数"""
+        from tests.test_task_queue.conftest import FakeBlogGenerator
+
+        class ChattyGenerator(FakeBlogGenerator):
+            async def generate(self, config, progress_callback=None):
+                for stage in ("researcher", "writer"):
+                    for i in range(50):
+                        await progress_callback(i, stage, f"{stage} {i}")
+                return {"url": "/blog/chatty"}
+
+        queue_manager.set_blog_generator(ChattyGenerator())
+        writes = self._count_writes(queue_manager)
+        events = []
+        queue_manager.on('task_progress', lambda t: events.append(t.progress))
+
+        task = _make_task()
+        await queue_manager.enqueue(task)
+        await queue_manager.start_worker()
+        for _ in range(50):
+            if (await queue_manager.get_task(task.id)).status == QueueStatus.COMPLETED:
+                break
+            await asyncio.sleep(0.05)
+        await queue_manager.stop_worker()
+
+        assert len(events) == 100
+        assert len(writes) <= 10
+        loaded = await queue_manager.get_task(task.id)
+        assert loaded.status == QueueStatus.COMPLETED
+        assert loaded.progress == 100
+
+
+class TestSnapshotCache:
+    """Q21-Q24: 快照缓存与版本"""
+
+    @staticmethod
+    def _count_reads(mgr):
+        reads = []
+        original = mgr.db.get_queue_overview
+
+        async def counting(limits):
+            reads.append(1)
+            return await original(limits)
+
+        mgr.db.get_queue_overview = counting
+        return reads
+
+    @pytest.mark.asyncio
+    async def test_q21_repeated_polls_hit_cache(self, queue_manager):
+        """Q21: 状态不变时重复获取快照不访问数据库，version 不变"""
+        await queue_manager.enqueue(_make_task())
+        reads = self._count_reads(queue_manager)
+        first = await queue_manager.get_queue_snapshot()
+        for _ in range(20):
+            again = await queue_manager.get_queue_snapshot()
+        assert len(reads) == 1
+        assert again['version'] == first['version']
+
+    @pytest.mark.asyncio
+    async def test_q22_state_change_invalidates(self, queue_manager):
+        """Q22: 入队/取消后快照立即反映变化"""
+        task = _make_task()
+        await queue_manager.enqueue(task)
+        before = await queue_manager.get_queue_snapshot()
+        await queue_manager.cancel(task.id)
+        after = await queue_manager.get_queue_snapshot()
+        assert after['version'] != before['version']
+        assert after['stats']['queued_count'] == 0
+        assert after['stats']['cancelled_count'] == 1
+        assert after['cancelled'][0]['id'] == task.id
+
+    @pytest.mark.asyncio
+    async def test_q23_progress_overlaid_without_reload(self, queue_manager):
+        """Q23: 进度变化叠加到缓存快照上，不重新查询数据库"""
+        queue_manager.progress_flush_interval = 60
+        task = _make_task(status=QueueStatus.RUNNING)
+        await queue_manager.save_task(task)
+        await queue_manager.update_progress(task.id, 10, "writer")
+        before = await queue_manager.get_queue_snapshot()
+        reads = self._count_reads(queue_manager)
+
+        await queue_manager.update_progress(task.id, 55, "writer", "第 3 节")
+        after = await queue_manager.get_queue_snapshot()
+
+        assert reads == []
+        assert after['version'] != before['version']
+        assert after['running'][0]['progress'] == 55
+        assert after['running'][0]['stage_detail'] == "第 3 节"
+
+    @pytest.mark.asyncio
+    async def test_q24_matches_per_status_queries(self, queue_manager):
+        """Q24: 聚合查询结果与逐状态查询一致"""
+        for i in range(25):
+            task = _make_task(name=f"done-{i}", status=QueueStatus.COMPLETED)
+            task.completed_at = task.created_at
+            await queue_manager.db.save_task(task)
+        for i in range(3):
+            await queue_manager.enqueue(_make_task(
+                name=f"q-{i}", priority=TaskPriority.HIGH if i == 2 else TaskPriority.NORMAL,
+            ))
+
+        snap = await queue_manager.get_queue_snapshot()
+        db = queue_manager.db
+        assert [t['id'] for t in snap['queued']] == [
+            t.id for t in await db.get_tasks_by_status(QueueStatus.QUEUED)]
+        assert [t['id'] for t in snap['completed']] == [
+            t.id for t in await db.get_tasks_by_status(QueueStatus.COMPLETED, limit=20)]
+        assert snap['stats']['queued_count'] == 3
+        assert snap['stats']['completed_today'] == await db.count_completed_today()
+        assert snap['failed'] == [] and snap['stats']['failed_count'] == 0
@@ -0,0 +1,122 @@
+"""
+41.18 工具增强 LLM — 同轮工具调用并发执行测试
+"""
+import json
+import threading
+import time
+
+from services.blog_generator.tool_enhanced_llm import ToolDefinition, ToolEnhancedLLM
+
+
+def _call(call_id, query, name="web_search"):
+    return {
+        "id": call_id, "type": "function",
+        "function": {"name": name, "arguments": json.dumps({"query": query})},
+    }
+
+
+class ScriptedLLM:
+    """按脚本逐轮返回工具调用，最后返回文本"""
+
+    def __init__(self, rounds):
+        self.rounds = list(rounds)
+        self.seen = []
+
+    def chat(self, messages, tools=None, **kwargs):
+        self.seen.append(list(messages))
+        if self.rounds:
+            return {"tool_calls": self.rounds.pop(0)}
+        return "最终回答"
+
+
+def _search_tool(delay=0.0, calls=None, timeout=None):
+    lock = threading.Lock()
+
+    def handler(query, max_results=5):
+        with lock:
+            if calls is not None:
+                calls.append(query)
+        time.sleep(delay(query) if callable(delay) else delay)
+        return f"results for {query}"
+
+    return ToolDefinition("web_search", "search", {"type": "object"}, handler, timeout=timeout)
+
+
+def _tool_messages(messages):
+    return [(m["tool_call_id"], m["content"]) for m in messages if m.get("role") == "tool"]
+
+
+class TestParallelToolRounds:
+
+    def test_round_takes_as_long_as_slowest_tool(self):
+        llm = ScriptedLLM([[_call(f"c{i}", f"q{i}") for i in range(4)]])
+        agent = ToolEnhancedLLM(llm, [_search_tool(delay=0.2)])
+
+        started = time.perf_counter()
+        assert agent.chat_with_tools([{"role": "user", "content": "hi"}]) == "最终回答"
+        assert time.perf_counter() - started < 0.5
+
+    def test_results_reinjected_in_original_order(self):
+        llm = ScriptedLLM([[_call("slow", "slow"), _call("fast", "fast")]])
+        agent = ToolEnhancedLLM(llm, [_search_tool(delay=lambda q: 0.2 if q == "slow" else 0)])
+        agent.chat_with_tools([{"role": "user", "content": "hi"}])
+
+        final = llm.seen[-1]
+        assert _tool_messages(final) == [("slow", "results for slow"), ("fast", "results for fast")]
+        assert [m["role"] for m in final[1:]] == ["assistant", "tool", "assistant", "tool"]
+
+    def test_identical_calls_deduplicated_across_rounds(self):
+        calls = []
+        llm = ScriptedLLM([
+            [_call("a", "rag"), _call("b", "rag"), _call("c", "agents")],
+            [_call("d", "rag")],
+        ])
+        agent = ToolEnhancedLLM(llm, [_search_tool(calls=calls)])
+        agent.chat_with_tools([{"role": "user", "content": "hi"}])
+
+        assert sorted(calls) == ["agents", "rag"]
+        contents = dict(_tool_messages(llm.seen[-1]))
+        assert contents["a"] == contents["b"] == contents["d"] == "results for rag"
+
+    def test_slow_tool_times_out_without_blocking_others(self):
+        llm = ScriptedLLM([[_call("hang", "hang"), _call("ok", "ok")]])
+        tool = _search_tool(delay=lambda q: 2 if q == "hang" else 0, timeout=0.1)
+        agent = ToolEnhancedLLM(llm, [tool])
+
+        started = time.perf_counter()
+        agent.chat_with_tools([{"role": "user", "content": "hi"}])
+        assert time.perf_counter() - started < 1
+
+        contents = dict(_tool_messages(llm.seen[-1]))
+        assert "超时" in contents["hang"]
+        assert contents["ok"] == "results for ok"
+
+    def test_parallelism_capped_per_round(self, monkeypatch):
+        monkeypatch.setenv("LLM_TOOLS_MAX_PARALLEL", "2")
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def handler(query):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return query
+
+        llm = ScriptedLLM([[_call(f"c{i}", f"q{i}") for i in range(6)]])
+        agent = ToolEnhancedLLM(llm, [ToolDefinition("web_search", "", {}, handler)])
+        agent.chat_with_tools([{"role": "user", "content": "hi"}])
+        assert peak[0] == 2
+
+    def test_unknown_tool_and_bad_arguments(self):
+        bad = {"id": "bad", "function": {"name": "web_search", "arguments": "{not json"}}
+        llm = ScriptedLLM([[_call("x", "q", name="missing"), bad, _call("ok", "q")]])
+        agent = ToolEnhancedLLM(llm, [_search_tool()])
+        agent.chat_with_tools([{"role": "user", "content": "hi"}])
+
+        contents = dict(_tool_messages(llm.seen[-1]))
+        assert "x" not in contents
+        assert contents["bad"].startswith("工具调用失败")
+        assert contents["ok"] == "results for q"
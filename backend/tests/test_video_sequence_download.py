@@ -0,0 +1,67 @@
+"""
+视频片段下载测试：在后台事件循环上下载时不应阻塞其他协程
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+from services.media.video_sequence_service import VideoSequenceOrchestrator
+from utils import http_client
+
+
+def _orchestrator():
+    return VideoSequenceOrchestrator(llm_client=None, video_service=None, prompt_manager=None)
+
+
+@pytest.fixture
+def mock_transport(monkeypatch):
+    """用 MockTransport 替换共享 AsyncClient，handler 由测试提供"""
+    @asynccontextmanager
+    async def no_slot(url):
+        yield
+
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(http_client, "get_async_client", lambda: client)
+        monkeypatch.setattr(http_client, "async_host_slot", no_slot)
+        return client
+    return install
+
+
+def test_download_does_not_block_event_loop(mock_transport, tmp_path):
+    async def handler(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, content=b"video-bytes")
+
+    mock_transport(handler)
+    target = tmp_path / "segment.mp4"
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        ok = await _orchestrator()._download_video("https://cdn.example.com/a.mp4", str(target))
+        ticking.cancel()
+        return ok, ticks
+
+    ok, ticks = asyncio.run(scenario())
+
+    assert ok is True
+    assert target.read_bytes() == b"video-bytes"
+    assert ticks >= 5
+
+
+def test_download_failure_returns_false(mock_transport, tmp_path):
+    mock_transport(lambda request: httpx.Response(404))
+
+    ok = asyncio.run(_orchestrator()._download_video("https://cdn.example.com/missing.mp4", str(tmp_path / "x.mp4")))
+
+    assert ok is False
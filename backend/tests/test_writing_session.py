@@ -170,6 +170,152 @@ class TestWritingSessionUserIsolation:
         assert session.user_id == ""
 
 
+class TestWritingSessionDeltaPersistence:
+    """WS17-WS22: 章节按行增量写入、搜索结果共享存储、并发安全"""
+
+    @staticmethod
+    def _writes(session_mgr, action):
+        statements = []
+        session_mgr._conn.set_trace_callback(statements.append)
+        try:
+            action()
+        finally:
+            session_mgr._conn.set_trace_callback(None)
+        return [s for s in statements if s.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE"))]
+
+    def test_ws17_update_sections_writes_only_changed_rows(self, session_mgr):
+        """WS17: 只写入内容变化的章节"""
+        sections = [{"id": f"s{i}", "title": f"第{i}章", "content": "正文" * 2000} for i in range(50)]
+        session = session_mgr.create(topic="长文", sections=sections)
+
+        edited = [dict(s) for s in sections]
+        edited[7]["content"] += "（修订）"
+        writes = self._writes(session_mgr, lambda: session_mgr.update(session.session_id, sections=edited))
+
+        section_writes = [w for w in writes if "writing_session_sections" in w]
+        assert len(section_writes) == 1
+        assert session_mgr.get(session.session_id).sections == edited
+
+        # 删除末尾章节
+        session_mgr.update(session.session_id, sections=edited[:3])
+        assert session_mgr.get(session.session_id).sections == edited[:3]
+
+    def test_ws18_update_section_replaces_or_appends(self, session_mgr):
+        """WS18: update_section 按 id 替换，不存在则追加"""
+        session = session_mgr.create(topic="测试", sections=[
+            {"id": "s1", "title": "简介", "content": ""},
+            {"id": "s2", "title": "正文", "content": ""},
+        ])
+        assert session_mgr.update_section(session.session_id, {"id": "s2", "title": "正文", "content": "已写"})
+        assert session_mgr.update_section(session.session_id, {"id": "s3", "title": "总结", "content": "新增"})
+        assert not session_mgr.update_section("ws_nonexistent", {"id": "s1"})
+
+        sections = session_mgr.get(session.session_id).sections
+        assert [s["id"] for s in sections] == ["s1", "s2", "s3"]
+        assert sections[1]["content"] == "已写"
+        assert sections[2]["content"] == "新增"
+
+    def test_ws18b_update_section_sets_status_in_one_write(self, session_mgr):
+        """WS18b: update_section 同时更新状态，只写会话行和这一章节，不重新读取章节"""
+        session = session_mgr.create(topic="测试", sections=[{"id": f"s{i}", "content": ""} for i in range(5)])
+        statements = []
+        session_mgr._conn.set_trace_callback(statements.append)
+        try:
+            assert session_mgr.update_section(session.session_id, {"id": "s3", "content": "已写"}, status="writing")
+        finally:
+            session_mgr._conn.set_trace_callback(None)
+
+        assert not any("SELECT session_id, data FROM writing_session_sections" in s for s in statements)
+        assert sum(s.lstrip().upper().startswith(("INSERT", "UPDATE")) for s in statements) == 2
+        fetched = session_mgr.get(session.session_id)
+        assert fetched.status == "writing"
+        assert fetched.sections[3]["content"] == "已写"
+
+        session.replace_section({"id": "s3", "content": "已写"})
+        session.replace_section({"id": "s9", "content": "追加"})
+        assert session.sections[3]["content"] == "已写"
+        assert session.sections[-1]["id"] == "s9"
+
+    def test_ws19_search_results_stored_once(self, session_mgr):
+        """WS19: 相同搜索结果跨会话只存一份，删除后回收"""
+        results = [{"title": f"结果{i}", "url": f"https://example.com/{i}", "content": "内容" * 500} for i in range(20)]
+        a = session_mgr.create(topic="A", search_results=results)
+        b = session_mgr.create(topic="B")
+        session_mgr.update(b.session_id, search_results=results[5:] + [{"title": "独有"}])
+
+        count = lambda: session_mgr._conn.execute("SELECT COUNT(*) FROM writing_search_results").fetchone()[0]
+        assert count() == 21
+        assert session_mgr.get(a.session_id).search_results == results
+        assert session_mgr.get(b.session_id).search_results == results[5:] + [{"title": "独有"}]
+
+        session_mgr.delete(a.session_id)
+        assert count() == 16
+        session_mgr.update(b.session_id, search_results=[])
+        assert count() == 0
+
+    def test_ws20_migrates_legacy_json_columns(self, tmp_path):
+        """WS20: 旧库整块 JSON 迁移到子表"""
+        import json
+        import sqlite3
+
+        db_path = str(tmp_path / "sessions.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE writing_sessions (
+                session_id TEXT PRIMARY KEY, topic TEXT NOT NULL,
+                article_type TEXT DEFAULT 'problem-solution', target_audience TEXT DEFAULT 'beginner',
+                target_length TEXT DEFAULT 'medium', outline TEXT, sections TEXT, search_results TEXT,
+                research_summary TEXT, key_concepts TEXT, code_blocks TEXT, images TEXT,
+                status TEXT DEFAULT 'created', created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+            )
+        """)
+        sections = [{"id": "s1", "title": "简介", "content": "旧数据"}]
+        results = [{"title": "Wiki", "content": "..."}]
+        conn.execute(
+            "INSERT INTO writing_sessions (session_id, topic, sections, search_results, key_concepts, created_at, updated_at) "
+            "VALUES ('ws_legacy', '旧会话', ?, ?, '[\"AI\"]', 't', 't')",
+            (json.dumps(sections), json.dumps(results)),
+        )
+        conn.commit()
+        conn.close()
+
+        mgr = WritingSessionManager(db_path=db_path)
+        session = mgr.get("ws_legacy")
+        assert session.sections == sections
+        assert session.search_results == results
+        assert session.key_concepts == ["AI"]
+        assert session.user_id == ""
+        # 原列已清空，再次打开不会重复迁移
+        assert mgr._conn.execute("SELECT sections FROM writing_sessions").fetchone()[0] is None
+        assert WritingSessionManager(db_path=db_path).get("ws_legacy").sections == sections
+
+    def test_ws21_concurrent_updates(self, tmp_path):
+        """WS21: 多线程并发更新共享连接"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        mgr = WritingSessionManager(db_path=str(tmp_path / "sessions.db"))
+        session = mgr.create(topic="并发", sections=[{"id": f"s{i}", "content": ""} for i in range(8)])
+
+        def write(i):
+            for round_ in range(20):
+                mgr.update_section(session.session_id, {"id": f"s{i}", "content": f"{i}-{round_}"}, status="writing")
+                mgr.get(session.session_id)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(write, range(8)))
+
+        sections = mgr.get(session.session_id).sections
+        assert [s["content"] for s in sections] == [f"{i}-19" for i in range(8)]
+
+    def test_ws22_list_loads_children(self, session_mgr):
+        """WS22: list 返回完整会话"""
+        a = session_mgr.create(topic="A", sections=[{"id": "s1"}], search_results=[{"title": "r"}])
+        session_mgr.create(topic="B")
+        by_id = {s.session_id: s for s in session_mgr.list()}
+        assert by_id[a.session_id].sections == [{"id": "s1"}]
+        assert by_id[a.session_id].search_results == [{"title": "r"}]
+
+
 # ============ Fixtures ============
 
 @pytest.fixture
@@ -21,6 +21,9 @@ PUBLIC_SIGNATURES = {
     "delete_document": "(self, doc_id: str) -> bool",
     "list_documents": "(self, status: str = None, limit: int = 50) -> List[Dict[str, Any]]",
     "update_document_summary": "(self, doc_id: str, summary: str)",
+    "set_document_hash": "(self, doc_id: str, content_hash: str)",
+    "find_document_by_hash": "(self, content_hash: str, file_type: str) -> Optional[Dict[str, Any]]",
+    "reuse_parsed_document": "(self, doc_id: str, source_id: str) -> bool",
     "save_chunks": "(self, doc_id: str, chunks: List[Dict[str, Any]])",
     "get_chunks_by_document": "(self, doc_id: str) -> List[Dict[str, Any]]",
     "get_chunks_by_documents": "(self, doc_ids: List[str]) -> List[Dict[str, Any]]",
@@ -34,6 +37,8 @@ PUBLIC_SIGNATURES = {
     "delete_history": "(self, history_id: str) -> bool",
     "list_history_by_type": "(self, content_type: str = None, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]",
     "count_history_by_type": "(self, content_type: str = None) -> int",
+    "list_history_page": "(self, content_type: str = None, book_id: str = None, limit: int = 20, cursor: str = None, include_total: bool = True) -> Dict[str, Any]",
+    "search_history": "(self, query: str, content_type: str = None, limit: int = 20) -> List[Dict[str, Any]]",
     "save_xhs_record": "(self, history_id: str, topic: str, style: str = 'hand_drawn', layout_type: str = 'list', image_urls: list = None, copy_text: str = '', hashtags: list = None, cover_image: str = None, cover_video: str = None, source_id: str = None) -> Dict[str, Any]",
     "update_publish_platforms": "(self, history_id: str, platform: str, status: dict) -> bool",
     "update_xhs_publish_url": "(self, history_id: str, publish_url: str) -> bool",
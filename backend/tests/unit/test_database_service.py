@@ -391,6 +391,86 @@ class TestHistoryOperations:
 
 # ========== 知识分块操作测试 ==========
 
+@pytest.mark.unit
+class TestHistoryKeysetPagination:
+    """测试历史记录游标分页与总数缓存"""
+
+    def _seed(self, db_service, n, **kwargs):
+        for i in range(n):
+            db_service.save_history(
+                history_id=f"history_{i:03d}",
+                topic=f"Topic {i}",
+                article_type="tutorial",
+                target_length="medium",
+                markdown_content=f"# Content {i}",
+                outline='{}'
+            )
+
+    def test_cursor_walk_matches_offset_order(self, db_service):
+        """逐页游标遍历与 offset 全量顺序一致，无重复无遗漏"""
+        self._seed(db_service, 25)
+        expected = [r['id'] for r in db_service.list_history(limit=100)]
+
+        seen, cursor = [], None
+        while True:
+            page = db_service.list_history_page(limit=7, cursor=cursor)
+            seen.extend(r['id'] for r in page['records'])
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+
+        assert seen == expected
+        assert len(set(seen)) == 25
+        assert page['total'] == 25
+
+    def test_filters_by_type_and_book(self, db_service):
+        self._seed(db_service, 3)
+        db_service.save_xhs_record(history_id="xhs_1", topic="XHS")
+        db_service.update_history_book_id("history_001", "book_a")
+
+        xhs = db_service.list_history_page(content_type='xhs')
+        assert [r['id'] for r in xhs['records']] == ["xhs_1"]
+        assert xhs['total'] == 1
+
+        book = db_service.list_history_page(book_id="book_a")
+        assert [r['id'] for r in book['records']] == ["history_001"]
+        assert book['next_cursor'] is None
+
+    def test_list_excludes_large_columns(self, db_service):
+        self._seed(db_service, 1)
+        record = db_service.list_history_page()['records'][0]
+        assert 'markdown_content' not in record
+        assert 'outline' not in record
+
+    def test_invalid_cursor_raises_value_error(self, db_service):
+        with pytest.raises(ValueError):
+            db_service.list_history_page(cursor="not-a-cursor")
+
+    def test_count_cache_invalidated_by_writes(self, db_service):
+        self._seed(db_service, 2)
+        assert db_service.count_history() == 2
+
+        # 绕过仓储直接写入：在 TTL 内仍返回缓存值
+        with db_service.get_connection() as conn:
+            conn.execute("INSERT INTO history_records (id, topic) VALUES ('external', 'x')")
+        assert db_service.count_history() == 2
+
+        # 本进程的写入使缓存失效
+        db_service.save_xhs_record(history_id="xhs_1", topic="XHS")
+        assert db_service.count_history() == 4
+        db_service.delete_history("history_000")
+        assert db_service.count_history() == 3
+        assert db_service.count_history_by_type('xhs') == 1
+
+    def test_migration_backfills_null_content_type(self, db_service):
+        with db_service.get_connection() as conn:
+            conn.execute("INSERT INTO history_records (id, topic, content_type) VALUES ('legacy', 'x', NULL)")
+        db_service._migrate_tables()
+
+        page = db_service.list_history_page(content_type='blog')
+        assert [r['id'] for r in page['records']] == ['legacy']
+
+
 @pytest.mark.unit
 class TestChunkOperations:
     """知识分块操作测试"""
@@ -457,6 +537,43 @@ class TestChunkOperations:
         chunks = db_service.get_chunks_by_documents([])
         assert len(chunks) == 0
 
+    def test_breadcrumbs_roundtrip_and_reuse(self, db_service):
+        """分块标题路径随分块保存，复用解析结果时一并复制"""
+        for doc_id in ("doc_src", "doc_copy"):
+            db_service.create_document(
+                doc_id=doc_id, filename="guide.md", file_path="/tmp/guide.md", file_size=10, file_type="md"
+            )
+        db_service.update_document_status("doc_src", "ready")
+        db_service.save_chunks("doc_src", [
+            {'chunk_type': 'section', 'title': '安装', 'content': 'pip install', 'breadcrumbs': ['指南', '安装']},
+            {'chunk_type': 'section', 'title': '', 'content': '前言'},
+        ])
+
+        assert db_service.reuse_parsed_document("doc_copy", "doc_src")
+
+        for doc_id in ("doc_src", "doc_copy"):
+            chunks = db_service.get_chunks_by_document(doc_id)
+            assert [c['breadcrumbs'] for c in chunks] == [['指南', '安装'], []]
+
+    def test_migration_adds_breadcrumbs_column(self, db_service, sample_doc_id):
+        """旧库的 knowledge_chunks 没有 breadcrumbs 列：迁移补列，旧分块读出为空列表"""
+        with db_service.get_connection() as conn:
+            conn.execute("DROP TABLE knowledge_chunks")
+            conn.execute('''
+                CREATE TABLE knowledge_chunks (
+                    id TEXT PRIMARY KEY, document_id TEXT NOT NULL, chunk_index INTEGER NOT NULL,
+                    chunk_type TEXT DEFAULT 'text', title TEXT, content TEXT NOT NULL,
+                    start_pos INTEGER, end_pos INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute(
+                "INSERT INTO knowledge_chunks (id, document_id, chunk_index, content) VALUES ('c0', ?, 0, '旧分块')",
+                (sample_doc_id,),
+            )
+        db_service._migrate_tables()
+
+        assert db_service.get_chunks_by_document(sample_doc_id)[0]['breadcrumbs'] == []
+
 
 # ========== 文档图片操作测试 ==========
 
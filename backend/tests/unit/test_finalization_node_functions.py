@@ -9,6 +9,7 @@ from services.blog_generator.orchestrator.nodes.finalization import (
     coder_and_artist_node,
     factcheck_node,
     humanizer_node,
+    build_artist_state,
     merge_artist_image_ids,
     summary_generator_node,
     text_cleanup_node,
@@ -68,6 +69,46 @@ def test_coder_and_artist_registers_detached_artist_snapshot():
     registry.register.assert_called_once_with("task-1", future, executor)
 
 
+def test_coder_and_artist_submits_slim_snapshot_with_worker_limit():
+    coder = MagicMock()
+    coder.run.side_effect = lambda state: state
+    artist = MagicMock()
+    artist.preprocess_ascii_flowcharts.side_effect = lambda sections: sections
+    executor = MagicMock()
+    executor.submit.return_value = Future()
+    state = {
+        "sections": [{"id": "one", "content": "body"}],
+        "outline": {"sections": [{"title": "One"}]},
+        "search_results": [{"url": "https://example.com"}] * 50,
+        "topic": "Topic",
+        "code_blocks": [],
+    }
+
+    coder_and_artist_node(
+        state,
+        coder=coder,
+        artist=artist,
+        image_task_registry=MagicMock(),
+        executor_factory=MagicMock(return_value=executor),
+        uuid_factory=MagicMock(return_value="task-1"),
+        artist_max_workers=4,
+    )
+
+    submitted_state = executor.submit.call_args.args[1]
+    assert executor.submit.call_args.kwargs == {"max_workers": 4}
+    assert "search_results" not in submitted_state
+    assert "code_blocks" not in submitted_state
+    assert submitted_state["topic"] == "Topic"
+    assert submitted_state["outline"] is state["outline"]
+
+
+def test_build_artist_state_detaches_sections():
+    state = {"sections": [{"id": "one", "image_ids": ["a"]}]}
+    artist_state = build_artist_state(state)
+    artist_state["sections"][0]["image_ids"].append("b")
+    assert state["sections"][0]["image_ids"] == ["a"]
+
+
 def test_wait_for_images_merges_images_without_overwriting_reviewed_content():
     registry = ImageTaskRegistry()
     future = Future()
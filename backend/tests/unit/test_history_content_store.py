@@ -0,0 +1,140 @@
+"""
+历史记录大字段外置（压缩内容表）测试
+"""
+import os
+import random
+import sqlite3
+
+import pytest
+
+from services.database_service import DatabaseService
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    return DatabaseService(str(tmp_path / "history.db"))
+
+
+def _body(seed, words=20000):
+    rng = random.Random(seed)
+    vocab = ["agent", "graph", "state", "node", "prompt", "token", "模型", "检索", "向量", "上下文"]
+    return "# Title\n\n" + " ".join(rng.choice(vocab) for _ in range(words))
+
+
+def _save(db_service, history_id, markdown, outline='{"sections": []}'):
+    return db_service.save_history(
+        history_id=history_id, topic=f"Topic {history_id}", article_type="tutorial",
+        target_length="medium", markdown_content=markdown, outline=outline,
+    )
+
+
+def _raw_row(db_service, history_id):
+    with db_service.get_connection() as conn:
+        return dict(conn.execute("SELECT * FROM history_records WHERE id = ?", (history_id,)).fetchone())
+
+
+def _blob_count(db_service):
+    with db_service.get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM history_contents").fetchone()[0]
+
+
+@pytest.mark.unit
+class TestHistoryContentStore:
+
+    def test_bodies_stored_outside_history_records(self, db_service):
+        body = _body(1)
+        saved = _save(db_service, "h1", body)
+
+        row = _raw_row(db_service, "h1")
+        assert row["markdown_content"] is None and row["outline"] is None
+        assert row["markdown_hash"] and row["outline_hash"]
+        assert saved["markdown_content"] == body
+        assert saved["outline"] == '{"sections": []}'
+        assert "markdown_hash" not in saved
+
+    def test_identical_payloads_stored_once(self, db_service):
+        _save(db_service, "h1", "# Same")
+        _save(db_service, "h2", "# Same")
+        # 正文与大纲各一份
+        assert _blob_count(db_service) == 2
+
+    def test_update_and_delete_release_unreferenced_contents(self, db_service):
+        _save(db_service, "h1", "# v1")
+        _save(db_service, "h2", "# other")
+        assert db_service.update_history_markdown("h1", "# v2")
+        assert db_service.get_history("h1")["markdown_content"] == "# v2"
+        # "# v1" 已回收，共享的大纲仍保留
+        assert _blob_count(db_service) == 3
+
+        db_service.delete_history("h1")
+        assert _blob_count(db_service) == 2
+        assert db_service.get_history("h2")["outline"] == '{"sections": []}'
+        assert not db_service.update_history_markdown("missing", "# x")
+
+    def test_book_paths_load_bodies(self, db_service):
+        _save(db_service, "h1", "# Chapter body")
+        db_service.create_book("b1", "Book")
+        db_service.save_book_chapters("b1", [{
+            "chapter_index": 1, "chapter_title": "Intro", "blog_id": "h1",
+        }])
+        db_service.update_history_book_id("h1", "b1")
+
+        assert db_service.get_blogs_by_book("b1")[0]["markdown_content"] == "# Chapter body"
+        assert db_service.get_chapter_with_content("b1", "chapter_b1_0")["markdown_content"] == "# Chapter body"
+
+    def test_migration_moves_inline_rows(self, tmp_path):
+        db_path = str(tmp_path / "legacy.db")
+        service = DatabaseService(db_path)
+        with service.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO history_records (id, topic, markdown_content, outline, citations) "
+                "VALUES ('legacy', 't', '# Legacy body', '{}', '[]')"
+            )
+
+        migrated = DatabaseService(db_path)
+        row = _raw_row(migrated, "legacy")
+        assert row["markdown_content"] is None and row["citations"] is None
+        record = migrated.get_history("legacy")
+        assert record["markdown_content"] == "# Legacy body"
+        assert record["citations"] == "[]"
+
+    def test_xhs_payloads_stored_outside_history_records(self, db_service, tmp_path):
+        db_service.save_xhs_record(
+            "x1", "周末读书", image_urls=["https://img/1.png"], copy_text="推荐三本书", hashtags=["读书"],
+        )
+
+        row = _raw_row(db_service, "x1")
+        assert row["xhs_copy_text"] is None and row["xhs_image_urls"] is None and row["xhs_hashtags"] is None
+        assert row["xhs_copy_text_hash"] and row["xhs_image_urls_hash"] and row["xhs_hashtags_hash"]
+        listed = db_service.list_history_by_type("xhs")[0]
+        assert listed["xhs_copy_text"] == "推荐三本书"
+        assert listed["xhs_image_urls"] == '["https://img/1.png"]'
+        assert listed["xhs_hashtags"] == '["读书"]'
+        assert not any(key.endswith("_hash") for key in listed)
+        assert db_service.get_history("x1")["xhs_copy_text"] == "推荐三本书"
+
+        db_path = str(tmp_path / "legacy_xhs.db")
+        with DatabaseService(db_path).get_connection() as conn:
+            conn.execute(
+                "INSERT INTO history_records (id, topic, content_type, xhs_copy_text, xhs_hashtags) "
+                "VALUES ('legacy', 't', 'xhs', '旧文案', '[]')"
+            )
+        migrated = DatabaseService(db_path)
+        assert _raw_row(migrated, "legacy")["xhs_copy_text"] is None
+        assert migrated.get_history("legacy")["xhs_copy_text"] == "旧文案"
+
+    def test_database_file_shrinks_versus_inline_storage(self, tmp_path):
+        bodies = [_body(i) for i in range(40)]
+
+        inline_path = str(tmp_path / "inline.db")
+        conn = sqlite3.connect(inline_path)
+        conn.execute("CREATE TABLE history_records (id TEXT PRIMARY KEY, markdown_content TEXT)")
+        conn.executemany("INSERT INTO history_records VALUES (?, ?)", [(str(i), b) for i, b in enumerate(bodies)])
+        conn.commit()
+        conn.close()
+
+        service = DatabaseService(str(tmp_path / "store.db"))
+        for i, body in enumerate(bodies):
+            _save(service, str(i), body)
+
+        assert os.path.getsize(service.db_path) * 2 < os.path.getsize(inline_path)
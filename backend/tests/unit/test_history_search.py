@@ -0,0 +1,140 @@
+"""
+历史记录全文搜索（FTS5）测试
+"""
+import random
+import sqlite3
+import time
+
+import pytest
+
+from repositories.database.history_search import build_match_query, make_snippet
+from services.database_service import DatabaseService
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    service = DatabaseService(str(tmp_path / "search.db"))
+    service.save_history(
+        "rag", "检索增强生成实战", "tutorial", "medium",
+        "# RAG 入门指南\n\n检索增强生成把向量数据库与大模型结合起来，LangGraph 负责编排。", "{}",
+    )
+    service.save_history(
+        "agents", "Multi-agent systems", "tutorial", "medium",
+        "# Building Agents\n\nAgents coordinate tools. 向量 索引 are only briefly mentioned.", "{}",
+    )
+    service.save_xhs_record("xhs", "周末读书", copy_text="推荐三本关于数据库的书")
+    return service
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+@pytest.mark.unit
+class TestHistorySearch:
+
+    def test_cjk_phrase_matches_contiguous_text(self, db_service):
+        assert _ids(db_service.search_history("检索增强")) == ["rag"]
+        # 「向量数据库」需连续出现，agents 中「向量 索引」不算
+        assert _ids(db_service.search_history("向量数据库")) == ["rag"]
+
+    def test_latin_prefix_and_and_semantics(self, db_service):
+        assert _ids(db_service.search_history("lang")) == ["rag"]
+        assert _ids(db_service.search_history("agents tools")) == ["agents"]
+        assert db_service.search_history("agents 检索") == []
+
+    def test_title_and_topic_rank_above_body(self, db_service):
+        db_service.save_history("body-only", "其他", "tutorial", "medium", "# Misc\n\nsee agents", "{}")
+        assert _ids(db_service.search_history("agents"))[0] == "agents"
+
+    def test_results_carry_title_and_highlighted_snippet(self, db_service):
+        result = db_service.search_history("向量数据库")[0]
+        assert result["title"] == "RAG 入门指南"
+        assert "<mark>向量数据库</mark>" in result["snippet"]
+        assert "markdown_hash" not in result
+
+    def test_xhs_copy_text_and_type_filter(self, db_service):
+        assert set(_ids(db_service.search_history("数据库"))) == {"rag", "xhs"}
+        assert _ids(db_service.search_history("数据库", content_type="xhs")) == ["xhs"]
+
+    def test_index_follows_update_and_delete(self, db_service):
+        db_service.update_history_markdown("rag", "# 新版本\n\n改写后的正文讨论知识图谱")
+        assert db_service.search_history("向量数据库") == []
+        assert _ids(db_service.search_history("知识图谱")) == ["rag"]
+
+        db_service.delete_history("rag")
+        assert db_service.search_history("知识图谱") == []
+
+    def test_index_rebuilt_for_existing_database(self, tmp_path, db_service):
+        reopened = DatabaseService(db_service.db_path)
+        assert _ids(reopened.search_history("检索增强")) == ["rag"]
+
+    def test_blank_or_symbol_query_returns_nothing(self, db_service):
+        assert db_service.search_history("   ") == []
+        assert db_service.search_history('"') == []
+        assert db_service.search_history("AND OR NOT (") == []
+
+    def test_plain_connection_writes_do_not_need_app_functions(self, db_service):
+        # 其他 sqlite3 连接（运维脚本、sqlite3 CLI）直接写表不会因缺少自定义函数而失败
+        conn = sqlite3.connect(db_service.db_path)
+        conn.execute("UPDATE history_records SET topic = '图数据库选型' WHERE id = 'agents'")
+        conn.execute("DELETE FROM history_records WHERE id = 'xhs'")
+        conn.execute("INSERT INTO history_records (id, topic, content_type) VALUES ('raw', '手工导入的数据库笔记', 'blog')")
+        conn.commit()
+        conn.close()
+
+        # 下次启动时补齐索引
+        reopened = DatabaseService(db_service.db_path)
+        assert _ids(reopened.search_history("图数据库")) == ["agents"]
+        assert set(_ids(reopened.search_history("数据库"))) == {"rag", "agents", "raw"}
+
+    def test_index_survives_vacuum(self, db_service):
+        db_service.delete_history("agents")
+        with db_service.get_connection() as conn:
+            conn.commit()
+            conn.execute("VACUUM")
+        db_service.save_history("later", "后续文章", "tutorial", "medium", "# 后续\n\n讨论缓存淘汰", "{}")
+
+        assert _ids(db_service.search_history("检索增强")) == ["rag"]
+        assert _ids(db_service.search_history("缓存淘汰")) == ["later"]
+        assert _ids(db_service.search_history("推荐三本")) == ["xhs"]
+
+    @pytest.mark.slow
+    def test_finds_rare_term_among_thousands_of_articles(self, tmp_path):
+        service = _bulk_service(tmp_path)
+        assert len(service.search_history("稀有关键词")) == 4
+
+
+def _bulk_service(tmp_path):
+    service = DatabaseService(str(tmp_path / "bulk.db"))
+    rng = random.Random(3)
+    vocab = ["模型", "检索", "向量", "索引", "agent", "graph", "prompt", "token", "缓存", "并发"]
+    for i in range(2000):
+        body = f"# 文章 {i}\n\n" + " ".join(rng.choice(vocab) for _ in range(200))
+        if i % 500 == 0:
+            body += " 稀有关键词"
+        service.save_history(f"h{i}", f"主题 {i}", "tutorial", "medium", body, "{}")
+    return service
+
+
+@pytest.mark.benchmark
+def test_benchmark_search_latency_on_thousands_of_articles(tmp_path):
+    service = _bulk_service(tmp_path)
+
+    started = time.perf_counter()
+    results = service.search_history("稀有关键词")
+    elapsed = time.perf_counter() - started
+
+    assert len(results) == 4
+    assert elapsed < 0.1, f"FTS search over 2000 articles took {elapsed * 1000:.1f} ms"
+
+
+def test_build_match_query_quotes_terms():
+    assert build_match_query('lang 检索增强') == '"lang"* "检 索 增 强"'
+    assert build_match_query('a"b') == '"a"* "b"*'
+
+
+def test_make_snippet_escapes_html():
+    snippet = make_snippet("<b>before</b> hello world", ["hello"])
+    assert "&lt;b&gt;" in snippet
+    assert "<mark>hello</mark>" in snippet
@@ -0,0 +1,134 @@
+"""
+进程级后台事件循环 — 同步代码提交协程的统一入口
+
+Flask 请求线程、生成线程等同步代码原先各自 asyncio.run / new_event_loop，
+每次调用都要新建并销毁事件循环，绑定在循环上的对象（asyncio.Lock、
+Semaphore、AsyncClient 连接池、定时器）无法跨请求存活。本模块在每个进程
+中维护一个常驻事件循环（守护线程），所有同步调用方通过它执行协程：
+
+- run_async(coro): 提交并阻塞等待结果（请求线程使用）
+- submit_async(coro): 提交后立即返回 concurrent.futures.Future（后台任务使用）
+
+fork 后的子进程首次使用时会自动重新创建循环。
+
+用法：
+    from utils.background_loop import run_async, submit_async
+    snapshot = run_async(queue_manager.get_queue_snapshot())
+    submit_async(xhs_service._run_generation_with_sse(...))
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """在守护线程中常驻运行的事件循环"""
+
+    def __init__(self, name: str = "background-loop"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """返回运行中的循环（按需启动）"""
+        if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid() or not self._thread.is_alive():
+                    self._start()
+        return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(started.set)
+            loop.run_forever()
+
+        thread = threading.Thread(target=run, name=self.name, daemon=True)
+        thread.start()
+        started.wait()
+        self._loop, self._thread, self._pid = loop, thread, os.getpid()
+        logger.info(f"后台事件循环已启动: {self.name} (pid={self._pid})")
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """提交协程，立即返回 Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """提交协程并阻塞等待结果；超时后取消协程并抛出 TimeoutError"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("不能在后台事件循环线程内同步等待协程（会死锁），请直接 await")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def call_soon(self, callback, *args):
+        """线程安全地在循环中调度一个普通回调"""
+        return self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self, timeout: float = 5.0):
+        """停止循环（进程退出时调用）"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid():
+                return
+            self._loop = self._thread = self._pid = None
+        try:
+            asyncio.run_coroutine_threadsafe(_cancel_pending_tasks(), loop).result(timeout)
+        except Exception as e:
+            logger.debug(f"取消后台任务失败: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+async def _cancel_pending_tasks():
+    current = asyncio.current_task()
+    tasks = [t for t in asyncio.all_tasks() if t is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    """获取进程级后台事件循环（单例）"""
+    global _background_loop
+    if _background_loop is None:
+        with _lock:
+            if _background_loop is None:
+                _background_loop = BackgroundLoop("vibe-blog-async")
+                atexit.register(_background_loop.stop)
+    return _background_loop
+
+
+def run_async(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """在后台事件循环中执行协程并等待结果"""
+    return get_background_loop().run(coro, timeout)
+
+
+def submit_async(coro: Awaitable) -> concurrent.futures.Future:
+    """在后台事件循环中执行协程，不等待结果"""
+    return get_background_loop().submit(coro)
@@ -0,0 +1,198 @@
+"""
+共享 HTTP 连接池 — 搜索与抓取链路复用的 keep-alive 客户端
+
+研究阶段一次要访问 50–100 个 URL，逐次 requests.get/post 会为每个请求重新做
+DNS 解析和 TLS 握手。本模块提供进程级共享客户端：
+
+- 同步搜索 API：requests.Session（保留 requests 的异常与响应语义）
+- 同步网页抓取：httpx.Client（安装 h2 时启用 HTTP/2）
+- 异步调用：httpx.AsyncClient（按事件循环缓存，连接池随循环复用）
+
+所有客户端都带 keep-alive、按 host 的并发连接上限与默认超时。
+
+环境变量：
+- HTTP_CLIENT_TIMEOUT: 默认读超时（秒），默认 30
+- HTTP_CONNECT_TIMEOUT: 连接超时（秒），默认 10
+- HTTP_MAX_CONNECTIONS: 连接池总连接数，默认 100
+- HTTP_MAX_CONNECTIONS_PER_HOST: 单个 host 的并发连接上限，默认 10
+- HTTP_KEEPALIVE_EXPIRY: 空闲连接保活时间（秒），默认 30
+"""
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = float(os.environ.get('HTTP_CLIENT_TIMEOUT', '30'))
+CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', '10'))
+MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', '100'))
+MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', '10'))
+KEEPALIVE_EXPIRY = float(os.environ.get('HTTP_KEEPALIVE_EXPIRY', '30'))
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_httpx_client: Optional[httpx.Client] = None
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+# 事件循环 → (AsyncClient, host → asyncio.Semaphore)
+_async_clients: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, Dict[str, asyncio.Semaphore]]] = {}
+
+
+def http2_available() -> bool:
+    """h2 已安装时 httpx 才能协商 HTTP/2"""
+    return importlib.util.find_spec('h2') is not None
+
+
+def _host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def _httpx_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+def _httpx_timeout() -> httpx.Timeout:
+    return httpx.Timeout(DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT)
+
+
+# ========== requests.Session（搜索 API） ==========
+
+def get_session() -> requests.Session:
+    """获取共享 requests.Session；每个 host 的连接池上限即并发连接上限"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=MAX_CONNECTIONS,
+                    pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+                    pool_block=True,
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """等价于 requests.get，但复用共享连接池"""
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, DEFAULT_TIMEOUT))
+    return get_session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """等价于 requests.post，但复用共享连接池"""
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, DEFAULT_TIMEOUT))
+    return get_session().post(url, **kwargs)
+
+
+# ========== httpx.Client（网页抓取） ==========
+
+def get_httpx_client() -> httpx.Client:
+    """获取共享 httpx.Client（跟随重定向，h2 可用时启用 HTTP/2）"""
+    global _httpx_client
+    if _httpx_client is None:
+        with _lock:
+            if _httpx_client is None:
+                _httpx_client = httpx.Client(
+                    http2=http2_available(),
+                    limits=_httpx_limits(),
+                    timeout=_httpx_timeout(),
+                    follow_redirects=True,
+                )
+    return _httpx_client
+
+
+@contextmanager
+def host_slot(url: str):
+    """占用目标 host 的一个并发名额（httpx 连接池只有全局上限）"""
+    host = _host_of(url)
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        with _lock:
+            semaphore = _host_semaphores.setdefault(
+                host, threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+            )
+    with semaphore:
+        yield
+
+
+def fetch(url: str, method: str = 'GET', **kwargs) -> httpx.Response:
+    """通过共享 httpx.Client 发送请求，受单 host 并发上限约束"""
+    with host_slot(url):
+        return get_httpx_client().request(method, url, **kwargs)
+
+
+# ========== httpx.AsyncClient ==========
+
+def get_async_client() -> httpx.AsyncClient:
+    """获取当前事件循环的共享 httpx.AsyncClient（必须在协程中调用）"""
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None or entry[0].is_closed:
+        client = httpx.AsyncClient(
+            http2=http2_available(),
+            limits=_httpx_limits(),
+            timeout=_httpx_timeout(),
+            follow_redirects=True,
+        )
+        entry = (client, {})
+        with _lock:
+            for stale in [l for l in _async_clients if l.is_closed()]:
+                _async_clients.pop(stale, None)
+            _async_clients[loop] = entry
+    return entry[0]
+
+
+@asynccontextmanager
+async def async_host_slot(url: str):
+    """异步版 host_slot"""
+    get_async_client()
+    semaphores = _async_clients[asyncio.get_running_loop()][1]
+    host = _host_of(url)
+    semaphore = semaphores.get(host)
+    if semaphore is None:
+        semaphore = semaphores.setdefault(host, asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST))
+    async with semaphore:
+        yield
+
+
+async def async_fetch(url: str, method: str = 'GET', **kwargs) -> httpx.Response:
+    """通过当前事件循环的共享 AsyncClient 发送请求，受单 host 并发上限约束"""
+    async with async_host_slot(url):
+        return await get_async_client().request(method, url, **kwargs)
+
+
+# ========== 生命周期 ==========
+
+def close_all():
+    """关闭所有同步客户端（进程退出或测试清理时调用）"""
+    global _session, _httpx_client
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _httpx_client is not None:
+            _httpx_client.close()
+            _httpx_client = None
+        _host_semaphores.clear()
+
+
+async def aclose_current():
+    """关闭当前事件循环的 AsyncClient"""
+    entry = _async_clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].aclose()
@@ -2,15 +2,101 @@
 37.04 重复查询检测与回滚保护
 
 QueryDeduplicator — 按 Agent 隔离的查询缓存 + 连续回滚上限保护。
+
+除精确匹配外，还检测近似重复查询：只在词序、停用词、中英文空格或常见
+同义写法上不同的查询（如「Python 异步编程教程」与「python异步编程 的教程」）
+按 token 集合 Jaccard 相似度判重，并可取回首次查询记录的结果供调用方复用。
+
+按任务共享：get_task_deduplicator(task_id) 返回任务级实例，同一任务内
+Researcher / SubQueryEngine / DeepResearchEngine 等经同一 SearchService
+发出的查询共用一份记录。
+
+环境变量：
+- QUERY_DEDUP_THRESHOLD: 近似重复的 Jaccard 阈值，默认 0.8（1.0 退化为精确匹配）
 """
 import logging
+import os
+import re
+import threading
+import unicodedata
 from collections import OrderedDict
-from typing import Dict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_MAX_CONSECUTIVE_ROLLBACKS = 5
 DEFAULT_MAX_CACHE_PER_AGENT = 1000
+DEFAULT_SIMILARITY_THRESHOLD = float(os.environ.get('QUERY_DEDUP_THRESHOLD', '0.8'))
+DEFAULT_MAX_TASKS = 64
+
+_CJK = r'㐀-䶿一-鿿豈-﫿'
+_CJK_RUN_RE = re.compile(f'[{_CJK}]+')
+_CJK_GAP_RE = re.compile(f'(?<=[{_CJK}])\\s+(?=[{_CJK}])')
+_LATIN_TOKEN_RE = re.compile(r'[a-z0-9]+(?:[.+#][a-z0-9]+)*[+#]*')
+
+# 对检索结果几乎没有影响的词
+_LATIN_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'of', 'in', 'on', 'for', 'to', 'and', 'or', 'with',
+    'by', 'about', 'is', 'are', 'what', 'how', 'why', 'vs', 'versus',
+})
+_CJK_STOPWORDS = ('的', '了', '和', '与', '及', '以及', '是', '在', '中', '如何', '怎么', '怎样', '什么', '吗', '呢')
+
+# 常见同义/缩写写法 → 规范形式（在分词前替换）
+_SYNONYMS = (
+    (re.compile(r'大语言模型|大型语言模型|large language models?|\bllms\b'), ' llm '),
+    (re.compile(r'\bjs\b'), ' javascript '),
+    (re.compile(r'\bts\b'), ' typescript '),
+    (re.compile(r'\bk8s\b'), ' kubernetes '),
+    (re.compile(r'machine learning|机器学习'), ' ml '),
+    (re.compile(r'教程|指南|入门'), ' tutorial '),
+)
+
+
+@dataclass
+class QueryMatch:
+    """近似重复命中"""
+    query: str
+    similarity: float
+    results: Any = None
+
+
+@dataclass
+class _QueryEntry:
+    query: str
+    tokens: FrozenSet[str]
+    results: Any = None
+
+
+def query_tokens(query: str) -> FrozenSet[str]:
+    """查询 → 规范化 token 集合（拉丁词 + CJK 字符二元组）"""
+    text = unicodedata.normalize('NFKC', query).lower()
+    for pattern, canonical in _SYNONYMS:
+        text = pattern.sub(canonical, text)
+    # 中文之间的空格不影响语义：「异步 编程」与「异步编程」等价
+    text = _CJK_GAP_RE.sub('', text)
+
+    tokens = set()
+    for run in _CJK_RUN_RE.findall(text):
+        for stopword in _CJK_STOPWORDS:
+            run = run.replace(stopword, ' ')
+        for piece in run.split():
+            if len(piece) == 1:
+                tokens.add(piece)
+            else:
+                tokens.update(piece[i:i + 2] for i in range(len(piece) - 1))
+    for word in _LATIN_TOKEN_RE.findall(_CJK_RUN_RE.sub(' ', text)):
+        if word not in _LATIN_STOPWORDS:
+            tokens.add(word)
+    return frozenset(tokens)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
 
 
 class QueryDeduplicator:
@@ -18,6 +104,7 @@ class QueryDeduplicator:
     查询重复检测器。
 
     - 按 agent 隔离缓存（OrderedDict 实现 LRU 淘汰）
+    - 精确匹配 + token 集合 Jaccard 近似匹配，命中时可取回已记录的结果
     - 连续回滚计数 + 上限保护
     """
 
@@ -25,38 +112,76 @@ class QueryDeduplicator:
         self,
         max_consecutive_rollbacks: int = DEFAULT_MAX_CONSECUTIVE_ROLLBACKS,
         max_cache_per_agent: int = DEFAULT_MAX_CACHE_PER_AGENT,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
     ):
         self._caches: Dict[str, OrderedDict] = {}
         self._max_rollbacks = max_consecutive_rollbacks
         self._max_cache = max_cache_per_agent
+        self._threshold = similarity_threshold
         self._consecutive_rollbacks = 0
         self._total_duplicates = 0
+        self._near_duplicates = 0
+        self._lock = threading.Lock()
 
     @staticmethod
     def _normalize(query: str) -> str:
         return query.strip().lower()
 
-    def is_duplicate(self, query: str, agent: str = "default") -> bool:
-        """检查查询是否重复（不记录）"""
+    def lookup(self, query: str, agent: str = "default") -> Optional[QueryMatch]:
+        """查找重复或近似重复的已记录查询（命中计入重复统计）"""
         key = self._normalize(query)
-        cache = self._caches.get(agent)
-        if cache and key in cache:
+        with self._lock:
+            cache = self._caches.get(agent)
+            if not cache:
+                return None
+            entry = cache.get(key)
+            if entry is not None:
+                cache.move_to_end(key)
+                self._total_duplicates += 1
+                logger.debug(f"[QueryDedup] 重复查询: agent={agent}, query={query!r}")
+                return QueryMatch(query=entry.query, similarity=1.0, results=entry.results)
+
+            if self._threshold >= 1.0:
+                return None
+            tokens = query_tokens(query)
+            if not tokens:
+                return None
+            best, best_score = None, 0.0
+            for candidate in cache.values():
+                # |A∩B|/|A∪B| ≤ min/max：长度差距过大时不可能达到阈值
+                sizes = sorted((len(tokens), len(candidate.tokens)))
+                if not sizes[0] or sizes[0] / sizes[1] < self._threshold:
+                    continue
+                score = jaccard(tokens, candidate.tokens)
+                if score > best_score:
+                    best, best_score = candidate, score
+            if best is None or best_score < self._threshold:
+                return None
             self._total_duplicates += 1
-            logger.debug(f"[QueryDedup] 重复查询: agent={agent}, query={query!r}")
-            return True
-        return False
+            self._near_duplicates += 1
+            logger.info(
+                f"[QueryDedup] 近似重复查询: agent={agent}, {query!r} ≈ {best.query!r} "
+                f"(jaccard={best_score:.2f})"
+            )
+            return QueryMatch(query=best.query, similarity=best_score, results=best.results)
+
+    def is_duplicate(self, query: str, agent: str = "default") -> bool:
+        """检查查询是否重复或近似重复（不记录）"""
+        return self.lookup(query, agent) is not None
 
-    def record(self, query: str, agent: str = "default") -> None:
-        """记录已执行的查询"""
+    def record(self, query: str, agent: str = "default", results: Any = None) -> None:
+        """记录已执行的查询；results 供后续近似重复查询复用"""
         key = self._normalize(query)
-        if agent not in self._caches:
-            self._caches[agent] = OrderedDict()
-        cache = self._caches[agent]
-        cache[key] = True
-        cache.move_to_end(key)
-        # LRU 淘汰
-        while len(cache) > self._max_cache:
-            cache.popitem(last=False)
+        entry = _QueryEntry(query=query, tokens=query_tokens(query), results=results)
+        with self._lock:
+            if agent not in self._caches:
+                self._caches[agent] = OrderedDict()
+            cache = self._caches[agent]
+            cache[key] = entry
+            cache.move_to_end(key)
+            # LRU 淘汰
+            while len(cache) > self._max_cache:
+                cache.popitem(last=False)
 
     def rollback(self) -> bool:
         """
@@ -90,6 +215,7 @@ class QueryDeduplicator:
         return {
             "total_queries": total_queries,
             "total_duplicates": self._total_duplicates,
+            "near_duplicates": self._near_duplicates,
             "consecutive_rollbacks": self._consecutive_rollbacks,
             "max_consecutive_rollbacks": self._max_rollbacks,
             "agents": len(self._caches),
@@ -97,6 +223,42 @@ class QueryDeduplicator:
 
     def clear(self) -> None:
         """清空所有缓存和计数"""
-        self._caches.clear()
-        self._consecutive_rollbacks = 0
-        self._total_duplicates = 0
+        with self._lock:
+            self._caches.clear()
+            self._consecutive_rollbacks = 0
+            self._total_duplicates = 0
+            self._near_duplicates = 0
+
+
+# ========== 任务级共享实例 ==========
+
+_task_deduplicators: "OrderedDict[str, QueryDeduplicator]" = OrderedDict()
+_task_lock = threading.Lock()
+
+
+def get_task_deduplicator(task_id: str) -> QueryDeduplicator:
+    """获取任务级共享的查询去重器（同一任务内各 Agent 共用）"""
+    with _task_lock:
+        dedup = _task_deduplicators.get(task_id)
+        if dedup is None:
+            dedup = QueryDeduplicator()
+            _task_deduplicators[task_id] = dedup
+            # 任务异常退出未释放时按 LRU 兜底回收
+            while len(_task_deduplicators) > DEFAULT_MAX_TASKS:
+                _task_deduplicators.popitem(last=False)
+        else:
+            _task_deduplicators.move_to_end(task_id)
+        return dedup
+
+
+def release_task_deduplicator(task_id: str) -> None:
+    """任务结束时释放去重器"""
+    with _task_lock:
+        dedup = _task_deduplicators.pop(task_id, None)
+    if dedup is not None:
+        stats = dedup.get_stats()
+        if stats["total_duplicates"]:
+            logger.info(
+                f"[QueryDedup] 任务 {task_id} 复用查询 {stats['total_duplicates']} 次 "
+                f"(近似 {stats['near_duplicates']})"
+            )